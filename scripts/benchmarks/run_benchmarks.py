@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+"""
+End-to-end benchmarks for the seven smart tools
+
+Drives SmartToolsMcpServer._route_tool_call for every tool against synthetic
+repositories with fake engines, reporting p50/p95 latency, peak RSS and
+event-loop lag per (tool, repo size). Results are compared against a stored
+baseline and the script exits non-zero when a metric regresses past tolerance.
+
+Usage:
+    python scripts/benchmarks/run_benchmarks.py
+    python scripts/benchmarks/run_benchmarks.py --sizes 10,1000 --tools understand,validate
+    python scripts/benchmarks/run_benchmarks.py --update-baseline
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'src'))
+os.environ.setdefault('GOOGLE_API_KEY', 'benchmark-key')
+
+from fake_engines import create_fake_engines  # noqa: E402
+from synthetic_repo import repo_path  # noqa: E402
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+TOOLS = ['understand', 'investigate', 'validate', 'collaborate', 'propose_tests', 'deploy', 'full_analysis']
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+
+# metric -> absolute slack added to the relative tolerance, so tiny values don't flap
+METRIC_SLACK = {
+    'p50_seconds': 0.05,
+    'p95_seconds': 0.1,
+    'loop_lag_p95_ms': 10.0,
+    'loop_lag_max_ms': 100.0,
+    'peak_rss_mb': 25.0,
+}
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..1)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(-(-q * len(ordered) // 1)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def current_rss_mb() -> float:
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    import resource
+    # ru_maxrss is KiB on Linux; it is a high-water mark, which is what we report anyway
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class LoopSampler:
+    """Background task measuring event-loop lag (sleep overshoot) and peak RSS"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags_ms: List[float] = []
+        self.peak_rss_mb = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags_ms.append(max(0.0, (loop.time() - start - self.interval) * 1000))
+            self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.peak_rss_mb = current_rss_mb()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+        self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+
+
+def tool_arguments(tool: str, files: List[str]) -> Dict:
+    """Representative MCP arguments for each tool"""
+    if tool == 'understand':
+        return {'files': files, 'question': 'How is request handling structured?'}
+    if tool == 'investigate':
+        return {'files': files, 'problem': 'Intermittent timeouts in the billing service', 'focus': 'performance'}
+    if tool == 'validate':
+        return {'files': files, 'validation_type': 'all', 'severity': 'medium'}
+    if tool == 'collaborate':
+        return {'content': 'Proposed change: cache normalized items per service instance.',
+                'file_path': files[0], 'discussion_type': 'review'}
+    if tool == 'propose_tests':
+        return {'files': files, 'test_type': 'unit'}
+    if tool == 'deploy':
+        return {'files': files, 'deployment_stage': 'production'}
+    return {'files': files, 'focus': 'all'}
+
+
+def list_files(root: str) -> List[str]:
+    found = []
+    for base, dirs, names in os.walk(root):
+        dirs.sort()
+        found.extend(os.path.join(base, n) for n in sorted(names) if not n.startswith('.'))
+    return found
+
+
+def build_server(time_scale: float, seed: int):
+    """SmartToolsMcpServer wired to fake engines instead of Gemini-backed ones"""
+    from smart_mcp_server import SmartToolsMcpServer
+    from smart_tools.understand_tool import UnderstandTool
+    from smart_tools.investigate_tool import InvestigateTool
+    from smart_tools.validate_tool import ValidateTool
+    from smart_tools.collaborate_tool import CollaborateTool
+    from smart_tools.propose_tests_tool import ProposeTestsTool
+    from smart_tools.deploy_tool import DeployTool
+    from smart_tools.full_analysis_tool import FullAnalysisTool
+
+    server = SmartToolsMcpServer()
+    server.engines = create_fake_engines(time_scale=time_scale, seed=seed)
+    server.smart_tools = {
+        'understand': UnderstandTool(server.engines),
+        'investigate': InvestigateTool(server.engines),
+        'validate': ValidateTool(server.engines),
+        'collaborate': CollaborateTool(server.engines),
+        'propose_tests': ProposeTestsTool(server.engines),
+        'deploy': DeployTool(server.engines)
+    }
+    server.smart_tools['full_analysis'] = FullAnalysisTool(server.engines, server.smart_tools)
+    return server
+
+
+async def run_scenario(server, tool: str, files: List[str], iterations: int) -> Dict:
+    """Run one tool `iterations` times and summarise its metrics"""
+    arguments = tool_arguments(tool, files)
+    latencies = []
+    failures = 0
+    with LoopSampler() as sampler:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            output = await server._route_tool_call(tool, dict(arguments))
+            latencies.append(time.perf_counter() - start)
+            if not output or 'failed' in output.split('\n', 1)[0].lower():
+                failures += 1
+
+    return {
+        'iterations': iterations,
+        'failures': failures,
+        'p50_seconds': round(percentile(latencies, 0.5), 4),
+        'p95_seconds': round(percentile(latencies, 0.95), 4),
+        'loop_lag_p95_ms': round(percentile(sampler.lags_ms, 0.95) or 0.0, 2),
+        'loop_lag_max_ms': round(max(sampler.lags_ms, default=0.0), 2),
+        'peak_rss_mb': round(sampler.peak_rss_mb, 1),
+    }
+
+
+async def run_benchmarks(sizes: List[int], tools: List[str], iterations: int,
+                         time_scale: float, seed: int, repo_dir: str) -> Dict[str, Dict]:
+    server = build_server(time_scale, seed)
+    results = {}
+    for size in sizes:
+        files = list_files(repo_path(repo_dir, size, seed))
+        for tool in tools:
+            key = f"{tool}@{size}"
+            results[key] = await run_scenario(server, tool, files, iterations)
+            r = results[key]
+            print(f"{key:<24} p50 {r['p50_seconds']:>8.3f}s  p95 {r['p95_seconds']:>8.3f}s  "
+                  f"lag p95 {r['loop_lag_p95_ms']:>7.1f}ms  max {r['loop_lag_max_ms']:>7.1f}ms  "
+                  f"rss {r['peak_rss_mb']:>7.1f}MB  failures {r['failures']}", flush=True)
+    return results
+
+
+def compare_to_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Regressions where a metric exceeds baseline * (1 + tolerance) + slack"""
+    regressions = []
+    for key, metrics in sorted(results.items()):
+        reference = baseline.get(key)
+        if not reference:
+            continue
+        for metric, slack in METRIC_SLACK.items():
+            if metric not in reference or metric not in metrics:
+                continue
+            limit = reference[metric] * (1 + tolerance) + slack
+            if metrics[metric] > limit:
+                regressions.append(f"{key} {metric}: {metrics[metric]} > {limit:.3f} "
+                                   f"(baseline {reference[metric]})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--sizes', default='10,1000,10000', help='Synthetic repo sizes in files')
+    parser.add_argument('--tools', default=','.join(TOOLS), help='Comma-separated tools to run')
+    parser.add_argument('--iterations', type=int, default=5, help='Calls per (tool, size)')
+    parser.add_argument('--time-scale', type=float, default=0.01,
+                        help='Multiplier on engine latency profiles (1.0 = production-like)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repo-dir', default=os.path.join(tempfile.gettempdir(), 'smart_tools_bench'),
+                        help='Where synthetic repos are generated and reused')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative regression')
+    parser.add_argument('--update-baseline', action='store_true', help='Write results as the new baseline')
+    parser.add_argument('--output', help='Also write results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.ERROR)
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    tools = [t for t in args.tools.split(',') if t]
+    unknown = set(tools) - set(TOOLS)
+    if unknown:
+        parser.error(f"unknown tools: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run_benchmarks(sizes, tools, args.iterations, args.time_scale, args.seed, args.repo_dir))
+    report = {
+        'meta': {'time_scale': args.time_scale, 'iterations': args.iterations, 'seed': args.seed,
+                 'python': platform.python_version(), 'machine': platform.machine()},
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        baseline = {'meta': report['meta'], 'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+            baseline['meta'] = report['meta']
+        baseline['results'].update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('meta', {}).get('time_scale') != args.time_scale:
+        print(f"Baseline was recorded with time scale {baseline['meta'].get('time_scale')}; "
+              f"rerun with --time-scale to compare")
+        return 2
+
+    regressions = compare_to_baseline(results, baseline.get('results', {}), args.tolerance)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nNo regressions against baseline")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
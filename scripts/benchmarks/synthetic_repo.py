@@ -0,0 +1,116 @@
+"""
+Deterministic synthetic repositories for benchmarks
+Generates a package tree of Python/JS sources, tests, configs, docs and logs
+with realistic file sizes, so smart tools see the same mix they meet in practice
+"""
+import os
+import random
+from typing import Optional
+
+PYTHON_TEMPLATE = '''"""
+Module {name} - generated for benchmarks
+"""
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class {cls}:
+    """Service handling {topic} requests"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or {{}}
+        self.cache: Dict[str, str] = {{}}
+
+{methods}
+'''
+
+METHOD_TEMPLATE = '''    def {name}(self, items: List[str]) -> List[str]:
+        """Process {topic} items"""
+        results = []
+        for item in items:
+            if item in self.cache:
+                results.append(self.cache[item])
+                continue
+            value = item.strip().lower()
+            self.cache[item] = value
+            results.append(value)
+        logger.debug("processed %d items", len(results))
+        return results
+
+'''
+
+JS_TEMPLATE = '''// {name} - generated for benchmarks
+export async function {func}(request) {{
+  const response = await fetch(`/api/{topic}/${{request.id}}`);
+  if (!response.ok) {{
+    throw new Error(`{topic} request failed: ${{response.status}}`);
+  }}
+  return response.json();
+}}
+'''
+
+TEST_TEMPLATE = '''import unittest
+
+from src.{package}.{module} import {cls}
+
+
+class Test{cls}(unittest.TestCase):
+    def test_process(self):
+        self.assertEqual({cls}().process_{topic}([" A "]), ["a"])
+'''
+
+TOPICS = ['billing', 'auth', 'search', 'orders', 'users', 'events', 'reports', 'inventory', 'payments', 'sessions']
+
+
+def generate_repo(root: str, file_count: int, seed: int = 0) -> str:
+    """Create (or reuse) a synthetic repository with `file_count` files under `root`"""
+    marker = os.path.join(root, '.synthetic_complete')
+    if os.path.exists(marker):
+        return root
+
+    rng = random.Random(seed)
+    kinds = ['py'] * 60 + ['js'] * 15 + ['test'] * 15 + ['config'] * 5 + ['doc'] * 4 + ['log'] * 1
+    for i in range(file_count):
+        kind = rng.choice(kinds) if i >= 5 else ['py', 'js', 'test', 'config', 'doc'][i]
+        topic = rng.choice(TOPICS)
+        package = f"pkg{i % max(1, file_count // 50)}"
+        module = f"{topic}_{i}"
+        cls = f"{topic.title()}Service{i}"
+
+        if kind == 'py':
+            methods = ''.join(METHOD_TEMPLATE.format(name=f"process_{topic}" if m == 0 else f"step_{m}", topic=topic)
+                              for m in range(rng.randint(2, 12)))
+            path = os.path.join(root, 'src', package, f"{module}.py")
+            content = PYTHON_TEMPLATE.format(name=module, cls=cls, topic=topic, methods=methods)
+        elif kind == 'js':
+            path = os.path.join(root, 'web', package, f"{module}.js")
+            content = JS_TEMPLATE.format(name=module, func=f"fetch{topic.title()}{i}", topic=topic) * rng.randint(1, 6)
+        elif kind == 'test':
+            path = os.path.join(root, 'tests', package, f"test_{module}.py")
+            content = TEST_TEMPLATE.format(package=package, module=module, cls=cls, topic=topic)
+        elif kind == 'config':
+            path = os.path.join(root, 'config', f"{module}.yaml")
+            content = f"service: {topic}\nreplicas: {rng.randint(1, 8)}\ntimeout_seconds: {rng.randint(5, 120)}\n"
+        elif kind == 'doc':
+            path = os.path.join(root, 'docs', f"{module}.md")
+            content = f"# {topic.title()}\n\n" + f"The {topic} service handles requests. " * rng.randint(5, 60) + "\n"
+        else:
+            path = os.path.join(root, 'logs', f"{module}.log")
+            content = ''.join(f"2026-01-01T00:00:{s % 60:02d} ERROR {topic} timeout after {rng.randint(1, 30)}s\n"
+                              for s in range(rng.randint(20, 200)))
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+
+    with open(marker, 'w') as f:
+        f.write(str(file_count))
+    return root
+
+
+def repo_path(base_dir: str, file_count: int, seed: int = 0, create: bool = True) -> Optional[str]:
+    """Path of the cached synthetic repo for a size, generating it on first use"""
+    root = os.path.join(base_dir, f"repo_{file_count}_{seed}")
+    return generate_repo(root, file_count, seed) if create else root
@@ -0,0 +1,304 @@
+"""
+Deterministic local stand-in for the Gemini REST API
+Serves generateContent / streamGenerateContent with configurable latency
+distributions, per-key RPM limits (429 + Retry-After), hung requests, server
+errors and response sizes, so the orchestration layer can be load tested
+without network access or quota
+
+Use in-process with GEMINI_TRANSPORT=fake, or run standalone and point
+GEMINI_TRANSPORT=http / GEMINI_API_BASE_URL at it:
+
+    python -m src.clients.fake_gemini_server --port 8765 --latency lognormal:1.0,0.5 --rpm flash=10
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Relative latency of each model family, applied on top of the configured distribution
+DEFAULT_MODEL_LATENCY_SCALE = {'pro': 3.0, 'flash': 1.0, 'flash-lite': 0.5}
+
+
+def model_family(model_id: str) -> str:
+    """Map a model id like 'gemini-2.5-flash-lite' to 'pro' / 'flash' / 'flash-lite'"""
+    if 'flash-lite' in model_id:
+        return 'flash-lite'
+    if 'flash' in model_id:
+        return 'flash'
+    if 'pro' in model_id:
+        return 'pro'
+    return model_id
+
+
+def parse_latency(spec: str) -> Tuple[str, Tuple[float, ...]]:
+    """
+    Parse a latency distribution spec (seconds)
+
+    fixed:S | uniform:LO,HI | lognormal:MEDIAN,SIGMA | exponential:MEAN
+    """
+    kind, _, raw = spec.partition(':')
+    kind = kind.strip().lower()
+    params = tuple(float(p) for p in raw.split(',') if p.strip())
+    expected = {'fixed': 1, 'uniform': 2, 'lognormal': 2, 'exponential': 1}
+    if kind not in expected or len(params) != expected[kind]:
+        raise ValueError(f"Invalid latency spec '{spec}'. Use fixed:S, uniform:LO,HI, "
+                         f"lognormal:MEDIAN,SIGMA or exponential:MEAN")
+    return kind, params
+
+
+def sample_latency(rng: random.Random, kind: str, params: Tuple[float, ...]) -> float:
+    """Draw one latency from a parsed distribution"""
+    if kind == 'fixed':
+        return params[0]
+    if kind == 'uniform':
+        return rng.uniform(params[0], params[1])
+    if kind == 'lognormal':
+        return rng.lognormvariate(math.log(params[0]), params[1]) if params[0] > 0 else 0.0
+    return rng.expovariate(1.0 / params[0]) if params[0] > 0 else 0.0
+
+
+@dataclass
+class FakeGeminiSettings:
+    """Behaviour of the fake backend"""
+    latency: str = "lognormal:1.0,0.5"
+    model_latency_scale: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_MODEL_LATENCY_SCALE))
+    seconds_per_1k_prompt_tokens: float = 0.01
+    rpm_limits: Dict[str, int] = field(default_factory=dict)  # per API key and model family
+    timeout_rate: float = 0.0  # share of requests that hang for hang_seconds
+    hang_seconds: float = 600.0
+    error_rate: float = 0.0  # share of requests answered with a 500
+    response_chars: int = 2000
+    stream_chunks: int = 4
+    seed: int = 0
+
+    @classmethod
+    def from_config(cls, smart_config) -> 'FakeGeminiSettings':
+        """Build settings from the FAKE_GEMINI_* fields of SmartToolsConfig"""
+        return cls(
+            latency=smart_config.fake_gemini_latency,
+            rpm_limits=dict(smart_config.fake_gemini_rpm_limits),
+            timeout_rate=smart_config.fake_gemini_timeout_rate,
+            error_rate=smart_config.fake_gemini_error_rate,
+            response_chars=smart_config.fake_gemini_response_chars,
+            seed=smart_config.fake_gemini_seed
+        )
+
+
+class FakeGeminiServer:
+    """
+    aiohttp application imitating the Gemini generateContent endpoints
+
+    Each request draws from its own RNG seeded with (seed, arrival number), so
+    a given request sequence always sees the same latencies and injected faults.
+    """
+
+    def __init__(self, settings: Optional[FakeGeminiSettings] = None, host: str = '127.0.0.1', port: int = 0):
+        self.settings = settings or FakeGeminiSettings()
+        self.host = host
+        self.port = port
+        self._latency = parse_latency(self.settings.latency)
+        self._requests = 0
+        self._windows: Dict[Tuple[str, str], Deque[float]] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self.base_url: Optional[str] = None
+        self.stats = {'requests': 0, 'ok': 0, 'rate_limited': 0, 'hung': 0, 'errors': 0, 'in_flight': 0,
+                      'max_in_flight': 0}
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/v1beta/models/{model}:generateContent', self._generate)
+        app.router.add_post('/v1beta/models/{model}:streamGenerateContent', self._stream)
+        app.router.add_get('/stats', self._stats)
+        return app
+
+    async def start(self) -> str:
+        """Start listening; returns the base URL to use as GEMINI_API_BASE_URL"""
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        port = self._runner.addresses[0][1] if self._runner.addresses else self.port
+        self.base_url = f"http://{self.host}:{port}/v1beta"
+        logger.info(f"Fake Gemini server listening on {self.base_url}")
+        return self.base_url
+
+    async def ensure_started(self) -> str:
+        """Start once (on first use) and return the base URL"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._runner is None:
+                await self.start()
+        return self.base_url
+
+    async def close(self):
+        """Stop listening"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _next_rng(self) -> random.Random:
+        self._requests += 1
+        return random.Random(f"{self.settings.seed}:{self._requests}")
+
+    def _check_rpm(self, api_key: str, family: str, now: float) -> Optional[float]:
+        """None if admitted, else seconds until the per-minute window frees a slot"""
+        limit = self.settings.rpm_limits.get(family)
+        if not limit:
+            return None
+        window = self._windows.setdefault((api_key, family), deque())
+        while window and now - window[0] >= 60.0:
+            window.popleft()
+        if len(window) >= limit:
+            return 60.0 - (now - window[0])
+        window.append(now)
+        return None
+
+    def _response_text(self, prompt: str, rng: random.Random) -> str:
+        digest = hashlib.sha256(prompt.encode('utf-8', errors='replace')).hexdigest()[:12]
+        sections = ["## Summary\n", "## Findings\n", "## Recommendations\n"]
+        filler = f"Fake analysis {digest} token{rng.randint(0, 9)}. "
+        body_chars = max(0, self.settings.response_chars - sum(map(len, sections)))
+        per_section = body_chars // len(sections)
+        return ''.join(s + (filler * (per_section // len(filler) + 1))[:per_section] + "\n" for s in sections)
+
+    async def _admit_request(self, request: web.Request):
+        """Shared fault injection; returns (prompt, latency, rng) or an error response"""
+        body = await request.json()
+        prompt = ''.join(part.get('text', '') for content in body.get('contents', [])
+                         for part in content.get('parts', []))
+        family = model_family(request.match_info['model'])
+        api_key = request.headers.get('x-goog-api-key', '')
+        rng = self._next_rng()
+        self.stats['requests'] += 1
+
+        retry_after = self._check_rpm(api_key, family, time.monotonic())
+        if retry_after is not None:
+            self.stats['rate_limited'] += 1
+            return web.json_response(
+                {'error': {'code': 429, 'status': 'RESOURCE_EXHAUSTED',
+                           'message': f"Resource has been exhausted (fake RPM limit for {family})"}},
+                status=429, headers={'Retry-After': str(max(1, math.ceil(retry_after)))}
+            )
+
+        roll = rng.random()
+        if roll < self.settings.timeout_rate:
+            self.stats['hung'] += 1
+            await asyncio.sleep(self.settings.hang_seconds)
+        elif roll < self.settings.timeout_rate + self.settings.error_rate:
+            self.stats['errors'] += 1
+            return web.json_response({'error': {'code': 500, 'status': 'INTERNAL', 'message': 'Fake internal error'}},
+                                     status=500)
+
+        latency = sample_latency(rng, *self._latency) * self.settings.model_latency_scale.get(family, 1.0)
+        latency += (len(prompt) / 4 / 1000) * self.settings.seconds_per_1k_prompt_tokens
+        return prompt, latency, rng
+
+    def _usage(self, prompt: str, text: str) -> Dict[str, int]:
+        prompt_tokens, output_tokens = len(prompt) // 4, len(text) // 4
+        return {'promptTokenCount': prompt_tokens, 'candidatesTokenCount': output_tokens,
+                'totalTokenCount': prompt_tokens + output_tokens}
+
+    def _enter(self):
+        self.stats['in_flight'] += 1
+        self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+
+    async def _generate(self, request: web.Request) -> web.StreamResponse:
+        self._enter()
+        try:
+            admitted = await self._admit_request(request)
+            if isinstance(admitted, web.StreamResponse):
+                return admitted
+            prompt, latency, rng = admitted
+            await asyncio.sleep(latency)
+            text = self._response_text(prompt, rng)
+            self.stats['ok'] += 1
+            return web.json_response({
+                'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP'}],
+                'usageMetadata': self._usage(prompt, text)
+            })
+        finally:
+            self.stats['in_flight'] -= 1
+
+    async def _stream(self, request: web.Request) -> web.StreamResponse:
+        self._enter()
+        try:
+            admitted = await self._admit_request(request)
+            if isinstance(admitted, web.StreamResponse):
+                return admitted
+            prompt, latency, rng = admitted
+            text = self._response_text(prompt, rng)
+            chunks = max(1, self.settings.stream_chunks)
+            size = math.ceil(len(text) / chunks)
+
+            response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+            await response.prepare(request)
+            for i in range(chunks):
+                await asyncio.sleep(latency / chunks)
+                payload = {'candidates': [{'content': {'role': 'model', 'parts': [{'text': text[i * size:(i + 1) * size]}]}}]}
+                if i == chunks - 1:
+                    payload['usageMetadata'] = self._usage(prompt, text)
+                await response.write(f"data: {json.dumps(payload)}\r\n\r\n".encode())
+            await response.write_eof()
+            self.stats['ok'] += 1
+            return response
+        finally:
+            self.stats['in_flight'] -= 1
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.get_stats())
+
+    def get_stats(self) -> Dict:
+        """Request, fault and concurrency counters"""
+        return dict(self.stats)
+
+
+def _parse_rpm(values) -> Dict[str, int]:
+    limits = {}
+    for value in values or []:
+        family, _, limit = value.partition('=')
+        limits[family.strip()] = int(limit)
+    return limits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Gemini API server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', default=FakeGeminiSettings.latency,
+                        help="fixed:S | uniform:LO,HI | lognormal:MEDIAN,SIGMA | exponential:MEAN")
+    parser.add_argument('--rpm', action='append', metavar='MODEL=LIMIT',
+                        help="Per-key requests per minute before 429, e.g. --rpm pro=5 --rpm flash=10")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="Share of requests that hang")
+    parser.add_argument('--hang-seconds', type=float, default=600.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument('--response-chars', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    settings = FakeGeminiSettings(
+        latency=args.latency, rpm_limits=_parse_rpm(args.rpm), timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds, error_rate=args.error_rate,
+        response_chars=args.response_chars, seed=args.seed
+    )
+    server = FakeGeminiServer(settings, host=args.host, port=args.port)
+    web.run_app(server.make_app(), host=args.host, port=args.port, access_log=None,
+                print=lambda _: print(f"Fake Gemini API on http://{args.host}:{args.port}/v1beta "
+                                      f"(GEMINI_TRANSPORT=http GEMINI_API_BASE_URL=...)"))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,13 +2,13 @@
 Gemini AI client with rate limiting and CPU throttling
 """
 import asyncio
-import json
 import logging
 import os
 import random
+import time
 from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 import google.generativeai as genai
 
 # Simplified imports for smart tools system
@@ -21,7 +21,17 @@ from ..config import (
     RATE_LIMIT_FILE,
     config  # Add config instance for new rate limiting settings
 )
+from ..services.concurrency_governor import get_concurrency_governor
 from ..services.cpu_throttler import CPUThrottler
+from ..services.progress_reporter import ProgressReporter, get_progress_reporter
+from ..services.rate_limit_store import RateLimitStore
+from .hedging import HedgeBudget
+from .key_pool import KeyLease, KeyPool, KeyShard
+from .latency_tracker import LatencyTracker
+from .model_router import ERROR, RATE_LIMITED, SUCCESS, TIMEOUT, ModelRouter
+from .single_flight import SingleFlight, prompt_key
+from .rate_limiter import AdmissionController, build_model_quotas
+from .token_budget import PromptBudgeter, TokenEstimator
 
 # Simple exception classes for smart tools
 class GeminiApiError(Exception):
@@ -60,8 +70,9 @@ class GeminiClient:
         if len(self.keys) == 1:
             logger.info("Single API key configuration - rate limit recovery disabled")
         else:
-            logger.info(f"Dual API key configuration - automatic rate limit recovery enabled")
+            logger.info(f"Dual API key configuration - requests load-balanced across keys")
         
+        # Preferred key for legacy callers only - requests are routed through the key pool
         self.current_key_index = 0
         genai.configure(api_key=self.keys[self.current_key_index])
         
@@ -74,6 +85,13 @@ class GeminiClient:
         self.config = smart_config or config
         self.cpu_throttler = CPUThrottler.get_instance(self.config)
         
+        # Event-driven supervision: learn about CPU pressure changes via callback instead of polling
+        self.supervision_mode = self.config.api_call_supervision
+        self._cpu_pressure_high = False
+        add_pressure_listener = getattr(self.cpu_throttler, 'add_pressure_listener', None)
+        if add_pressure_listener is not None:
+            add_pressure_listener(self._on_cpu_pressure_change)
+        
         # SECURITY: Use granular per-model locks for better concurrency
         # This allows rate limit updates for different models to proceed in parallel
         self._rate_limit_locks = defaultdict(asyncio.Lock)
@@ -81,14 +99,90 @@ class GeminiClient:
         logger.info(f"Timeout configuration: base_request={self.base_request_timeout}s, "
                    f"connect={self.connect_timeout}s, retries={self.timeout_retry_count}")
         
-        # Initialize models
-        self.models = {
-            name: genai.GenerativeModel(model_id) 
-            for name, model_id in GEMINI_MODELS.items()
-        }
+        # Transport selection - "http" avoids holding an executor thread per in-flight request
+        self.transport_mode = getattr(self.config, 'gemini_transport', 'sdk')
+        self.http_transport = None
+        self.fake_server = None
+        if self.transport_mode == 'fake':
+            # In-process stand-in backend, started on first request (needs a running loop)
+            from .fake_gemini_server import FakeGeminiServer, FakeGeminiSettings
+            self.fake_server = FakeGeminiServer(FakeGeminiSettings.from_config(self.config))
+        if self.transport_mode in ('http', 'fake'):
+            from .gemini_transport import GeminiHttpTransport
+            self.http_transport = GeminiHttpTransport(
+                base_url=self.config.gemini_api_base_url,
+                max_connections=self.config.gemini_http_max_connections,
+                connect_timeout=self.connect_timeout,
+                keepalive_timeout=self.config.gemini_http_keepalive_seconds
+            )
+        logger.info(f"Gemini transport: {self.transport_mode}")
+        
+        # Initialize one isolated set of models per API key - no process-global key switching
+        self.key_pool = KeyPool(
+            self.keys,
+            model_factory=self._make_key_models,
+            rate_limit_cooldown_seconds=self.config.key_rate_limit_cooldown_seconds
+        )
+        self.models = self.key_pool.shards[0].models
+        
+        # Proactive admission control - queue or reroute before a request would exceed quota
+        self.admission = None
+        if self.config.enable_admission_control:
+            self.admission = AdmissionController(
+                self.key_pool,
+                build_model_quotas(self.config.gemini_quota_tier, self.config.gemini_model_quotas),
+                max_queue_seconds=self.config.admission_max_queue_seconds
+            )
+        
+        # Identical concurrent prompts share one upstream call
+        self.single_flight = SingleFlight() if self.config.enable_request_coalescing else None
+        
+        # Local token estimate (calibrated per model from usage metadata) and prompt budget
+        self.token_estimator = TokenEstimator()
+        self.prompt_budgeter = None
+        if self.config.enable_prompt_budget:
+            self.prompt_budgeter = PromptBudgeter(
+                self.token_estimator,
+                max_prompt_tokens=self.config.max_prompt_tokens,
+                latency_budget_seconds=(self.config.prompt_latency_budget_seconds
+                                        if self.config.enable_prompt_latency_budget else None),
+                strategy=self.config.prompt_budget_strategy,
+                allow_tier_change=self.config.prompt_budget_allow_tier_change
+            )
+        
+        # Observed latency per model and prompt size; drives adaptive deadlines and hedging
+        self.latency_tracker = LatencyTracker(
+            min_samples=self.config.hedge_min_samples,
+            path=self.config.latency_model_path if self.config.enable_adaptive_timeouts else None
+        )
+        self.hedge_budget = None
+        if self.config.enable_request_hedging and len(self.keys) > 1:
+            self.hedge_budget = HedgeBudget(ratio=self.config.hedge_budget_ratio)
+        
+        # Live per-(model, key) outcomes reorder the fallback chain
+        self.model_router = None
+        if self.config.enable_model_router:
+            self.model_router = ModelRouter(
+                window_seconds=self.config.model_router_window_seconds,
+                rate_limit_threshold=self.config.model_router_rate_limit_threshold,
+                min_observations=self.config.model_router_min_observations
+            )
+        
+        # Persistent response cache - reruns on unchanged inputs skip the API entirely
+        self.response_cache = None
+        if self.config.enable_response_cache:
+            try:
+                from ..services.response_cache import get_response_cache
+                self.response_cache = get_response_cache(self.config)
+            except Exception as e:
+                logger.warning(f"Response cache unavailable, continuing without it: {e}")
         
         # Rate limiting tracking
         self.rate_limit_file = RATE_LIMIT_FILE
+        self.rate_limit_store = RateLimitStore(
+            self.rate_limit_file,
+            flush_interval_seconds=self.config.rate_limit_flush_interval_seconds
+        )
         self.rate_limits = self._load_rate_limits()
         
         # Clear any expired or corrupted rate limit blocks on startup
@@ -98,36 +192,51 @@ class GeminiClient:
         
         logger.info("Gemini client initialized")
     
-    def _load_rate_limits(self) -> Dict[str, Dict]:
-        """Load rate limit tracking from file"""
+    def _make_key_models(self, api_key: str) -> Dict[str, genai.GenerativeModel]:
+        """Create GenerativeModel instances bound to their own client for one API key"""
+        models = {
+            name: genai.GenerativeModel(model_id)
+            for name, model_id in GEMINI_MODELS.items()
+        }
+        if self.http_transport:
+            # The HTTP transport sends the key with each request
+            return models
+        
         try:
-            if os.path.exists(self.rate_limit_file):
-                with open(self.rate_limit_file, 'r') as f:
-                    data = json.load(f)
-                    # Reset daily counts if it's a new day
-                    today = datetime.now().strftime('%Y-%m-%d')
-                    for model in data:
-                        if data[model].get('date') != today:
-                            data[model] = {'date': today, 'count': 0, 'blocked_until': None}
-                    return data
+            from google.generativeai.client import _ClientManager
+            manager = _ClientManager()
+            manager.configure(api_key=api_key)
+            key_client = manager.make_client('generative')
+            for model in models.values():
+                model._client = key_client
         except Exception as e:
-            logger.warning(f"Could not load rate limits: {e}")
-        
-        # Default rate limits
+            logger.warning(f"Could not create isolated client for API key, using shared client: {e}")
+        return models
+    
+    def _load_rate_limits(self) -> Dict[str, Dict]:
+        """Load rate limit tracking from file into the in-memory ledger"""
+        data = self.rate_limit_store.load()
         today = datetime.now().strftime('%Y-%m-%d')
-        return {
-            'pro': {'date': today, 'count': 0, 'blocked_until': None},
-            'flash': {'date': today, 'count': 0, 'blocked_until': None}, 
-            'flash-lite': {'date': today, 'count': 0, 'blocked_until': None}
-        }
+        
+        if not data:
+            # Default rate limits
+            data.update({
+                'pro': {'date': today, 'count': 0, 'blocked_until': None},
+                'flash': {'date': today, 'count': 0, 'blocked_until': None}, 
+                'flash-lite': {'date': today, 'count': 0, 'blocked_until': None}
+            })
+            return data
+        
+        # Reset daily counts if it's a new day
+        for model in data:
+            if not isinstance(data[model], dict) or data[model].get('date') != today:
+                data[model] = {'date': today, 'count': 0, 'blocked_until': None}
+                self.rate_limit_store.mark_dirty()
+        return data
     
     def _save_rate_limits(self):
-        """Save rate limit tracking to file"""
-        try:
-            with open(self.rate_limit_file, 'w') as f:
-                json.dump(self.rate_limits, f, indent=2)
-        except Exception as e:
-            logger.warning(f"Could not save rate limits: {e}")
+        """Mark rate limit tracking changed - written behind, atomically, off the event loop"""
+        self.rate_limit_store.mark_dirty()
     
     def clear_rate_limit_blocks(self, force_clear: bool = False):
         """Clear expired or corrupted rate limit blocks"""
@@ -222,7 +331,7 @@ class GeminiClient:
                                        timeout: float, error_response = None) -> Tuple[str, str, int]:
         """Implement progressive backoff retry strategy
         
-        New strategy: Progressive delays + try both API keys at each backoff level!
+        New strategy: Progressive delays + try every API key shard at each backoff level!
         """
         retry_delays = config.progressive_backoff_seconds  # [10, 30, 60, 180, 300]
         
@@ -240,55 +349,52 @@ class GeminiClient:
             logger.info(f"Rate limit backoff: waiting {delay_seconds}s before retry {attempt + 1}/{len(retry_delays)}")
             await asyncio.sleep(delay_seconds)
             
-            # Try BOTH API keys at each backoff level
-            for key_index in range(len(self.keys)):
+            # Try every key shard with budget at each backoff level, least loaded first
+            tried = set()
+            while True:
+                lease = await self._admit(model_name, prompt, exclude=tried)
+                if lease is None:
+                    break
+                shard = lease.shard
+                tried.add(shard.index)
                 total_backoff_attempts += 1
                 
-                # Switch to the specific key for this attempt
-                original_key = self.current_key_index
-                self.current_key_index = key_index
-                genai.configure(api_key=self.keys[self.current_key_index])
-                
                 try:
-                    logger.info(f"Backoff attempt {total_backoff_attempts}: {model_name} with API key {self.current_key_index} after {delay_seconds}s delay")
-                    
-                    # CPU yield before heavy API operation
-                    if self.cpu_throttler:
-                        await self.cpu_throttler.yield_if_needed()
+                    logger.info(f"Backoff attempt {total_backoff_attempts}: {model_name} with API key {shard.index} after {delay_seconds}s delay")
                     
-                    model = self.models[model_name]
-                    response = await asyncio.wait_for(
-                        asyncio.to_thread(model.generate_content, prompt),
-                        timeout=timeout
-                    )
+                    with lease:
+                        # CPU yield before heavy API operation
+                        if self.cpu_throttler:
+                            await self.cpu_throttler.yield_if_needed()
+                        
+                        response = await asyncio.wait_for(
+                            self._dispatch_generate(shard, prompt, model_name),
+                            timeout=timeout
+                        )
                     
                     if response and response.text:
-                        logger.info(f"Backoff retry successful for {model_name} with key {self.current_key_index} after {delay_seconds}s delay")
+                        self.key_pool.record_success(shard, model_name)
+                        logger.info(f"Backoff retry successful for {model_name} with key {shard.index} after {delay_seconds}s delay")
                         return response.text, model_name, total_backoff_attempts + 1  # +1 for original attempt
                         
                 except Exception as e:
                     if self._is_rate_limit_error(str(e)):
-                        logger.debug(f"Key {self.current_key_index} still rate limited after {delay_seconds}s delay")
+                        logger.debug(f"Key {shard.index} still rate limited after {delay_seconds}s delay")
+                        self._record_key_rate_limit(shard, model_name)
                         # Try next key at this backoff level
                         continue
                     else:
-                        # Different error - switch back to original key and propagate
-                        self.current_key_index = original_key
-                        genai.configure(api_key=self.keys[self.current_key_index])
+                        # Different error - propagate
                         raise
-                
-                # Restore original key after trying this one
-                self.current_key_index = original_key
-                genai.configure(api_key=self.keys[self.current_key_index])
             
-            # If we get here, both keys failed at this backoff level
-            logger.debug(f"Both API keys still rate limited after {delay_seconds}s delay, trying longer delay")
+            # If we get here, every key failed at this backoff level
+            logger.debug(f"All API keys still rate limited after {delay_seconds}s delay, trying longer delay")
         
-        # All retries with both keys failed
-        logger.warning(f"All progressive backoff retries failed for {model_name} (tried {total_backoff_attempts} attempts with both keys)")
-        raise Exception(f"Model {model_name} still rate limited after {len(retry_delays)} backoff levels with both API keys")
+        # All retries with all keys failed
+        logger.warning(f"All progressive backoff retries failed for {model_name} (tried {total_backoff_attempts} attempts across {len(self.key_pool)} keys)")
+        raise Exception(f"Model {model_name} still rate limited after {len(retry_delays)} backoff levels with all API keys")
     
-    async def _record_rate_limit_hit(self, model_name: str, error_message: str):
+    async def _record_rate_limit_hit(self, model_name: str, error_message: str, key_index: Optional[int] = None):
         """Record rate limit hit for metrics only - no more aggressive blocking
         
         New strategy: Just log for metrics, minimal blocking for RPM only
@@ -327,6 +433,9 @@ class GeminiClient:
             # Increment counters for metrics
             model_data['rpm_hits'] = model_data.get('rpm_hits', 0) + 1
             model_data['rpd_hits'] = model_data.get('rpd_hits', 0) + 1
+            if key_index is not None:
+                key_hits = model_data.setdefault('key_hits', {})
+                key_hits[str(key_index)] = key_hits.get(str(key_index), 0) + 1
             
             # New strategy: Only minimal blocking for RPM limits, NO daily blocking
             if config.enable_pre_blocking and ('minute' in error_message.lower() or 'rpm' in error_message.lower()):
@@ -344,7 +453,9 @@ class GeminiClient:
             self._save_rate_limits()
     
     def select_available_model(self, preferred_models: List[str]) -> Optional[Tuple[str, genai.GenerativeModel]]:
-        """Select first available model from preferred list"""
+        """Select first available model from preferred list, demoting currently failing models"""
+        if self.model_router:
+            preferred_models = self.model_router.order(preferred_models)
         for model_name in preferred_models:
             if model_name in self.models and self._is_model_available(model_name):
                 logger.info(f"Selected model: {model_name}")
@@ -354,21 +465,152 @@ class GeminiClient:
         return 'flash-lite', self.models['flash-lite']
     
     def switch_api_key(self):
-        """Switch to next available API key"""
+        """Rotate the preferred key index (legacy - requests are load-balanced by the key pool)"""
         if len(self.keys) > 1:
             self.current_key_index = (self.current_key_index + 1) % len(self.keys)
-            genai.configure(api_key=self.keys[self.current_key_index])
-            logger.info(f"Switched to alternate API key index {self.current_key_index}")
+            logger.info(f"Switched preferred API key index to {self.current_key_index}")
         else:
             logger.warning("Only one API key available, cannot switch")
     
+    def get_key_pool_stats(self) -> List[Dict]:
+        """Get per-key load and rate limit statistics"""
+        return self.key_pool.get_stats()
+    
+    def get_admission_stats(self) -> Optional[Dict]:
+        """Get queueing/reroute statistics and remaining per-key budgets"""
+        return self.admission.get_stats() if self.admission else None
+    
+    async def _admit(self, model_name: str, prompt: str, exclude: Iterable[int] = ()) -> Optional[KeyLease]:
+        """
+        Reserve quota on the best key and lease it; None means reroute to another model
+        
+        The lease is taken in the same step as the selection, so concurrent requests
+        see each other's in-flight count. Callers release it once the call is done.
+        """
+        if self.admission is None:
+            return self.key_pool.reserve(model_name, exclude=exclude)
+        tokens = self.token_estimator.estimate(prompt, model_name)
+        shard = await self.admission.admit(model_name, tokens, exclude=exclude)
+        return self.key_pool.lease(shard) if shard is not None else None
+    
+    def _try_admit_other_key(self, model_name: str, prompt: str, shard: KeyShard) -> Optional[KeyLease]:
+        """Lease a different key for an immediate retry, if one has budget"""
+        if self.admission is None:
+            return self.key_pool.reserve(model_name, exclude={shard.index})
+        tokens = self.token_estimator.estimate(prompt, model_name)
+        other = self.admission.try_admit(model_name, tokens, exclude={shard.index})
+        return self.key_pool.lease(other) if other is not None else None
+    
+    def _record_key_rate_limit(self, shard: KeyShard, model_name: str):
+        """Put a key into cooldown and drain its request budget after a 429"""
+        self.key_pool.record_rate_limit(shard, model_name)
+        if self.admission is not None:
+            self.admission.record_rate_limit(shard, model_name)
+        # Engines turn failures into text, so the shared engine limit hears about 429s from here
+        governor = get_concurrency_governor()
+        if governor is not None:
+            governor.decrease(RATE_LIMITED)
+    
+    def get_coalescing_stats(self) -> Optional[Dict[str, int]]:
+        """Get counts of upstream executions vs coalesced duplicate requests"""
+        return self.single_flight.get_stats() if self.single_flight else None
+    
+    def get_response_cache_stats(self) -> Optional[Dict]:
+        """Get persistent response cache hit/miss and size statistics"""
+        return self.response_cache.get_stats() if self.response_cache else None
+    
+    def get_model_router_stats(self) -> Optional[Dict]:
+        """Get windowed success, 429 and latency stats per model and reorder counts"""
+        return self.model_router.get_stats() if self.model_router else None
+    
+    def get_hedging_stats(self) -> Optional[Dict]:
+        """Get hedge budget counters and observed latency percentiles"""
+        if self.hedge_budget is None:
+            return None
+        return {**self.hedge_budget.get_stats(), 'latency': self.latency_tracker.get_stats()}
+    
+    def get_token_budget_stats(self) -> Dict:
+        """Get budgeting decisions and estimated vs actual prompt tokens per model"""
+        if self.prompt_budgeter:
+            return self.prompt_budgeter.get_stats()
+        return {'models': self.token_estimator.get_stats()}
+    
     async def generate_content(self, prompt: str, model_name: str = "flash", 
                              timeout: float = None) -> Tuple[str, str, int]:
         """
+        Generate content, serving unchanged prompts from the response cache and
+        sharing one upstream call between identical concurrent requests
+        
+        Returns:
+            Tuple of (response_text, final_model_used, total_attempts) - attempts is 0 for cache hits
+        """
+        cache_key = None
+        if self.response_cache:
+            cache_key = self.response_cache.make_key(GEMINI_MODELS.get(model_name, model_name), prompt)
+            cached = await self.response_cache.aget(cache_key)
+            if cached is not None:
+                logger.debug(f"Response cache hit for {model_name} ({len(prompt)} chars)")
+                reporter = get_progress_reporter() if self.config.enable_streaming_responses else None
+                if reporter is not None:
+                    await reporter.section(f"Gemini {cached['model_used']} (cached)", cached['text'])
+                return cached['text'], cached['model_used'], 0
+        
+        if self.single_flight is None:
+            return await self._generate_and_store(prompt, model_name, timeout, cache_key)
+        return await self.single_flight.do(
+            prompt_key(model_name, prompt),
+            lambda: self._generate_and_store(prompt, model_name, timeout, cache_key)
+        )
+    
+    async def _generate_and_store(self, prompt: str, model_name: str, timeout: Optional[float],
+                                  cache_key: Optional[str]) -> Tuple[str, str, int]:
+        """Fit the prompt to its budget, call the API with fallback and cache successful responses"""
+        text, model_used, attempts, exact = await self._generate_within_budget(prompt, model_name, timeout)
+        # The cache key is the requested model and full prompt - only an answer to exactly that may be stored
+        if cache_key and text and exact:
+            await self.response_cache.aput(
+                cache_key, GEMINI_MODELS.get(model_name, model_name),
+                {'text': text, 'model_used': model_used}
+            )
+        return text, model_used, attempts
+    
+    async def _generate_within_budget(self, prompt: str, model_name: str,
+                                      timeout: Optional[float]) -> Tuple[str, str, int, bool]:
+        """
+        Apply the prompt budget plan - a faster tier, trimmed files or concurrent shards
+        
+        Returns:
+            Tuple of (response_text, final_model_used, total_attempts, exact) - exact is True only
+            when the full prompt was answered by the requested model with no failed part
+        """
+        def answered(text: str, used: str) -> bool:
+            return used == model_name and not text.startswith("Error:")
+        
+        if self.prompt_budgeter is None:
+            text, used, attempts = await self._generate_content_with_fallback(prompt, model_name, timeout)
+            return text, used, attempts, answered(text, used)
+        
+        plan = self.prompt_budgeter.plan(prompt, model_name)
+        degraded = plan.action in ("tier", "trim")
+        if len(plan.prompts) == 1:
+            text, used, attempts = await self._generate_content_with_fallback(plan.prompts[0], plan.model_name, timeout)
+            return text, used, attempts, not degraded and answered(text, used)
+        
+        results = await asyncio.gather(*[
+            self._generate_content_with_fallback(shard_prompt, plan.model_name, timeout)
+            for shard_prompt in plan.prompts
+        ])
+        sections = [f"## Part {i + 1} of {len(results)}\n\n{text}" for i, (text, _, _) in enumerate(results)]
+        exact = not degraded and all(answered(text, used) for text, used, _ in results)
+        return "\n\n".join(sections), results[0][1], sum(attempts for _, _, attempts in results), exact
+    
+    async def _generate_content_with_fallback(self, prompt: str, model_name: str = "flash",
+                                              timeout: float = None) -> Tuple[str, str, int]:
+        """
         Generate content using specified Gemini model with intelligent fallback
         
         New Strategy (User Preferred):
-        1. Try requested model with current API key
+        1. Wait briefly for quota budget on the best API key (reroute if none)
         2. On rate limit → Try OTHER API KEY first (if available)
         3. If other key also rate limited → Progressive backoff (10, 30, 60s...)
         4. If still failing → Fallback to cheaper model
@@ -377,9 +619,6 @@ class GeminiClient:
         Returns:
             Tuple of (response_text, final_model_used, total_attempts)
         """
-        if timeout is None:
-            timeout = self.base_request_timeout
-        
         # Simplified fallback strategy (cost-conscious for personal use)
         # Prevent automatic escalation to expensive Pro model
         if model_name == "pro":
@@ -391,6 +630,10 @@ class GeminiClient:
         else:
             fallback_models = ["flash", "flash-lite"]               # Default: avoid pro unless explicitly requested
         
+        # Models that have been 429ing or failing recently move to the end of the chain
+        if self.model_router:
+            fallback_models = self.model_router.order(fallback_models)
+        
         total_attempts = 0
         last_error = None
         
@@ -398,24 +641,33 @@ class GeminiClient:
         for current_model in fallback_models:
             if current_model not in self.models:
                 continue
-                
-            model = self.models[current_model]
             
             # Check if model is available (not blocked)
             if not self._is_model_available(current_model):
                 logger.info(f"Model {current_model} is rate limited, skipping to next model")
                 continue
             
+            # Wait briefly for quota on the best key, or reroute to the next model
+            lease = await self._admit(current_model, prompt)
+            if lease is None:
+                logger.info(f"No quota budget for {current_model} on any key, rerouting to next model")
+                last_error = f"{current_model} quota budget exhausted on all keys"
+                continue
+            shard = lease.shard
+            
+            attempt_timeout = timeout if timeout is not None else self._request_timeout(current_model, prompt)
+            
             try:
                 total_attempts += 1
-                logger.info(f"Attempt {total_attempts}: Trying {current_model} with API key {self.current_key_index}")
-                
-                # CPU yield before heavy API operation
-                if self.cpu_throttler:
-                    await self.cpu_throttler.yield_if_needed()
+                logger.info(f"Attempt {total_attempts}: Trying {current_model} with API key {shard.index}")
                 
-                # Make CPU-safe API call with monitoring
-                response = await self._cpu_safe_api_call(model, prompt, timeout, current_model)
+                with lease:
+                    # CPU yield before heavy API operation
+                    if self.cpu_throttler:
+                        await self.cpu_throttler.yield_if_needed()
+                    
+                    # Make CPU-safe API call with monitoring
+                    response = await self._cpu_safe_api_call(shard, prompt, attempt_timeout, current_model)
                 
                 # Success!
                 if current_model != model_name:
@@ -424,26 +676,29 @@ class GeminiClient:
                 
             except asyncio.TimeoutError:
                 logger.warning(f"Timeout for {current_model}")
-                last_error = f"Timeout after {timeout}s"
+                last_error = f"Timeout after {attempt_timeout:.0f}s"
                 continue
                 
             except Exception as e:
                 if self._is_rate_limit_error(str(e)):
-                    logger.warning(f"Rate limit hit for {current_model}")
-                    await self._record_rate_limit_hit(current_model, str(e))
+                    logger.warning(f"Rate limit hit for {current_model} on API key {shard.index}")
+                    await self._record_rate_limit_hit(current_model, str(e), shard.index)
+                    self._record_key_rate_limit(shard, current_model)
                     
                     # User's preferred strategy: Try other API key first
-                    if config.retry_other_key_first and len(self.keys) > 1:
+                    other_lease = (self._try_admit_other_key(current_model, prompt, shard)
+                                   if config.retry_other_key_first else None)
+                    if other_lease is not None:
+                        other_shard = other_lease.shard
                         logger.info("Trying other API key first...")
-                        original_key = self.current_key_index
-                        self.switch_api_key()
                         
                         try:
                             total_attempts += 1
-                            logger.info(f"Attempt {total_attempts}: {current_model} with alternate API key {self.current_key_index}")
+                            logger.info(f"Attempt {total_attempts}: {current_model} with alternate API key {other_shard.index}")
                             
                             # Use CPU-safe API call for alternate key attempts too
-                            response = await self._cpu_safe_api_call(model, prompt, timeout, current_model)
+                            with other_lease:
+                                response = await self._cpu_safe_api_call(other_shard, prompt, attempt_timeout, current_model)
                             
                             # Success with other key!
                             logger.info(f"Success with alternate API key for {current_model}")
@@ -452,9 +707,8 @@ class GeminiClient:
                         except Exception as e2:
                             if self._is_rate_limit_error(str(e2)):
                                 logger.info("Other API key also rate limited - using progressive backoff")
-                                # Switch back to original key for consistency
-                                self.current_key_index = original_key
-                                genai.configure(api_key=self.keys[self.current_key_index])
+                                await self._record_rate_limit_hit(current_model, str(e2), other_shard.index)
+                                self._record_key_rate_limit(other_shard, current_model)
                             else:
                                 # Different error with other key
                                 logger.error(f"API error with alternate key: {e2}")
@@ -465,7 +719,7 @@ class GeminiClient:
                     try:
                         logger.info(f"Applying progressive backoff for {current_model}")
                         response_text, used_model, backoff_attempts = await self._progressive_backoff_retry(
-                            prompt, current_model, timeout, e
+                            prompt, current_model, attempt_timeout, e
                         )
                         # Success after backoff!
                         total_attempts += backoff_attempts
@@ -488,16 +742,247 @@ class GeminiClient:
         logger.error(error_msg)
         return (f"Error: {error_msg}", model_name, total_attempts)
     
-    async def _cpu_safe_api_call(self, model, prompt: str, timeout: float, model_name: str):
+    def _request_timeout(self, model_name: str, prompt: str) -> float:
         """
-        Make API call with periodic CPU yielding during the wait.
-        Implements Gemini's recommended pattern with verification-based threading.
+        Deadline for one call - a high percentile of observed latency for this
+        model and prompt size, with headroom, or the flat base timeout until
+        enough calls in that size bucket have been seen
         """
-        # Create API task - model.generate_content is synchronous (verified)
-        api_task = asyncio.create_task(
-            asyncio.to_thread(model.generate_content, prompt)
+        if not self.config.enable_adaptive_timeouts:
+            return self.base_request_timeout
+        expected = self.latency_tracker.percentile(
+            model_name,
+            self.config.adaptive_timeout_percentile,
+            tokens=self.token_estimator.estimate(prompt, model_name),
+            min_samples=self.config.adaptive_timeout_min_samples,
+            fallback_to_model=False,
+            include_timeouts=True
         )
+        if expected is None:
+            return self.base_request_timeout
+        return min(max(expected * self.config.adaptive_timeout_multiplier,
+                       self.config.adaptive_timeout_min_seconds),
+                   self.config.adaptive_timeout_max_seconds)
+    
+    async def _dispatch_generate(self, shard: KeyShard, prompt: str, model_name: str):
+        """Send one generate request over the configured transport using a specific key shard"""
+        if self.fake_server is not None:
+            self.http_transport.base_url = await self.fake_server.ensure_started()
+        reporter = get_progress_reporter() if self.config.enable_streaming_responses else None
+        if reporter is not None:
+            return await self._dispatch_stream(shard, prompt, model_name, reporter)
+        if self.http_transport:
+            return await self.http_transport.generate_content(
+                GEMINI_MODELS[model_name], prompt, shard.api_key
+            )
+        # SDK mode - model.generate_content is synchronous (verified)
+        return await asyncio.to_thread(shard.models[model_name].generate_content, prompt)
+    
+    async def _dispatch_stream(self, shard: KeyShard, prompt: str, model_name: str,
+                               reporter: ProgressReporter):
+        """Stream a generate request, forwarding partial text to the progress reporter
+        
+        Returns a response with the full concatenated text, like a non-streamed call.
+        """
+        from .gemini_transport import GeminiResponse
+        
+        source = f"Gemini {model_name}"
+        text_parts = []
+        usage = {}
+        
+        if self.http_transport:
+            async for chunk in self.http_transport.stream_generate_content(
+                GEMINI_MODELS[model_name], prompt, shard.api_key
+            ):
+                text = chunk.text
+                text_parts.append(text)
+                usage = chunk.payload.get('usageMetadata', usage)
+                await reporter.stream_chunk(source, text)
+        else:
+            # SDK streaming iterator is blocking - drain it in a worker thread and hand chunks back
+            loop = asyncio.get_running_loop()
+            queue: asyncio.Queue = asyncio.Queue()
+            
+            def produce():
+                try:
+                    for chunk in shard.models[model_name].generate_content(prompt, stream=True):
+                        loop.call_soon_threadsafe(queue.put_nowait, ('chunk', chunk))
+                    loop.call_soon_threadsafe(queue.put_nowait, ('done', None))
+                except Exception as e:
+                    loop.call_soon_threadsafe(queue.put_nowait, ('error', e))
+            
+            producer = loop.run_in_executor(None, produce)
+            while True:
+                kind, item = await queue.get()
+                if kind == 'done':
+                    break
+                if kind == 'error':
+                    raise item
+                try:
+                    text = item.text
+                except ValueError:
+                    # Chunks without text parts (e.g. safety metadata only)
+                    text = ''
+                text_parts.append(text)
+                metadata = getattr(item, 'usage_metadata', None)
+                if metadata is not None:
+                    usage = {
+                        'promptTokenCount': getattr(metadata, 'prompt_token_count', 0),
+                        'candidatesTokenCount': getattr(metadata, 'candidates_token_count', 0),
+                        'totalTokenCount': getattr(metadata, 'total_token_count', 0)
+                    }
+                await reporter.stream_chunk(source, text)
+            await producer
         
+        await reporter.flush(source)
+        return GeminiResponse({
+            'candidates': [{'content': {'parts': [{'text': ''.join(text_parts)}]}}],
+            'usageMetadata': usage
+        })
+    
+    def _on_cpu_pressure_change(self, throttle_active: bool, cpu_percent: float):
+        """CPU throttler callback - invoked only when throttling turns on or off"""
+        self._cpu_pressure_high = throttle_active
+        logger.debug(f"CPU pressure {'high' if throttle_active else 'normal'} ({cpu_percent:.1f}%) - "
+                     f"API dispatch {'deferring' if throttle_active else 'resumed'}")
+    
+    async def _cpu_safe_api_call(self, shard: KeyShard, prompt: str, timeout: float, model_name: str):
+        """
+        Make API call with CPU-aware supervision.
+        "event" mode awaits the call under a single deadline; "poll" mode
+        wakes every api_call_check_interval_seconds to yield CPU.
+        Success and latency are credited to the key that answered, which is
+        the hedge's key when a hedged duplicate wins.
+        """
+        estimated_tokens = self.token_estimator.estimate(prompt, model_name)
+        start = time.monotonic()
+        try:
+            if self.supervision_mode == 'poll':
+                response = await self._supervise_api_call(shard, prompt, timeout, model_name)
+                answered_by, sent_at = shard, start
+            else:
+                response, answered_by, sent_at = await self._await_api_call(shard, prompt, timeout, model_name)
+        except asyncio.TimeoutError:
+            # Censored sample - the call took at least this long, so deadlines can only grow from it;
+            # kept out of the windows the hedge delay is read from
+            self.latency_tracker.record(model_name, timeout, tokens=estimated_tokens, timed_out=True)
+            self._record_route_outcome(model_name, shard, TIMEOUT)
+            raise
+        except Exception as e:
+            self._record_route_outcome(model_name, shard, RATE_LIMITED if self._is_rate_limit_error(str(e)) else ERROR)
+            raise
+        elapsed = time.monotonic() - sent_at
+        self.key_pool.record_success(answered_by, model_name)
+        self._record_route_outcome(model_name, answered_by, SUCCESS, elapsed)
+        self.latency_tracker.record(model_name, elapsed, tokens=estimated_tokens)
+        self._record_token_usage(model_name, prompt, estimated_tokens, response, elapsed)
+        return response
+    
+    def _record_route_outcome(self, model_name: str, shard: KeyShard, kind: str,
+                              latency: Optional[float] = None):
+        """Feed one attempt's outcome to the model router"""
+        if self.model_router:
+            self.model_router.record(model_name, shard.index, kind, latency)
+    
+    def _record_token_usage(self, model_name: str, prompt: str, estimated_tokens: int,
+                            response, elapsed_seconds: float):
+        """Record estimated vs actual prompt tokens, calibrating the estimator"""
+        metadata = getattr(response, 'usage_metadata', None)
+        actual_tokens = getattr(metadata, 'prompt_token_count', None) if metadata is not None else None
+        if not isinstance(actual_tokens, int):
+            actual_tokens = None
+        self.token_estimator.record(model_name, len(prompt), estimated_tokens, actual_tokens, elapsed_seconds)
+    
+    async def _await_api_call(self, shard: KeyShard, prompt: str, timeout: float, model_name: str):
+        """
+        Await the API call directly with one deadline; a timeout cancels the request
+        
+        Returns:
+            Tuple of (response, shard that answered, monotonic time its request was sent)
+        """
+        if self._cpu_pressure_high and self.cpu_throttler:
+            # Only pay for a yield when the throttler has told us CPU is under pressure
+            await self.cpu_throttler.yield_control()
+        
+        start = time.monotonic()
+        if self.hedge_budget is not None:
+            call = self._hedged_dispatch(shard, prompt, model_name)
+        else:
+            call = self._dispatch_generate(shard, prompt, model_name)
+        try:
+            result = await asyncio.wait_for(call, timeout=timeout)
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(f"API call to {model_name} timed out after {timeout}s")
+        return result if self.hedge_budget is not None else (result, shard, start)
+    
+    def _acquire_hedge_shard(self, model_name: str, prompt: str, shard: KeyShard) -> Optional[KeyLease]:
+        """Lease another key with quota for a duplicate request, if the hedge budget allows one"""
+        if not self.hedge_budget.can_hedge():
+            return None
+        other = self._try_admit_other_key(model_name, prompt, shard)
+        if other is not None:
+            self.hedge_budget.spend()
+        return other
+    
+    async def _hedged_dispatch(self, shard: KeyShard, prompt: str, model_name: str):
+        """
+        Dispatch, and if no response arrives within the model's observed hedge
+        percentile, send a duplicate on another key - the first success wins
+        and the loser is cancelled
+        
+        Returns:
+            Tuple of (response, shard that answered, monotonic time its request was sent)
+        """
+        start = time.monotonic()
+        self.hedge_budget.record_request()
+        hedge_after = self.latency_tracker.percentile(
+            model_name, self.config.hedge_percentile, tokens=self.token_estimator.estimate(prompt, model_name)
+        )
+        streaming = self.config.enable_streaming_responses and get_progress_reporter() is not None
+        if hedge_after is None or streaming:
+            # No latency history yet, or a duplicate would double the streamed output
+            return await self._dispatch_generate(shard, prompt, model_name), shard, start
+        
+        primary = asyncio.create_task(self._dispatch_generate(shard, prompt, model_name))
+        hedge = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if done:
+                return primary.result(), shard, start
+            
+            hedge_lease = self._acquire_hedge_shard(model_name, prompt, shard)
+            if hedge_lease is None:
+                return await primary, shard, start
+            hedge_shard = hedge_lease.shard
+            
+            logger.debug(f"{model_name} call on key {shard.index} exceeded p{int(self.config.hedge_percentile * 100)} "
+                         f"({hedge_after:.1f}s) - hedging on key {hedge_shard.index}")
+            with hedge_lease:
+                hedge_sent = time.monotonic()
+                hedge = asyncio.create_task(self._dispatch_generate(hedge_shard, prompt, model_name))
+                pending = {primary, hedge}
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None:
+                            if task is hedge:
+                                self.hedge_budget.record_win()
+                                return task.result(), hedge_shard, hedge_sent
+                            return task.result(), shard, start
+                        if task is hedge and self._is_rate_limit_error(str(task.exception())):
+                            self._record_key_rate_limit(hedge_shard, model_name)
+                # Both failed - surface the original key's error to the fallback logic
+                raise primary.exception()
+        finally:
+            for task in (primary, hedge):
+                if task is not None and not task.done():
+                    task.cancel()
+    
+    async def _supervise_api_call(self, shard: KeyShard, prompt: str, timeout: float, model_name: str):
+        """Poll the in-flight API task, yielding CPU between checks (legacy "poll" mode)"""
+        api_task = asyncio.create_task(
+            self._dispatch_generate(shard, prompt, model_name)
+        )
         check_interval = self.config.api_call_check_interval_seconds  # 500ms from config
         elapsed = 0.0
         yield_count = 0
@@ -541,21 +1026,38 @@ class GeminiClient:
     async def generate_summary(self, prompt: str, timeout: float = None) -> str:
         """Generate summary using flash-lite model (optimized for cost)"""
         try:
-            genai.configure(api_key=self.keys[self.current_key_index])
-            flash_lite_model = self.models["flash-lite"]
+            lease = await self._admit("flash-lite", prompt)
+            if lease is None:
+                # No flash-lite budget on any key - take the regular fallback chain rather than
+                # sending a request admission just refused
+                logger.info("No quota budget for flash-lite summary, using model fallback")
+                text, _, _ = await self._generate_content_with_fallback(prompt, "flash-lite", timeout)
+                if text.startswith("Error:"):
+                    return f"Summary generation failed: {text[len('Error:'):].strip()}"
+                return text
             
             if timeout is None:
-                timeout = self.base_request_timeout
+                timeout = self._request_timeout("flash-lite", prompt)
             
-            # CPU yield before API operation
-            if self.cpu_throttler:
-                await self.cpu_throttler.yield_if_needed()
-            
-            # Use CPU-safe API call for summary generation
-            response = await self._cpu_safe_api_call(flash_lite_model, prompt, timeout, "flash-lite")
+            with lease as shard:
+                # CPU yield before API operation
+                if self.cpu_throttler:
+                    await self.cpu_throttler.yield_if_needed()
+                
+                # Use CPU-safe API call for summary generation
+                response = await self._cpu_safe_api_call(shard, prompt, timeout, "flash-lite")
             
             return response.text
             
         except Exception as e:
             logger.error(f"Failed to generate summary: {e}")
-            return f"Summary generation failed: {str(e)}"
\ No newline at end of file
+            return f"Summary generation failed: {str(e)}"
+    
+    async def close(self):
+        """Flush rate limit state and the latency model, release transport resources (pooled HTTP session)"""
+        await self.rate_limit_store.aclose()
+        await self.latency_tracker.aclose()
+        if self.http_transport:
+            await self.http_transport.close()
+        if self.fake_server:
+            await self.fake_server.close()
@@ -0,0 +1,124 @@
+"""
+Async-native HTTP transport for the Gemini REST API
+Keeps a pooled keep-alive session so concurrent requests don't each hold a worker thread
+"""
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiHttpError(Exception):
+    """Non-2xx response from the Gemini REST API
+
+    The status code is kept in the message so the client's string-based
+    rate limit detection ('429', 'resource exhausted') keeps working.
+    """
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(f"{status} {message}")
+        self.status = status
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
+
+
+class GeminiResponse:
+    """Minimal response object mirroring the SDK's `.text` / `.usage_metadata` surface"""
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.payload = payload
+
+    @property
+    def text(self) -> str:
+        parts = []
+        for candidate in self.payload.get('candidates', [])[:1]:
+            for part in candidate.get('content', {}).get('parts', []):
+                if 'text' in part:
+                    parts.append(part['text'])
+        return ''.join(parts)
+
+    @property
+    def usage_metadata(self) -> SimpleNamespace:
+        usage = self.payload.get('usageMetadata', {})
+        return SimpleNamespace(
+            prompt_token_count=usage.get('promptTokenCount', 0),
+            candidates_token_count=usage.get('candidatesTokenCount', 0),
+            total_token_count=usage.get('totalTokenCount', 0)
+        )
+
+
+class GeminiHttpTransport:
+    """Non-blocking generateContent calls over a shared aiohttp session"""
+
+    def __init__(self, base_url: str, max_connections: int = 32,
+                 connect_timeout: float = 20.0, keepalive_timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.max_connections = max_connections
+        self.connect_timeout = connect_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Create the pooled session lazily, once per event loop"""
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            # Request deadlines are enforced by the caller; only bound the connect phase here
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.connect_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._session_loop = loop
+            logger.info(f"Gemini HTTP transport session opened: {self.base_url} "
+                        f"(max_connections={self.max_connections})")
+        return self._session
+
+    def _build_body(self, prompt: str) -> Dict[str, Any]:
+        return {'contents': [{'role': 'user', 'parts': [{'text': prompt}]}]}
+
+    async def generate_content(self, model_id: str, prompt: str, api_key: str) -> GeminiResponse:
+        """POST models/{model_id}:generateContent and return the parsed response"""
+        session = await self._get_session()
+        url = f"{self.base_url}/models/{model_id}:generateContent"
+
+        async with session.post(url, json=self._build_body(prompt),
+                                headers={'x-goog-api-key': api_key}) as response:
+            if response.status != 200:
+                message = await response.text()
+                raise GeminiHttpError(response.status, message[:500], dict(response.headers))
+            payload = await response.json(content_type=None)
+
+        return GeminiResponse(payload)
+
+    async def stream_generate_content(self, model_id: str, prompt: str,
+                                      api_key: str) -> AsyncIterator[GeminiResponse]:
+        """POST models/{model_id}:streamGenerateContent (SSE) and yield each partial response"""
+        session = await self._get_session()
+        url = f"{self.base_url}/models/{model_id}:streamGenerateContent"
+
+        async with session.post(url, params={'alt': 'sse'}, json=self._build_body(prompt),
+                                headers={'x-goog-api-key': api_key}) as response:
+            if response.status != 200:
+                message = await response.text()
+                raise GeminiHttpError(response.status, message[:500], dict(response.headers))
+            async for raw_line in response.content:
+                line = raw_line.decode('utf-8', errors='replace').strip()
+                if not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if not data or data == '[DONE]':
+                    continue
+                yield GeminiResponse(json.loads(data))
+
+    async def close(self):
+        """Close the pooled session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
@@ -0,0 +1,45 @@
+"""
+Hedged requests - a slow call is duplicated on another API key and the first response wins
+The hedge budget caps duplicates to a fraction of requests so average cost stays flat
+"""
+from typing import Dict
+
+
+class HedgeBudget:
+    """
+    Earns `ratio` of a hedge per request, up to `burst` saved hedges
+
+    With ratio=0.1 at most one request in ten (on average) may send a duplicate,
+    so hedging can never more than marginally increase quota use.
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: float = 2.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = 0.0
+        self.stats = {'requests': 0, 'hedges_sent': 0, 'hedge_wins': 0, 'denied': 0}
+
+    def record_request(self):
+        """Account for one (non-hedge) request"""
+        self.stats['requests'] += 1
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def can_hedge(self) -> bool:
+        """True if a hedge is affordable right now"""
+        if self.tokens >= 1.0:
+            return True
+        self.stats['denied'] += 1
+        return False
+
+    def spend(self):
+        """Pay for one hedge"""
+        self.tokens -= 1.0
+        self.stats['hedges_sent'] += 1
+
+    def record_win(self):
+        """The hedge answered before the original request"""
+        self.stats['hedge_wins'] += 1
+
+    def get_stats(self) -> Dict:
+        """Requests, hedges sent, hedges that won and hedges denied by the budget"""
+        return {**self.stats, 'available': round(self.tokens, 2)}
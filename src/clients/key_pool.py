@@ -0,0 +1,118 @@
+"""
+Key-sharded client pool for Gemini
+One isolated client per API key so both keys serve requests concurrently
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class KeyShard:
+    """One API key with its own model clients and load/rate-limit state"""
+    index: int
+    api_key: str
+    models: Dict[str, Any] = field(default_factory=dict)
+    in_flight: int = 0
+    total_requests: int = 0
+    rate_limit_hits: int = 0
+    # Per-model cooldowns after a 429 on this key (monotonic deadline)
+    cooldown_until: Dict[str, float] = field(default_factory=dict)
+
+    def is_cooling(self, model_name: str, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        return self.cooldown_until.get(model_name, 0.0) > now
+
+
+class KeyLease:
+    """
+    One in-flight request on a shard, counted from the moment the lease is taken
+
+    Taking the lease in the same step as selecting the shard means concurrent
+    requests see each other's load before any of them awaits. Release is
+    idempotent; the lease is also a context manager that releases on exit.
+    """
+
+    def __init__(self, shard: KeyShard):
+        self.shard = shard
+        self.released = False
+        shard.in_flight += 1
+        shard.total_requests += 1
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.shard.in_flight -= 1
+
+    def __enter__(self) -> KeyShard:
+        return self.shard
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+class KeyPool:
+    """
+    Load-balances requests across API keys
+
+    Selection prefers keys whose model isn't cooling down after a rate limit,
+    then the key with the fewest in-flight requests, then the least used key.
+    """
+
+    def __init__(self, keys: List[str], model_factory: Optional[Callable[[str], Dict[str, Any]]] = None,
+                 rate_limit_cooldown_seconds: float = 10.0):
+        self.rate_limit_cooldown_seconds = rate_limit_cooldown_seconds
+        self.shards = [
+            KeyShard(index=i, api_key=key, models=model_factory(key) if model_factory else {})
+            for i, key in enumerate(keys)
+        ]
+        logger.info(f"Key pool initialized with {len(self.shards)} key shard(s)")
+
+    def __len__(self) -> int:
+        return len(self.shards)
+
+    def select(self, model_name: str, exclude: Iterable[int] = ()) -> Optional[KeyShard]:
+        """Pick the best shard for a model, or None if every shard is excluded"""
+        excluded = set(exclude)
+        candidates = [s for s in self.shards if s.index not in excluded]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        return min(candidates, key=lambda s: (s.is_cooling(model_name, now), s.in_flight, s.total_requests, s.index))
+
+    def lease(self, shard: KeyShard) -> KeyLease:
+        """Count an in-flight request against a shard until the lease is released"""
+        return KeyLease(shard)
+
+    def reserve(self, model_name: str, exclude: Iterable[int] = ()) -> Optional[KeyLease]:
+        """Select the best shard and lease it in one step, or None if every shard is excluded"""
+        shard = self.select(model_name, exclude)
+        return KeyLease(shard) if shard is not None else None
+
+    def record_rate_limit(self, shard: KeyShard, model_name: str, cooldown_seconds: Optional[float] = None):
+        """Put a (key, model) pair into cooldown so new requests prefer the other key"""
+        cooldown = self.rate_limit_cooldown_seconds if cooldown_seconds is None else cooldown_seconds
+        shard.rate_limit_hits += 1
+        shard.cooldown_until[model_name] = time.monotonic() + cooldown
+        logger.info(f"Key {shard.index} cooling down for {model_name}: {cooldown:.0f}s")
+
+    def record_success(self, shard: KeyShard, model_name: str):
+        """Clear any cooldown once a key serves the model again"""
+        shard.cooldown_until.pop(model_name, None)
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        """Per-key load and rate-limit statistics"""
+        now = time.monotonic()
+        return [
+            {
+                'key_index': s.index,
+                'in_flight': s.in_flight,
+                'total_requests': s.total_requests,
+                'rate_limit_hits': s.rate_limit_hits,
+                'cooling_models': sorted(m for m in s.cooldown_until if s.is_cooling(m, now))
+            }
+            for s in self.shards
+        ]
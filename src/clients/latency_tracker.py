@@ -0,0 +1,202 @@
+"""
+Observed Gemini call latency per model and prompt-size bucket
+Sliding windows of recent call durations, queried by percentile, learned online
+and persisted so adaptive deadlines survive server restarts
+"""
+import asyncio
+import bisect
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (estimated prompt tokens) of the size buckets; the last bucket is open-ended
+SIZE_BUCKET_BOUNDS = (2_000, 8_000, 32_000, 128_000, 512_000)
+ALL_SIZES = "all"
+# Suffix of the windows holding the deadlines of timed-out calls
+TIMEOUTS = "timeouts"
+
+
+def size_bucket(tokens: Optional[int]) -> str:
+    """Bucket label for a prompt of `tokens` estimated tokens"""
+    if tokens is None:
+        return ALL_SIZES
+    index = bisect.bisect_left(SIZE_BUCKET_BOUNDS, tokens)
+    if index == len(SIZE_BUCKET_BOUNDS):
+        return f">{SIZE_BUCKET_BOUNDS[-1] // 1000}k"
+    return f"<={SIZE_BUCKET_BOUNDS[index] // 1000}k"
+
+
+def _nearest_rank(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class LatencyTracker:
+    """
+    Keeps recent call latencies per model, overall and per prompt-size bucket
+
+    Samples are grouped under "<model>|<bucket>" and "<model>|all". Timed-out
+    calls are kept apart under "<key>|timeouts": their deadline is only a lower
+    bound on the latency, so only deadline lookups (`include_timeouts`) read
+    them and the hedge percentile stays a true latency. With a `path`, the windows are loaded at startup and written back (atomically,
+    in a worker thread) a few seconds after they change. The snapshot is taken
+    on the event loop, so the worker never reads windows `record()` is mutating.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20, path: Optional[str] = None,
+                 save_delay_seconds: float = 10.0):
+        self.window = window
+        self.min_samples = min_samples
+        self.path = path
+        self.save_delay_seconds = save_delay_seconds
+        self._samples: Dict[str, Deque[float]] = {}
+        self._dirty = False
+        self._changes = 0
+        self._save_task: Optional[asyncio.Task] = None
+        self._io_lock = threading.Lock()
+        if path:
+            self.load()
+
+    def _window(self, key: str) -> Deque[float]:
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        return samples
+
+    def record(self, model_name: str, seconds: float, tokens: Optional[int] = None, timed_out: bool = False):
+        """Record the duration of one call (a timed-out call records its deadline with `timed_out`)"""
+        suffix = f"|{TIMEOUTS}" if timed_out else ""
+        self._window(f"{model_name}|{ALL_SIZES}{suffix}").append(seconds)
+        if tokens is not None:
+            self._window(f"{model_name}|{size_bucket(tokens)}{suffix}").append(seconds)
+        self._mark_dirty()
+
+    def percentile(self, model_name: str, q: float, tokens: Optional[int] = None,
+                   min_samples: Optional[int] = None, fallback_to_model: bool = True,
+                   include_timeouts: bool = False) -> Optional[float]:
+        """
+        Latency at quantile `q` (0-1) for the prompt's size bucket
+
+        Falls back to the model's overall window when the bucket is still
+        sparse (unless `fallback_to_model` is False); None until enough calls
+        were observed. Timed-out calls count (at their deadline) only with
+        `include_timeouts`.
+        """
+        min_samples = self.min_samples if min_samples is None else min_samples
+        keys = [f"{model_name}|{size_bucket(tokens)}"]
+        if tokens is not None and fallback_to_model:
+            keys.append(f"{model_name}|{ALL_SIZES}")
+        for key in keys:
+            samples = list(self._samples.get(key, ()))
+            if include_timeouts:
+                samples.extend(self._samples.get(f"{key}|{TIMEOUTS}", ()))
+            if samples and len(samples) >= min_samples:
+                return _nearest_rank(sorted(samples), q)
+        return None
+
+    def _mark_dirty(self):
+        if not self.path:
+            return
+        self._dirty = True
+        self._changes += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._save_task is None or self._save_task.done():
+            self._save_task = loop.create_task(self._save_later())
+
+    async def _save_later(self):
+        try:
+            await asyncio.sleep(self.save_delay_seconds)
+        except asyncio.CancelledError:
+            return
+        await self.asave()
+
+    def load(self):
+        """Load persisted windows; a missing or corrupted file starts empty"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read latency model from {self.path}: {e}")
+            return
+        for key, samples in data.get('samples', {}).items():
+            window = self._window(key)
+            window.extend(float(s) for s in samples[-self.window:])
+
+    def _snapshot(self) -> Dict:
+        return {'samples': {key: [round(s, 3) for s in samples] for key, samples in self._samples.items()}}
+
+    def _write(self, snapshot: Dict) -> bool:
+        """Write a snapshot with a write-temp-then-rename (blocking); False if it failed"""
+        with self._io_lock:
+            try:
+                directory = os.path.dirname(os.path.abspath(self.path))
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix='.latency.', suffix='.tmp', dir=directory)
+                try:
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump(snapshot, f)
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    try:
+                        os.unlink(tmp_path)
+                    except OSError:
+                        pass
+                    raise
+            except OSError as e:
+                logger.warning(f"Could not save latency model: {e}")
+                return False
+        return True
+
+    def _mark_saved(self, changes: int):
+        # Samples recorded while the write was in flight still need a save
+        if self._changes == changes:
+            self._dirty = False
+
+    def save(self):
+        """Write all windows now - for callers without a running event loop"""
+        if not self.path or not self._dirty:
+            return
+        changes = self._changes
+        if self._write(self._snapshot()):
+            self._mark_saved(changes)
+
+    async def asave(self):
+        """Snapshot the windows on the loop and write them in a worker thread"""
+        if not self.path or not self._dirty:
+            return
+        changes = self._changes
+        if await asyncio.to_thread(self._write, self._snapshot()):
+            self._mark_saved(changes)
+
+    async def aclose(self):
+        """Cancel the pending delayed save and save now"""
+        task, self._save_task = self._save_task, None
+        if task is not None and not task.done():
+            task.cancel()
+        await self.asave()
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Sample counts and p50/p90/p99 per model and size bucket"""
+        stats = {}
+        for key, samples in self._samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            stats[key] = {
+                'samples': len(ordered),
+                'p50': round(_nearest_rank(ordered, 0.5), 3),
+                'p90': round(_nearest_rank(ordered, 0.9), 3),
+                'p99': round(_nearest_rank(ordered, 0.99), 3)
+            }
+        return stats
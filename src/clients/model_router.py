@@ -0,0 +1,116 @@
+"""
+Model router - orders the fallback chain from live per-model outcomes
+Keeps a rolling window of success, 429 and latency per (model, API key) and
+demotes models that are currently rate limited or failing, so requests stop
+paying for a doomed attempt plus backoff on every call
+"""
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SUCCESS = "success"
+RATE_LIMITED = "rate_limited"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+
+@dataclass
+class Outcome:
+    """One finished API attempt"""
+    at: float
+    kind: str
+    latency: Optional[float] = None
+
+
+class ModelRouter:
+    """
+    Rolling per-(model, key) outcome windows used to reorder fallback chains
+
+    A model is demoted when, over the last `window_seconds`, its 429 rate
+    reaches `rate_limit_threshold` or its success rate drops below
+    `min_success_rate` (with at least `min_observations` attempts). Healthy
+    models keep their preferred order; demoted ones move to the end, best
+    success rate and lowest latency first, and are re-probed once their bad
+    outcomes age out of the window.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, rate_limit_threshold: float = 0.5,
+                 min_success_rate: float = 0.5, min_observations: int = 3):
+        self.window_seconds = window_seconds
+        self.rate_limit_threshold = rate_limit_threshold
+        self.min_success_rate = min_success_rate
+        self.min_observations = min_observations
+        self._outcomes: Dict[Tuple[str, int], Deque[Outcome]] = {}
+        self.stats = {'reordered': 0}
+
+    def record(self, model_name: str, key_index: int, kind: str,
+               latency: Optional[float] = None, now: Optional[float] = None):
+        """Record the outcome of one attempt on `model_name` with API key `key_index`"""
+        now = time.monotonic() if now is None else now
+        window = self._outcomes.setdefault((model_name, key_index), deque())
+        window.append(Outcome(now, kind, latency))
+        self._expire(window, now)
+
+    def _expire(self, window: Deque[Outcome], now: float):
+        while window and now - window[0].at > self.window_seconds:
+            window.popleft()
+
+    def model_stats(self, model_name: str, now: Optional[float] = None) -> Dict:
+        """Windowed attempts, success rate, 429 rate and median latency across keys"""
+        now = time.monotonic() if now is None else now
+        outcomes: List[Outcome] = []
+        for (model, _), window in self._outcomes.items():
+            if model == model_name:
+                self._expire(window, now)
+                outcomes.extend(window)
+
+        attempts = len(outcomes)
+        latencies = sorted(o.latency for o in outcomes if o.kind == SUCCESS and o.latency is not None)
+        return {
+            'attempts': attempts,
+            'success_rate': sum(o.kind == SUCCESS for o in outcomes) / attempts if attempts else None,
+            'rate_limit_rate': sum(o.kind == RATE_LIMITED for o in outcomes) / attempts if attempts else None,
+            'p50_latency': latencies[len(latencies) // 2] if latencies else None
+        }
+
+    def is_demoted(self, model_name: str, now: Optional[float] = None) -> bool:
+        """True if recent outcomes say this model should be tried last"""
+        stats = self.model_stats(model_name, now)
+        if stats['attempts'] < self.min_observations:
+            return False
+        return (stats['rate_limit_rate'] >= self.rate_limit_threshold
+                or stats['success_rate'] < self.min_success_rate)
+
+    def order(self, chain: List[str], now: Optional[float] = None) -> List[str]:
+        """Reorder a fallback chain: healthy models first (in preferred order), then demoted ones"""
+        healthy = [m for m in chain if not self.is_demoted(m, now)]
+        if len(healthy) == len(chain):
+            return list(chain)
+
+        def demoted_rank(model_name: str):
+            stats = self.model_stats(model_name, now)
+            return (-(stats['success_rate'] or 0.0), stats['p50_latency'] or float('inf'))
+
+        demoted = sorted((m for m in chain if m not in healthy), key=demoted_rank)
+        ordered = healthy + demoted
+        if ordered != list(chain):
+            self.stats['reordered'] += 1
+            logger.info(f"Model router: {' -> '.join(chain)} reordered to {' -> '.join(ordered)}")
+        return ordered
+
+    def get_stats(self) -> Dict:
+        """Per-model windowed stats plus how often a chain was reordered"""
+        now = time.monotonic()
+        models = sorted({model for model, _ in self._outcomes})
+        return {
+            **self.stats,
+            'models': {m: {**self.model_stats(m, now), 'demoted': self.is_demoted(m, now)} for m in models},
+            'keys': {
+                f"{model}|{key_index}": len(window)
+                for (model, key_index), window in sorted(self._outcomes.items())
+            }
+        }
@@ -0,0 +1,223 @@
+"""
+Proactive admission control for Gemini requests
+One set of token buckets (RPM, TPM, RPD) per (API key, model) so requests are
+queued briefly or rerouted before they hit the quota, instead of after a 429
+"""
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from .key_pool import KeyPool, KeyShard
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelQuota:
+    """Published per-key limits for one model"""
+    rpm: int
+    tpm: int
+    rpd: int
+
+
+# Per-key quotas by billing tier (https://ai.google.dev/gemini-api/docs/rate-limits)
+DEFAULT_MODEL_QUOTAS: Dict[str, Dict[str, ModelQuota]] = {
+    "free": {
+        "pro": ModelQuota(rpm=5, tpm=250_000, rpd=100),
+        "flash": ModelQuota(rpm=10, tpm=250_000, rpd=250),
+        "flash-lite": ModelQuota(rpm=15, tpm=250_000, rpd=1_000),
+    },
+    "tier1": {
+        "pro": ModelQuota(rpm=150, tpm=2_000_000, rpd=10_000),
+        "flash": ModelQuota(rpm=1_000, tpm=1_000_000, rpd=10_000),
+        "flash-lite": ModelQuota(rpm=4_000, tpm=4_000_000, rpd=100_000),
+    },
+}
+
+
+class TokenBucket:
+    """Continuously refilling token bucket"""
+
+    def __init__(self, capacity: float, refill_per_second: float, now: Optional[float] = None):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+            self.updated = now
+
+    def wait_time(self, amount: float, now: Optional[float] = None) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        if self.refill_per_second <= 0:
+            return math.inf
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float, now: Optional[float] = None):
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def drain(self, now: Optional[float] = None):
+        """Empty the bucket - the server told us the budget is exhausted"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class AdmissionController:
+    """
+    Schedules requests against per-(key, model) RPM/TPM/RPD budgets
+
+    `admit` picks the key that can serve the request soonest, waiting up to
+    `max_queue_seconds` for budget to refill. If no key has budget within that
+    window it returns None so the caller can reroute to another model.
+    """
+
+    def __init__(self, key_pool: KeyPool, quotas: Dict[str, ModelQuota],
+                 max_queue_seconds: float = 20.0):
+        self.key_pool = key_pool
+        self.quotas = quotas
+        self.max_queue_seconds = max_queue_seconds
+        self._buckets: Dict[Tuple[int, str], Tuple[TokenBucket, TokenBucket, TokenBucket]] = {}
+        self.stats = {
+            'admitted': 0,
+            'queued': 0,
+            'rerouted': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0
+        }
+        logger.info(f"Admission control enabled for models: {sorted(quotas)} "
+                    f"(max queue {max_queue_seconds}s)")
+
+    def _get_buckets(self, key_index: int, model_name: str) -> Optional[Tuple[TokenBucket, TokenBucket, TokenBucket]]:
+        quota = self.quotas.get(model_name)
+        if quota is None:
+            return None
+        buckets = self._buckets.get((key_index, model_name))
+        if buckets is None:
+            buckets = (
+                TokenBucket(quota.rpm, quota.rpm / 60.0),
+                TokenBucket(quota.tpm, quota.tpm / 60.0),
+                TokenBucket(quota.rpd, quota.rpd / 86_400.0),
+            )
+            self._buckets[(key_index, model_name)] = buckets
+        return buckets
+
+    def wait_time(self, shard: KeyShard, model_name: str, tokens: int, now: Optional[float] = None) -> float:
+        """Seconds until this key has budget for the request"""
+        buckets = self._get_buckets(shard.index, model_name)
+        if buckets is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        rpm, tpm, rpd = buckets
+        return max(rpm.wait_time(1, now), tpm.wait_time(tokens, now), rpd.wait_time(1, now))
+
+    def _consume(self, shard: KeyShard, model_name: str, tokens: int, now: float):
+        buckets = self._get_buckets(shard.index, model_name)
+        if buckets is None:
+            return
+        rpm, tpm, rpd = buckets
+        rpm.consume(1, now)
+        tpm.consume(tokens, now)
+        rpd.consume(1, now)
+
+    def _best_shard(self, model_name: str, tokens: int, exclude: Iterable[int]) -> Tuple[Optional[KeyShard], float]:
+        excluded = set(exclude)
+        now = time.monotonic()
+        best, best_key = None, None
+        for shard in self.key_pool.shards:
+            if shard.index in excluded:
+                continue
+            wait = self.wait_time(shard, model_name, tokens, now)
+            key = (wait, shard.is_cooling(model_name, now), shard.in_flight, shard.total_requests, shard.index)
+            if best_key is None or key < best_key:
+                best, best_key = shard, key
+        return best, (best_key[0] if best_key else math.inf)
+
+    def try_admit(self, model_name: str, tokens: int, exclude: Iterable[int] = ()) -> Optional[KeyShard]:
+        """Admit immediately on a key with budget, or return None without waiting"""
+        shard, wait = self._best_shard(model_name, tokens, exclude)
+        if shard is None or wait > 0:
+            return None
+        self._consume(shard, model_name, tokens, time.monotonic())
+        self.stats['admitted'] += 1
+        return shard
+
+    async def admit(self, model_name: str, tokens: int, exclude: Iterable[int] = ()) -> Optional[KeyShard]:
+        """Wait (bounded) for a key with budget and reserve it; None means reroute"""
+        exclude = set(exclude)
+        start = time.monotonic()
+        deadline = start + self.max_queue_seconds
+        queued = False
+
+        while True:
+            shard, wait = self._best_shard(model_name, tokens, exclude)
+            if shard is None:
+                return None
+            if wait <= 0:
+                # No await between the check and the reservation - safe on one event loop
+                self._consume(shard, model_name, tokens, time.monotonic())
+                waited = time.monotonic() - start
+                self.stats['admitted'] += 1
+                self.stats['total_wait_seconds'] += waited
+                self.stats['max_wait_seconds'] = max(self.stats['max_wait_seconds'], waited)
+                if queued:
+                    logger.debug(f"Admitted {model_name} on key {shard.index} after {waited:.2f}s queueing")
+                return shard
+            if time.monotonic() + wait > deadline:
+                self.stats['rerouted'] += 1
+                logger.info(f"No {model_name} budget within {self.max_queue_seconds}s on any key "
+                            f"(next slot in {wait:.1f}s)")
+                return None
+            if not queued:
+                queued = True
+                self.stats['queued'] += 1
+            await asyncio.sleep(wait)
+
+    def record_rate_limit(self, shard: KeyShard, model_name: str):
+        """A 429 means our view of the budget was optimistic - drain the request bucket"""
+        buckets = self._get_buckets(shard.index, model_name)
+        if buckets is not None:
+            buckets[0].drain()
+
+    def get_stats(self) -> Dict:
+        """Admission statistics plus remaining per-(key, model) budgets"""
+        now = time.monotonic()
+        budgets = {}
+        for (key_index, model_name), (rpm, tpm, rpd) in self._buckets.items():
+            rpm._refill(now)
+            tpm._refill(now)
+            rpd._refill(now)
+            budgets[f"{model_name}@key{key_index}"] = {
+                'requests_available': round(rpm.tokens, 2),
+                'tokens_available': int(tpm.tokens),
+                'daily_requests_available': int(rpd.tokens)
+            }
+        return {**self.stats, 'budgets': budgets}
+
+
+def build_model_quotas(tier: str, overrides: Optional[Dict[str, Dict[str, int]]] = None) -> Dict[str, ModelQuota]:
+    """Resolve quotas for a billing tier, applying any per-model overrides"""
+    base = DEFAULT_MODEL_QUOTAS.get(tier)
+    if base is None:
+        raise ValueError(f"Unknown Gemini quota tier '{tier}'. Must be one of: {sorted(DEFAULT_MODEL_QUOTAS)}")
+    quotas = {name: ModelQuota(q.rpm, q.tpm, q.rpd) for name, q in base.items()}
+    for model_name, values in (overrides or {}).items():
+        current = quotas.get(model_name, ModelQuota(rpm=0, tpm=0, rpd=0))
+        quotas[model_name] = ModelQuota(
+            rpm=int(values.get('rpm', current.rpm)),
+            tpm=int(values.get('tpm', current.tpm)),
+            rpd=int(values.get('rpd', current.rpd))
+        )
+    return quotas
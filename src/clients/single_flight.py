@@ -0,0 +1,74 @@
+"""
+Single-flight coalescing of identical in-flight requests
+Concurrent callers with the same key share one upstream call and its result
+"""
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+def prompt_key(model_name: str, prompt: str) -> str:
+    """Coalescing key for a model + prompt pair"""
+    digest = hashlib.sha256(prompt.encode('utf-8', errors='replace')).hexdigest()
+    return f"{model_name}:{digest}"
+
+
+class _Flight:
+    """One shared upstream call and the number of callers waiting on it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution
+
+    The first caller (leader) starts the work as a task; later callers with the
+    same key await that task instead of starting their own. A caller being
+    cancelled does not cancel the shared call unless it was the last waiter.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.stats = {'executions': 0, 'coalesced': 0}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run factory() for this key, or join an identical call already in flight"""
+        flight = self._flights.get(key)
+        if flight is None or flight.task.done():
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task, k=key, f=flight: self._finish(k, f))
+            self.stats['executions'] += 1
+        else:
+            self.stats['coalesced'] += 1
+            logger.debug(f"Coalesced request onto in-flight call {str(key)[:24]} ({flight.waiters} waiting)")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _finish(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception retrieved - waiters re-raise it through shield()
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Execution and coalescing counters"""
+        return {**self.stats, 'in_flight': len(self._flights)}
@@ -0,0 +1,309 @@
+"""
+Local token estimation and prompt budgeting before dispatch
+Keeps oversized file corpora from running into request timeouts by switching to a
+faster model tier, splitting the files into shards, or trimming the least relevant files
+"""
+import logging
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Gemini 2.5 input context window (tokens)
+MODEL_CONTEXT_TOKENS = {
+    "pro": 1_048_576,
+    "flash": 1_048_576,
+    "flash-lite": 1_048_576,
+}
+
+# Starting points before calibration: characters per token and end-to-end prompt tokens per second
+DEFAULT_CHARS_PER_TOKEN = 3.6
+DEFAULT_PROMPT_TOKENS_PER_SECOND = {
+    "pro": 5_000,
+    "flash": 15_000,
+    "flash-lite": 30_000,
+}
+
+# Latency is fitted as a fixed overhead plus a per-token cost, and only once the recent
+# requests span enough prompt sizes to separate the two
+LATENCY_FIT_MIN_SAMPLES = 8
+LATENCY_FIT_MIN_SPAN_TOKENS = 20_000
+
+# Faster tiers to try when a prompt won't fit the latency budget of the requested model
+FASTER_TIERS = {
+    "pro": ["flash", "flash-lite"],
+    "flash": ["flash-lite"],
+    "flash-lite": [],
+}
+
+# Files that rarely matter for analysis - dropped first when trimming
+_LOW_RELEVANCE_PATTERNS = re.compile(
+    r"(\.lock$|lock\.json$|\.min\.(js|css)$|(^|[\\/])(node_modules|dist|build|vendor|\.venv|venv|__pycache__)[\\/]"
+    r"|\.(map|svg|csv|txt)$)",
+    re.IGNORECASE
+)
+_FILE_BLOCK = re.compile(r"^### File: (?P<path>[^\n]+)\n", re.MULTILINE)
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]{3,}")
+
+
+@dataclass
+class ModelCalibration:
+    """Per-model estimator state learned from actual usage"""
+    chars_per_token: float = DEFAULT_CHARS_PER_TOKEN
+    prompt_tokens_per_second: float = 10_000.0
+    base_seconds: float = 0.0
+    samples: int = 0
+    # (estimated, actual) prompt tokens for recent requests
+    history: Deque[Tuple[int, int]] = field(default_factory=lambda: deque(maxlen=200))
+    # (actual prompt tokens, elapsed seconds) for recent requests
+    latencies: Deque[Tuple[int, float]] = field(default_factory=lambda: deque(maxlen=200))
+
+
+class TokenEstimator:
+    """
+    Fast character-based token estimator, calibrated per model
+
+    Each observed (characters, actual prompt tokens) pair nudges the model's
+    chars-per-token ratio with an exponential moving average. Request latency is
+    modelled as base_seconds + tokens / prompt_tokens_per_second, least-squares
+    fitted over recent (tokens, elapsed) pairs: whole-call time of small prompts is
+    mostly fixed overhead and says little about how long a large prompt takes.
+    """
+
+    def __init__(self, smoothing: float = 0.2):
+        self.smoothing = smoothing
+        self._models: Dict[str, ModelCalibration] = {}
+
+    def _calibration(self, model_name: str) -> ModelCalibration:
+        calibration = self._models.get(model_name)
+        if calibration is None:
+            calibration = ModelCalibration(
+                prompt_tokens_per_second=DEFAULT_PROMPT_TOKENS_PER_SECOND.get(model_name, 10_000.0)
+            )
+            self._models[model_name] = calibration
+        return calibration
+
+    def estimate(self, text: str, model_name: str) -> int:
+        """Estimated prompt tokens for `text`"""
+        return max(1, int(len(text) / self._calibration(model_name).chars_per_token))
+
+    def estimate_seconds(self, tokens: int, model_name: str) -> float:
+        """Estimated end-to-end latency for a prompt of `tokens` tokens"""
+        calibration = self._calibration(model_name)
+        return calibration.base_seconds + tokens / calibration.prompt_tokens_per_second
+
+    def tokens_for_seconds(self, seconds: float, model_name: str) -> int:
+        """Largest prompt expected to complete within `seconds`"""
+        calibration = self._calibration(model_name)
+        return int(max(0.0, seconds - calibration.base_seconds) * calibration.prompt_tokens_per_second)
+
+    def record(self, model_name: str, prompt_chars: int, estimated_tokens: int,
+               actual_tokens: Optional[int], elapsed_seconds: Optional[float] = None):
+        """Record estimated vs actual prompt tokens (and latency) for one request"""
+        calibration = self._calibration(model_name)
+        if actual_tokens:
+            calibration.history.append((estimated_tokens, actual_tokens))
+            observed_ratio = prompt_chars / actual_tokens
+            calibration.chars_per_token += self.smoothing * (observed_ratio - calibration.chars_per_token)
+            calibration.samples += 1
+            if elapsed_seconds and elapsed_seconds > 0:
+                calibration.latencies.append((actual_tokens, elapsed_seconds))
+                self._fit_latency(calibration)
+        logger.debug(f"Token usage {model_name}: estimated={estimated_tokens}, actual={actual_tokens}")
+
+    @staticmethod
+    def _fit_latency(calibration: ModelCalibration):
+        """Refit overhead and per-token cost when recent prompt sizes vary enough to tell them apart"""
+        points = calibration.latencies
+        if len(points) < LATENCY_FIT_MIN_SAMPLES:
+            return
+        sizes = [tokens for tokens, _ in points]
+        if max(sizes) - min(sizes) < LATENCY_FIT_MIN_SPAN_TOKENS:
+            return
+
+        mean_tokens = sum(sizes) / len(points)
+        mean_seconds = sum(elapsed for _, elapsed in points) / len(points)
+        variance = sum((tokens - mean_tokens) ** 2 for tokens in sizes)
+        covariance = sum((tokens - mean_tokens) * (elapsed - mean_seconds) for tokens, elapsed in points)
+        seconds_per_token = covariance / variance
+        if seconds_per_token <= 0:
+            # Size explains none of the latency - keep the current model
+            return
+        calibration.prompt_tokens_per_second = 1.0 / seconds_per_token
+        calibration.base_seconds = max(0.0, mean_seconds - seconds_per_token * mean_tokens)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Calibration and estimate accuracy per model"""
+        stats = {}
+        for model_name, calibration in self._models.items():
+            errors = [abs(est - act) / act for est, act in calibration.history if act]
+            stats[model_name] = {
+                'chars_per_token': round(calibration.chars_per_token, 3),
+                'prompt_tokens_per_second': round(calibration.prompt_tokens_per_second, 1),
+                'base_seconds': round(calibration.base_seconds, 2),
+                'samples': calibration.samples,
+                'mean_abs_error_pct': round(100 * sum(errors) / len(errors), 1) if errors else None,
+                'recent': list(calibration.history)[-5:]
+            }
+        return stats
+
+
+@dataclass
+class PromptPlan:
+    """How a prompt will be sent: one or more prompts to one model"""
+    model_name: str
+    prompts: List[str]
+    estimated_tokens: int
+    budget_tokens: int
+    action: str = "none"  # none | tier | shard | trim
+    omitted_files: List[str] = field(default_factory=list)
+
+
+def split_file_blocks(prompt: str) -> Tuple[str, List[Tuple[str, str]], str]:
+    """Split a prompt into (head, [(path, block)], tail) around `### File:` blocks"""
+    matches = list(_FILE_BLOCK.finditer(prompt))
+    if not matches:
+        return prompt, [], ""
+
+    head = prompt[:matches[0].start()]
+    blocks = []
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(prompt)
+        blocks.append((match.group('path').strip(), prompt[match.start():end]))
+
+    # Text after the last closing code fence is instructions, not file content
+    last_path, last_block = blocks[-1]
+    fence_end = last_block.rfind("\n```")
+    if fence_end != -1:
+        cut = last_block.find("\n", fence_end + 4)
+        if cut != -1:
+            blocks[-1] = (last_path, last_block[:cut + 1])
+            return head, blocks, last_block[cut + 1:]
+    return head, blocks, ""
+
+
+def _relevance(path: str, block: str, keywords: set) -> float:
+    """Higher is more relevant: keyword overlap with the instructions, minus low-value file penalties"""
+    score = 0.0
+    if keywords:
+        lowered = block.lower()
+        score += sum(1 for word in keywords if word in lowered)
+        score += 3 * sum(1 for word in keywords if word in path.lower())
+    if _LOW_RELEVANCE_PATTERNS.search(path):
+        score -= 100
+    return score
+
+
+class PromptBudgeter:
+    """
+    Fits prompts to a token (and optionally latency) budget before dispatch
+
+    In order: send as-is if it fits; switch to a faster tier that fits; then
+    split file blocks into shards ("shard" strategy) or drop the least relevant
+    files ("trim" strategy).
+    """
+
+    def __init__(self, estimator: TokenEstimator, max_prompt_tokens: int = 400_000,
+                 latency_budget_seconds: Optional[float] = None, strategy: str = "trim",
+                 allow_tier_change: bool = True):
+        self.estimator = estimator
+        self.max_prompt_tokens = max_prompt_tokens
+        self.latency_budget_seconds = latency_budget_seconds
+        self.strategy = strategy
+        self.allow_tier_change = allow_tier_change
+        self.stats = {'planned': 0, 'tier_changes': 0, 'sharded': 0, 'trimmed': 0, 'omitted_files': 0}
+
+    def budget_for(self, model_name: str) -> int:
+        """Prompt token budget for a model (context, configured cap and latency budget if set)"""
+        budget = min(MODEL_CONTEXT_TOKENS.get(model_name, self.max_prompt_tokens), self.max_prompt_tokens)
+        if self.latency_budget_seconds is not None:
+            budget = min(budget, self.estimator.tokens_for_seconds(self.latency_budget_seconds, model_name))
+        return budget
+
+    def plan(self, prompt: str, model_name: str) -> PromptPlan:
+        """Decide model tier and prompt shape so each request fits its budget"""
+        self.stats['planned'] += 1
+        estimated = self.estimator.estimate(prompt, model_name)
+        budget = self.budget_for(model_name)
+        if estimated <= budget:
+            return PromptPlan(model_name, [prompt], estimated, budget)
+
+        if self.allow_tier_change:
+            for tier in FASTER_TIERS.get(model_name, []):
+                tier_estimate = self.estimator.estimate(prompt, tier)
+                tier_budget = self.budget_for(tier)
+                if tier_estimate <= tier_budget:
+                    self.stats['tier_changes'] += 1
+                    logger.info(f"Prompt ~{estimated} tokens exceeds {model_name} budget {budget}; "
+                                f"using {tier} (budget {tier_budget})")
+                    return PromptPlan(tier, [prompt], tier_estimate, tier_budget, action="tier")
+
+        head, blocks, tail = split_file_blocks(prompt)
+        if not blocks:
+            # Nothing structured to split - hard truncate as a last resort
+            keep_chars = int(budget * self.estimator._calibration(model_name).chars_per_token)
+            self.stats['trimmed'] += 1
+            logger.warning(f"Prompt ~{estimated} tokens exceeds budget {budget}; truncating to fit")
+            truncated = prompt[:keep_chars] + "\n\n[Truncated to fit token budget]"
+            return PromptPlan(model_name, [truncated], budget, budget, action="trim")
+
+        if self.strategy == "shard":
+            return self._shard(model_name, estimated, budget, head, blocks, tail)
+        return self._trim(model_name, estimated, budget, head, blocks, tail)
+
+    def _shard(self, model_name: str, estimated: int, budget: int, head: str,
+               blocks: List[Tuple[str, str]], tail: str) -> PromptPlan:
+        overhead = self.estimator.estimate(head + tail, model_name)
+        shard_budget = max(1, budget - overhead)
+        shards: List[List[str]] = [[]]
+        used = 0
+        for _, block in blocks:
+            size = self.estimator.estimate(block, model_name)
+            if shards[-1] and used + size > shard_budget:
+                shards.append([])
+                used = 0
+            shards[-1].append(block)
+            used += size
+
+        prompts = [
+            f"{head}{''.join(shard)}\n[Part {i + 1} of {len(shards)} of the files]\n{tail}"
+            for i, shard in enumerate(shards)
+        ]
+        self.stats['sharded'] += 1
+        logger.info(f"Prompt ~{estimated} tokens exceeds {model_name} budget {budget}; split into {len(prompts)} shards")
+        return PromptPlan(model_name, prompts, estimated, budget, action="shard")
+
+    def _trim(self, model_name: str, estimated: int, budget: int, head: str,
+              blocks: List[Tuple[str, str]], tail: str) -> PromptPlan:
+        keywords = {w.lower() for w in _WORD.findall(head + tail)}
+        ranked = sorted(
+            range(len(blocks)),
+            key=lambda i: (_relevance(blocks[i][0], blocks[i][1], keywords), -len(blocks[i][1]))
+        )
+        sizes = [self.estimator.estimate(block, model_name) for _, block in blocks]
+        total = self.estimator.estimate(head + tail, model_name) + sum(sizes) + 50
+        dropped = set()
+        for i in ranked:
+            if total <= budget or len(dropped) == len(blocks) - 1:
+                break
+            dropped.add(i)
+            total -= sizes[i]
+
+        omitted = [blocks[i][0] for i in sorted(dropped)]
+        kept = ''.join(block for i, (_, block) in enumerate(blocks) if i not in dropped)
+        note = (f"\n[Omitted {len(omitted)} less relevant files to fit the token budget: "
+                f"{', '.join(omitted[:20])}{' ...' if len(omitted) > 20 else ''}]\n") if omitted else ""
+        trimmed = f"{head}{kept}{note}{tail}"
+
+        self.stats['trimmed'] += 1
+        self.stats['omitted_files'] += len(omitted)
+        logger.info(f"Prompt ~{estimated} tokens exceeds {model_name} budget {budget}; "
+                    f"omitted {len(omitted)} of {len(blocks)} files")
+        return PromptPlan(model_name, [trimmed], self.estimator.estimate(trimmed, model_name), budget,
+                          action="trim", omitted_files=omitted)
+
+    def get_stats(self) -> Dict:
+        """Budgeting decisions plus estimator calibration"""
+        return {**self.stats, 'models': self.estimator.get_stats()}
@@ -28,7 +28,21 @@ class SmartToolsConfig(BaseSettings):
     gemini_request_timeout: float = Field(60.0, env="GEMINI_REQUEST_TIMEOUT")
     gemini_connect_timeout: float = Field(20.0, env="GEMINI_CONNECT_TIMEOUT")
     timeout_retry_count: int = Field(3, env="TIMEOUT_RETRY_COUNT")
-    
+
+    # Transport Configuration - "sdk" runs the blocking SDK call in a worker thread,
+    # "http" uses a pooled keep-alive aiohttp session with no thread per request,
+    # "fake" serves requests from an in-process stand-in (load testing without network or quota)
+    gemini_transport: str = Field("sdk", env="GEMINI_TRANSPORT")
+    gemini_api_base_url: str = Field("https://generativelanguage.googleapis.com/v1beta", env="GEMINI_API_BASE_URL")
+    gemini_http_max_connections: int = Field(32, env="GEMINI_HTTP_MAX_CONNECTIONS")
+    gemini_http_keepalive_seconds: float = Field(30.0, env="GEMINI_HTTP_KEEPALIVE_SECONDS")
+    fake_gemini_latency: str = Field("lognormal:1.0,0.5", env="FAKE_GEMINI_LATENCY")  # fixed:S | uniform:LO,HI | lognormal:MEDIAN,SIGMA | exponential:MEAN
+    fake_gemini_rpm_limits: Dict[str, int] = Field(default_factory=dict, env="FAKE_GEMINI_RPM_LIMITS")  # JSON, e.g. {"pro": 5}
+    fake_gemini_timeout_rate: float = Field(0.0, env="FAKE_GEMINI_TIMEOUT_RATE")
+    fake_gemini_error_rate: float = Field(0.0, env="FAKE_GEMINI_ERROR_RATE")
+    fake_gemini_response_chars: int = Field(2000, env="FAKE_GEMINI_RESPONSE_CHARS")
+    fake_gemini_seed: int = Field(0, env="FAKE_GEMINI_SEED")
+
     # Logging Configuration
     gemini_mcp_log_level: str = Field("INFO", env="GEMINI_MCP_LOG_LEVEL")
     
@@ -40,14 +54,57 @@ class SmartToolsConfig(BaseSettings):
     # CPU Performance Configuration - Unified timing for consistency
     file_scan_yield_frequency: int = Field(50, env="FILE_SCAN_YIELD_FREQUENCY")
     processing_yield_interval_ms: int = Field(100, env="PROCESSING_YIELD_INTERVAL_MS")
-    max_cpu_usage_percent: float = Field(80.0, env="MAX_CPU_USAGE_PERCENT")
+    max_cpu_usage_percent: float = Field(80.0, env="MAX_CPU_USAGE_PERCENT")  # Percent of our CPU quota, not of the host
+    cpu_accounting_mode: str = Field("auto", env="CPU_ACCOUNTING_MODE")  # auto, cgroup, process or host
     cpu_check_interval: int = Field(10, env="CPU_CHECK_INTERVAL")
     max_concurrent_reviews: int = Field(4, env="MAX_CONCURRENT_REVIEWS")
+    
+    # Event-loop lag monitor - feeds CPUThrottler alongside system CPU usage
+    enable_loop_monitor: bool = Field(True, env="ENABLE_LOOP_MONITOR")
+    loop_lag_sample_interval_ms: float = Field(50.0, env="LOOP_LAG_SAMPLE_INTERVAL_MS")
+    loop_lag_threshold_ms: float = Field(100.0, env="LOOP_LAG_THRESHOLD_MS")  # Smoothed lag above this activates throttling
+    loop_block_threshold_ms: float = Field(250.0, env="LOOP_BLOCK_THRESHOLD_MS")  # Stalls this long are logged with stack samples
+    
+    # Concurrency governor - process-wide AIMD limit on in-flight engine calls
+    enable_concurrency_governor: bool = Field(True, env="ENABLE_CONCURRENCY_GOVERNOR")
+    concurrency_initial_limit: int = Field(4, env="CONCURRENCY_INITIAL_LIMIT")
+    concurrency_min_limit: int = Field(1, env="CONCURRENCY_MIN_LIMIT")
+    concurrency_max_limit: int = Field(12, env="CONCURRENCY_MAX_LIMIT")
+    concurrency_decrease_factor: float = Field(0.7, env="CONCURRENCY_DECREASE_FACTOR")  # Multiplier on 429/timeout/slowdown/pressure
+    concurrency_latency_tolerance: float = Field(2.0, env="CONCURRENCY_LATENCY_TOLERANCE")  # Slower than this x an engine's average counts as congestion
+    concurrency_memory_high_percent: float = Field(85.0, env="CONCURRENCY_MEMORY_HIGH_PERCENT")
+    
+    # Process pool for CPU-bound post-processing (correlation analysis, issue extraction)
+    enable_process_pool: bool = Field(True, env="ENABLE_PROCESS_POOL")
+    process_pool_workers: int = Field(2, env="PROCESS_POOL_WORKERS")
+    process_pool_min_offload_chars: int = Field(20_000, env="PROCESS_POOL_MIN_OFFLOAD_CHARS")  # Smaller inputs run inline
+    
+    # Shared file content cache - tools' pre-population and engines' code collection read through it
+    enable_file_cache: bool = Field(True, env="ENABLE_FILE_CACHE")
+    file_cache_max_mb: float = Field(64.0, env="FILE_CACHE_MAX_MB")  # LRU budget in on-disk megabytes
+    file_mmap_threshold_mb: float = Field(1.0, env="FILE_MMAP_THRESHOLD_MB")  # Memory-map files at least this large
+    file_max_text_mb: float = Field(1.0, env="FILE_MAX_TEXT_MB")  # Decode at most this much (head + tail) of a mapped file
+    enable_file_watcher: bool = Field(False, env="ENABLE_FILE_WATCHER")  # Validate caches from change notifications
+    file_watch_backend: str = Field("auto", env="FILE_WATCH_BACKEND")  # "auto", "inotify" (Linux) or "poll"
+    file_watch_poll_interval: float = Field(2.0, env="FILE_WATCH_POLL_INTERVAL")  # Seconds between scans when polling
+    file_watch_max_dirs: int = Field(8192, env="FILE_WATCH_MAX_DIRS")  # Directories watched across all project roots
+    enable_incremental_analysis: bool = Field(False, env="ENABLE_INCREMENTAL_ANALYSIS")  # Reuse engine results for unchanged shards
+    incremental_shard_files: int = Field(25, env="INCREMENTAL_SHARD_FILES")  # Max files per cached shard
+    engine_result_store_max_mb: float = Field(32.0, env="ENGINE_RESULT_STORE_MAX_MB")  # In-memory budget for stored results
+    engine_result_store_ttl_seconds: float = Field(24 * 3600, env="ENGINE_RESULT_STORE_TTL_SECONDS")  # Stored result lifetime
+    hash_index_persist: bool = Field(True, env="HASH_INDEX_PERSIST")  # Save file content digests per project root
+    hash_index_dir: str = Field(str(PROJECT_ROOT / "cache" / "hash_index"), env="HASH_INDEX_DIR")
+    hash_index_workers: int = Field(4, env="HASH_INDEX_WORKERS")  # Threads hashing changed files in parallel
+    hash_index_max_entries: int = Field(200_000, env="HASH_INDEX_MAX_ENTRIES")  # Digests kept per project root
+    enable_engine_sharding: bool = Field(True, env="ENABLE_ENGINE_SHARDING")  # Map-reduce oversized file lists across parallel engine calls
+    engine_shard_max_tokens: int = Field(150_000, env="ENGINE_SHARD_MAX_TOKENS")  # Estimated file tokens per engine call
+    engine_shard_max_parallel: int = Field(4, env="ENGINE_SHARD_MAX_PARALLEL")  # Shards in flight per call (also capped by the governor)
     enable_streaming_responses: bool = Field(True, env="ENABLE_STREAMING_RESPONSES")
     
     # CPU Throttling - Additional unified parameters to resolve timing conflicts
     cpu_check_interval_seconds: float = Field(0.1, env="CPU_CHECK_INTERVAL_SECONDS")  # How often to check CPU
     api_call_check_interval_seconds: float = Field(0.5, env="API_CALL_CHECK_INTERVAL_SECONDS")  # API monitoring interval
+    api_call_supervision: str = Field("event", env="API_CALL_SUPERVISION")  # "event" (single deadline) or "poll" (legacy interval checks)
     
     # Rate Limiting Configuration - Inherit sophisticated settings
     enable_pre_blocking: bool = Field(False, env="ENABLE_PRE_BLOCKING")
@@ -55,10 +112,55 @@ class SmartToolsConfig(BaseSettings):
     progressive_backoff_seconds: List[int] = Field([10, 30], env="PROGRESSIVE_BACKOFF_SECONDS")
     retry_other_key_first: bool = Field(True, env="RETRY_OTHER_KEY_FIRST")
     enable_retry_after_header: bool = Field(True, env="ENABLE_RETRY_AFTER_HEADER")
+    key_rate_limit_cooldown_seconds: float = Field(10.0, env="KEY_RATE_LIMIT_COOLDOWN_SECONDS")  # Steer new requests off a 429'd key
+
+    # Admission Control - per-(key, model) RPM/TPM/RPD token buckets applied before each request
+    # Off by default: the quota tier can't be detected, and free-tier limits would throttle paid keys
+    enable_admission_control: bool = Field(False, env="ENABLE_ADMISSION_CONTROL")
+    gemini_quota_tier: str = Field("free", env="GEMINI_QUOTA_TIER")  # "free" or "tier1"
+    gemini_model_quotas: Dict[str, Dict[str, int]] = Field({}, env="GEMINI_MODEL_QUOTAS")  # e.g. {"pro": {"rpm": 10}}
+    admission_max_queue_seconds: float = Field(20.0, env="ADMISSION_MAX_QUEUE_SECONDS")  # Longer waits reroute to the next model
+    enable_request_coalescing: bool = Field(True, env="ENABLE_REQUEST_COALESCING")  # Share one call between identical concurrent prompts
+
+    # Response Cache - persistent SQLite store keyed by (model, prompt hash, params)
+    enable_response_cache: bool = Field(True, env="ENABLE_RESPONSE_CACHE")
+    response_cache_path: str = Field(str(PROJECT_ROOT / "cache" / "gemini_responses.sqlite3"), env="RESPONSE_CACHE_PATH")
+    response_cache_ttl_seconds: float = Field(7 * 24 * 3600, env="RESPONSE_CACHE_TTL_SECONDS")
+    response_cache_max_mb: int = Field(256, env="RESPONSE_CACHE_MAX_MB")
+    
+    # Prompt budgeting - fit oversized prompts to a token and latency budget before dispatch
+    enable_prompt_budget: bool = Field(True, env="ENABLE_PROMPT_BUDGET")
+    max_prompt_tokens: int = Field(400_000, env="MAX_PROMPT_TOKENS")
+    enable_prompt_latency_budget: bool = Field(False, env="ENABLE_PROMPT_LATENCY_BUDGET")  # Also cap prompts by predicted latency
+    prompt_latency_budget_seconds: float = Field(45.0, env="PROMPT_LATENCY_BUDGET_SECONDS")
+    prompt_budget_strategy: str = Field("trim", env="PROMPT_BUDGET_STRATEGY")  # "trim" (drop least relevant files) or "shard"
+    prompt_budget_allow_tier_change: bool = Field(True, env="PROMPT_BUDGET_ALLOW_TIER_CHANGE")
+    
+    # Hedged requests - duplicate a slow call on another API key, first response wins
+    enable_request_hedging: bool = Field(False, env="ENABLE_REQUEST_HEDGING")
+    hedge_percentile: float = Field(0.9, env="HEDGE_PERCENTILE")  # Hedge after this quantile of observed latency
+    hedge_budget_ratio: float = Field(0.1, env="HEDGE_BUDGET_RATIO")  # Max hedges per request, on average
+    hedge_min_samples: int = Field(20, env="HEDGE_MIN_SAMPLES")  # Observed calls needed before hedging a model
+    
+    # Adaptive timeouts - per-model deadlines learned from latency by prompt size
+    enable_adaptive_timeouts: bool = Field(True, env="ENABLE_ADAPTIVE_TIMEOUTS")
+    adaptive_timeout_percentile: float = Field(0.99, env="ADAPTIVE_TIMEOUT_PERCENTILE")
+    adaptive_timeout_multiplier: float = Field(2.0, env="ADAPTIVE_TIMEOUT_MULTIPLIER")  # Headroom over the percentile
+    adaptive_timeout_min_seconds: float = Field(10.0, env="ADAPTIVE_TIMEOUT_MIN_SECONDS")
+    adaptive_timeout_max_seconds: float = Field(300.0, env="ADAPTIVE_TIMEOUT_MAX_SECONDS")
+    adaptive_timeout_min_samples: int = Field(20, env="ADAPTIVE_TIMEOUT_MIN_SAMPLES")  # Per size bucket, before leaving the flat timeout
+    latency_model_path: str = Field(str(PROJECT_ROOT / "cache" / "latency_model.json"), env="LATENCY_MODEL_PATH")
+    
+    # Model router - reorder the fallback chain from recent per-model outcomes
+    enable_model_router: bool = Field(True, env="ENABLE_MODEL_ROUTER")
+    model_router_window_seconds: float = Field(300.0, env="MODEL_ROUTER_WINDOW_SECONDS")
+    model_router_rate_limit_threshold: float = Field(0.5, env="MODEL_ROUTER_RATE_LIMIT_THRESHOLD")  # 429 share that demotes a model
+    model_router_min_observations: int = Field(3, env="MODEL_ROUTER_MIN_OBSERVATIONS")
     
     # File Paths
     logs_dir: str = str(PROJECT_ROOT / "logs")
     rate_limit_file: str = str(PROJECT_ROOT / "gemini_rate_limits.json")
+    rate_limit_flush_interval_seconds: float = Field(5.0, env="RATE_LIMIT_FLUSH_INTERVAL_SECONDS")  # Write-behind delay for rate limit state
     session_log_file: str = str(PROJECT_ROOT / "logs" / "dialogue_sessions.json")
     
     @validator('google_api_key', 'google_api_key2', pre=True)
@@ -81,6 +183,61 @@ class SmartToolsConfig(BaseSettings):
             raise ValueError("Routing confidence threshold must be between 0.0 and 1.0")
         return v
     
+    @validator('gemini_transport')
+    def validate_transport(cls, v):
+        """Validate the Gemini transport mode"""
+        valid_transports = ['sdk', 'http', 'fake']
+        if v.lower() not in valid_transports:
+            raise ValueError(f"Invalid Gemini transport. Must be one of: {valid_transports}")
+        return v.lower()
+
+    @validator('prompt_budget_strategy')
+    def validate_prompt_budget_strategy(cls, v):
+        """Validate the prompt budget strategy"""
+        valid_strategies = ['trim', 'shard']
+        if v.lower() not in valid_strategies:
+            raise ValueError(f"Invalid prompt budget strategy. Must be one of: {valid_strategies}")
+        return v.lower()
+    
+    @validator('api_call_supervision')
+    def validate_api_call_supervision(cls, v):
+        """Validate the API call supervision mode"""
+        valid_modes = ['event', 'poll']
+        if v.lower() not in valid_modes:
+            raise ValueError(f"Invalid API call supervision mode. Must be one of: {valid_modes}")
+        return v.lower()
+
+    @validator('gemini_quota_tier')
+    def validate_quota_tier(cls, v):
+        """Validate the Gemini quota tier"""
+        valid_tiers = ['free', 'tier1']
+        if v.lower() not in valid_tiers:
+            raise ValueError(f"Invalid Gemini quota tier. Must be one of: {valid_tiers}")
+        return v.lower()
+
+    @validator('concurrency_decrease_factor')
+    def validate_concurrency_decrease_factor(cls, v):
+        """Validate the multiplicative decrease keeps the limit shrinking"""
+        if not 0 < v < 1:
+            raise ValueError("Concurrency decrease factor must be between 0.0 and 1.0 (exclusive)")
+        return v
+
+    @validator('cpu_accounting_mode')
+    def validate_cpu_accounting_mode(cls, v):
+        """Validate CPU accounting mode"""
+        valid_modes = ['auto', 'cgroup', 'process', 'host']
+        if v.lower() not in valid_modes:
+            raise ValueError(f"Invalid CPU accounting mode. Must be one of: {valid_modes}")
+        return v.lower()
+
+    @validator('file_watch_backend')
+    def validate_file_watch_backend(cls, v):
+        """Validate file watch backend"""
+        valid_backends = ['auto', 'inotify', 'poll']
+        if v.lower() not in valid_backends:
+            raise ValueError(f"Invalid file watch backend. Must be one of: {valid_backends}")
+        return v.lower()
+
     @validator('max_cpu_usage_percent')
     def validate_cpu_usage_threshold(cls, v):
         """Validate CPU usage threshold is between 10 and 100"""
@@ -0,0 +1,249 @@
+"""
+Map-reduce sharding of large file sets across parallel engine calls
+A directory input expands to every code file beneath it; sending them all in one
+engine call builds a prompt that times out or gets truncated. Oversized path lists
+are split into token-bounded shards grouped by directory, each shard runs as its own
+engine call, and the shard reports are merged with duplicate findings removed.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Handle import for both module and script execution
+try:
+    from ..services.concurrency_governor import ERROR, SUCCESS, failure_outcome
+    from ..services.engine_result_store import dedupe_findings, describe_shard, is_cacheable_result
+except ImportError:
+    from services.concurrency_governor import ERROR, SUCCESS, failure_outcome
+    from services.engine_result_store import dedupe_findings, describe_shard, is_cacheable_result
+
+logger = logging.getLogger(__name__)
+
+# Path parameters whose files an engine reviews independently of each other
+SHARDABLE_PATH_PARAMS = ('paths', 'source_paths', 'config_paths', 'spec_paths', 'log_paths')
+
+# Engines that relate files to each other - a shard would miss cross-file findings
+CROSS_FILE_ENGINES = frozenset({
+    'analyze_code', 'analyze_database', 'analyze_test_coverage', 'map_dependencies',
+    'interface_inconsistency_detector'
+})
+
+# Same starting point as the prompt budgeter's estimator, plus the `### File:` header and fences
+CHARS_PER_TOKEN = 3.6
+FILE_OVERHEAD_TOKENS = 20
+
+
+def estimate_file_tokens(paths: List[str]) -> Dict[str, int]:
+    """Prompt tokens each file is expected to cost, from its size (blocking; call via asyncio.to_thread)"""
+    tokens = {}
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        tokens[path] = int(size / CHARS_PER_TOKEN) + FILE_OVERHEAD_TOKENS
+    return tokens
+
+
+def plan_token_shards(file_tokens: Dict[str, int], max_tokens: int) -> List[List[str]]:
+    """
+    Split files into shards of at most `max_tokens`, keeping each directory's files
+    together and packing small neighbouring directories into one shard
+
+    A directory too large for one shard is split in path order; a single file over
+    the budget gets a shard of its own and is left to the prompt budgeter.
+    """
+    by_dir: "OrderedDict[str, List[str]]" = OrderedDict()
+    for path in sorted(file_tokens):
+        by_dir.setdefault(os.path.dirname(path), []).append(path)
+
+    shards: List[List[str]] = []
+    current: List[str] = []
+    used = 0
+    for files in by_dir.values():
+        dir_tokens = sum(file_tokens[path] for path in files)
+        if current and used + dir_tokens > max_tokens:
+            shards.append(current)
+            current, used = [], 0
+        for path in files:
+            if current and used + file_tokens[path] > max_tokens:
+                shards.append(current)
+                current, used = [], 0
+            current.append(path)
+            used += file_tokens[path]
+    if current:
+        shards.append(current)
+    return shards
+
+
+def reduce_shard_results(engine_name: str, shards: List[List[str]], results: List[Any]) -> Tuple[Any, int]:
+    """
+    Merge shard reports into one, dropping list-item findings already reported by an
+    earlier shard. Returns (merged report, duplicates removed).
+
+    When every shard failed, the first failure is returned as-is so callers still
+    recognise the engine error.
+    """
+    failures = [not is_cacheable_result(result) for result in results]
+    if all(failures):
+        first = results[0]
+        return (f"Engine {engine_name} failed: {first}" if isinstance(first, BaseException) else first), 0
+
+    texts, removed = dedupe_findings([
+        f"Analysis failed: {str(result)[:200]}" if failed else str(result)
+        for result, failed in zip(results, failures)
+    ])
+    total = len(shards)
+    sections = [f"### Shard {i}/{total}: {describe_shard(files)}\n\n{text}"
+                for i, (files, text) in enumerate(zip(shards, texts), 1)]
+
+    file_count = sum(len(files) for files in shards)
+    summary = [f"## {engine_name}: {file_count} files analyzed in {total} parallel shards"]
+    if removed:
+        summary.append(f"{removed} duplicate findings reported by more than one shard were merged.")
+    if any(failures):
+        summary.append(f"⚠️ {sum(failures)} of {total} shards failed; their files were not analyzed.")
+    return "\n\n".join(["\n\n".join(summary)] + sections), removed
+
+
+class EngineSharder:
+    """
+    Runs an engine over an oversized file list shard by shard
+
+    Shards run concurrently, at most `max_parallel` at a time. With a concurrency
+    governor, the caller's own slot (held around the engine call) works through the
+    shards one after another, and further shards run alongside only on slots that
+    are free right now, so the fan-out stays inside the AIMD limit shared with every
+    other engine call and never waits on a slot while holding one.
+    Each shard's Gemini requests still pass through the client's admission control.
+    """
+
+    def __init__(self, max_shard_tokens: int = 150_000, max_parallel: int = 4, governor=None):
+        self.max_shard_tokens = max_shard_tokens
+        self.max_parallel = max_parallel
+        self.governor = governor
+        self.stats = {'sharded_calls': 0, 'shards': 0, 'failed_shards': 0, 'duplicates_removed': 0}
+
+    def shard_param(self, engine_name: str, kwargs: Dict[str, Any]) -> Optional[str]:
+        """The path parameter to shard on, or None when this call must not be split"""
+        if engine_name in CROSS_FILE_ENGINES:
+            return None
+        candidates = [param for param in SHARDABLE_PATH_PARAMS
+                      if isinstance(kwargs.get(param), list) and len(kwargs[param]) > 1]
+        return max(candidates, key=lambda param: len(kwargs[param])) if candidates else None
+
+    def parallelism(self) -> int:
+        limit = self.max_parallel
+        if self.governor is not None:
+            limit = min(limit, self.governor.limit)
+        return max(1, limit)
+
+    async def run(self, engine_name: str, kwargs: Dict[str, Any],
+                  call: Callable[[Dict[str, Any]], Awaitable[Any]]) -> Any:
+        """
+        Map `call` over token-bounded shards of the largest path parameter and reduce
+        the results; a call that fits the budget runs once, unchanged
+        """
+        param = self.shard_param(engine_name, kwargs)
+        if param is None:
+            return await call(kwargs)
+
+        file_tokens = await asyncio.to_thread(estimate_file_tokens, kwargs[param])
+        if sum(file_tokens.values()) <= self.max_shard_tokens:
+            return await call(kwargs)
+
+        shards = plan_token_shards(file_tokens, self.max_shard_tokens)
+        if len(shards) == 1:
+            return await call(kwargs)
+
+        parallel = min(self.parallelism(), len(shards))
+        logger.info(f"{engine_name}: splitting {len(file_tokens)} files (~{sum(file_tokens.values())} tokens) "
+                    f"into {len(shards)} shards, up to {parallel} at a time")
+        pending = deque(enumerate(shards))
+        results: List[Any] = [None] * len(shards)
+
+        async def run_next():
+            i, files = pending.popleft()
+            try:
+                results[i] = await call({**kwargs, param: files})
+            except Exception as e:
+                results[i] = e
+            return results[i]
+
+        async def caller_worker():
+            # Runs under the caller's slot, so every shard is eventually run even with no free slot
+            while pending:
+                await run_next()
+
+        async def slot_worker():
+            # Only ever takes a slot that is free right now - waiting for one while the
+            # caller holds its own can deadlock concurrent sharded calls
+            while pending:
+                owner = self.governor.try_acquire()
+                if owner is None:
+                    return
+                started = time.monotonic()
+                outcome = ERROR
+                try:
+                    result = await run_next()
+                    outcome = SUCCESS if is_cacheable_result(result) else failure_outcome(str(result))
+                except asyncio.CancelledError:
+                    outcome = None
+                    raise
+                finally:
+                    self.governor.release(owner, engine_name, time.monotonic() - started, outcome)
+
+        extra = [slot_worker() if self.governor is not None else caller_worker() for _ in range(parallel - 1)]
+        await asyncio.gather(caller_worker(), *extra)
+        merged, removed = reduce_shard_results(engine_name, shards, list(results))
+
+        self.stats['sharded_calls'] += 1
+        self.stats['shards'] += len(shards)
+        self.stats['failed_shards'] += sum(1 for result in results if not is_cacheable_result(result))
+        self.stats['duplicates_removed'] += removed
+        return merged
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'max_shard_tokens': self.max_shard_tokens, 'max_parallel': self.max_parallel}
+
+
+# Global sharder instance
+_global_sharder: Optional[EngineSharder] = None
+
+
+def get_engine_sharder(smart_config=None) -> Optional[EngineSharder]:
+    """Get the shared engine sharder, or None when engine sharding is disabled"""
+    global _global_sharder
+
+    if _global_sharder is None:
+        if smart_config is None:
+            try:
+                try:
+                    from ..config import config as smart_config
+                except ImportError:
+                    from config import config as smart_config
+            except Exception as e:
+                logger.warning(f"Engine sharding disabled - configuration unavailable: {e}")
+                return None
+        try:
+            from ..services.concurrency_governor import get_concurrency_governor
+        except ImportError:
+            from services.concurrency_governor import get_concurrency_governor
+
+        if smart_config.enable_engine_sharding:
+            _global_sharder = EngineSharder(
+                max_shard_tokens=smart_config.engine_shard_max_tokens,
+                max_parallel=smart_config.engine_shard_max_parallel,
+                governor=get_concurrency_governor()
+            )
+
+    return _global_sharder
+
+
+def reset_engine_sharder():
+    """Drop the shared sharder (tests and config reloads)"""
+    global _global_sharder
+    _global_sharder = None
@@ -12,7 +12,10 @@ import aiofiles
 # Handle import for both module and script execution
 try:
     from ..services.cpu_throttler import get_cpu_throttler
+    from ..services.file_content_cache import get_file_content_cache
+    from ..services.progress_reporter import report_progress, report_section
     from ..utils.path_utils import normalize_paths
+    from .engine_sharding import get_engine_sharder
 except ImportError:
     # Handle direct script execution
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -20,10 +23,16 @@ except ImportError:
     if parent_dir not in sys.path:
         sys.path.insert(0, parent_dir)
     from services.cpu_throttler import get_cpu_throttler
+    from services.file_content_cache import get_file_content_cache
+    from services.progress_reporter import report_progress, report_section
     from utils.path_utils import normalize_paths
+    from engines.engine_sharding import get_engine_sharder
 
 logger = logging.getLogger(__name__)
 
+# Characters of each engine result surfaced as a progress section before the full report
+PROGRESS_PREVIEW_CHARS = 2000
+
 
 class EngineWrapper:
     """
@@ -39,6 +48,9 @@ class EngineWrapper:
         
         # Get CPU throttler singleton instance
         self.cpu_throttler = get_cpu_throttler()
+        
+        # Splits oversized file lists into parallel shard calls (None when disabled)
+        self.sharder = get_engine_sharder()
     
     async def execute(self, **kwargs) -> Any:
         """
@@ -68,18 +80,22 @@ class EngineWrapper:
             smart_tools_root = os.path.dirname(os.path.dirname(os.path.dirname(current_file)))
             gemini_engines_path = os.path.join(smart_tools_root, "gemini-engines")
             
+            await report_progress(f"Running {self.engine_name}...")
+            
             # Use heavy operation monitor for CPU tracking
             if self.cpu_throttler:
                 async with self.cpu_throttler.monitor_heavy_operation(f"engine_{self.engine_name}"):
-                    result = await self._execute_engine_impl(adapted_kwargs, gemini_engines_path)
+                    result = await self._execute_sharded(adapted_kwargs, gemini_engines_path)
             else:
-                result = await self._execute_engine_impl(adapted_kwargs, gemini_engines_path)
+                result = await self._execute_sharded(adapted_kwargs, gemini_engines_path)
             
+            await report_section(f"{self.engine_name} complete", str(result)[:PROGRESS_PREVIEW_CHARS])
             return result
             
         except Exception as e:
             # Return error information in a consistent format
             logger.error(f"Engine {self.engine_name} failed: {str(e)}")
+            await report_progress(f"{self.engine_name} failed: {str(e)}")
             return f"Engine {self.engine_name} failed: {str(e)}"
         finally:
             # Restore original working directory
@@ -89,6 +105,15 @@ class EngineWrapper:
             if self.cpu_throttler:
                 await self.cpu_throttler.yield_if_needed()
     
+    async def _execute_sharded(self, adapted_kwargs: Dict[str, Any], gemini_engines_path: str) -> Any:
+        """Run the engine once, or map-reduce it over shards when the file list exceeds the shard budget"""
+        if self.sharder is None:
+            return await self._execute_engine_impl(adapted_kwargs, gemini_engines_path)
+        return await self.sharder.run(
+            self.engine_name, adapted_kwargs,
+            lambda shard_kwargs: self._execute_engine_impl(shard_kwargs, gemini_engines_path)
+        )
+    
     async def _execute_engine_impl(self, adapted_kwargs: Dict[str, Any], gemini_engines_path: str) -> Any:
         """Helper method to execute the engine with proper directory context"""
         import os
@@ -254,10 +279,16 @@ class EngineFactory:
                         # Check extension
                         if not extensions or any(path.suffix == ext for ext in extensions):
                             try:
-                                async with aiofiles.open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                                    content = await f.read()
-                                    collected_content.append(f"### File: {path}\n```\n{content}\n```\n")
-                                    processed_files.add(path_str)
+                                cache = get_file_content_cache()
+                                if cache:
+                                    content = await cache.read_text(path)
+                                    if content is None:
+                                        raise OSError("unreadable")
+                                else:
+                                    async with aiofiles.open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                                        content = await f.read()
+                                collected_content.append(f"### File: {path}\n```\n{content}\n```\n")
+                                processed_files.add(path_str)
                             except Exception as e:
                                 logger.warning(f"Could not read file {path}: {e}")
                 
@@ -315,6 +346,31 @@ class EngineFactory:
         tool_implementations._collect_code_from_paths = patched_collect_code_from_paths
         logger.info("Applied WindowsPath normalization monkey patch to GeminiToolImplementations")
     
+    @staticmethod
+    def _apply_file_cache_patch(tool_implementations: Any):
+        """
+        Route the engines' per-file reads through the shared file content cache
+        
+        The original code collection reads every file from disk for every engine
+        call; with the cache each file is read once per change, and the smart tools'
+        pre-population warms it before the engines run.
+        """
+        cache = get_file_content_cache()
+        if cache is None or not hasattr(tool_implementations, '_read_file_safe'):
+            return
+        
+        original_read = tool_implementations._read_file_safe
+        
+        async def cached_read_file_safe(file_path):
+            content = await cache.read_text(file_path)
+            if content is None:
+                # Let the original report the failure its own way
+                return await original_read(file_path)
+            return content
+        
+        tool_implementations._read_file_safe = cached_read_file_safe
+        logger.info("Routed engine file reads through the shared file content cache")
+    
     @staticmethod
     def create_engines_from_original(tool_implementations: Any, gemini_client: Any = None) -> Dict[str, EngineWrapper]:
         """
@@ -327,6 +383,7 @@ class EngineFactory:
         # CRITICAL: Apply monkey patch immediately to fix WindowsPath error
         # This will add the missing _collect_code_from_paths method if needed
         EngineFactory._apply_path_normalization_monkey_patch(tool_implementations)
+        EngineFactory._apply_file_cache_patch(tool_implementations)
         
         engines = {}
         
@@ -0,0 +1,340 @@
+"""
+Concurrency governor - one process-wide limit on in-flight engine calls
+Replaces per-tool semaphores and batch sizes with an AIMD limit that reacts to
+engine latency, 429s, timeouts, CPU pressure (via CPUThrottler) and memory
+(against the cgroup limit in containers), and shares slots fairly between
+concurrent tool calls
+"""
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+SUCCESS = "success"
+RATE_LIMITED = "rate_limited"
+TIMEOUT = "timeout"
+ERROR = "error"
+
+# Substrings of error text that mean upstream quota pushback rather than a plain failure
+_RATE_LIMIT_MARKERS = ('rate limit', 'ratelimit', '429', 'quota', 'exhausted', 'too many requests')
+
+# Set per tool call by the MCP server; engine tasks inherit it through asyncio's context copying
+_current_owner: ContextVar[Optional[str]] = ContextVar('concurrency_owner', default=None)
+
+
+def failure_outcome(message: str) -> str:
+    """Classify an engine error (raised or returned as text) as RATE_LIMITED, TIMEOUT or ERROR"""
+    text = str(message).lower()
+    if any(marker in text for marker in _RATE_LIMIT_MARKERS):
+        return RATE_LIMITED
+    if 'timeout' in text or 'timed out' in text:
+        return TIMEOUT
+    return ERROR
+
+
+@contextmanager
+def governor_scope(owner: str):
+    """Make `owner` the fairness group for engine calls made during a tool call"""
+    token = _current_owner.set(owner)
+    try:
+        yield owner
+    finally:
+        _current_owner.reset(token)
+
+
+class GovernorSlot:
+    """A held slot; callers may set `outcome` before it is released"""
+
+    def __init__(self, owner: str, engine_name: Optional[str]):
+        self.owner = owner
+        self.engine_name = engine_name
+        self.outcome: Optional[str] = None
+
+
+class ConcurrencyGovernor:
+    """
+    AIMD concurrency limit shared by every smart tool
+
+    The limit grows by roughly one slot per limit's worth of fast completions
+    while it is the binding constraint, and shrinks multiplicatively (at most
+    once per `decrease_cooldown_seconds`) on a 429, a timeout, a completion
+    slower than `latency_tolerance` x that engine's running average, CPU
+    throttling or memory above `memory_high_percent`.
+
+    When slots are contended the next free one goes to the waiting owner
+    (tool call) holding the fewest slots, FIFO within an owner, so one large
+    request can't starve the others.
+    """
+
+    def __init__(self, initial_limit: int = 4, min_limit: int = 1, max_limit: int = 12,
+                 decrease_factor: float = 0.7, latency_tolerance: float = 2.0,
+                 memory_high_percent: float = 85.0, decrease_cooldown_seconds: float = 5.0,
+                 latency_min_samples: int = 5, cpu_throttler=None, resource_accounting=None):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.memory_high_percent = memory_high_percent
+        self.decrease_cooldown_seconds = decrease_cooldown_seconds
+        self.latency_min_samples = latency_min_samples
+
+        self._in_flight: Dict[str, int] = {}
+        self._waiters: Dict[str, Deque[Tuple[int, asyncio.Future]]] = {}
+        self._sequence = itertools.count()
+        self._latency: Dict[str, Tuple[float, int]] = {}  # engine -> (running average, samples)
+        self._last_decrease = float('-inf')
+        self._memory_percent = 0.0
+        self._memory_checked = float('-inf')
+        self.stats = {
+            'acquired': 0, 'waited': 0, 'increases': 0, 'decreases': 0,
+            'decrease_reasons': {}
+        }
+
+        # Reads cgroup memory limits when given; host-wide memory otherwise
+        self.resource_accounting = resource_accounting
+        self.cpu_throttler = cpu_throttler
+        if cpu_throttler:
+            cpu_throttler.add_pressure_listener(self._on_cpu_pressure)
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self._in_flight.values())
+
+    def _check_memory(self):
+        """Sample system memory at most once a second and back off when it runs high"""
+        now = time.monotonic()
+        if now - self._memory_checked < 1.0:
+            return
+        self._memory_checked = now
+        try:
+            if self.resource_accounting:
+                self._memory_percent = self.resource_accounting.memory_percent()
+            else:
+                self._memory_percent = psutil.virtual_memory().percent
+        except Exception as e:
+            logger.debug(f"Could not read memory usage: {e}")
+            return
+        if self._memory_percent >= self.memory_high_percent:
+            self.decrease('memory')
+
+    async def acquire(self, owner: Optional[str] = None) -> str:
+        """Wait for a slot for `owner` (defaults to the current tool call) and return the owner"""
+        owner = owner or _current_owner.get() or 'default'
+        self._check_memory()
+
+        if self.in_flight < self.limit and not any(self._waiters.values()):
+            self._grant(owner)
+            return owner
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(owner, deque()).append((next(self._sequence), future))
+        self.stats['waited'] += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled - hand the slot on
+                self._release_slot(owner)
+            else:
+                self._discard_waiter(owner, future)
+            raise
+        return owner
+
+    def try_acquire(self, owner: Optional[str] = None) -> Optional[str]:
+        """Take a slot only if one is free right now and nobody is queued; the owner, or None"""
+        owner = owner or _current_owner.get() or 'default'
+        self._check_memory()
+        if self.in_flight < self.limit and not any(self._waiters.values()):
+            self._grant(owner)
+            return owner
+        return None
+
+    def release(self, owner: str, engine_name: Optional[str] = None,
+                latency: Optional[float] = None, outcome: Optional[str] = SUCCESS):
+        """Return a slot and feed its outcome into the limit"""
+        was_binding = self.in_flight >= self.limit
+        self._release_slot(owner, grant=False)
+        self.observe(engine_name, latency, outcome, was_binding)
+        self._grant_waiters()
+
+    @asynccontextmanager
+    async def slot(self, engine_name: Optional[str] = None, owner: Optional[str] = None):
+        """
+        Hold a slot for one engine call
+
+        Exceptions are classified with failure_outcome (timeouts as TIMEOUT);
+        cancellation releases the slot without a latency sample.
+        """
+        owner = await self.acquire(owner)
+        held = GovernorSlot(owner, engine_name)
+        started = time.monotonic()
+        try:
+            yield held
+        except asyncio.CancelledError:
+            held.outcome = None
+            raise
+        except asyncio.TimeoutError:
+            held.outcome = TIMEOUT
+            raise
+        except Exception as e:
+            held.outcome = held.outcome or failure_outcome(str(e))
+            raise
+        else:
+            held.outcome = held.outcome or SUCCESS
+        finally:
+            self.release(owner, engine_name, time.monotonic() - started, held.outcome)
+
+    def observe(self, engine_name: Optional[str], latency: Optional[float], outcome: Optional[str],
+                was_binding: bool = True):
+        """Additive increase on fast successes while the limit is binding, multiplicative decrease on congestion"""
+        if outcome in (RATE_LIMITED, TIMEOUT):
+            self.decrease(outcome)
+            return
+        if outcome != SUCCESS or latency is None:
+            return
+
+        key = engine_name or 'default'
+        average, samples = self._latency.get(key, (latency, 0))
+        slow = samples >= self.latency_min_samples and latency > average * self.latency_tolerance
+        self._latency[key] = (average + (latency - average) / min(samples + 1, 20), samples + 1)
+
+        if slow:
+            self.decrease('latency')
+        elif was_binding and self._limit < self.max_limit:
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self.stats['increases'] += 1
+
+    def decrease(self, reason: str):
+        """Multiplicative decrease, at most once per cooldown so one burst doesn't collapse the limit"""
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown_seconds:
+            return
+        self._last_decrease = now
+        previous = self.limit
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        self.stats['decreases'] += 1
+        reasons = self.stats['decrease_reasons']
+        reasons[reason] = reasons.get(reason, 0) + 1
+        if self.limit != previous:
+            logger.info(f"Concurrency limit {previous} -> {self.limit} ({reason})")
+
+    def _on_cpu_pressure(self, active: bool, cpu_percent: float):
+        if active:
+            self.decrease('cpu')
+
+    def _grant(self, owner: str):
+        self._in_flight[owner] = self._in_flight.get(owner, 0) + 1
+        self.stats['acquired'] += 1
+
+    def _release_slot(self, owner: str, grant: bool = True):
+        remaining = self._in_flight.get(owner, 0) - 1
+        if remaining > 0:
+            self._in_flight[owner] = remaining
+        else:
+            self._in_flight.pop(owner, None)
+        if grant:
+            self._grant_waiters()
+
+    def _discard_waiter(self, owner: str, future: asyncio.Future):
+        queue = self._waiters.get(owner)
+        if queue:
+            self._waiters[owner] = deque(w for w in queue if w[1] is not future)
+            if not self._waiters[owner]:
+                del self._waiters[owner]
+
+    def _grant_waiters(self):
+        """Hand free slots to the owner holding the fewest, oldest waiter first on ties"""
+        while self.in_flight < self.limit:
+            candidates = [(self._in_flight.get(owner, 0), queue[0][0], owner)
+                          for owner, queue in self._waiters.items() if queue]
+            if not candidates:
+                return
+            _, _, owner = min(candidates)
+            queue = self._waiters[owner]
+            _, future = queue.popleft()
+            if not queue:
+                del self._waiters[owner]
+            if future.done():
+                continue
+            self._grant(owner)
+            future.set_result(None)
+
+    def get_stats(self) -> Dict:
+        """Current limit, usage per owner and adjustment counters"""
+        return {
+            **self.stats,
+            'decrease_reasons': dict(self.stats['decrease_reasons']),
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'waiting': sum(len(q) for q in self._waiters.values()),
+            'owners': dict(self._in_flight),
+            'memory_percent': self._memory_percent,
+            'min_limit': self.min_limit,
+            'max_limit': self.max_limit
+        }
+
+
+# Global governor instance
+_global_governor: Optional[ConcurrencyGovernor] = None
+
+
+def get_concurrency_governor(smart_config=None) -> Optional[ConcurrencyGovernor]:
+    """Get the process-wide governor, or None when it is disabled"""
+    global _global_governor
+
+    if _global_governor is None:
+        if smart_config is None:
+            try:
+                try:
+                    from ..config import config as smart_config
+                except ImportError:
+                    from config import config as smart_config
+            except Exception as e:
+                # Same fallback as CPUThrottler: sensible defaults rather than no limit at all
+                logger.warning(f"Concurrency governor initialized with default configuration: {e}")
+        try:
+            from .cpu_throttler import get_cpu_throttler
+            from .resource_accounting import get_resource_accounting
+        except ImportError:
+            from services.cpu_throttler import get_cpu_throttler
+            from services.resource_accounting import get_resource_accounting
+
+        if smart_config is None:
+            _global_governor = ConcurrencyGovernor(cpu_throttler=get_cpu_throttler(),
+                                                   resource_accounting=get_resource_accounting())
+        elif smart_config.enable_concurrency_governor:
+            _global_governor = ConcurrencyGovernor(
+                initial_limit=smart_config.concurrency_initial_limit,
+                min_limit=smart_config.concurrency_min_limit,
+                max_limit=smart_config.concurrency_max_limit,
+                decrease_factor=smart_config.concurrency_decrease_factor,
+                latency_tolerance=smart_config.concurrency_latency_tolerance,
+                memory_high_percent=smart_config.concurrency_memory_high_percent,
+                cpu_throttler=get_cpu_throttler(),
+                resource_accounting=get_resource_accounting(smart_config.cpu_accounting_mode)
+            )
+
+    return _global_governor
+
+
+def reset_concurrency_governor():
+    """Drop the global governor (tests and config reloads)"""
+    global _global_governor
+
+    if _global_governor and _global_governor.cpu_throttler:
+        _global_governor.cpu_throttler.remove_pressure_listener(_global_governor._on_cpu_pressure)
+
+    _global_governor = None
@@ -143,11 +143,9 @@ class CorrelationFramework:
             Analysis results including correlations, conflicts, and resolutions
         """
         # Check cache first if enabled
-        if self.use_cache and self._cache:
-            cached_result = self._cache.get(engine_results)
-            if cached_result:
-                logger.info("Using cached correlation results")
-                return cached_result
+        cached_result = self.get_cached(engine_results)
+        if cached_result:
+            return cached_result
         
         # Reset for new analysis
         self.correlations = []
@@ -177,11 +175,24 @@ class CorrelationFramework:
         }
         
         # Cache the result if caching is enabled
-        if self.use_cache and self._cache:
-            self._cache.put(engine_results, result)
+        self.store_cached(engine_results, result)
         
         return result
     
+    def get_cached(self, engine_results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Cached analysis for these engine results, if caching is enabled and it is fresh"""
+        if self.use_cache and self._cache:
+            cached_result = self._cache.get(engine_results)
+            if cached_result:
+                logger.info("Using cached correlation results")
+                return cached_result
+        return None
+    
+    def store_cached(self, engine_results: Dict[str, Any], result: Dict[str, Any]):
+        """Cache an analysis computed elsewhere (e.g. in a worker process)"""
+        if self.use_cache and self._cache:
+            self._cache.put(engine_results, result)
+    
     def _extract_patterns(self, engine_results: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
         """
         Extract standardized patterns from engine results
@@ -939,4 +950,9 @@ class CorrelationFramework:
         if not summary_parts:
             return "No significant correlations or conflicts detected"
         
-        return "; ".join(summary_parts)
\ No newline at end of file
+        return "; ".join(summary_parts)
+
+
+def analyze_engine_results(engine_results: Dict[str, Any]) -> Dict[str, Any]:
+    """Uncached analysis entry point for the process pool (workers don't share the cache)"""
+    return CorrelationFramework(use_cache=False).analyze(engine_results)
@@ -1,15 +1,23 @@
 """
 CPU throttling service to prevent overloading VS Code and the system
-Provides CPU yield points and usage monitoring for heavy operations
+Provides CPU yield points and usage monitoring for heavy operations, driven by
+system CPU usage and by lag measured on our own event loop
 Adapted from claude-gemini-mcp with singleton pattern for smart tools
 """
 import asyncio
 import time
-import psutil
+import weakref
 import logging
-from typing import Optional, AsyncGenerator, Any
+from typing import Optional, AsyncGenerator, Any, Callable
 from datetime import datetime, timedelta
 
+try:
+    from .loop_monitor import LoopLagMonitor
+    from .resource_accounting import get_resource_accounting
+except ImportError:
+    from services.loop_monitor import LoopLagMonitor
+    from services.resource_accounting import get_resource_accounting
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,6 +47,10 @@ class CPUThrottler:
         self._last_cpu_check = 0
         self._cached_cpu_percent = 0.0
         self._cpu_cache_duration = 1.0  # Cache CPU readings for 1 second
+        self._pressure_listeners = []  # Notified only when throttling turns on/off
+        self._pressure_changes = 0
+        self._pressure_reason = None
+        self._loop_lag_activations = 0
         
         if config is None:
             # Use sensible defaults when no config provided
@@ -46,6 +58,8 @@ class CPUThrottler:
             self.max_cpu_percent = 80.0
             self.cpu_check_interval = 10
             self.file_scan_yield_frequency = 50
+            self.loop_monitor = LoopLagMonitor()
+            self.resource_accounting = get_resource_accounting()
             logger.warning("CPU throttler initialized with default configuration")
         else:
             self.config = config
@@ -54,11 +68,22 @@ class CPUThrottler:
             self.max_cpu_percent = getattr(config, 'max_cpu_usage_percent', 80.0)
             self.cpu_check_interval = getattr(config, 'cpu_check_interval', 10)
             self.file_scan_yield_frequency = getattr(config, 'file_scan_yield_frequency', 50)
+            # CPU usage relative to our cgroup quota (or this process), not the whole host
+            self.resource_accounting = get_resource_accounting(getattr(config, 'cpu_accounting_mode', 'auto'))
+            # Event-loop lag: system CPU can look idle while our own loop is starved
+            self.loop_monitor = None
+            if getattr(config, 'enable_loop_monitor', True):
+                self.loop_monitor = LoopLagMonitor(
+                    sample_interval_ms=getattr(config, 'loop_lag_sample_interval_ms', 50.0),
+                    lag_threshold_ms=getattr(config, 'loop_lag_threshold_ms', 100.0),
+                    block_threshold_ms=getattr(config, 'loop_block_threshold_ms', 250.0)
+                )
         
         CPUThrottler._initialized = True
         
         logger.info(f"CPU throttler singleton initialized - Yield: {self.yield_interval_ms}ms, "
-                   f"CPU limit: {self.max_cpu_percent}%, Check interval: {self.cpu_check_interval}")
+                   f"CPU limit: {self.max_cpu_percent}% of {self.resource_accounting.cpu_quota_cores():.2f} cores "
+                   f"({self.resource_accounting.mode} accounting), Check interval: {self.cpu_check_interval}")
     
     @classmethod
     def get_instance(cls, config=None):
@@ -68,7 +93,7 @@ class CPUThrottler:
         return cls._instance
     
     def _get_cpu_usage(self) -> float:
-        """Get current CPU usage with caching to reduce overhead"""
+        """Get current CPU usage as a percent of our quota, with caching to reduce overhead"""
         current_time = time.time()
         
         # Use cached value if recent enough
@@ -76,8 +101,8 @@ class CPUThrottler:
             return self._cached_cpu_percent
         
         try:
-            # Get CPU usage - this is a brief snapshot
-            cpu_percent = psutil.cpu_percent(interval=None)  # Non-blocking
+            # Usage since the previous reading - non-blocking
+            cpu_percent = self.resource_accounting.cpu_percent()
             self._cached_cpu_percent = cpu_percent
             self._last_cpu_check = current_time
             return cpu_percent
@@ -99,20 +124,80 @@ class CPUThrottler:
         if self._operation_count >= self.cpu_check_interval:
             self._operation_count = 0
             
-            # Check CPU usage - this is the critical adaptive logic
+            # Check CPU usage and our own loop's lag - this is the critical adaptive logic
             cpu_usage = self._get_cpu_usage()
+            loop_lag_ms = self.loop_monitor.current_lag_ms() if self.loop_monitor else 0.0
             if cpu_usage > self.max_cpu_percent:
+                reason = f"CPU usage high: {cpu_usage:.1f}% > {self.max_cpu_percent}%"
+            elif self.loop_monitor and loop_lag_ms > self.loop_monitor.lag_threshold_ms:
+                reason = f"Event loop lag high: {loop_lag_ms:.0f}ms > {self.loop_monitor.lag_threshold_ms:.0f}ms"
+            else:
+                reason = None
+            
+            if reason:
                 if not self._throttle_active:
-                    logger.warning(f"CPU usage high: {cpu_usage:.1f}% > {self.max_cpu_percent}% - activating throttling")
-                    self._throttle_active = True
+                    logger.warning(f"{reason} - activating throttling")
+                    self._pressure_reason = 'cpu' if cpu_usage > self.max_cpu_percent else 'loop_lag'
+                    if self._pressure_reason == 'loop_lag':
+                        self._loop_lag_activations += 1
+                    self._set_throttle_active(True, cpu_usage)
                 return True
             else:
                 if self._throttle_active:
-                    logger.info(f"CPU usage normalized: {cpu_usage:.1f}% - deactivating throttling")
-                    self._throttle_active = False
+                    logger.info(f"CPU usage normalized: {cpu_usage:.1f}%, loop lag {loop_lag_ms:.0f}ms - "
+                               f"deactivating throttling")
+                    self._pressure_reason = None
+                    self._set_throttle_active(False, cpu_usage)
         
         return False
     
+    def start_loop_monitor(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+        """Start measuring lag on the given (default: running) event loop"""
+        if not self.loop_monitor:
+            return False
+        self.loop_monitor.start(loop)
+        return True
+    
+    def stop_loop_monitor(self):
+        """Stop the event loop lag monitor"""
+        if self.loop_monitor:
+            self.loop_monitor.stop()
+    
+    def add_pressure_listener(self, callback: Callable[[bool, float], None]):
+        """
+        Register callback(throttle_active, cpu_percent) for CPU pressure transitions
+        
+        Bound methods are held weakly so listeners don't keep their owners alive.
+        """
+        if hasattr(callback, '__self__') and hasattr(callback, '__func__'):
+            self._pressure_listeners.append(weakref.WeakMethod(callback))
+        else:
+            self._pressure_listeners.append(lambda: callback)
+    
+    def remove_pressure_listener(self, callback: Callable[[bool, float], None]):
+        """Unregister a pressure listener"""
+        self._pressure_listeners = [ref for ref in self._pressure_listeners
+                                    if ref() is not None and ref() != callback]
+    
+    def _set_throttle_active(self, active: bool, cpu_usage: float):
+        """Flip throttling state and notify listeners of the transition"""
+        if active == self._throttle_active:
+            return
+        self._throttle_active = active
+        self._pressure_changes += 1
+        
+        live_listeners = []
+        for ref in self._pressure_listeners:
+            callback = ref()
+            if callback is None:
+                continue
+            live_listeners.append(ref)
+            try:
+                callback(active, cpu_usage)
+            except Exception as e:
+                logger.warning(f"CPU pressure listener failed: {e}")
+        self._pressure_listeners = live_listeners
+    
     async def yield_if_needed(self):
         """Yield control to the event loop if conditions are met"""
         if await self.should_yield():
@@ -189,6 +274,11 @@ class CPUThrottler:
             'yield_interval_ms': self.yield_interval_ms,
             'max_cpu_percent': self.max_cpu_percent,
             'time_since_yield_ms': (time.time() - self._last_yield_time) * 1000,
+            'pressure_changes': self._pressure_changes,
+            'pressure_reason': self._pressure_reason,
+            'loop_lag_activations': self._loop_lag_activations,
+            'loop_lag': self.loop_monitor.get_stats() if self.loop_monitor else None,
+            'resources': self.resource_accounting.get_stats(),
             'singleton_initialized': CPUThrottler._initialized
         }
     
@@ -0,0 +1,280 @@
+"""
+Per-engine result store for incremental analysis
+Engine results are stored per shard of input files, keyed by the engine, its
+parameters and a content digest of every file in the shard, so a rerun after
+editing one file only sends that file's shard back to Gemini
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Handle import for both module and script execution
+try:
+    from .hash_index import HashIndex, get_hash_index
+except ImportError:
+    from services.hash_index import HashIndex, get_hash_index
+
+logger = logging.getLogger(__name__)
+
+# Leading markers of the error strings engines and the error handler return
+_ERROR_PREFIXES = ("❌", "⚠️", "🚨", "Engine ")
+
+_LIST_MARKER = re.compile(r"^\s*(?:[-*•+]|\d+[.)])\s+")
+_WHITESPACE = re.compile(r"\s+")
+# Summary block the engine sharder puts above its per-shard sections
+_SHARDED_SUMMARY = re.compile(r"\A## [^\n]*: \d+ files analyzed in \d+ parallel shards\n(?P<notes>.*?)(?=^### Shard |\Z)",
+                              re.MULTILINE | re.DOTALL)
+_MERGED_DUPLICATES = re.compile(r"^(\d+) duplicate findings", re.MULTILINE)
+
+
+@dataclass
+class ShardRun:
+    """One shard of an incremental engine run"""
+    files: List[str]
+    result: Any = None
+    reused: bool = False
+    error: Optional[BaseException] = None
+
+
+def plan_shards(paths: Iterable[str], max_files: int) -> List[List[str]]:
+    """
+    Split paths into shards of at most `max_files`, keeping each directory's
+    files together and packing small neighbouring directories into one shard
+
+    Paths are sorted first, so the same file set always yields the same shards
+    and an edit only changes the digest of the shard holding the edited file.
+    """
+    by_dir: "OrderedDict[str, List[str]]" = OrderedDict()
+    for path in sorted(set(paths)):
+        by_dir.setdefault(os.path.dirname(path), []).append(path)
+
+    shards, current = [], []
+    for files in by_dir.values():
+        for start in range(0, len(files), max_files):
+            chunk = files[start:start + max_files]
+            if current and len(current) + len(chunk) > max_files:
+                shards.append(current)
+                current = []
+            current.extend(chunk)
+    if current:
+        shards.append(current)
+    return shards
+
+
+def is_cacheable_result(result: Any) -> bool:
+    """Only successful engine output is worth reusing"""
+    if isinstance(result, dict):
+        return bool(result.get('success'))
+    return isinstance(result, str) and bool(result.strip()) and not result.startswith(_ERROR_PREFIXES)
+
+
+def describe_shard(files: List[str]) -> str:
+    """Short 'N files in dir, dir' label for a shard's section heading"""
+    directories = sorted({os.path.basename(os.path.dirname(f)) or os.path.dirname(f) for f in files})
+    where = ', '.join(directories[:3]) + (f" +{len(directories) - 3} more" if len(directories) > 3 else '')
+    return f"{len(files)} files in {where}"
+
+
+def finding_key(line: str) -> Optional[str]:
+    """Normalized text of a list-item finding, None for headings and prose"""
+    if not _LIST_MARKER.match(line):
+        return None
+    key = _WHITESPACE.sub(' ', _LIST_MARKER.sub('', line, count=1)).strip().lower()
+    return key or None
+
+
+def dedupe_findings(texts: List[str]) -> Tuple[List[str], int]:
+    """Drop list-item findings already reported by an earlier text; returns (texts, duplicates removed)"""
+    seen = set()
+    removed = 0
+    deduped = []
+    for text in texts:
+        kept = []
+        for line in text.splitlines():
+            key = finding_key(line)
+            if key is not None:
+                if key in seen:
+                    removed += 1
+                    continue
+                seen.add(key)
+            kept.append(line)
+        deduped.append("\n".join(kept).strip())
+    return deduped, removed
+
+
+def _run_text(run: ShardRun) -> str:
+    return f"Analysis failed: {str(run.error)[:200]}" if run.error is not None else str(run.result)
+
+
+def shard_bodies(runs: List[ShardRun]) -> Tuple[List[str], int]:
+    """
+    Each run's report as it appears in the merged report, without the summary of a
+    sharded engine run and without findings an earlier shard already reported.
+    Returns (bodies, duplicates removed).
+    """
+    removed = 0
+    bodies = []
+    for run in runs:
+        body = _run_text(run)
+        summary = _SHARDED_SUMMARY.match(body) if run.error is None else None
+        if summary:
+            removed += sum(int(n) for n in _MERGED_DUPLICATES.findall(summary.group('notes')))
+            body = body[summary.end():]
+        bodies.append(body)
+    bodies, cross_shard = dedupe_findings(bodies)
+    return bodies, removed + cross_shard
+
+
+def merge_shard_results(runs: List[ShardRun], engine_name: Optional[str] = None) -> Any:
+    """
+    One report from shard results, each section marked fresh or reused (a single
+    fresh run's result is passed through unchanged)
+
+    Aggregates are recomputed over the merged report, as a single run over all the
+    files would report them: findings repeated across shards appear once, and the
+    per-shard summaries of sharded engine runs are replaced by one summary.
+    """
+    if len(runs) == 1 and not runs[0].reused:
+        return runs[0].result if runs[0].error is None else _run_text(runs[0])
+
+    bodies, removed = shard_bodies(runs)
+
+    total = len(runs)
+    sections = []
+    for i, (run, body) in enumerate(zip(runs, bodies), 1):
+        status = " - ♻️ reused from previous run (files unchanged)" if run.reused else ""
+        sections.append(f"### Shard {i}/{total}: {describe_shard(run.files)}{status}\n\n{body}")
+
+    reused = sum(1 for run in runs if run.reused)
+    failed = sum(1 for run in runs if run.error is not None or not is_cacheable_result(run.result))
+    summary = [f"## {engine_name or 'Analysis'}: {sum(len(run.files) for run in runs)} files analyzed "
+               f"in {total} shards ({reused} reused)"]
+    if removed:
+        summary.append(f"{removed} duplicate findings reported by more than one shard were merged.")
+    if failed:
+        summary.append(f"⚠️ {failed} of {total} shards failed; their files were not analyzed.")
+    return "\n\n".join(["\n\n".join(summary)] + sections)
+
+
+class EngineResultStore:
+    """
+    In-memory LRU of engine results keyed by (engine, parameters, shard file digests)
+
+    File digests come from the shared hash index (full contents, reused while a
+    file's size and mtime are unchanged).
+    Entries older than `ttl_seconds` are misses; the least recently used go
+    first once their total size passes `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, ttl_seconds: float = 24 * 3600,
+                 hash_index: Optional[HashIndex] = None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hash_index = hash_index if hash_index is not None else HashIndex()
+        self._entries: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'expired': 0}
+
+    @staticmethod
+    def make_key(engine_name: str, params: Dict[str, Any], file_digests: List[Tuple[str, str]]) -> str:
+        """Stable key over the engine, its non-path parameters and each file's digest"""
+        payload = json.dumps([engine_name, params, file_digests], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def digest_files(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Content digest per path, None when unreadable (blocking; prefer adigest_files)"""
+        return self.hash_index.digest_files(paths)
+
+    async def adigest_files(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Content digest per path, hashed in parallel off the event loop"""
+        return await self.hash_index.digest_many(paths)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return None
+        created, size, result = entry
+        if time.time() - created > self.ttl_seconds:
+            self._drop(key)
+            self.stats['expired'] += 1
+            self.stats['misses'] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats['hits'] += 1
+        return result
+
+    def put(self, key: str, result: Any):
+        size = len(result.encode('utf-8')) if isinstance(result, str) else len(json.dumps(result, default=str))
+        if size > self.max_bytes:
+            return
+        self._drop(key)
+        self._entries[key] = (time.time(), size, result)
+        self._bytes += size
+        self.stats['stores'] += 1
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.stats['evictions'] += 1
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and occupancy"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'files_hashed': self.hash_index.stats['files_hashed'],
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0
+        }
+
+
+# Global store instance
+_global_store: Optional[EngineResultStore] = None
+
+
+def get_engine_result_store(smart_config=None) -> Optional[EngineResultStore]:
+    """Get the shared engine result store, or None when incremental analysis is disabled"""
+    global _global_store
+
+    if _global_store is None:
+        if smart_config is None:
+            try:
+                try:
+                    from ..config import config as smart_config
+                except ImportError:
+                    from config import config as smart_config
+            except Exception as e:
+                logger.warning(f"Incremental analysis disabled - configuration unavailable: {e}")
+                return None
+
+        if smart_config.enable_incremental_analysis:
+            _global_store = EngineResultStore(
+                max_bytes=int(smart_config.engine_result_store_max_mb * 1024 * 1024),
+                ttl_seconds=smart_config.engine_result_store_ttl_seconds,
+                hash_index=get_hash_index(smart_config)
+            )
+
+    return _global_store
+
+
+def reset_engine_result_store():
+    """Drop the shared store (tests and config reloads)"""
+    global _global_store
+    _global_store = None
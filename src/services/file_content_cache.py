@@ -0,0 +1,304 @@
+"""
+Process-wide file content cache shared by smart tools and engines
+Entries are validated against (size, mtime_ns) on every read, so each file is
+read from disk once per change rather than once per engine per tool, and the
+cache is held to an LRU byte budget. Large files are memory-mapped (FileView)
+instead of read, and only a bounded excerpt of them is ever decoded
+"""
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    from ..utils.file_view import DEFAULT_MMAP_THRESHOLD, FileView
+    from .file_watcher import get_file_watcher
+except ImportError:
+    from utils.file_view import DEFAULT_MMAP_THRESHOLD, FileView
+    from services.file_watcher import get_file_watcher
+
+logger = logging.getLogger(__name__)
+
+FileVersion = Tuple[int, int]  # (st_size, st_mtime_ns)
+Content = Union[str, FileView]
+
+
+def _load(path: str, cached_version: Optional[FileVersion],
+          mmap_threshold: int = DEFAULT_MMAP_THRESHOLD) -> Tuple[FileVersion, Optional[Content]]:
+    """
+    Stat `path` and load it only if it changed since `cached_version` (runs in a worker thread)
+
+    Files at or above `mmap_threshold` come back as a mapped FileView, others decoded.
+    """
+    st = os.stat(path)
+    version = (st.st_size, st.st_mtime_ns)
+    if version == cached_version:
+        return version, None
+    if st.st_size >= mmap_threshold:
+        view = FileView(path, mmap_threshold)
+        return view.version, view
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return version, f.read()
+
+
+def _load_many(paths: List[str], cached_versions: List[Optional[FileVersion]],
+               mmap_threshold: int = DEFAULT_MMAP_THRESHOLD) -> List[Any]:
+    """_load over a batch in one worker-thread hop; failures are returned as exceptions"""
+    results = []
+    for path, cached_version in zip(paths, cached_versions):
+        try:
+            results.append(_load(path, cached_version, mmap_threshold))
+        except (OSError, ValueError) as e:
+            results.append(e)
+    return results
+
+
+class FileContentCache:
+    """
+    LRU cache of decoded file contents keyed by path and validated by (size, mtime_ns)
+
+    The byte budget counts on-disk sizes; files larger than the whole budget are
+    returned but not kept. Concurrent reads of the same path share one disk read.
+
+    Files of `mmap_threshold` bytes or more are kept as mapped FileViews instead
+    (at most `max_views` open, outside the byte budget). Text reads of them
+    decode at most `max_text_bytes` - the head and tail of the file.
+
+    With a FileWatcher, decoded entries the watcher reports unchanged since
+    they were validated are served without a stat or a worker-thread hop.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, mmap_threshold: int = DEFAULT_MMAP_THRESHOLD,
+                 max_text_bytes: int = 1024 * 1024, max_views: int = 64, watcher=None):
+        self.max_bytes = max_bytes
+        self.mmap_threshold = mmap_threshold
+        self.max_text_bytes = max_text_bytes
+        self.max_views = max_views
+        self.watcher = watcher
+        self._validated: Dict[str, int] = {}  # Path -> watcher sequence captured before its last validation
+        self._entries: "OrderedDict[str, Tuple[FileVersion, str]]" = OrderedDict()
+        self._views: "OrderedDict[str, FileView]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'evictions': 0, 'errors': 0,
+                      'bytes_read': 0, 'mapped': 0, 'bytes_decoded_from_maps': 0, 'watcher_hits': 0}
+
+    def __contains__(self, path: str) -> bool:
+        return str(path) in self._entries or str(path) in self._views
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._views)
+
+    def _lookup(self, path: str) -> Optional[Tuple[FileVersion, Content]]:
+        view = self._views.get(path)
+        if view is not None:
+            return view.version, view
+        return self._entries.get(path)
+
+    def _watched_hit(self, path: str) -> Optional[str]:
+        """Cached text the watcher vouches for, without touching the filesystem"""
+        entry = self._entries.get(path)
+        if entry is None or not self.watcher.is_unchanged_since(path, self._validated.get(path)):
+            return None
+        self._entries.move_to_end(path)
+        self.stats['hits'] += 1
+        self.stats['watcher_hits'] += 1
+        return entry[1]
+
+    def _watch_sequence(self) -> Optional[int]:
+        return self.watcher.sequence if self.watcher is not None else None
+
+    def _mark_validated(self, path: str, seq: Optional[int], content):
+        if seq is not None and content is not None:
+            self._validated[path] = seq
+
+    async def read_text(self, path) -> Optional[str]:
+        """Current contents of `path`, or None if it can't be read"""
+        content, _ = await self.fetch(path)
+        return content
+
+    async def fetch(self, path) -> Tuple[Optional[str], str]:
+        """(text or None, outcome) where outcome is 'hit', 'miss', 'stale' or 'error'"""
+        path = str(path)
+        if self.watcher is not None:
+            content = self._watched_hit(path)
+            if content is not None:
+                return content, 'hit'
+        task = self._inflight.get(path)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            # Joined another caller's read - no disk access of our own
+            content, outcome = await asyncio.shield(task)
+            return content, 'hit' if content is not None else outcome
+
+        # A shared task, so one caller's cancellation doesn't fail the others' read
+        task = asyncio.ensure_future(self._read(path))
+        self._inflight[path] = task
+        task.add_done_callback(lambda done: self._inflight.pop(path, None)
+                               if self._inflight.get(path) is done else None)
+        return await asyncio.shield(task)
+
+    async def fetch_many(self, paths: Iterable) -> List[Tuple[Optional[Content], str]]:
+        """
+        fetch() for a batch of paths with a single worker-thread hop, for bulk pre-loading
+
+        Large files come back as their (undecoded) FileView.
+        """
+        paths = [str(p) for p in paths]
+        results: Dict[str, Tuple[Optional[Content], str]] = {}
+        if self.watcher is not None:
+            for path in paths:
+                content = self._watched_hit(path)
+                if content is not None:
+                    results[path] = (content, 'hit')
+        unverified = [path for path in paths if path not in results]
+        if unverified:
+            seq = self._watch_sequence()
+            entries = [self._lookup(p) for p in unverified]
+            loaded = await asyncio.to_thread(_load_many, unverified, [e[0] if e else None for e in entries],
+                                             self.mmap_threshold)
+            for path, entry, result in zip(unverified, entries, loaded):
+                results[path] = self._apply(path, entry, result)
+                self._mark_validated(path, seq, results[path][0])
+        return [results[path] for path in paths]
+
+    async def _read(self, path: str) -> Tuple[Optional[str], str]:
+        entry = self._lookup(path)
+        seq = self._watch_sequence()
+        try:
+            result = await asyncio.to_thread(_load, path, entry[0] if entry else None, self.mmap_threshold)
+        except (OSError, ValueError) as e:
+            result = e
+        content, outcome = self._apply(path, entry, result)
+        self._mark_validated(path, seq, content)
+        if isinstance(content, FileView):
+            view = content
+            try:
+                content = await asyncio.to_thread(view.excerpt, self.max_text_bytes)
+            except ValueError as e:
+                # Closed by an eviction while we were decoding
+                logger.debug(f"Mapped view of {path} went away: {e}")
+                return None, 'error'
+            self.stats['bytes_decoded_from_maps'] += min(view.size, self.max_text_bytes)
+        return content, outcome
+
+    def _apply(self, path: str, entry, result) -> Tuple[Optional[Content], str]:
+        """Fold one load result into the cache and return (contents, outcome)"""
+        if isinstance(result, Exception):
+            self.stats['errors'] += 1
+            self.invalidate(path)
+            logger.debug(f"Could not read {path}: {result}")
+            return None, 'error'
+
+        version, content = result
+        if content is None:
+            # Unchanged since `entry`; re-store it in case it was evicted while we checked
+            self.stats['hits'] += 1
+            if path in self._entries:
+                self._entries.move_to_end(path)
+            elif path in self._views:
+                self._views.move_to_end(path)
+            elif isinstance(entry[1], FileView) and entry[1].closed:
+                return None, 'error'
+            else:
+                self._store(path, *entry)
+            return entry[1], 'hit'
+
+        outcome = 'stale' if entry else 'miss'
+        self.stats['stale' if entry else 'misses'] += 1
+        self.stats['bytes_read'] += version[0]
+        self._store(path, version, content)
+        return content, outcome
+
+    def _store(self, path: str, version: FileVersion, content: Content):
+        self.invalidate(path)
+        if isinstance(content, FileView):
+            self.stats['mapped'] += 1
+            self._views[path] = content
+            while len(self._views) > self.max_views:
+                evicted_path, evicted = self._views.popitem(last=False)
+                self._validated.pop(evicted_path, None)
+                evicted.close()
+                self.stats['evictions'] += 1
+            return
+        size = version[0]
+        if size > self.max_bytes:
+            return
+        self._entries[path] = (version, content)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            evicted_path, ((evicted_size, _), _) = self._entries.popitem(last=False)
+            self._validated.pop(evicted_path, None)
+            self._bytes -= evicted_size
+            self.stats['evictions'] += 1
+
+    def invalidate(self, path) -> bool:
+        """Drop one path; returns whether it was cached"""
+        self._validated.pop(str(path), None)
+        view = self._views.pop(str(path), None)
+        if view is not None:
+            view.close()
+            return True
+        entry = self._entries.pop(str(path), None)
+        if entry is None:
+            return False
+        self._bytes -= entry[0][0]
+        return True
+
+    def clear(self):
+        for view in self._views.values():
+            view.close()
+        self._views.clear()
+        self._entries.clear()
+        self._validated.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> Dict:
+        """Hit/miss counters, occupancy and budget"""
+        lookups = self.stats['hits'] + self.stats['misses'] + self.stats['stale']
+        return {
+            **self.stats,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'mapped_views': len(self._views),
+            'mapped_bytes': sum(view.size for view in self._views.values()),
+            'max_bytes': self.max_bytes,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0
+        }
+
+
+# Global cache instance
+_global_cache: Optional[FileContentCache] = None
+
+
+def get_file_content_cache(smart_config=None) -> Optional[FileContentCache]:
+    """Get the shared file content cache, or None when file caching is disabled"""
+    global _global_cache
+
+    if _global_cache is None:
+        if smart_config is None:
+            try:
+                try:
+                    from ..config import config as smart_config
+                except ImportError:
+                    from config import config as smart_config
+            except Exception as e:
+                logger.warning(f"File content cache initialized with default configuration: {e}")
+
+        if smart_config is None:
+            _global_cache = FileContentCache()
+        elif smart_config.enable_file_cache:
+            _global_cache = FileContentCache(
+                max_bytes=int(smart_config.file_cache_max_mb * 1024 * 1024),
+                mmap_threshold=int(smart_config.file_mmap_threshold_mb * 1024 * 1024),
+                max_text_bytes=int(smart_config.file_max_text_mb * 1024 * 1024),
+                watcher=get_file_watcher(smart_config)
+            )
+
+    return _global_cache
+
+
+def reset_file_content_cache():
+    """Drop the shared cache (tests and config reloads)"""
+    global _global_cache
+    _global_cache = None
@@ -0,0 +1,413 @@
+"""
+Filesystem change notification for project roots
+A background thread follows changes under each watched root (inotify on Linux,
+periodic scans elsewhere) and stamps every changed path with a sequence number,
+so caches can validate an entry with a dictionary lookup instead of a stat or a
+re-hash, and re-check only the files that actually changed
+"""
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('auto', 'inotify', 'poll')
+
+# Directories never worth watching (and usually the largest in a tree)
+IGNORED_DIRS = frozenset({'.git', '.hg', '.svn', 'node_modules', '__pycache__', '.venv', 'venv',
+                          '.mypy_cache', '.pytest_cache', '.tox', 'dist', 'build'})
+
+# inotify(7) event bits
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO |
+               _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+_LISTING_CHANGES = _IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+class _Inotify:
+    """Minimal ctypes binding for inotify - no third-party dependency"""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add_watch(self, path: str) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def read_events(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """(wd, mask, name) for events arriving within `timeout` seconds"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events, offset = [], 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def inotify_available() -> bool:
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        _Inotify().close()
+        return True
+    except (OSError, AttributeError):
+        return False
+
+
+class FileWatcher:
+    """
+    Change sequence numbers for files under watched project roots
+
+    Every directory being watched carries the sequence number it has been
+    watched since, and every change records the path (and, for creations and
+    deletions, its directory) with a new sequence number. A cache that captured
+    `sequence` before validating an entry can later trust it while
+    `is_unchanged_since(path, seq)` holds. Changes become visible after the
+    backend notices them - immediately with inotify, within `poll_interval`
+    seconds when polling. Directories past `max_dirs`, in IGNORED_DIRS, or whose
+    watch failed are simply not covered, and callers fall back to stat().
+    """
+
+    def __init__(self, backend: str = 'auto', poll_interval: float = 2.0,
+                 max_dirs: int = 8192, max_tracked_changes: int = 100_000):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown file watch backend {backend!r}; expected one of {BACKENDS}")
+        if backend == 'auto':
+            backend = 'inotify' if inotify_available() else 'poll'
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.max_dirs = max_dirs
+        self.max_tracked_changes = max_tracked_changes
+
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._reset_seq = 0  # Nothing validated before this is trusted (queue overflow)
+        self._dirs: Dict[str, int] = {}  # Covered directory -> sequence it has been watched since
+        self._changes: Dict[str, int] = {}  # Path -> sequence of its latest change
+        self._roots: Dict[str, Optional[int]] = {}  # Root -> sequence fully covered since (None: partially)
+        self._pending_roots: List[str] = []
+        self._wds: Dict[int, str] = {}
+        self._snapshots: Dict[str, Dict[str, Tuple[int, int]]] = {}  # Poll backend: root -> file stats
+        self._inotify: Optional[_Inotify] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._dir_limit_logged = False
+        self.stats = {'events': 0, 'changes': 0, 'overflows': 0, 'watch_errors': 0}
+
+    @property
+    def sequence(self) -> int:
+        """Current change sequence; capture it before validating an entry"""
+        return self._seq
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def watch(self, root) -> bool:
+        """Start following changes under `root` (no-op if already covered); returns whether it is watched"""
+        root = os.path.abspath(str(root))
+        if not os.path.isdir(root):
+            return False
+        with self._lock:
+            if any(root == watched or root.startswith(watched + os.sep) for watched in self._roots):
+                return True
+            if root not in self._pending_roots:
+                self._pending_roots.append(root)
+        self._start()
+        return True
+
+    def is_unchanged_since(self, path, seq: Optional[int]) -> bool:
+        """Whether `path` is covered and has not changed since sequence `seq` (no filesystem access)"""
+        if seq is None or seq < self._reset_seq:
+            return False
+        path = os.path.abspath(str(path))
+        since = self._dirs.get(os.path.dirname(path))
+        return since is not None and since <= seq and self._changes.get(path, 0) <= seq
+
+    def dirty_paths(self, root, since_seq: int) -> Optional[Set[str]]:
+        """
+        Paths under `root` changed after `since_seq`, or None when that can't be
+        known (root not watched for that whole period, or events were dropped)
+        """
+        root = os.path.abspath(str(root))
+        with self._lock:
+            watched_since = next((seq for watched, seq in self._roots.items()
+                                  if seq is not None and (root == watched or root.startswith(watched + os.sep))),
+                                 None)
+            if watched_since is None or watched_since > since_seq or since_seq < self._reset_seq:
+                return None
+            prefix = root + os.sep
+            return {path for path, seq in self._changes.items()
+                    if seq > since_seq and (path == root or path.startswith(prefix))}
+
+    def _start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        if self.backend == 'inotify' and self._inotify is None:
+            self._inotify = _Inotify()
+        target = self._run_inotify if self.backend == 'inotify' else self._run_poll
+        self._thread = threading.Thread(target=target, name='file-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop watching; every path becomes uncovered"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+        with self._lock:
+            self._pending_roots = list(self._roots) + self._pending_roots
+            self._roots.clear()
+            self._dirs.clear()
+            self._wds.clear()
+            self._snapshots.clear()
+
+    def _record(self, path: str):
+        with self._lock:
+            self._seq += 1
+            self._changes[path] = self._seq
+            self.stats['changes'] += 1
+            if len(self._changes) > self.max_tracked_changes:
+                self._forget_changes()
+
+    def _forget_changes(self):
+        """Drop the change log; entries validated before now are no longer trusted (holds _lock)"""
+        self._seq += 1
+        self._reset_seq = self._seq
+        self._changes.clear()
+
+    def _next_roots(self) -> List[str]:
+        with self._lock:
+            roots, self._pending_roots = self._pending_roots, []
+        return roots
+
+    def _dir_limit_reached(self, covered: int) -> bool:
+        if covered < self.max_dirs:
+            return False
+        if not self._dir_limit_logged:
+            logger.warning(f"File watcher reached FILE_WATCH_MAX_DIRS={self.max_dirs}; "
+                           f"remaining directories fall back to stat()")
+            self._dir_limit_logged = True
+        return True
+
+    # inotify backend
+
+    def _add_tree(self, top: str) -> bool:
+        """Watch `top` and its subdirectories; returns whether all of them are covered"""
+        for directory, dirnames, _ in os.walk(top):
+            if self._dir_limit_reached(len(self._dirs)):
+                return False
+            dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+            try:
+                wd = self._inotify.add_watch(directory)
+            except OSError as e:
+                self.stats['watch_errors'] += 1
+                if e.errno == errno.ENOSPC:
+                    logger.warning(f"inotify watch limit reached at {directory}; raise "
+                                   f"fs.inotify.max_user_watches or lower FILE_WATCH_MAX_DIRS")
+                return False
+            with self._lock:
+                self._wds[wd] = directory
+                self._seq += 1
+                self._dirs[directory] = self._seq
+        return True
+
+    def _drop_tree(self, top: str):
+        prefix = top + os.sep
+        with self._lock:
+            for directory in [d for d in self._dirs if d == top or d.startswith(prefix)]:
+                del self._dirs[directory]
+
+    def _run_inotify(self):
+        while not self._stop.is_set():
+            for root in self._next_roots():
+                complete = self._add_tree(root)
+                with self._lock:
+                    self._roots[root] = self._seq if complete else None
+            try:
+                events = self._inotify.read_events(0.5)
+            except (OSError, ValueError):
+                if not self._stop.is_set():
+                    logger.exception("File watcher stopped reading events")
+                return
+            for wd, mask, name in events:
+                self._handle_event(wd, mask, name)
+
+    def _handle_event(self, wd: int, mask: int, name: str):
+        self.stats['events'] += 1
+        if mask & _IN_Q_OVERFLOW:
+            self.stats['overflows'] += 1
+            logger.warning("inotify queue overflowed; file caches will re-validate everything once")
+            with self._lock:
+                self._forget_changes()
+            return
+        directory = self._wds.get(wd)
+        if directory is None:
+            return
+        if mask & _IN_IGNORED:
+            with self._lock:
+                self._wds.pop(wd, None)
+                if self._dirs.get(directory) is not None and directory not in self._wds.values():
+                    del self._dirs[directory]
+            return
+
+        path = os.path.join(directory, name) if name else directory
+        if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+            self._drop_tree(directory)
+        elif mask & _IN_ISDIR:
+            if mask & (_IN_DELETE | _IN_MOVED_FROM):
+                self._drop_tree(path)
+            elif mask & (_IN_CREATE | _IN_MOVED_TO) and os.path.basename(path) not in IGNORED_DIRS:
+                self._add_tree(path)
+        self._record(path)
+        if name and mask & _LISTING_CHANGES:
+            self._record(directory)
+
+    # Polling backend
+
+    def _scan(self, root: str) -> Tuple[bool, Set[str], Dict[str, Tuple[int, int]]]:
+        """(complete, directories, file stats) for one root, within the directory budget"""
+        directories, files = set(), {}
+        prefix = root + os.sep
+        elsewhere = sum(1 for d in self._dirs if not (d == root or d.startswith(prefix)))
+        for dirpath, dirnames, filenames in os.walk(root):
+            if self._dir_limit_reached(elsewhere + len(directories)):
+                return False, directories, files
+            dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+            directories.add(dirpath)
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                files[path] = (st.st_size, st.st_mtime_ns)
+        return True, directories, files
+
+    def _poll_root(self, root: str):
+        complete, directories, files = self._scan(root)
+        previous = self._snapshots.get(root)
+        self._snapshots[root] = files
+        if previous is not None:
+            for path in previous.keys() | files.keys():
+                if previous.get(path) != files.get(path):
+                    self._record(path)
+                    if (path in previous) != (path in files):
+                        self._record(os.path.dirname(path))
+        with self._lock:
+            self._seq += 1
+            prefix = root + os.sep
+            for directory in [d for d in self._dirs if (d == root or d.startswith(prefix))
+                              and d not in directories]:
+                del self._dirs[directory]
+            for directory in directories:
+                self._dirs.setdefault(directory, self._seq)
+            if not complete:
+                self._roots[root] = None
+            elif self._roots.get(root) is None:
+                self._roots[root] = self._seq
+
+    def _run_poll(self):
+        while True:
+            for root in self._next_roots() + list(self._snapshots):
+                try:
+                    self._poll_root(root)
+                except OSError as e:
+                    logger.debug(f"File watcher could not scan {root}: {e}")
+            if self._stop.wait(self.poll_interval):
+                return
+
+    def get_stats(self) -> Dict:
+        """Backend, coverage and event counters"""
+        return {
+            **self.stats,
+            'backend': self.backend,
+            'running': self.running,
+            'roots': list(self._roots),
+            'watched_dirs': len(self._dirs),
+            'tracked_changes': len(self._changes),
+            'sequence': self._seq
+        }
+
+
+# Global watcher instance
+_global_watcher: Optional[FileWatcher] = None
+
+
+def get_file_watcher(smart_config=None) -> Optional[FileWatcher]:
+    """Get the shared file watcher, or None when change notification is disabled"""
+    global _global_watcher
+
+    if _global_watcher is None:
+        if smart_config is None:
+            try:
+                try:
+                    from ..config import config as smart_config
+                except ImportError:
+                    from config import config as smart_config
+            except Exception as e:
+                logger.warning(f"File watcher disabled - configuration unavailable: {e}")
+                return None
+
+        if smart_config.enable_file_watcher:
+            try:
+                _global_watcher = FileWatcher(
+                    backend=smart_config.file_watch_backend,
+                    poll_interval=smart_config.file_watch_poll_interval,
+                    max_dirs=smart_config.file_watch_max_dirs
+                )
+            except OSError as e:
+                logger.warning(f"File watcher unavailable, caches will stat() files instead: {e}")
+
+    return _global_watcher
+
+
+def reset_file_watcher():
+    """Stop and drop the shared watcher (tests and config reloads)"""
+    global _global_watcher
+    if _global_watcher is not None:
+        _global_watcher.stop()
+    _global_watcher = None
@@ -0,0 +1,318 @@
+"""
+Persisted content hash index
+Full-content file digests computed in parallel on a thread pool, memoized by
+(size, mtime_ns) and saved per project root, so cache keys built from file
+contents cost one stat per unchanged file instead of a read on every run
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Handle import for both module and script execution
+try:
+    from ..utils.project_context import ProjectContextReader
+except ImportError:
+    from utils.project_context import ProjectContextReader
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+HASH_ALGORITHM = "xxh3_128" if xxhash is not None else "blake2b-128"
+
+# A directory holding one of these is a project root; its index is persisted on its own
+ROOT_MARKERS = ('.git', 'pyproject.toml', 'setup.py', *ProjectContextReader.PROJECT_INDICATORS)
+
+# Paths hashed per worker task - enough to amortize the hop to the pool
+_BATCH_SIZE = 64
+_READ_BLOCK = 1024 * 1024
+
+Entry = Tuple[int, int, str]  # (size, mtime_ns, digest)
+
+
+def hash_file(path: str) -> str:
+    """Digest of a file's full contents (blocking)"""
+    hasher = xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_READ_BLOCK), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class _RootIndex:
+    """Entries for the files under one project root, keyed by path relative to it"""
+
+    def __init__(self, root: Optional[str]):
+        self.root = root
+        self._prefix_len = len(os.path.join(root, '')) if root else 0
+        self.entries: Dict[str, Entry] = {}
+        self.dirty = False
+
+    def key(self, path: str) -> str:
+        """Path relative to the root (`path` is absolute and beneath it)"""
+        return path[self._prefix_len:]
+
+
+class HashIndex:
+    """
+    Content digests of files, reused while a file's (size, mtime_ns) is unchanged
+
+    Each file belongs to the nearest ancestor directory holding a project marker
+    (.git, pyproject.toml, package.json, ...). A root's entries are loaded from
+    `index_dir` the first time one of its files is looked up and written back with
+    an atomic rename after new digests are computed. Files outside any project
+    root are memoized in memory only. Concurrent server processes may overwrite
+    each other's index; a lost entry only costs one re-hash.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None, max_workers: int = 4,
+                 max_entries_per_root: int = 200_000):
+        self.index_dir = index_dir
+        self.max_workers = max(1, max_workers)
+        self.max_entries_per_root = max_entries_per_root
+        self._roots: Dict[Optional[str], _RootIndex] = {}
+        self._dir_roots: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.stats = {'lookups': 0, 'reused': 0, 'files_hashed': 0, 'errors': 0,
+                      'roots_loaded': 0, 'saves': 0}
+
+    def _root_for(self, directory: str) -> Optional[str]:
+        """Nearest ancestor (or self) holding a root marker, memoized per directory"""
+        walked = []
+        current = directory
+        root = None
+        while True:
+            if current in self._dir_roots:
+                root = self._dir_roots[current]
+                break
+            walked.append(current)
+            if any(os.path.exists(os.path.join(current, marker)) for marker in ROOT_MARKERS):
+                root = current
+                break
+            parent = os.path.dirname(current)
+            if parent == current:
+                break
+            current = parent
+        for seen in walked:
+            self._dir_roots[seen] = root
+        return root
+
+    def _index_path(self, root: str) -> str:
+        name = hashlib.blake2b(root.encode('utf-8'), digest_size=8).hexdigest()
+        return os.path.join(self.index_dir, f"{name}.json")
+
+    def _root_index(self, root: Optional[str]) -> _RootIndex:
+        """In-memory index for a root, loading the persisted one on first use (call under the lock)"""
+        index = self._roots.get(root)
+        if index is not None:
+            return index
+
+        index = _RootIndex(root)
+        if root and self.index_dir:
+            try:
+                with open(self._index_path(root), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if (data.get('version') == INDEX_VERSION and data.get('algorithm') == HASH_ALGORITHM
+                        and data.get('root') == root):
+                    index.entries = {rel: tuple(entry) for rel, entry in data.get('entries', {}).items()}
+                    self.stats['roots_loaded'] += 1
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable hash index for {root}: {e}")
+        self._roots[root] = index
+        return index
+
+    def _lookup(self, paths: List[str]) -> Tuple[Dict[str, Optional[str]], List[tuple]]:
+        """
+        Stat every path and serve digests whose (size, mtime_ns) still match (blocking)
+
+        Returns the digests found and the regular files still to hash, as
+        (path, root index, key, size, mtime_ns) tuples.
+        """
+        digests: Dict[str, Optional[str]] = {}
+        pending = []
+        for path in paths:
+            full_path = os.path.abspath(path)
+            try:
+                st = os.stat(full_path)
+            except OSError as e:
+                logger.debug(f"Could not stat {path}: {e}")
+                digests[path] = None
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                digests[path] = None
+                continue
+            with self._lock:
+                index = self._root_index(self._root_for(os.path.dirname(full_path)))
+                key = index.key(full_path)
+                known = index.entries.get(key)
+                self.stats['lookups'] += 1
+                if known is not None and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+                    self.stats['reused'] += 1
+                    digests[path] = known[2]
+                    continue
+            pending.append((path, index, key, st.st_size, st.st_mtime_ns))
+        return digests, pending
+
+    def _hash_batch(self, pending: List[tuple]) -> Dict[str, Optional[str]]:
+        """Hash files missing from the index and record them (blocking)"""
+        digests = {}
+        for path, index, key, size, mtime_ns in pending:
+            # Hand the GIL back between files so parallel batches don't starve the event loop
+            time.sleep(0)
+            try:
+                digest = hash_file(os.path.join(index.root, key) if index.root else key)
+            except OSError as e:
+                logger.debug(f"Could not hash {path}: {e}")
+                with self._lock:
+                    self.stats['errors'] += 1
+                digests[path] = None
+                continue
+            with self._lock:
+                index.entries.pop(key, None)
+                index.entries[key] = (size, mtime_ns, digest)
+                while len(index.entries) > self.max_entries_per_root:
+                    index.entries.pop(next(iter(index.entries)))
+                index.dirty = True
+                self.stats['files_hashed'] += 1
+            digests[path] = digest
+        return digests
+
+    def digest_files(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Digest every path on the calling thread and persist new entries (blocking)"""
+        digests, pending = self._lookup(list(dict.fromkeys(paths)))
+        if pending:
+            digests.update(self._hash_batch(pending))
+            self.save()
+        return digests
+
+    async def digest_many(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Digest every path without blocking the event loop, keyed by the paths as given
+
+        Unchanged files cost one stat on a single worker; only files missing from the
+        index are hashed, in parallel batches on the index's thread pool, and their
+        digests are persisted.
+        """
+        unique = list(dict.fromkeys(paths))
+        if not unique:
+            return {}
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='hash-index')
+
+        loop = asyncio.get_running_loop()
+        digests, pending = await loop.run_in_executor(self._executor, self._lookup, unique)
+        if not pending:
+            return digests
+
+        batch_size = max(1, min(_BATCH_SIZE, -(-len(pending) // self.max_workers)))
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        for result in await asyncio.gather(
+                *(loop.run_in_executor(self._executor, self._hash_batch, batch) for batch in batches)):
+            digests.update(result)
+        await loop.run_in_executor(self._executor, self.save)
+        return digests
+
+    def save(self):
+        """Write back every persisted root with new entries (blocking)"""
+        if not self.index_dir:
+            return
+        with self._lock:
+            pending = [(index.root, dict(index.entries)) for index in self._roots.values()
+                       if index.root and index.dirty]
+            for index in self._roots.values():
+                index.dirty = False
+        for root, entries in pending:
+            try:
+                os.makedirs(self.index_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(prefix='.hash_index.', suffix='.tmp', dir=self.index_dir)
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        f.write(json.dumps({'version': INDEX_VERSION, 'algorithm': HASH_ALGORITHM,
+                                            'root': root, 'entries': entries}))
+                    os.replace(tmp_path, self._index_path(root))
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
+                with self._lock:
+                    self.stats['saves'] += 1
+            except OSError as e:
+                logger.warning(f"Could not persist hash index for {root}: {e}")
+
+    def clear(self):
+        """Forget in-memory entries (persisted indexes are reloaded on next use)"""
+        with self._lock:
+            self._roots.clear()
+            self._dir_roots.clear()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def get_stats(self) -> Dict:
+        """Reuse counters and index sizes"""
+        with self._lock:
+            entries = sum(len(index.entries) for index in self._roots.values())
+            roots = sum(1 for root in self._roots if root)
+        return {
+            **self.stats,
+            'algorithm': HASH_ALGORITHM,
+            'entries': entries,
+            'roots': roots,
+            'reuse_rate': self.stats['reused'] / self.stats['lookups'] if self.stats['lookups'] else 0.0
+        }
+
+
+# Global index instance
+_global_index: Optional[HashIndex] = None
+
+
+def get_hash_index(smart_config=None) -> HashIndex:
+    """Get the shared hash index (in memory only when configuration is unavailable)"""
+    global _global_index
+
+    if _global_index is None:
+        if smart_config is None:
+            try:
+                try:
+                    from ..config import config as smart_config
+                except ImportError:
+                    from config import config as smart_config
+            except Exception as e:
+                logger.warning(f"Hash index not persisted - configuration unavailable: {e}")
+
+        if smart_config is None:
+            _global_index = HashIndex()
+        else:
+            _global_index = HashIndex(
+                index_dir=smart_config.hash_index_dir if smart_config.hash_index_persist else None,
+                max_workers=smart_config.hash_index_workers,
+                max_entries_per_root=smart_config.hash_index_max_entries
+            )
+
+    return _global_index
+
+
+def reset_hash_index():
+    """Shut down and drop the shared index (tests and config reloads)"""
+    global _global_index
+
+    if _global_index:
+        _global_index.close()
+
+    _global_index = None
@@ -0,0 +1,180 @@
+"""
+Event-loop lag monitor - measures whether our own event loop is starved
+A sampler task records how late each scheduled wakeup actually runs, and a
+watchdog thread notices when the loop stops waking up at all, attributing the
+stall to the running task with stack samples of the blocking code
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    """
+    Scheduled-vs-actual wakeup delay of one event loop, plus blocking detection
+
+    The sampler sleeps `sample_interval_ms` at a time and records how far past
+    the scheduled wakeup it resumed. Meanwhile a daemon thread checks that
+    wakeups keep happening; once the loop has been unresponsive for
+    `block_threshold_ms` it records which task is running and samples the loop
+    thread's stack (up to `max_stack_samples` per stall, one per threshold
+    period). The stall's total duration is filled in when the loop resumes.
+    """
+
+    def __init__(self, sample_interval_ms: float = 50.0, lag_threshold_ms: float = 100.0,
+                 block_threshold_ms: float = 250.0, window: int = 200,
+                 max_stack_samples: int = 3, stack_depth: int = 12, max_events: int = 20):
+        self.sample_interval = sample_interval_ms / 1000
+        self.lag_threshold_ms = lag_threshold_ms
+        self.block_threshold = block_threshold_ms / 1000
+        self.max_stack_samples = max_stack_samples
+        self.stack_depth = stack_depth
+
+        self._lags_ms: Deque[float] = deque(maxlen=window)
+        self._ewma_ms = 0.0
+        self._max_lag_ms = 0.0
+        self._samples = 0
+        self.blocking_events: Deque[Dict] = deque(maxlen=max_events)
+        self._blocks_detected = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._expected_wakeup = 0.0
+        self._current_block: Optional[Dict] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start sampling the given (default: running) loop; a no-op if already running"""
+        if self.running:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._stop.clear()
+        self._expected_wakeup = time.monotonic() + self.sample_interval
+        self._task = self._loop.create_task(self._sample(), name='loop-lag-monitor')
+        self._watchdog = threading.Thread(target=self._watch, name='loop-lag-watchdog', daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        """Stop the sampler and watchdog"""
+        self._stop.set()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+        if self._watchdog is not None and self._watchdog is not threading.current_thread():
+            self._watchdog.join(timeout=1.0)
+        self._watchdog = None
+
+    async def _sample(self):
+        self._loop_thread_id = threading.get_ident()
+        try:
+            while not self._stop.is_set():
+                self._expected_wakeup = time.monotonic() + self.sample_interval
+                await asyncio.sleep(self.sample_interval)
+                self._record(max(0.0, time.monotonic() - self._expected_wakeup))
+        finally:
+            # The loop went away without stop(); let the watchdog exit too
+            self._stop.set()
+
+    def _record(self, lag: float):
+        lag_ms = lag * 1000
+        self._lags_ms.append(lag_ms)
+        self._samples += 1
+        self._ewma_ms += 0.2 * (lag_ms - self._ewma_ms)
+        self._max_lag_ms = max(self._max_lag_ms, lag_ms)
+
+        with self._lock:
+            block, self._current_block = self._current_block, None
+        if block is not None:
+            block['duration_ms'] = round(lag_ms + self.sample_interval * 1000, 1)
+            logger.warning(f"Event loop blocked for {block['duration_ms']:.0f}ms by task {block['task']}")
+
+    def _watch(self):
+        """Watchdog thread: sample the loop thread's stack while wakeups are overdue"""
+        check_every = max(self.block_threshold / 4, 0.005)
+        while not self._stop.wait(check_every):
+            overdue = time.monotonic() - self._expected_wakeup
+            if overdue < self.block_threshold:
+                continue
+            with self._lock:
+                block = self._current_block
+                if block is None:
+                    block = self._open_block()
+                if block is not None and len(block['stacks']) < self.max_stack_samples \
+                        and overdue >= self.block_threshold * (len(block['stacks']) + 1):
+                    stack = self._sample_stack()
+                    if stack:
+                        block['stacks'].append(stack)
+                        if len(block['stacks']) == 1:
+                            logger.warning(f"Event loop unresponsive for {overdue * 1000:.0f}ms in task "
+                                           f"{block['task']}:\n" + ''.join(stack))
+
+    def _open_block(self) -> Optional[Dict]:
+        if self._loop is None or self._loop_thread_id is None:
+            return None
+        task = None
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            pass
+        self._current_block = {
+            'task': task.get_name() if task is not None else '<callback>',
+            'started_at': time.time() - (time.monotonic() - self._expected_wakeup),
+            'duration_ms': None,
+            'stacks': []
+        }
+        self.blocking_events.append(self._current_block)
+        self._blocks_detected += 1
+        return self._current_block
+
+    def _sample_stack(self) -> List[str]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return []
+        return traceback.format_list(traceback.extract_stack(frame, limit=self.stack_depth))
+
+    def current_lag_ms(self) -> float:
+        """Smoothed lag, counting a stall that is still in progress"""
+        if not self.running:
+            return self._ewma_ms
+        overdue_ms = (time.monotonic() - self._expected_wakeup) * 1000
+        return max(self._ewma_ms, overdue_ms)
+
+    def is_lagging(self) -> bool:
+        """Whether the loop is currently starved past `lag_threshold_ms`"""
+        return self.current_lag_ms() > self.lag_threshold_ms
+
+    def get_stats(self) -> Dict:
+        """Lag percentiles over the sample window and recent blocking events"""
+        ordered = sorted(self._lags_ms)
+
+        def pct(q):
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2) if ordered else 0.0
+
+        with self._lock:
+            events = [dict(e, stacks=list(e['stacks'])) for e in self.blocking_events]
+        return {
+            'running': self.running,
+            'samples': self._samples,
+            'lag_ms': round(self._ewma_ms, 2),
+            'lag_p50_ms': pct(0.5),
+            'lag_p95_ms': pct(0.95),
+            'lag_max_ms': round(self._max_lag_ms, 2),
+            'lag_threshold_ms': self.lag_threshold_ms,
+            'lagging': self.is_lagging(),
+            'blocks_detected': self._blocks_detected,
+            'recent_blocks': events
+        }
@@ -0,0 +1,150 @@
+"""
+Shared process pool for CPU-bound analysis stages
+Pure-Python regex and SequenceMatcher passes hold the GIL, so running them in a
+thread still stalls the event loop. This pool runs them in worker processes,
+started lazily on first use, and ships results back pickled and compressed
+"""
+import asyncio
+import logging
+import multiprocessing
+import pickle
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Results pickled larger than this are zlib-compressed before crossing the pipe
+COMPRESS_THRESHOLD_BYTES = 4096
+
+
+def _run_compact(func: Callable, args: tuple, kwargs: dict) -> Tuple[bool, bytes]:
+    """Worker entry point: run `func` and return (compressed, payload)"""
+    payload = pickle.dumps(func(*args, **kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+    if len(payload) >= COMPRESS_THRESHOLD_BYTES:
+        return True, zlib.compress(payload, 1)
+    return False, payload
+
+
+def decode_result(compressed: bool, payload: bytes) -> Any:
+    """Inverse of the worker's compact encoding"""
+    return pickle.loads(zlib.decompress(payload) if compressed else payload)
+
+
+class ProcessPool:
+    """
+    Lazily started process pool for picklable, module-level functions
+
+    Work smaller than `min_offload_chars` (per the caller's size hint) runs
+    inline, since a round-trip to a worker costs more than it saves. If the
+    pool can't start or breaks, work falls back to a thread so callers always
+    get a result.
+    """
+
+    def __init__(self, max_workers: int = 2, min_offload_chars: int = 20_000,
+                 start_method: Optional[str] = None):
+        self.max_workers = max(1, max_workers)
+        self.min_offload_chars = min_offload_chars
+        # forkserver avoids forking a process that is running an event loop and threads
+        methods = multiprocessing.get_all_start_methods()
+        self.start_method = start_method or ('forkserver' if 'forkserver' in methods else 'spawn')
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.stats = {
+            'offloaded': 0, 'inline': 0, 'thread_fallbacks': 0,
+            'bytes_returned': 0, 'compressed': 0, 'restarts': 0
+        }
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method)
+            )
+            logger.info(f"Started process pool ({self.max_workers} workers, {self.start_method})")
+        return self._executor
+
+    async def run(self, func: Callable, *args, size_hint: Optional[int] = None, **kwargs) -> Any:
+        """Run `func(*args, **kwargs)` in a worker process and return its result"""
+        if size_hint is not None and size_hint < self.min_offload_chars:
+            self.stats['inline'] += 1
+            return func(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        try:
+            compressed, payload = await loop.run_in_executor(
+                self._get_executor(), _run_compact, func, args, kwargs
+            )
+        except (BrokenProcessPool, pickle.PicklingError, OSError) as e:
+            logger.warning(f"Process pool unavailable ({type(e).__name__}: {e}); running {func.__name__} in a thread")
+            if isinstance(e, BrokenProcessPool):
+                self._discard_executor()
+            self.stats['thread_fallbacks'] += 1
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+        self.stats['offloaded'] += 1
+        self.stats['bytes_returned'] += len(payload)
+        self.stats['compressed'] += compressed
+        return decode_result(compressed, payload)
+
+    def _discard_executor(self):
+        """Drop a broken executor; the next call starts a fresh one"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self.stats['restarts'] += 1
+
+    def shutdown(self, wait: bool = True):
+        """Stop worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict:
+        """Offload counters and pool state"""
+        return {
+            **self.stats,
+            'started': self._executor is not None,
+            'max_workers': self.max_workers,
+            'start_method': self.start_method,
+            'min_offload_chars': self.min_offload_chars
+        }
+
+
+# Global pool instance
+_global_pool: Optional[ProcessPool] = None
+
+
+def get_process_pool(smart_config=None) -> Optional[ProcessPool]:
+    """Get the shared process pool, or None when offloading is disabled"""
+    global _global_pool
+
+    if _global_pool is None:
+        if smart_config is None:
+            try:
+                try:
+                    from ..config import config as smart_config
+                except ImportError:
+                    from config import config as smart_config
+            except Exception as e:
+                logger.warning(f"Process pool initialized with default configuration: {e}")
+
+        if smart_config is None:
+            _global_pool = ProcessPool()
+        elif smart_config.enable_process_pool:
+            _global_pool = ProcessPool(
+                max_workers=smart_config.process_pool_workers,
+                min_offload_chars=smart_config.process_pool_min_offload_chars
+            )
+
+    return _global_pool
+
+
+def reset_process_pool():
+    """Shut down and drop the shared pool"""
+    global _global_pool
+
+    if _global_pool:
+        _global_pool.shutdown(wait=False)
+
+    _global_pool = None
@@ -0,0 +1,139 @@
+"""
+Incremental progress reporting for long-running smart tool calls
+Partial Gemini output and engine completions are pushed to the MCP client as
+progress notifications while the full result is still being assembled
+"""
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# (progress, total, message) -> notification
+SendProgress = Callable[[float, Optional[float], str], Awaitable[None]]
+
+# Set per tool call by the MCP server; engine tasks inherit it through asyncio's context copying
+_current_reporter: ContextVar[Optional['ProgressReporter']] = ContextVar('progress_reporter', default=None)
+
+# Markdown headings mark natural section boundaries in streamed model output
+_SECTION_MARKERS = ('\n## ', '\n### ', '\n#### ')
+
+
+class ProgressReporter:
+    """
+    Buffers streamed text per source and emits it as progress notifications
+
+    The first chunk from each source is sent immediately. After that, chunks
+    are flushed when a new markdown section starts, when the buffer
+    reaches `flush_chars`, or when `flush_interval_seconds` has passed since the
+    last flush. Send failures are logged and never break the tool call.
+    """
+
+    def __init__(self, send: SendProgress, flush_chars: int = 1500,
+                 flush_interval_seconds: float = 2.0, max_message_chars: int = 4000):
+        self._send = send
+        self.flush_chars = flush_chars
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_message_chars = max_message_chars
+        self.progress = 0
+        self.total: Optional[float] = None
+        self.notifications_sent = 0
+        self.first_notification_at: Optional[float] = None
+        self.started_at = time.monotonic()
+        self._buffers: Dict[str, List[str]] = {}
+        self._buffer_sizes: Dict[str, int] = {}
+        self._last_flush: Dict[str, float] = {}
+        self._send_lock = asyncio.Lock()
+
+    async def report(self, message: str):
+        """Emit a one-line status update"""
+        await self._emit(message)
+
+    async def section(self, title: str, text: str = ""):
+        """Emit a completed section (e.g. one engine's findings)"""
+        body = f"## {title}\n{text}".rstrip()
+        await self._emit(body)
+
+    async def stream_chunk(self, source: str, text: str):
+        """Buffer a streamed chunk and flush at section boundaries or size/time limits"""
+        if not text:
+            return
+        if source not in self._last_flush:
+            # First output from a source goes out immediately - time-to-first-output matters most
+            self._append(source, text)
+            await self.flush(source)
+            return
+
+        # Close the current section at a heading so each notification holds whole sections
+        boundary = max((text.rfind(marker) for marker in _SECTION_MARKERS), default=-1)
+        if boundary >= 0 and self._buffer_sizes.get(source, 0) + boundary > 0:
+            self._append(source, text[:boundary])
+            await self.flush(source)
+            text = text[boundary:]
+
+        self._append(source, text)
+        due = time.monotonic() - self._last_flush[source] >= self.flush_interval_seconds
+        if due or self._buffer_sizes.get(source, 0) >= self.flush_chars:
+            await self.flush(source)
+
+    def _append(self, source: str, text: str):
+        if text:
+            self._buffers.setdefault(source, []).append(text)
+            self._buffer_sizes[source] = self._buffer_sizes.get(source, 0) + len(text)
+
+    async def flush(self, source: Optional[str] = None):
+        """Emit buffered text for one source (or all sources)"""
+        sources = [source] if source is not None else list(self._buffers)
+        for name in sources:
+            chunks = self._buffers.pop(name, None)
+            self._buffer_sizes.pop(name, None)
+            self._last_flush[name] = time.monotonic()
+            if chunks:
+                await self._emit(f"[{name}] {''.join(chunks)}")
+
+    async def _emit(self, message: str):
+        if len(message) > self.max_message_chars:
+            message = message[:self.max_message_chars] + "\n... (continued in final result)"
+        async with self._send_lock:
+            self.progress += 1
+            try:
+                await self._send(self.progress, self.total, message)
+                self.notifications_sent += 1
+                if self.first_notification_at is None:
+                    self.first_notification_at = time.monotonic()
+                    logger.debug(f"First progress notification after "
+                                 f"{self.first_notification_at - self.started_at:.2f}s")
+            except Exception as e:
+                logger.debug(f"Progress notification failed (ignored): {e}")
+
+
+def get_progress_reporter() -> Optional[ProgressReporter]:
+    """Reporter for the current tool call, or None when the client didn't ask for progress"""
+    return _current_reporter.get()
+
+
+@contextmanager
+def progress_scope(reporter: Optional[ProgressReporter]):
+    """Make `reporter` current for the duration of a tool call"""
+    token = _current_reporter.set(reporter)
+    try:
+        yield reporter
+    finally:
+        _current_reporter.reset(token)
+
+
+async def report_progress(message: str):
+    """Emit a status update if a reporter is active (no-op otherwise)"""
+    reporter = _current_reporter.get()
+    if reporter is not None:
+        await reporter.report(message)
+
+
+async def report_section(title: str, text: str = ""):
+    """Emit a completed section if a reporter is active (no-op otherwise)"""
+    reporter = _current_reporter.get()
+    if reporter is not None:
+        await reporter.section(title, text)
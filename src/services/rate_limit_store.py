@@ -0,0 +1,235 @@
+"""
+Write-behind, crash-safe store for Gemini rate limit metrics
+Keeps the ledger in memory, snapshots it periodically with an atomic
+write-temp-then-rename, and merges concurrent updates from other server
+processes under a file lock instead of overwriting them
+"""
+import asyncio
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# Per-model fields that count events - merged by adding each process's delta
+COUNTER_FIELDS = ('count', 'rpm_hits', 'rpd_hits')
+
+
+@contextmanager
+def _file_lock(lock_path: str):
+    """Exclusive cross-process lock on a sidecar file"""
+    with open(lock_path, 'a+') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _merge_counters(base: Dict, local: Dict, other: Dict) -> Dict:
+    keys = set(local) | set(other)
+    return {k: other.get(k, 0) + local.get(k, 0) - base.get(k, 0) for k in keys}
+
+
+def merge_entry(base: Optional[Dict], local: Optional[Dict], other: Optional[Dict]) -> Optional[Dict]:
+    """Three-way merge of one model's entry
+
+    `base` is what this process last synced with the file, `local` is its
+    current view and `other` is what is on disk now. Counters add both sides'
+    increments; other fields take this process's value only if it changed them.
+    """
+    if local == base or local is None:
+        return copy.deepcopy(other if other is not None else local)
+    if other is None:
+        return copy.deepcopy(local)
+    if local.get('date') != other.get('date'):
+        # A day rollover on one side - the newer day wins outright
+        newer = local if (local.get('date') or '') > (other.get('date') or '') else other
+        return copy.deepcopy(newer)
+
+    base = base or {}
+    same_day_base = base if base.get('date') == local.get('date') else {}
+    merged = copy.deepcopy(other)
+    for field, value in local.items():
+        if field in COUNTER_FIELDS:
+            merged[field] = other.get(field, 0) + value - same_day_base.get(field, 0)
+        elif field == 'key_hits':
+            merged[field] = _merge_counters(same_day_base.get(field, {}), value, other.get(field, {}))
+        elif value != base.get(field):
+            merged[field] = copy.deepcopy(value)
+    return merged
+
+
+def merge_ledger(base: Dict, local: Dict, other: Dict) -> Dict:
+    """Three-way merge of the full ledger (see merge_entry)"""
+    merged = {}
+    for model_name in set(base) | set(local) | set(other):
+        entry = merge_entry(base.get(model_name), local.get(model_name), other.get(model_name))
+        if entry is not None:
+            merged[model_name] = entry
+    return merged
+
+
+class RateLimitStore:
+    """
+    In-memory rate limit ledger with periodic atomic snapshots
+
+    Callers mutate `data` in place and call `mark_dirty()`. A background task
+    flushes dirty state every `flush_interval_seconds` in a worker thread, so
+    the event loop never blocks on file I/O. Each flush locks the file, merges
+    in updates other processes wrote since our last sync, writes a temp file
+    and renames it over the original, so readers never see a partial file.
+    """
+
+    def __init__(self, path: str, flush_interval_seconds: float = 5.0):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.flush_interval_seconds = flush_interval_seconds
+        self.data: Dict[str, Dict[str, Any]] = {}
+        self._base: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._io_lock = threading.Lock()
+        self.stats = {'flushes': 0, 'merged_external_updates': 0, 'errors': 0}
+
+    def _read_file(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read rate limits from {self.path}: {e}")
+            return {}
+
+    def _write_atomic(self, data: Dict[str, Dict[str, Any]]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.rate_limits.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Load the ledger from disk into `data` (in place) and return it"""
+        with self._io_lock:
+            disk = self._read_file()
+        self.data.clear()
+        self.data.update(copy.deepcopy(disk))
+        self._base = copy.deepcopy(disk)
+        return self.data
+
+    def mark_dirty(self):
+        """Record that `data` changed; schedules a write-behind flush if a loop is running"""
+        self._dirty = True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._flush_task is None or self._flush_task.done() or self._flush_task.get_loop() is not loop:
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        try:
+            await asyncio.sleep(self.flush_interval_seconds)
+        except asyncio.CancelledError:
+            return
+        await self.aflush()
+
+    def _sync_with_disk(self, snapshot: Dict, base: Dict) -> Dict:
+        """Lock, merge with disk and atomically write; returns what was written"""
+        with self._io_lock, _file_lock(self.lock_path):
+            disk = self._read_file()
+            if disk != base:
+                self.stats['merged_external_updates'] += 1
+            merged = merge_ledger(base, snapshot, disk)
+            self._write_atomic(merged)
+        self.stats['flushes'] += 1
+        return merged
+
+    def _apply_merged(self, snapshot: Dict, merged: Dict):
+        # Keep changes made while the write was in flight, on top of the merged state
+        current = merge_ledger(snapshot, self.data, merged)
+        self._dirty = current != merged
+        self.data.clear()
+        self.data.update(current)
+        self._base = merged
+
+    def flush(self):
+        """Synchronous flush - for shutdown paths without a running event loop"""
+        if not self._dirty:
+            return
+        snapshot, base = copy.deepcopy(self.data), copy.deepcopy(self._base)
+        try:
+            merged = self._sync_with_disk(snapshot, base)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Could not save rate limits: {e}")
+            return
+        self._apply_merged(snapshot, merged)
+
+    async def aflush(self):
+        """Flush in a worker thread without blocking the event loop"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        # Shielded so a cancelled caller can't leave a written snapshot unapplied
+        # (re-flushing it would count the same increments twice)
+        await asyncio.shield(self._flush_once(self._flush_lock))
+
+    async def _flush_once(self, flush_lock: asyncio.Lock):
+        async with flush_lock:
+            if not self._dirty:
+                return
+            snapshot, base = copy.deepcopy(self.data), copy.deepcopy(self._base)
+            try:
+                merged = await asyncio.to_thread(self._sync_with_disk, snapshot, base)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.warning(f"Could not save rate limits: {e}")
+                return
+            self._apply_merged(snapshot, merged)
+
+    async def aclose(self):
+        """Cancel the pending write-behind and flush immediately"""
+        task, self._flush_task = self._flush_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.aflush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Flush and merge counters"""
+        return {**self.stats, 'dirty': self._dirty, 'path': self.path}
@@ -0,0 +1,171 @@
+"""
+Container-aware CPU and memory accounting
+Host-wide psutil readings mostly reflect noisy neighbours in a container. This
+reads the cgroup v2 controller files for our own cgroup (cpu.max, cpu.stat,
+memory.current, memory.max) and this process's CPU time, and reports usage
+relative to the quota we can actually use
+"""
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+MODES = ('auto', 'cgroup', 'process', 'host')
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def find_cgroup_dir(cgroup_root: str = CGROUP_ROOT, proc_cgroup: str = '/proc/self/cgroup') -> Optional[str]:
+    """Directory of this process's cgroup v2 group, or None without a unified hierarchy"""
+    contents = _read(proc_cgroup) or ''
+    for line in contents.splitlines():
+        hierarchy, _, path = line.partition('::')
+        if hierarchy == '0':
+            candidate = os.path.join(cgroup_root, path.lstrip('/'))
+            # Inside a cgroup namespace the group is mounted at the root
+            for directory in (candidate, cgroup_root):
+                if os.path.exists(os.path.join(directory, 'cgroup.controllers')):
+                    return directory
+    return None
+
+
+class ResourceAccounting:
+    """
+    CPU usage as a percent of this container's quota, and cgroup memory usage
+
+    Modes: 'cgroup' (the whole cgroup's usage from cpu.stat, including pool
+    workers and other processes in the container), 'process' (this process's
+    CPU time), 'host' (legacy host-wide psutil) and 'auto' (cgroup when a v2
+    hierarchy is available, else process). Quota comes from cpu.max, or the CPUs
+    this process may run on when unlimited. Time spent throttled by the cgroup
+    since the last sample counts as 100% of quota. Memory is read from the
+    cgroup's limit when it has one, else host-wide.
+    """
+
+    def __init__(self, mode: str = 'auto', cgroup_dir: Optional[str] = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown CPU accounting mode {mode!r}; expected one of {MODES}")
+        self.cgroup_dir = cgroup_dir if cgroup_dir is not None else find_cgroup_dir()
+        if mode == 'auto':
+            mode = 'cgroup' if self.cgroup_dir else 'process'
+        elif mode == 'cgroup' and not self.cgroup_dir:
+            logger.warning("No cgroup v2 hierarchy found - accounting CPU for this process only")
+            mode = 'process'
+        self.mode = mode
+
+        self._process = psutil.Process()
+        self._last_wall: Optional[float] = None
+        self._last_usage_usec: Optional[float] = None
+        self._last_throttled_usec: Optional[float] = None
+        self._last_percent = 0.0
+        self._throttled_samples = 0
+
+    def _cgroup_file(self, name: str) -> Optional[str]:
+        return _read(os.path.join(self.cgroup_dir, name)) if self.cgroup_dir else None
+
+    def cpu_quota_cores(self) -> float:
+        """CPUs' worth of time available per second: cpu.max quota, else usable CPUs"""
+        cpu_max = self._cgroup_file('cpu.max')
+        if cpu_max:
+            quota, _, period = cpu_max.partition(' ')
+            if quota != 'max':
+                try:
+                    return max(float(quota) / float(period or 100000), 0.01)
+                except ValueError:
+                    logger.debug(f"Unparseable cpu.max: {cpu_max!r}")
+        try:
+            return float(len(os.sched_getaffinity(0)))
+        except (AttributeError, OSError):
+            return float(os.cpu_count() or 1)
+
+    def _cpu_stat(self) -> Dict[str, float]:
+        stats = {}
+        for line in (self._cgroup_file('cpu.stat') or '').splitlines():
+            key, _, value = line.partition(' ')
+            try:
+                stats[key] = float(value)
+            except ValueError:
+                continue
+        return stats
+
+    def _usage_usec(self) -> Optional[float]:
+        if self.mode == 'cgroup':
+            return self._cpu_stat().get('usage_usec')
+        times = self._process.cpu_times()
+        return (times.user + times.system + times.children_user + times.children_system) * 1_000_000
+
+    def cpu_percent(self) -> float:
+        """CPU used since the previous call, as a percent of quota (0.0 on the first call)"""
+        if self.mode == 'host':
+            self._last_percent = psutil.cpu_percent(interval=None)
+            return self._last_percent
+
+        now = time.monotonic()
+        usage = self._usage_usec()
+        throttled = self._cpu_stat().get('throttled_usec') if self.cgroup_dir else None
+        percent = 0.0
+        if usage is not None and self._last_usage_usec is not None and now > self._last_wall:
+            elapsed_usec = (now - self._last_wall) * 1_000_000
+            percent = (usage - self._last_usage_usec) / (elapsed_usec * self.cpu_quota_cores()) * 100
+            if throttled is not None and self._last_throttled_usec is not None \
+                    and throttled > self._last_throttled_usec:
+                self._throttled_samples += 1
+                percent = max(percent, 100.0)
+
+        self._last_wall, self._last_usage_usec, self._last_throttled_usec = now, usage, throttled
+        self._last_percent = max(0.0, percent)
+        return self._last_percent
+
+    def memory_percent(self) -> float:
+        """memory.current / memory.max for a limited cgroup, else host memory usage"""
+        if self.mode == 'host':
+            return psutil.virtual_memory().percent
+        current, limit = self._cgroup_file('memory.current'), self._cgroup_file('memory.max')
+        if current and limit and limit != 'max':
+            try:
+                return float(current) / float(limit) * 100
+            except (ValueError, ZeroDivisionError):
+                logger.debug(f"Unparseable cgroup memory files: {current!r} / {limit!r}")
+        return psutil.virtual_memory().percent
+
+    def get_stats(self) -> Dict:
+        """Accounting mode, quota and latest readings"""
+        return {
+            'mode': self.mode,
+            'cgroup_dir': self.cgroup_dir,
+            'cpu_quota_cores': round(self.cpu_quota_cores(), 2),
+            'cpu_percent_of_quota': round(self._last_percent, 1),
+            'cgroup_throttled_samples': self._throttled_samples,
+            'memory_percent': round(self.memory_percent(), 1)
+        }
+
+
+# Global accounting instance
+_global_accounting: Optional[ResourceAccounting] = None
+
+
+def get_resource_accounting(mode: Optional[str] = None) -> ResourceAccounting:
+    """Get the shared accounting instance (mode applies on first creation)"""
+    global _global_accounting
+
+    if _global_accounting is None:
+        _global_accounting = ResourceAccounting(mode or 'auto')
+
+    return _global_accounting
+
+
+def reset_resource_accounting():
+    """Drop the shared accounting instance (tests and config reloads)"""
+    global _global_accounting
+    _global_accounting = None
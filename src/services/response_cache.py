@@ -0,0 +1,222 @@
+"""
+Persistent content-addressed cache for Gemini responses
+Single-file SQLite store (WAL mode) shared safely by several MCP server processes
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed);
+CREATE INDEX IF NOT EXISTS idx_responses_created ON responses (created);
+"""
+
+
+class ResponseCache:
+    """
+    On-disk LLM response cache with TTL, byte budget and LRU eviction
+
+    Keys are SHA-256 digests of (model id, prompt, generation params); values
+    are zlib-compressed JSON. Each thread gets its own SQLite connection, and
+    WAL mode plus a busy timeout lets concurrent processes read while one writes.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = 7 * 24 * 3600,
+                 max_bytes: int = 256 * 1024 * 1024, busy_timeout_ms: int = 5000):
+        """
+        Initialize the response cache
+
+        Args:
+            db_path: SQLite database file (created if missing)
+            ttl_seconds: Age after which an entry is treated as a miss
+            max_bytes: Compressed payload budget before LRU eviction
+            busy_timeout_ms: How long a writer waits on another process's lock
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'expired': 0, 'errors': 0}
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        logger.info(f"Response cache initialized at {db_path} "
+                    f"(ttl={ttl_seconds}s, max={max_bytes // (1024 * 1024)}MB)")
+
+    def _conn(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections aren't shareable across threads)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def make_key(model_id: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Content-addressed key for a request"""
+        hasher = hashlib.sha256()
+        hasher.update(model_id.encode())
+        hasher.update(b'\0')
+        hasher.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+        hasher.update(b'\0')
+        hasher.update(prompt.encode('utf-8', errors='replace'))
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached value, or None if missing or expired"""
+        try:
+            conn = self._conn()
+            row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            value, created = row
+            if now - created > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            conn.execute("UPDATE responses SET accessed = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.stats['hits'] += 1
+            return json.loads(zlib.decompress(value))
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    def put(self, key: str, model_id: str, value: Dict[str, Any]):
+        """Store a value and evict least recently used entries if over budget"""
+        try:
+            blob = zlib.compress(json.dumps(value).encode(), 6)
+            now = time.time()
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, value, size, created, accessed, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, model_id, blob, len(blob), now, now)
+            )
+            self.stats['writes'] += 1
+            self._evict(conn, now)
+        except sqlite3.Error as e:
+            self.stats['errors'] += 1
+            logger.warning(f"Response cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then LRU entries until under 90% of the byte budget"""
+        expired = conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)).rowcount
+        self.stats['expired'] += max(expired, 0)
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = int(self.max_bytes * 0.9)
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC"):
+            if total <= target:
+                break
+            victims.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.stats['evictions'] += len(victims)
+        logger.debug(f"Response cache evicted {len(victims)} LRU entries")
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """Non-blocking get (runs in a worker thread)"""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, model_id: str, value: Dict[str, Any]):
+        """Non-blocking put (runs in a worker thread)"""
+        await asyncio.to_thread(self.put, key, model_id, value)
+
+    def clear(self):
+        """Remove every cached response"""
+        self._conn().execute("DELETE FROM responses")
+        logger.info("Response cache cleared")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus on-disk totals"""
+        try:
+            entries, total = self._conn().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        except sqlite3.Error:
+            entries, total = None, None
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'hit_rate': self.stats['hits'] / lookups if lookups else 0.0,
+            'entries': entries,
+            'total_bytes': total,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds
+        }
+
+    def close(self):
+        """Close all per-thread connections"""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+
+# Global cache instance
+_global_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache(smart_config=None) -> ResponseCache:
+    """Get the global response cache instance"""
+    global _global_cache
+
+    if _global_cache is None:
+        if smart_config is None:
+            from ..config import config as smart_config
+        _global_cache = ResponseCache(
+            db_path=smart_config.response_cache_path,
+            ttl_seconds=smart_config.response_cache_ttl_seconds,
+            max_bytes=smart_config.response_cache_max_mb * 1024 * 1024
+        )
+
+    return _global_cache
+
+
+def reset_response_cache():
+    """Close and drop the global cache"""
+    global _global_cache
+
+    if _global_cache:
+        _global_cache.close()
+
+    _global_cache = None
@@ -3,12 +3,13 @@ Smart Tools MCP Server
 Consolidated 7-tool interface with intelligent routing
 """
 import asyncio
+import itertools
 import json
 import logging
 import os
 import sys
 import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 # MCP imports
@@ -42,6 +43,8 @@ from smart_tools.base_smart_tool import SmartToolResult
 from engines.original_tool_adapter import OriginalToolAdapter
 from routing.intent_analyzer import IntentAnalyzer, ToolIntent
 from services.cpu_throttler import CPUThrottler
+from services.concurrency_governor import governor_scope
+from services.progress_reporter import ProgressReporter, progress_scope
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -54,6 +57,7 @@ class SmartToolsMcpServer:
         self.server = Server("claude-smart-tools")
         self.engines = {}
         self.smart_tools = {}
+        self._tool_call_ids = itertools.count(1)
         
         # Initialize CPU throttler singleton early
         try:
@@ -509,32 +513,55 @@ class SmartToolsMcpServer:
                 if not self.engines:
                     await self.initialize_engines()
                 
-                result = await self._route_tool_call(name, arguments)
+                # Stream partial sections as progress notifications when the client asked for them
+                with progress_scope(self._create_progress_reporter()):
+                    result = await self._route_tool_call(name, arguments)
                 return [TextContent(type="text", text=result)]
                 
             except Exception as e:
                 logger.error(f"Tool execution failed for {name}: {e}")
                 return [TextContent(type="text", text=f"Tool execution failed: {str(e)}")]
     
+    def _create_progress_reporter(self) -> Optional[ProgressReporter]:
+        """Build a progress reporter for the current request if it carries a progressToken"""
+        if not config.enable_streaming_responses:
+            return None
+        try:
+            ctx = self.server.request_context
+        except LookupError:
+            return None
+        progress_token = getattr(ctx.meta, 'progressToken', None) if ctx.meta else None
+        if progress_token is None:
+            return None
+        
+        session = ctx.session
+        
+        async def send(progress: float, total: Optional[float], message: str):
+            await session.send_progress_notification(progress_token, progress, total, message)
+        
+        return ProgressReporter(send)
+    
     async def _route_tool_call(self, tool_name: str, arguments: Dict[str, Any]) -> str:
         """Route tool calls to appropriate smart tools"""
         
-        if tool_name == "understand":
-            return await self._handle_understand(arguments)
-        elif tool_name == "investigate":
-            return await self._handle_investigate(arguments)
-        elif tool_name == "validate":
-            return await self._handle_validate(arguments)
-        elif tool_name == "collaborate":
-            return await self._handle_collaborate(arguments)
-        elif tool_name == "propose_tests":
-            return await self._handle_propose_tests(arguments)
-        elif tool_name == "deploy":
-            return await self._handle_deploy(arguments)
-        elif tool_name == "full_analysis":
-            return await self._handle_full_analysis(arguments)
-        else:
-            return f"Unknown tool: {tool_name}"
+        # Each call is its own fairness group for the shared engine concurrency slots
+        with governor_scope(f"{tool_name}#{next(self._tool_call_ids)}"):
+            if tool_name == "understand":
+                return await self._handle_understand(arguments)
+            elif tool_name == "investigate":
+                return await self._handle_investigate(arguments)
+            elif tool_name == "validate":
+                return await self._handle_validate(arguments)
+            elif tool_name == "collaborate":
+                return await self._handle_collaborate(arguments)
+            elif tool_name == "propose_tests":
+                return await self._handle_propose_tests(arguments)
+            elif tool_name == "deploy":
+                return await self._handle_deploy(arguments)
+            elif tool_name == "full_analysis":
+                return await self._handle_full_analysis(arguments)
+            else:
+                return f"Unknown tool: {tool_name}"
     
     async def _handle_understand(self, arguments: Dict[str, Any]) -> str:
         """Handle understand tool calls"""
@@ -742,15 +769,21 @@ class SmartToolsMcpServer:
             stats = self.cpu_throttler.get_throttling_stats()
             logger.info(f"CPU throttling active: max_cpu={stats['max_cpu_percent']}%, "
                        f"yield_interval={stats['yield_interval_ms']}ms")
+            if self.cpu_throttler.start_loop_monitor():
+                logger.info("Event loop lag monitor started")
         else:
             logger.warning("CPU throttling not available - system may experience freezing under heavy load")
         
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream, 
-                self.server.create_initialization_options()
-            )
+        try:
+            async with stdio_server() as (read_stream, write_stream):
+                await self.server.run(
+                    read_stream,
+                    write_stream,
+                    self.server.create_initialization_options()
+                )
+        finally:
+            if self.cpu_throttler:
+                self.cpu_throttler.stop_loop_monitor()
 
 
 async def main():
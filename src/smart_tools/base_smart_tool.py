@@ -2,9 +2,11 @@
 Base class for smart tools that route to multiple engines with CPU throttling
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from dataclasses import asdict, dataclass, is_dataclass
+from typing import AsyncGenerator, Dict, Any, List, Optional
 from pydantic import BaseModel
 import asyncio
+import contextlib
 import logging
 import sys
 import os
@@ -12,6 +14,12 @@ import os
 # Handle imports for both module and script execution
 try:
     from ..services.cpu_throttler import get_cpu_throttler
+    from ..services.concurrency_governor import SUCCESS, failure_outcome, get_concurrency_governor
+    from ..services.process_pool import get_process_pool
+    from ..services.file_content_cache import get_file_content_cache
+    from ..services.file_watcher import get_file_watcher
+    from ..services.engine_result_store import ShardRun, get_engine_result_store, is_cacheable_result, plan_shards
+    from ..services.hash_index import get_hash_index
     from ..utils.project_context import get_project_context_reader
     from ..utils.path_utils import normalize_paths
     from ..utils.error_handler import handle_smart_tool_error
@@ -22,6 +30,12 @@ except ImportError:
     if parent_dir not in sys.path:
         sys.path.insert(0, parent_dir)
     from services.cpu_throttler import get_cpu_throttler
+    from services.concurrency_governor import SUCCESS, failure_outcome, get_concurrency_governor
+    from services.process_pool import get_process_pool
+    from services.file_content_cache import get_file_content_cache
+    from services.file_watcher import get_file_watcher
+    from services.engine_result_store import ShardRun, get_engine_result_store, is_cacheable_result, plan_shards
+    from services.hash_index import get_hash_index
     from utils.project_context import get_project_context_reader
     from utils.path_utils import normalize_paths
     from utils.error_handler import handle_smart_tool_error
@@ -42,6 +56,24 @@ class SmartToolResult(BaseModel):
     resolutions: Optional[List[Dict[str, Any]]] = None
 
 
+@dataclass
+class EngineRun:
+    """Outcome of one engine run from the concurrent executor"""
+    engine_name: str
+    result: Any = None
+    error: Optional[BaseException] = None
+    elapsed: Optional[float] = None
+
+    @property
+    def success(self) -> bool:
+        """True unless the engine raised, timed out or returned a structured/string error"""
+        if self.error is not None:
+            return False
+        if isinstance(self.result, dict):
+            return bool(self.result.get('success'))
+        return not (isinstance(self.result, str) and self.result.startswith("❌"))
+
+
 class BaseSmartTool(ABC):
     """Base class for all smart tools with CPU throttling and correlation support"""
     
@@ -52,14 +84,21 @@ class BaseSmartTool(ABC):
         # Get CPU throttler singleton instance
         self.cpu_throttler = get_cpu_throttler()
         
+        # Process-wide concurrency limit shared by all tools (None when disabled)
+        self.concurrency_governor = get_concurrency_governor()
+        
+        # Shared, lazily started worker processes for CPU-bound post-processing
+        self.process_pool = get_process_pool()
+        
         # Initialize correlation framework (lazy loading)
         self._correlation_framework = None
         self.enable_correlation = os.environ.get('ENABLE_CORRELATION_ANALYSIS', 'true').lower() == 'true'
         
-        # Initialize file content cache for this execution
-        from collections import OrderedDict
-        self._file_content_cache = {}  # {file_path: (content, mtime)}
-        self._cache_enabled = os.environ.get('ENABLE_FILE_CACHE', 'true').lower() == 'true'
+        # Process-wide file content cache, shared with the engines' code collection
+        self._file_content_cache = get_file_content_cache()
+        self._cached_paths = set()  # Files this tool has loaded into the shared cache
+        self._cache_enabled = (self._file_content_cache is not None and
+                               os.environ.get('ENABLE_FILE_CACHE', 'true').lower() == 'true')
         self._cache_hits = 0
         self._cache_misses = 0
         self._cache_stale_hits = 0
@@ -73,12 +112,23 @@ class BaseSmartTool(ABC):
         from collections import OrderedDict
         self.context_reader = get_project_context_reader()
         self._project_context_cache = OrderedDict()  # LRU cache for project context
+        self._file_watcher = get_file_watcher()  # Change notification for project roots (None when disabled)
+        self._hash_index = get_hash_index()  # Persisted full-content digests keyed by (size, mtime_ns)
         
         # Configure retry behavior
         self._max_retries = int(os.environ.get('ENGINE_MAX_RETRIES', '3'))
         self._base_retry_delay = float(os.environ.get('ENGINE_BASE_RETRY_DELAY', '1.0'))
         self._max_retry_delay = float(os.environ.get('ENGINE_MAX_RETRY_DELAY', '30.0'))
         
+        # Configure concurrent engine execution
+        self._engine_timeout = float(os.environ.get('ENGINE_TIMEOUT_SECONDS', '0'))
+        self._executor_stats = {'timed_out': 0, 'cancelled': 0}
+        
+        # Per-shard engine results reused across runs (None when incremental analysis is disabled)
+        self.result_store = get_engine_result_store()
+        self._incremental_shard_files = int(os.environ.get('INCREMENTAL_SHARD_FILES', '25'))
+        self._executor_stats.update({'fresh_shards': 0, 'reused_shards': 0})
+        
         if self.cpu_throttler:
             logger.debug(f"Smart tool {self.tool_name} initialized with CPU throttling, file caching, and project context awareness")
         else:
@@ -209,60 +259,30 @@ class BaseSmartTool(ABC):
             if self.cpu_throttler:
                 await self.cpu_throttler.yield_if_needed()
     
-    async def execute_multiple_engines(self, engine_names: List[str], **kwargs) -> Dict[str, Any]:
-        """Execute multiple engines with CPU-aware batching and improved error handling"""
+    async def execute_multiple_engines(self, engine_names: List[str], max_parallel: Optional[int] = None,
+                                       engine_timeout: Optional[float] = None, deadline: Optional[float] = None,
+                                       quorum: Optional[int] = None, **kwargs) -> Dict[str, Any]:
+        """
+        Execute multiple engines concurrently with bounded parallelism and improved error handling
+
+        Results are keyed by engine name in completion order; failed engines are logged and
+        left out so callers get partial results instead of failing completely.
+        """
         results = {}
         
         # Fix 4: Error Handling - Continue processing even if individual engines fail
-        if self.cpu_throttler:
-            # Use throttled batch processing for large engine sets
-            async for batch in self.cpu_throttler.throttled_batch_processing(engine_names, batch_size=3):
-                for engine_name in batch:
-                    try:
-                        result = await self.execute_engine(engine_name, **kwargs)
-                        
-                        # Check for structured success/error response
-                        if result and isinstance(result, dict) and result.get('success'):
-                            results[engine_name] = result
-                        elif result and isinstance(result, dict):
-                            # Log specific error from failed engine
-                            error_msg = result.get('error', 'Unknown failure')
-                            logger.warning(f"Engine {engine_name} failed: {error_msg}")
-                        else:
-                            # For non-dict results, check if it's an error string
-                            if isinstance(result, str) and result.startswith("❌"):
-                                logger.warning(f"Engine {engine_name} failed: {result}")
-                            else:
-                                # Treat as successful result
-                                results[engine_name] = result
-                                
-                    except Exception as e:
-                        logger.warning(f"Engine {engine_name} failed with exception: {e}")
-                        continue
-        else:
-            # Fallback: execute all engines sequentially with error handling
-            for engine_name in engine_names:
-                try:
-                    result = await self.execute_engine(engine_name, **kwargs)
-                    
-                    # Check for structured success/error response
-                    if result and isinstance(result, dict) and result.get('success'):
-                        results[engine_name] = result
-                    elif result and isinstance(result, dict):
-                        # Log specific error from failed engine
-                        error_msg = result.get('error', 'Unknown failure')
-                        logger.warning(f"Engine {engine_name} failed: {error_msg}")
-                    else:
-                        # For non-dict results, check if it's an error string
-                        if isinstance(result, str) and result.startswith("❌"):
-                            logger.warning(f"Engine {engine_name} failed: {result}")
-                        else:
-                            # Treat as successful result
-                            results[engine_name] = result
-                            
-                except Exception as e:
-                    logger.warning(f"Engine {engine_name} failed with exception: {e}")
-                    continue
+        async for run in self.iter_engine_results(engine_names, max_parallel=max_parallel,
+                                                  engine_timeout=engine_timeout, deadline=deadline,
+                                                  quorum=quorum, **kwargs):
+            if run.success:
+                results[run.engine_name] = run.result
+            elif run.error is not None:
+                logger.warning(f"Engine {run.engine_name} failed with exception: {run.error!r}")
+            elif isinstance(run.result, dict):
+                # Log specific error from failed engine
+                logger.warning(f"Engine {run.engine_name} failed: {run.result.get('error', 'Unknown failure')}")
+            else:
+                logger.warning(f"Engine {run.engine_name} failed: {run.result}")
         
         # Return partial results instead of failing completely
         if not results:
@@ -270,6 +290,144 @@ class BaseSmartTool(ABC):
         
         return results
     
+    async def iter_engine_results(self, engine_names: List[str], max_parallel: Optional[int] = None,
+                                  engine_timeout: Optional[float] = None, deadline: Optional[float] = None,
+                                  quorum: Optional[int] = None,
+                                  engine_kwargs: Optional[Dict[str, Dict[str, Any]]] = None,
+                                  **kwargs) -> AsyncGenerator[EngineRun, None]:
+        """
+        Run engines concurrently and yield an EngineRun for each one as it completes
+
+        Args:
+            engine_names: Engines to run, in priority order (earlier ones get slots first)
+            max_parallel: Optional cap on this call's engines in flight; the concurrency
+                governor bounds every engine call regardless
+            engine_timeout: Per-engine deadline in seconds (default ENGINE_TIMEOUT_SECONDS, 0 = none)
+            deadline: Overall deadline in seconds; engines still running are cancelled and
+                yielded as timed out
+            quorum: Stop after this many successful engines and cancel the stragglers
+            engine_kwargs: Per-engine keyword arguments merged over the shared **kwargs
+
+        Stragglers are also cancelled if the caller stops iterating early, so wrap partial
+        iteration in contextlib.aclosing().
+        """
+        if engine_timeout is None:
+            engine_timeout = self._engine_timeout or None
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + deadline if deadline else None
+        semaphore = asyncio.Semaphore(max_parallel) if max_parallel else contextlib.nullcontext()
+
+        async def run_engine(engine_name: str) -> EngineRun:
+            async with semaphore:
+                params = {**kwargs, **(engine_kwargs or {}).get(engine_name, {})}
+                started = loop.time()
+                try:
+                    result = await asyncio.wait_for(self.execute_engine(engine_name, **params), engine_timeout)
+                    return EngineRun(engine_name, result=result, elapsed=loop.time() - started)
+                except asyncio.TimeoutError as e:
+                    self._executor_stats['timed_out'] += 1
+                    logger.warning(f"Engine {engine_name} exceeded its {engine_timeout}s deadline")
+                    return EngineRun(engine_name, error=e, elapsed=loop.time() - started)
+                except Exception as e:
+                    return EngineRun(engine_name, error=e, elapsed=loop.time() - started)
+
+        tasks = {asyncio.create_task(run_engine(name)): name for name in engine_names}
+        pending = set(tasks)
+        succeeded = 0
+        try:
+            while pending:
+                timeout = None
+                if deadline_at is not None:
+                    timeout = deadline_at - loop.time()
+                    if timeout <= 0:
+                        break
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    run = task.result()
+                    succeeded += run.success
+                    yield run
+                if quorum and succeeded >= quorum:
+                    if pending:
+                        logger.info(f"Engine quorum of {quorum} reached; cancelling {len(pending)} stragglers")
+                        await self._cancel_engine_tasks(pending)
+                        pending = set()
+                    break
+
+            if pending:
+                logger.warning(f"Engine deadline of {deadline}s reached; cancelling {len(pending)} stragglers")
+                await self._cancel_engine_tasks(pending)
+                for task in sorted(pending, key=lambda t: engine_names.index(tasks[t])):
+                    yield EngineRun(tasks[task], error=asyncio.TimeoutError(f"deadline of {deadline}s reached"))
+                pending = set()
+        finally:
+            if pending:
+                await self._cancel_engine_tasks(pending)
+    
+    async def execute_engine_incremental(self, engine_name: str, path_param: str, files: List[str],
+                                         shard: bool = True, **kwargs) -> List[ShardRun]:
+        """
+        Run an engine over `files` shard by shard, reusing stored results for unchanged shards
+
+        Shards are keyed by the engine, `kwargs` and a content digest of each of their
+        files, so only shards containing a changed file reach the engine. Pass
+        shard=False for engines that compare files with each other; the whole file set
+        is then a single shard. Without the result store this is one execute_engine call.
+        """
+        store = self.result_store
+        paths = await asyncio.to_thread(normalize_paths, files, True) if store is not None else []
+        if not paths:
+            result = await self.execute_engine(engine_name, **{path_param: files}, **kwargs)
+            return [ShardRun(list(files), result)]
+        
+        shards = plan_shards(paths, self._incremental_shard_files) if shard else [sorted(paths)]
+        digests = await store.adigest_files(paths)
+        runs: List[Optional[ShardRun]] = []
+        keys: List[Optional[str]] = []
+        for shard_files in shards:
+            key = None
+            if all(digests.get(path) for path in shard_files):
+                key = store.make_key(engine_name, kwargs, [(path, digests[path]) for path in shard_files])
+            cached = store.get(key) if key else None
+            runs.append(ShardRun(shard_files, cached, reused=True) if cached is not None else None)
+            keys.append(key)
+        
+        fresh = [i for i, run in enumerate(runs) if run is None]
+        results = await asyncio.gather(
+            *(self.execute_engine(engine_name, **{path_param: shards[i]}, **kwargs) for i in fresh),
+            return_exceptions=True
+        )
+        for i, result in zip(fresh, results):
+            if isinstance(result, Exception):
+                runs[i] = ShardRun(shards[i], error=result)
+                continue
+            runs[i] = ShardRun(shards[i], result)
+            if keys[i] and is_cacheable_result(result):
+                store.put(keys[i], result)
+        
+        self._executor_stats['fresh_shards'] += len(fresh)
+        self._executor_stats['reused_shards'] += len(runs) - len(fresh)
+        if len(fresh) < len(runs):
+            logger.info(f"{engine_name}: reused {len(runs) - len(fresh)} of {len(runs)} shards from previous runs")
+        return runs
+    
+    async def _cancel_engine_tasks(self, tasks) -> None:
+        """Cancel in-flight engine tasks and wait for them to unwind"""
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._executor_stats['cancelled'] += len(tasks)
+    
+    async def _call_engine(self, engine: Any, engine_name: str, kwargs: Dict[str, Any]) -> Any:
+        """One engine attempt under a governor slot, released before any retry backoff"""
+        if not self.concurrency_governor:
+            return await (engine.execute(**kwargs) if hasattr(engine, 'execute') else engine(**kwargs))
+        # Every tool's engine calls share the process-wide slots
+        async with self.concurrency_governor.slot(engine_name) as held:
+            result = await (engine.execute(**kwargs) if hasattr(engine, 'execute') else engine(**kwargs))
+            # Engines report most failures (429s included) as text, so let those shrink the limit too
+            held.outcome = SUCCESS if is_cacheable_result(result) else failure_outcome(str(result))
+            return result
+    
     async def _execute_engine_with_retry(self, engine: Any, engine_name: str, kwargs: Dict[str, Any]) -> Any:
         """
         Execute engine with exponential backoff retry logic for rate limiting and transient errors
@@ -283,11 +441,7 @@ class BaseSmartTool(ABC):
         for attempt in range(max_retries + 1):
             try:
                 # Execute the engine
-                if hasattr(engine, 'execute'):
-                    result = await engine.execute(**kwargs)
-                else:
-                    # Direct function call
-                    result = await engine(**kwargs)
+                result = await self._call_engine(engine, engine_name, kwargs)
                     
                 # Success - return result
                 if attempt > 0:
@@ -329,22 +483,21 @@ class BaseSmartTool(ABC):
         
         try:
             # Lazy load correlation framework
+            try:
+                from ..services.correlation_framework import CorrelationFramework, analyze_engine_results
+            except ImportError:
+                from services.correlation_framework import CorrelationFramework, analyze_engine_results
             if self._correlation_framework is None:
-                from ..services.correlation_framework import CorrelationFramework
                 self._correlation_framework = CorrelationFramework()
             
-            # Run correlation analysis in executor to avoid blocking
-            from concurrent.futures import ThreadPoolExecutor
-            
-            # Use a thread pool for CPU-bound correlation analysis
-            loop = asyncio.get_event_loop()
-            with ThreadPoolExecutor(max_workers=1) as executor:
-                # Run the synchronous analyze method in a thread
-                correlation_results = await loop.run_in_executor(
-                    executor,
-                    self._correlation_framework.analyze,
-                    engine_results
+            correlation_results = self._correlation_framework.get_cached(engine_results)
+            if correlation_results is None:
+                # Regex and SequenceMatcher work holds the GIL, so run it in the shared process pool
+                correlation_results = await self.run_cpu_bound(
+                    analyze_engine_results, engine_results,
+                    size_hint=sum(len(str(result)) for result in engine_results.values())
                 )
+                self._correlation_framework.store_cached(engine_results, correlation_results)
             
             # Log summary
             if correlation_results and 'summary' in correlation_results:
@@ -360,6 +513,34 @@ class BaseSmartTool(ABC):
             logger.error(f"Correlation analysis failed: {e}")
             return None
     
+    def correlation_result_fields(self, correlation_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Correlation analysis as SmartToolResult fields (plain dicts rather than framework dataclasses)"""
+        if not correlation_data:
+            return {'correlations': None, 'conflicts': None, 'resolutions': None}
+        
+        def as_dicts(items):
+            return [asdict(item) if is_dataclass(item) else item for item in items or []]
+        
+        return {
+            'correlations': {
+                'items': as_dicts(correlation_data.get('correlations')),
+                'summary': correlation_data.get('summary')
+            },
+            'conflicts': as_dicts(correlation_data.get('conflicts')),
+            'resolutions': as_dicts(correlation_data.get('resolutions'))
+        }
+    
+    async def run_cpu_bound(self, func, *args, size_hint: Optional[int] = None, **kwargs) -> Any:
+        """
+        Run a CPU-heavy, module-level function off the event loop
+        
+        Uses the shared process pool (inline for small inputs per `size_hint`), or a
+        thread when the pool is disabled.
+        """
+        if self.process_pool:
+            return await self.process_pool.run(func, *args, size_hint=size_hint, **kwargs)
+        return await asyncio.to_thread(func, *args, **kwargs)
+    
     def format_correlation_report(self, correlation_data: Dict[str, Any]) -> str:
         """Format correlation analysis results for display"""
         if not correlation_data:
@@ -392,9 +573,7 @@ class BaseSmartTool(ABC):
         return "\n".join(report_parts) if report_parts else ""
     
     async def _populate_file_cache(self, kwargs: Dict[str, Any], path_params: List[str]) -> None:
-        """Pre-populate file content cache with timestamp validation for freshness"""
-        import aiofiles
-        import os
+        """Pre-populate the shared file content cache, re-reading only files that changed"""
         from pathlib import Path
         
         # Collect all unique file paths from kwargs
@@ -418,31 +597,23 @@ class BaseSmartTool(ABC):
                                         if len(all_files) > self._cache_dir_limit:
                                             break
         
-        # Read files into cache with timestamp validation
-        for file_path in all_files:
-            try:
-                current_mtime = await asyncio.to_thread(os.path.getmtime, file_path)
-                
-                # Check if file is in cache and if it's still fresh
-                if file_path in self._file_content_cache:
-                    cached_content, cached_mtime = self._file_content_cache[file_path]
-                    if cached_mtime == current_mtime:
-                        self._cache_hits += 1
-                        logger.debug(f"Cache hit (fresh) for file: {file_path}")
-                        continue
-                    else:
-                        self._cache_stale_hits += 1
-                        logger.debug(f"Cache stale for file: {file_path}, re-reading")
-                
-                # Read the file (either not cached or stale)
-                async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                    content = await f.read()
-                    self._file_content_cache[file_path] = (content, current_mtime)
-                    self._cache_misses += 1
-                    logger.debug(f"Cached file content with mtime: {file_path}")
-                    
-            except Exception as e:
-                logger.debug(f"Could not cache file {file_path}: {e}")
+        # Read through the shared cache; unchanged files (same size and mtime_ns) aren't re-read
+        cache = self._file_content_cache
+        paths = list(all_files)
+        results = []
+        for start in range(0, len(paths), 32):  # One worker-thread hop per batch
+            results.extend(await cache.fetch_many(paths[start:start + 32]))
+        for path, (content, outcome) in zip(paths, results):
+            if outcome == 'hit':
+                self._cache_hits += 1
+            elif outcome == 'stale':
+                self._cache_stale_hits += 1
+            elif outcome == 'miss':
+                self._cache_misses += 1
+            if content is not None:
+                self._cached_paths.add(path)
+        # Forget files the shared cache has since evicted
+        self._cached_paths = {path for path in self._cached_paths if path in cache}
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache statistics for debugging and optimization"""
@@ -451,16 +622,31 @@ class BaseSmartTool(ABC):
             'cache_hits': self._cache_hits,
             'cache_misses': self._cache_misses,
             'cache_stale_hits': self._cache_stale_hits,
-            'cache_size': len(self._file_content_cache),
+            'cache_size': len(self._cached_paths),
             'cache_hit_rate': self._cache_hits / total_accesses if total_accesses > 0 else 0,
             'cache_freshness_rate': self._cache_hits / (self._cache_hits + self._cache_stale_hits) if (self._cache_hits + self._cache_stale_hits) > 0 else 1.0,
             'cache_extensions': self._cache_extensions,
-            'cache_dir_limit': self._cache_dir_limit
+            'cache_dir_limit': self._cache_dir_limit,
+            'shared_cache': self._file_content_cache.get_stats() if self._file_content_cache else None
+        }
+    
+    def current_concurrency_limit(self) -> Optional[int]:
+        """Current process-wide engine concurrency limit, or None when ungoverned"""
+        return self.concurrency_governor.limit if self.concurrency_governor else None
+    
+    def get_executor_stats(self) -> Dict[str, Any]:
+        """Get concurrent engine executor statistics"""
+        return {
+            'concurrency_limit': self.current_concurrency_limit(),
+            'engine_timeout': self._engine_timeout or None,
+            **self._executor_stats
         }
     
     def clear_cache(self) -> None:
-        """Clear the file content cache to free memory"""
-        self._file_content_cache.clear()
+        """Drop this tool's files from the shared content cache to free memory"""
+        for path in self._cached_paths:
+            self._file_content_cache.invalidate(path)
+        self._cached_paths.clear()
         self._project_context_cache.clear()
         logger.info(f"Cleared file and project context cache. Stats: {self.get_cache_stats()}")
     
@@ -476,25 +662,14 @@ class BaseSmartTool(ABC):
                     files.append(str(value))
         return files
     
-    def _get_file_hash(self, file_path: str) -> str:
-        """Generate hash of file content for cache invalidation"""
-        import hashlib
-        try:
-            # For performance, only hash first 10KB of each file
-            with open(file_path, 'rb') as f:
-                return hashlib.md5(f.read(10240)).hexdigest()
-        except (IOError, OSError) as e:
-            logger.warning(f"Could not generate hash for {file_path}: {e}")
-            return None
-
     async def _get_project_context(self, files: List[str]) -> Dict[str, Any]:
         """Get project context with content-based cache invalidation"""
-        # Create cache key from ALL file hashes, not just first 5
-        file_hashes = []
-        for f in sorted(files):  # Sort for consistent key generation
-            hash_val = self._get_file_hash(f)
-            if hash_val:
-                file_hashes.append(f"{os.path.basename(f)}:{hash_val}")
+        if self._file_watcher is not None:
+            return self._get_watched_project_context(files)
+        
+        # Cache key from the full-content digest of every file, hashed in parallel off the event loop
+        digests = await self._hash_index.digest_many(files)
+        file_hashes = [f"{path}:{digest}" for path, digest in sorted(digests.items()) if digest]
         
         if not file_hashes:
             # No valid files to hash, skip caching
@@ -520,10 +695,40 @@ class BaseSmartTool(ABC):
             self._project_context_cache.popitem(last=False)
             logger.debug(f"Cache trimmed. Removed oldest entry.")
         
-        # Log what we found
+        self._log_project_context(context)
+        return context
+    
+    def _get_watched_project_context(self, files: List[str]) -> Dict[str, Any]:
+        """Get project context, re-reading it only when the watcher saw one of its files change"""
+        key = frozenset(os.path.abspath(f) for f in files)
+        cached = self._project_context_cache.get(key)
+        if cached is not None:
+            seq, context = cached
+            root = context.get('project_root')
+            dirty = self._file_watcher.dirty_paths(root, seq) if root else None
+            # Context comes from the analyzed files and the context files around the project root
+            context_dirs = {os.path.dirname(os.path.join(root, name)) for name in self.context_reader.CONTEXT_FILES}
+            if dirty is not None and not any(path in key or os.path.dirname(path) in context_dirs
+                                             for path in dirty):
+                logger.debug(f"Using watched project context for {len(files)} files")
+                self._project_context_cache.move_to_end(key)
+                return context
+        
+        seq = self._file_watcher.sequence
+        logger.info(f"Reading project context for {len(files)} files")
+        context = self.context_reader.read_project_context(files)
+        if context.get('project_root'):
+            self._file_watcher.watch(context['project_root'])
+        self._project_context_cache[key] = (seq, context)
+        if len(self._project_context_cache) > 10:
+            self._project_context_cache.popitem(last=False)
+        
+        self._log_project_context(context)
+        return context
+    
+    def _log_project_context(self, context: Dict[str, Any]) -> None:
+        """Log what the project context reader found"""
         if context.get('claude_md_content'):
             logger.info(f"Found project CLAUDE.md with {len(context['claude_md_content'])} chars")
         if context.get('project_type'):
-            logger.info(f"Detected project type: {context['project_type']}")
-        
-        return context
\ No newline at end of file
+            logger.info(f"Detected project type: {context['project_type']}")
\ No newline at end of file
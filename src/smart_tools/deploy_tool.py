@@ -6,6 +6,11 @@ from typing import List, Dict, Any, Optional
 from .base_smart_tool import BaseSmartTool, SmartToolResult
 from .executive_synthesizer import ExecutiveSynthesizer
 
+try:
+    from ..utils.issue_extraction import extract_deployment_issues
+except ImportError:
+    from utils.issue_extraction import extract_deployment_issues
+
 
 class DeployTool(BaseSmartTool):
     """
@@ -134,7 +139,7 @@ class DeployTool(BaseSmartTool):
                         validation_type="all"  # Comprehensive config validation
                     )
                     deployment_results['configuration'] = config_result
-                    config_issues = self._extract_deployment_issues(config_result, "configuration", deployment_stage)
+                    config_issues = await self._extract_deployment_issues(config_result, "configuration", deployment_stage)
                     validation_issues.extend(config_issues)
                     critical_blockers.extend([issue for issue in config_issues if issue.get('severity') == 'critical'])
             
@@ -148,7 +153,7 @@ class DeployTool(BaseSmartTool):
                         comparison_mode="breaking_changes"
                     )
                     deployment_results['api_contracts'] = api_result
-                    api_issues = self._extract_deployment_issues(api_result, "api_contracts", deployment_stage)
+                    api_issues = await self._extract_deployment_issues(api_result, "api_contracts", deployment_stage)
                     validation_issues.extend(api_issues)
                     critical_blockers.extend([issue for issue in api_issues if issue.get('severity') == 'critical'])
             
@@ -161,7 +166,7 @@ class DeployTool(BaseSmartTool):
                     verbose=True
                 )
                 deployment_results['security'] = security_result
-                security_issues = self._extract_deployment_issues(security_result, "security", deployment_stage)
+                security_issues = await self._extract_deployment_issues(security_result, "security", deployment_stage)
                 validation_issues.extend(security_issues)
                 critical_blockers.extend([issue for issue in security_issues if issue.get('severity') == 'critical'])
             
@@ -173,7 +178,7 @@ class DeployTool(BaseSmartTool):
                     profile_type="comprehensive"
                 )
                 deployment_results['performance'] = perf_result
-                perf_issues = self._extract_deployment_issues(perf_result, "performance", deployment_stage)
+                perf_issues = await self._extract_deployment_issues(perf_result, "performance", deployment_stage)
                 validation_issues.extend(perf_issues)
             
             # Phase 5: Database Validation - For schema/migration deployments
@@ -186,7 +191,7 @@ class DeployTool(BaseSmartTool):
                         analysis_type="schema"
                     )
                     deployment_results['database'] = db_result
-                    db_issues = self._extract_deployment_issues(db_result, "database", deployment_stage)
+                    db_issues = await self._extract_deployment_issues(db_result, "database", deployment_stage)
                     validation_issues.extend(db_issues)
                     critical_blockers.extend([issue for issue in db_issues if issue.get('severity') == 'critical'])
             
@@ -253,33 +258,11 @@ class DeployTool(BaseSmartTool):
         
         return config_files
     
-    def _extract_deployment_issues(self, result: str, category: str, deployment_stage: str) -> List[Dict[str, Any]]:
-        """Extract deployment-blocking issues from engine results"""
-        issues = []
-        result_lower = str(result).lower()
-        
-        # Critical deployment blockers
-        critical_keywords = ['critical', 'error', 'fail', 'security', 'vulnerability', 'breaking']
-        if any(keyword in result_lower for keyword in critical_keywords):
-            severity = 'critical' if deployment_stage == 'production' else 'high'
-            issues.append({
-                'category': category,
-                'severity': severity,
-                'description': f"{category.title()} validation identified potential deployment blocker",
-                'deployment_impact': 'Blocks deployment until resolved'
-            })
-        
-        # Warning-level issues
-        warning_keywords = ['warning', 'deprecated', 'recommendation', 'improvement']
-        if any(keyword in result_lower for keyword in warning_keywords):
-            issues.append({
-                'category': category,
-                'severity': 'medium',
-                'description': f"{category.title()} validation found deployment concerns",
-                'deployment_impact': 'Should be addressed before deployment'
-            })
-        
-        return issues
+    async def _extract_deployment_issues(self, result: str, category: str, deployment_stage: str) -> List[Dict[str, Any]]:
+        """Extract deployment-blocking issues from engine results, off the event loop for large outputs"""
+        result_text = str(result)
+        return await self.run_cpu_bound(extract_deployment_issues, result_text, category, deployment_stage,
+                                        size_hint=len(result_text))
     
     def _synthesize_deployment_report(self, deployment_stage: str, deployment_ready: bool,
                                     deployment_results: Dict[str, Any], validation_issues: List[Dict[str, Any]],
@@ -3,9 +3,21 @@ Executive Synthesizer - Provides consolidated executive-style summaries of tool
 Uses Gemini 2.5 Flash-Lite to synthesize comprehensive analysis into actionable insights
 """
 import logging
+import os
+import sys
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
+# Handle imports for both module and script execution
+try:
+    from ..services.progress_reporter import report_progress
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+    from services.progress_reporter import report_progress
+
 logger = logging.getLogger(__name__)
 
 
@@ -62,6 +74,8 @@ class ExecutiveSynthesizer:
                 tool_name, raw_results, original_request, targets
             )
             
+            await report_progress(f"Engines finished - writing executive synthesis for {tool_name}...")
+            
             # Call review_output with Gemini 2.5 Flash-Lite (fallback to Flash)
             synthesis_result = await self._call_review_engine(synthesis_prompt)
             
@@ -227,15 +227,6 @@ class FullAnalysisTool(BaseSmartTool):
             # Remove duplicates from engines used
             total_engines_used = list(dict.fromkeys(total_engines_used))
             
-            # Extract correlation details for result
-            correlations = None
-            conflicts = None  
-            resolutions = None
-            if correlation_data:
-                correlations = correlation_data.get('correlations')
-                conflicts = correlation_data.get('conflicts')
-                resolutions = correlation_data.get('resolutions')
-            
             return SmartToolResult(
                 tool_name="full_analysis",
                 success=True,
@@ -252,9 +243,7 @@ class FullAnalysisTool(BaseSmartTool):
                     "analysis_phases": len(analysis_results),
                     "autonomous_mode": autonomous
                 },
-                correlations=correlations,
-                conflicts=conflicts,
-                resolutions=resolutions
+                **self.correlation_result_fields(correlation_data)
             )
             
         except Exception as e:
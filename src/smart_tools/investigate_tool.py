@@ -10,6 +10,11 @@ import psutil  # For memory monitoring
 from .base_smart_tool import BaseSmartTool, SmartToolResult
 from .executive_synthesizer import ExecutiveSynthesizer
 
+try:
+    from ..services.engine_result_store import merge_shard_results
+except ImportError:
+    from services.engine_result_store import merge_shard_results
+
 logger = logging.getLogger(__name__)
 
 
@@ -120,12 +125,11 @@ class InvestigateTool(BaseSmartTool):
             quality_focus = self._map_problem_to_quality_focus(problem_type)
             
             # Memory safeguard: Check available memory before parallel execution
+            # (parallelism itself is bounded by the shared concurrency governor)
             memory = await asyncio.to_thread(psutil.virtual_memory)
             if memory.percent > self._memory_fallback_threshold:
-                logger.warning(f"High memory usage detected: {memory.percent}%. Using reduced parallelism.")
-                max_parallel = 2
-            else:
-                max_parallel = 5
+                logger.warning(f"High memory usage detected: {memory.percent}%.")
+            max_parallel = self.current_concurrency_limit()
             
             # Execution mode selection: parallel (default) or sequential (fallback)
             if self._execution_mode == 'sequential' or (memory.percent > self._memory_fallback_threshold and self._sequential_fallback):
@@ -185,16 +189,9 @@ class InvestigateTool(BaseSmartTool):
             if 'map_dependencies' in engines_used:
                 specialized_tasks.append(self._run_dependency_analysis(files))
             
-            # Execute parallel batch 1 with memory safeguards
+            # Execute parallel batch 1 - engine calls acquire governor slots
             if parallel_tasks:
-                semaphore = asyncio.Semaphore(max_parallel)
-                
-                async def run_with_semaphore(task):
-                    async with semaphore:
-                        return await task
-                
-                limited_tasks = [run_with_semaphore(task) for task in parallel_tasks]
-                parallel_results = await asyncio.gather(*limited_tasks, return_exceptions=True)
+                parallel_results = await asyncio.gather(*parallel_tasks, return_exceptions=True)
                 
                 # Process results with error tracking
                 for i, result in enumerate(parallel_results):
@@ -207,8 +204,7 @@ class InvestigateTool(BaseSmartTool):
             
             # Execute specialized batch with same safeguards
             if specialized_tasks:
-                limited_specialized = [run_with_semaphore(task) for task in specialized_tasks]
-                specialized_results = await asyncio.gather(*limited_specialized, return_exceptions=True)
+                specialized_results = await asyncio.gather(*specialized_tasks, return_exceptions=True)
                 
                 for i, result in enumerate(specialized_results):
                     if isinstance(result, Exception):
@@ -363,40 +359,38 @@ class InvestigateTool(BaseSmartTool):
     async def _run_code_search(self, files: List[str], keywords: str, problem: str) -> Dict[str, Any]:
         """Run code search in parallel"""
         try:
-            result = await self.execute_engine(
-                'search_code',
+            runs = await self.execute_engine_incremental(
+                'search_code', 'paths', files,
                 query=keywords,
-                paths=files,
                 context_question=f"Find code related to: {problem}",
                 output_format="text"
             )
-            return {'code_search': result}
+            return {'code_search': merge_shard_results(runs, 'search_code')}
         except Exception as e:
             return {'code_search': f"Code search failed: {str(e)}"}
     
     async def _run_quality_analysis(self, files: List[str], quality_focus: str) -> Dict[str, Any]:
         """Run quality analysis in parallel"""
         try:
-            result = await self.execute_engine(
-                'check_quality',
-                paths=files,
+            runs = await self.execute_engine_incremental(
+                'check_quality', 'paths', files,
                 check_type=quality_focus,
                 verbose=True
             )
-            return {'quality': result}
+            return {'quality': merge_shard_results(runs, 'check_quality')}
         except Exception as e:
             return {'quality': f"Quality analysis failed: {str(e)}"}
     
     async def _run_architectural_analysis(self, files: List[str], problem: str) -> Dict[str, Any]:
         """Run architectural analysis in parallel"""
         try:
-            result = await self.execute_engine(
-                'analyze_code',
-                paths=files,
+            runs = await self.execute_engine_incremental(
+                'analyze_code', 'paths', files,
+                shard=False,
                 analysis_type="refactor_prep",
                 question=f"What might be causing: {problem}"
             )
-            return {'architecture': result}
+            return {'architecture': merge_shard_results(runs, 'analyze_code')}
         except Exception as e:
             return {'architecture': f"Architectural analysis failed: {str(e)}"}
     
@@ -414,59 +408,56 @@ class InvestigateTool(BaseSmartTool):
     async def _run_log_analysis(self, files: List[str]) -> Dict[str, Any]:
         """Run log analysis"""
         try:
-            result = await self.execute_engine(
-                'analyze_logs',
-                log_paths=files,
+            runs = await self.execute_engine_incremental(
+                'analyze_logs', 'log_paths', files,
                 focus="errors"
             )
-            return {'logs': result}
+            return {'logs': merge_shard_results(runs, 'analyze_logs')}
         except Exception as e:
             return {'logs': f"Log analysis failed: {str(e)}"}
     
     async def _run_security_analysis(self, files: List[str]) -> Dict[str, Any]:
         """Run security analysis"""
         try:
-            result = await self.execute_engine(
-                'config_validator',
-                config_paths=files,
+            runs = await self.execute_engine_incremental(
+                'config_validator', 'config_paths', files,
                 validation_type="security"
             )
-            return {'security_config': result}
+            return {'security_config': merge_shard_results(runs, 'config_validator')}
         except Exception as e:
             return {'security_config': f"Security analysis failed: {str(e)}"}
     
     async def _run_api_analysis(self, files: List[str]) -> Dict[str, Any]:
         """Run API analysis"""
         try:
-            result = await self.execute_engine(
-                'api_contract_checker',
-                spec_paths=files
+            runs = await self.execute_engine_incremental(
+                'api_contract_checker', 'spec_paths', files
             )
-            return {'api_contracts': result}
+            return {'api_contracts': merge_shard_results(runs, 'api_contract_checker')}
         except Exception as e:
             return {'api_contracts': f"API analysis failed: {str(e)}"}
     
     async def _run_database_analysis(self, files: List[str]) -> Dict[str, Any]:
         """Run database analysis"""
         try:
-            result = await self.execute_engine(
-                'analyze_database',
-                schema_paths=files,
+            runs = await self.execute_engine_incremental(
+                'analyze_database', 'schema_paths', files,
+                shard=False,
                 analysis_type="relationships"
             )
-            return {'database': result}
+            return {'database': merge_shard_results(runs, 'analyze_database')}
         except Exception as e:
             return {'database': f"Database analysis failed: {str(e)}"}
     
     async def _run_dependency_analysis(self, files: List[str]) -> Dict[str, Any]:
         """Run dependency analysis"""
         try:
-            result = await self.execute_engine(
-                'map_dependencies',
-                project_paths=files,
+            runs = await self.execute_engine_incremental(
+                'map_dependencies', 'project_paths', files,
+                shard=False,
                 analysis_depth="transitive"
             )
-            return {'dependencies': result}
+            return {'dependencies': merge_shard_results(runs, 'map_dependencies')}
         except Exception as e:
             return {'dependencies': f"Dependency analysis failed: {str(e)}"}
     
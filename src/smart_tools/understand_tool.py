@@ -136,7 +136,8 @@ class UnderstandTool(BaseSmartTool):
                 logger.info(f"Using project-specific CLAUDE.md for understanding ({len(project_context['claude_md_content'])} chars)")
             
             # Pre-compute documentation files for parallel execution
-            doc_files = self._find_documentation_files(files) if 'analyze_docs' in routing_strategy['engines'] else []
+            doc_files = (await asyncio.to_thread(self._find_documentation_files, files)
+                         if 'analyze_docs' in routing_strategy['engines'] else [])
             
             # Group independent tasks for parallel execution
             parallel_tasks = []
@@ -9,6 +9,13 @@ import psutil  # For memory monitoring
 from .base_smart_tool import BaseSmartTool, SmartToolResult
 from .executive_synthesizer import ExecutiveSynthesizer
 
+try:
+    from ..utils.issue_extraction import determine_issue_severity, extract_validation_issues
+    from ..services.engine_result_store import merge_shard_results, shard_bodies
+except ImportError:
+    from utils.issue_extraction import determine_issue_severity, extract_validation_issues
+    from services.engine_result_store import merge_shard_results, shard_bodies
+
 logger = logging.getLogger(__name__)
 
 
@@ -159,13 +166,11 @@ class ValidateTool(BaseSmartTool):
             if project_context and project_context.get('claude_md_content'):
                 logger.info(f"Using project-specific CLAUDE.md for validation ({len(project_context['claude_md_content'])} chars)")
             
-            # Memory safeguard: Check available memory before parallel execution
+            # Memory safeguard: the shared concurrency governor backs off under memory pressure
             memory = await asyncio.to_thread(psutil.virtual_memory)
             if memory.percent > 85:
-                logger.warning(f"High memory usage detected: {memory.percent}%. Using reduced parallelism.")
-                max_parallel = 2  # Reduce parallel tasks when memory is constrained
-            else:
-                max_parallel = 6  # Normal parallel execution
+                logger.warning(f"High memory usage detected: {memory.percent}%.")
+            max_parallel = self.current_concurrency_limit()
             
             # Track execution errors for aggregation
             execution_errors = []
@@ -177,6 +182,7 @@ class ValidateTool(BaseSmartTool):
             validation_results = {}
             issues_found = []
             total_issues = 0
+            shard_counts = {'shards': 0, 'reused_shards': 0}
             
             # Pre-compute file categories for engines
             config_files = self._find_config_files(files)
@@ -207,18 +213,9 @@ class ValidateTool(BaseSmartTool):
             if 'analyze_test_coverage' in engines_used and source_files:
                 parallel_tasks.append(self._run_test_coverage_analysis(source_files))
             
-            # Execute independent engines in parallel with memory-aware batching
+            # Execute independent engines in parallel - engine calls acquire governor slots
             if parallel_tasks:
-                # Use semaphore to limit concurrent tasks based on memory
-                semaphore = asyncio.Semaphore(max_parallel)
-                
-                async def run_with_semaphore(task):
-                    async with semaphore:
-                        return await task
-                
-                # Wrap tasks with semaphore
-                limited_tasks = [run_with_semaphore(task) for task in parallel_tasks]
-                parallel_results = await asyncio.gather(*limited_tasks, return_exceptions=True)
+                parallel_results = await asyncio.gather(*parallel_tasks, return_exceptions=True)
                 
                 # Enhanced error aggregation and reporting
                 for i, result in enumerate(parallel_results):
@@ -236,6 +233,8 @@ class ValidateTool(BaseSmartTool):
                             if 'issues' in data:
                                 issues_found.extend(data['issues'])
                                 total_issues += len(data['issues'])
+                            for counter in shard_counts:
+                                shard_counts[counter] += data.get(counter, 0)
             
             # Batch 2: Dependent engines (run after file analysis)
             dependent_tasks = []
@@ -251,9 +250,7 @@ class ValidateTool(BaseSmartTool):
             
             # Execute dependent engines in parallel with same memory safeguards
             if dependent_tasks:
-                # Reuse semaphore for dependent tasks
-                limited_dependent = [run_with_semaphore(task) for task in dependent_tasks]
-                dependent_results = await asyncio.gather(*limited_dependent, return_exceptions=True)
+                dependent_results = await asyncio.gather(*dependent_tasks, return_exceptions=True)
                 
                 # Process dependent results with enhanced error tracking
                 for i, result in enumerate(dependent_results):
@@ -268,6 +265,8 @@ class ValidateTool(BaseSmartTool):
                             if 'issues' in data:
                                 issues_found.extend(data['issues'])
                                 total_issues += len(data['issues'])
+                            for counter in shard_counts:
+                                shard_counts[counter] += data.get(counter, 0)
             
             # Filter issues by severity
             filtered_issues = self._filter_issues_by_severity(issues_found, severity)
@@ -311,15 +310,6 @@ class ValidateTool(BaseSmartTool):
             # Success only if: validation was performed AND no critical issues found
             validation_success = has_valid_results and len(critical_issues) == 0
             
-            # Extract correlation summary for result
-            correlations = None
-            conflicts = None
-            resolutions = None
-            if correlation_data:
-                correlations = correlation_data.get('correlations')
-                conflicts = correlation_data.get('conflicts')
-                resolutions = correlation_data.get('resolutions')
-            
             return SmartToolResult(
                 tool_name="validate",
                 success=validation_success,
@@ -339,11 +329,12 @@ class ValidateTool(BaseSmartTool):
                     "max_parallel_tasks": max_parallel,
                     "memory_usage_percent": memory.percent,
                     "execution_errors": len(execution_errors),
-                    "error_details": execution_errors[:5] if execution_errors else []  # Include first 5 errors
+                    "error_details": execution_errors[:5] if execution_errors else [],  # Include first 5 errors
+                    "engine_shards": shard_counts['shards'],
+                    "reused_shards": shard_counts['reused_shards'],
+                    "reused_issues": sum(1 for issue in filtered_issues if issue.get('reused'))
                 },
-                correlations=correlations,
-                conflicts=conflicts,
-                resolutions=resolutions
+                **self.correlation_result_fields(correlation_data)
             )
             
         except Exception as e:
@@ -379,40 +370,15 @@ class ValidateTool(BaseSmartTool):
         }
         return mapping.get(validation_type, 'all')
     
-    def _extract_issues_from_result(self, result: str, category: str) -> List[Dict[str, Any]]:
-        """Extract issues from engine results - simplified heuristic approach"""
-        issues = []
-        
-        # Simple heuristic to detect issues in text results
-        result_lower = str(result).lower()
-        issue_keywords = ['error', 'warning', 'issue', 'problem', 'vulnerability', 'security', 'deprecated']
-        
-        if any(keyword in result_lower for keyword in issue_keywords):
-            # Count rough number of issues based on keyword frequency
-            issue_count = sum(result_lower.count(keyword) for keyword in issue_keywords[:3])  # Top 3 keywords
-            
-            for i in range(min(issue_count, 5)):  # Max 5 issues per category
-                severity = self._determine_issue_severity(result_lower, category)
-                issues.append({
-                    'category': category,
-                    'severity': severity,
-                    'description': f"{category.title()} issue detected in analysis",
-                    'source': 'automated_detection'
-                })
-        
-        return issues
+    async def _extract_issues_from_result(self, result: str, category: str) -> List[Dict[str, Any]]:
+        """Extract issues from engine results, off the event loop for large outputs"""
+        result_text = str(result)
+        return await self.run_cpu_bound(extract_validation_issues, result_text, category,
+                                        size_hint=len(result_text))
     
     def _determine_issue_severity(self, result_text: str, category: str) -> str:
         """Determine issue severity based on keywords and category"""
-        high_severity_keywords = ['critical', 'security', 'vulnerability', 'error', 'fail']
-        medium_severity_keywords = ['warning', 'deprecated', 'performance']
-        
-        if any(keyword in result_text for keyword in high_severity_keywords):
-            return 'high'
-        elif any(keyword in result_text for keyword in medium_severity_keywords):
-            return 'medium'
-        else:
-            return 'low'
+        return determine_issue_severity(result_text, category)
     
     def _filter_issues_by_severity(self, issues: List[Dict[str, Any]], min_severity: str) -> List[Dict[str, Any]]:
         """Filter issues based on minimum severity level"""
@@ -455,6 +421,14 @@ class ValidateTool(BaseSmartTool):
             ""
         ]
         
+        reused_issues = sum(1 for issue in issues if issue.get('reused'))
+        if reused_issues:
+            report_sections.extend([
+                f"♻️ **{reused_issues} of {len(issues)} issues reused** from a previous run of unchanged files "
+                f"(marked per shard below)",
+                ""
+            ])
+        
         # Add category breakdown
         if issues_by_category:
             report_sections.extend([
@@ -593,81 +567,101 @@ class ValidateTool(BaseSmartTool):
         return "\n".join(report_sections)
     
     # Parallel execution helper methods
+    async def _run_incremental_analysis(self, category: str, issue_category: str, engine_name: str,
+                                        path_param: str, files: List[str], shard: bool = True,
+                                        **kwargs) -> Dict[str, Any]:
+        """
+        Run one engine shard by shard, reusing unchanged shards, and tag the issues from reused shards
+
+        Issues are extracted per shard from its section of the merged report (findings
+        repeated across shards counted once) and tagged with that shard's reuse; their
+        number and severity follow the merged report, as a single run over all the
+        files would report them.
+        """
+        runs = await self.execute_engine_incremental(engine_name, path_param, files, shard=shard, **kwargs)
+        merged = merge_shard_results(runs, engine_name)
+        overall = await self._extract_issues_from_result(merged, issue_category)
+        bodies, _ = shard_bodies(runs)
+        issues = []
+        for index, (run, body) in enumerate(zip(runs, bodies), 1):
+            if run.error is not None:
+                continue
+            for issue in await self._extract_issues_from_result(body, issue_category):
+                if len(runs) > 1:
+                    issue['shard'] = index  # the "### Shard i/n" section it came from
+                if run.reused:
+                    issue['reused'] = True
+                issues.append(issue)
+        issues = issues[:len(overall)]
+        for issue, reference in zip(issues, overall):
+            issue['severity'] = reference['severity']
+        return {category: {
+            'result': merged,
+            'issues': issues,
+            'shards': len(runs),
+            'reused_shards': sum(1 for run in runs if run.reused)
+        }}
+    
     async def _run_quality_analysis(self, files: List[str], quality_focus: str) -> Dict[str, Any]:
         """Run quality analysis in parallel batch"""
         try:
-            result = await self.execute_engine(
-                'check_quality',
-                paths=files,
+            return await self._run_incremental_analysis(
+                'quality', 'quality', 'check_quality', 'paths', files,
                 check_type=quality_focus,
                 verbose=True
             )
-            issues = self._extract_issues_from_result(result, "quality")
-            return {'quality': {'result': result, 'issues': issues}}
         except Exception as e:
             return {'quality': {'result': f"Quality analysis failed: {str(e)}", 'issues': []}}
     
     async def _run_config_validation(self, config_files: List[str]) -> Dict[str, Any]:
         """Run config validation in parallel batch"""
         try:
-            result = await self.execute_engine(
-                'config_validator',
-                config_paths=config_files,
+            return await self._run_incremental_analysis(
+                'security_config', 'security', 'config_validator', 'config_paths', config_files,
                 validation_type="security"
             )
-            issues = self._extract_issues_from_result(result, "security")
-            return {'security_config': {'result': result, 'issues': issues}}
         except Exception as e:
             return {'security_config': {'result': f"Config validation failed: {str(e)}", 'issues': []}}
     
     async def _run_consistency_analysis(self, source_files: List[str]) -> Dict[str, Any]:
-        """Run consistency analysis in parallel batch"""
+        """Run consistency analysis in parallel batch (compares files, so never sharded)"""
         try:
-            result = await self.execute_engine(
-                'interface_inconsistency_detector',
-                source_paths=source_files,
+            return await self._run_incremental_analysis(
+                'consistency', 'consistency', 'interface_inconsistency_detector', 'source_paths', source_files,
+                shard=False,
                 pattern_types=["naming", "parameters", "return_types"]
             )
-            issues = self._extract_issues_from_result(result, "consistency")
-            return {'consistency': {'result': result, 'issues': issues}}
         except Exception as e:
             return {'consistency': {'result': f"Consistency analysis failed: {str(e)}", 'issues': []}}
     
     async def _run_api_validation(self, api_files: List[str]) -> Dict[str, Any]:
         """Run API validation in parallel batch"""
         try:
-            result = await self.execute_engine(
-                'api_contract_checker',
-                spec_paths=api_files,
+            return await self._run_incremental_analysis(
+                'api_contracts', 'api', 'api_contract_checker', 'spec_paths', api_files,
                 comparison_mode="standalone"
             )
-            issues = self._extract_issues_from_result(result, "api")
-            return {'api_contracts': {'result': result, 'issues': issues}}
         except Exception as e:
             return {'api_contracts': {'result': f"API validation failed: {str(e)}", 'issues': []}}
     
     async def _run_database_analysis(self, db_files: List[str]) -> Dict[str, Any]:
-        """Run database analysis in parallel batch"""
+        """Run database analysis in parallel batch (schemas reference each other, so never sharded)"""
         try:
-            result = await self.execute_engine(
-                'analyze_database',
-                schema_paths=db_files,
+            return await self._run_incremental_analysis(
+                'database', 'database', 'analyze_database', 'schema_paths', db_files,
+                shard=False,
                 analysis_type="optimization"
             )
-            issues = self._extract_issues_from_result(result, "database")
-            return {'database': {'result': result, 'issues': issues}}
         except Exception as e:
             return {'database': {'result': f"Database analysis failed: {str(e)}", 'issues': []}}
     
     async def _run_test_coverage_analysis(self, source_files: List[str]) -> Dict[str, Any]:
-        """Run test coverage analysis in parallel batch"""
+        """Run test coverage analysis in parallel batch (pairs sources with tests, so never sharded)"""
         try:
-            result = await self.execute_engine(
-                'analyze_test_coverage',
-                source_paths=source_files
+            return await self._run_incremental_analysis(
+                'test_coverage', 'testing', 'analyze_test_coverage', 'source_paths', source_files,
+                shard=False
             )
-            issues = self._extract_issues_from_result(result, "testing")
-            return {'test_coverage': {'result': result, 'issues': issues}}
         except Exception as e:
             return {'test_coverage': {'result': f"Test coverage analysis failed: {str(e)}", 'issues': []}}
     
@@ -678,34 +672,30 @@ class ValidateTool(BaseSmartTool):
                 'performance_profiler',
                 target_operation="validation_analysis"
             )
-            issues = self._extract_issues_from_result(result, "performance")
+            issues = await self._extract_issues_from_result(result, "performance")
             return {'performance': {'result': result, 'issues': issues}}
         except Exception as e:
             return {'performance': {'result': f"Performance analysis failed: {str(e)}", 'issues': []}}
     
     async def _run_dependency_analysis(self, files: List[str]) -> Dict[str, Any]:
-        """Run dependency analysis in dependent batch"""
+        """Run dependency analysis in dependent batch (whole project graph, so never sharded)"""
         try:
-            result = await self.execute_engine(
-                'map_dependencies',
-                project_paths=files,
+            return await self._run_incremental_analysis(
+                'dependencies', 'dependencies', 'map_dependencies', 'project_paths', files,
+                shard=False,
                 analysis_depth="transitive"
             )
-            issues = self._extract_issues_from_result(result, "dependencies")
-            return {'dependencies': {'result': result, 'issues': issues}}
         except Exception as e:
             return {'dependencies': {'result': f"Dependency analysis failed: {str(e)}", 'issues': []}}
     
     async def _run_architectural_analysis(self, files: List[str]) -> Dict[str, Any]:
-        """Run architectural analysis in dependent batch"""
+        """Run architectural analysis in dependent batch (whole codebase, so never sharded)"""
         try:
-            result = await self.execute_engine(
-                'analyze_code',
-                paths=files,
+            return await self._run_incremental_analysis(
+                'architecture', 'architecture', 'analyze_code', 'paths', files,
+                shard=False,
                 analysis_type="refactor_prep",
                 question="What potential issues exist in this code?"
             )
-            issues = self._extract_issues_from_result(result, "architecture")
-            return {'architecture': {'result': result, 'issues': issues}}
         except Exception as e:
             return {'architecture': {'result': f"Architectural analysis failed: {str(e)}", 'issues': []}}
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Read-only file views backed by mmap for large files
+Large sources and logs are mapped rather than read, handed out as memoryview
+slices, and decoded only for the byte ranges actually sent to an engine
+"""
+import mmap
+import os
+from typing import Optional, Tuple
+
+# Files at least this large are memory-mapped instead of read into memory
+DEFAULT_MMAP_THRESHOLD = 1024 * 1024
+
+# How far past a cut point to look for a newline, so excerpts split on line boundaries
+_LINE_SEARCH_BYTES = 4096
+
+
+class FileView:
+    """
+    Bytes of one file as a memoryview: mmap-backed at or above `mmap_threshold`,
+    a plain read below it
+
+    Mapped pages are loaded on demand and belong to the page cache, so a
+    multi-hundred-MB log costs only the ranges that are decoded. A mapped file
+    must not be truncated while in use; `is_current()` lets callers check the
+    file is unchanged before decoding.
+    """
+
+    def __init__(self, path: str, mmap_threshold: int = DEFAULT_MMAP_THRESHOLD):
+        self.path = str(path)
+        self._mmap: Optional[mmap.mmap] = None
+        with open(self.path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            self.size = st.st_size
+            self.version: Tuple[int, int] = (st.st_size, st.st_mtime_ns)
+            if self.size and self.size >= mmap_threshold:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._raw = self._mmap
+            else:
+                self._raw = f.read()
+        self._buffer = memoryview(self._raw)
+
+    @property
+    def mapped(self) -> bool:
+        return self._mmap is not None
+
+    @property
+    def closed(self) -> bool:
+        return self._buffer is None
+
+    def is_current(self) -> bool:
+        """Whether the file on disk still has the size and mtime this view was opened with"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return (st.st_size, st.st_mtime_ns) == self.version
+
+    def slice(self, start: int = 0, end: Optional[int] = None) -> memoryview:
+        """Zero-copy slice of the file's bytes"""
+        if self._buffer is None:
+            raise ValueError(f"FileView for {self.path} is closed")
+        return self._buffer[start:end]
+
+    def text(self, start: int = 0, end: Optional[int] = None,
+             encoding: str = 'utf-8', errors: str = 'ignore') -> str:
+        """Decode one byte range (no intermediate bytes copy)"""
+        chunk = self.slice(start, end)
+        try:
+            return str(chunk, encoding, errors)
+        finally:
+            chunk.release()
+
+    def _line_start(self, offset: int) -> int:
+        """First line boundary at or after `offset` (within a short search window)"""
+        if offset <= 0 or offset >= self.size:
+            return max(0, min(offset, self.size))
+        newline = self._raw.find(b'\n', offset, min(self.size, offset + _LINE_SEARCH_BYTES))
+        return newline + 1 if newline != -1 else offset
+
+    def excerpt(self, max_bytes: int, head_fraction: float = 0.25) -> str:
+        """
+        The whole file decoded if it fits in `max_bytes`; otherwise its head and
+        tail (most of the budget, where recent log lines are) around an omission marker
+        """
+        if self.size <= max_bytes:
+            return self.text()
+        head_end = self._line_start(int(max_bytes * head_fraction))
+        tail_start = self._line_start(self.size - (max_bytes - head_end))
+        omitted = tail_start - head_end
+        return (f"{self.text(0, head_end)}"
+                f"\n[... {omitted:,} bytes omitted from {self.size:,}-byte file ...]\n"
+                f"{self.text(tail_start)}")
+
+    def close(self):
+        """Release the buffer and unmap; a no-op while slices are still held elsewhere"""
+        if self._buffer is None:
+            return
+        try:
+            self._buffer.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError:
+            # Exported slices still alive - the mapping is freed with them
+            return
+        self._buffer = None
+        self._raw = b''
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
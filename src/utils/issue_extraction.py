@@ -0,0 +1,73 @@
+"""
+Keyword-based issue extraction from engine results
+Module-level and dependency-free so the shared process pool can run it in
+worker processes on large engine outputs
+"""
+from typing import Any, Dict, List
+
+ISSUE_KEYWORDS = ['error', 'warning', 'issue', 'problem', 'vulnerability', 'security', 'deprecated']
+HIGH_SEVERITY_KEYWORDS = ['critical', 'security', 'vulnerability', 'error', 'fail']
+MEDIUM_SEVERITY_KEYWORDS = ['warning', 'deprecated', 'performance']
+DEPLOYMENT_CRITICAL_KEYWORDS = ['critical', 'error', 'fail', 'security', 'vulnerability', 'breaking']
+DEPLOYMENT_WARNING_KEYWORDS = ['warning', 'deprecated', 'recommendation', 'improvement']
+
+
+def determine_issue_severity(result_text: str, category: str) -> str:
+    """Determine issue severity based on keywords and category"""
+    if any(keyword in result_text for keyword in HIGH_SEVERITY_KEYWORDS):
+        return 'high'
+    elif any(keyword in result_text for keyword in MEDIUM_SEVERITY_KEYWORDS):
+        return 'medium'
+    else:
+        return 'low'
+
+
+def extract_validation_issues(result: Any, category: str) -> List[Dict[str, Any]]:
+    """Extract issues from engine results - simplified heuristic approach"""
+    issues = []
+
+    # Simple heuristic to detect issues in text results
+    result_lower = str(result).lower()
+
+    if any(keyword in result_lower for keyword in ISSUE_KEYWORDS):
+        # Count rough number of issues based on keyword frequency
+        issue_count = sum(result_lower.count(keyword) for keyword in ISSUE_KEYWORDS[:3])  # Top 3 keywords
+        severity = determine_issue_severity(result_lower, category)
+
+        for i in range(min(issue_count, 5)):  # Max 5 issues per category
+            issues.append({
+                'category': category,
+                'severity': severity,
+                'description': f"{category.title()} issue detected in analysis",
+                'source': 'automated_detection'
+            })
+
+    return issues
+
+
+def extract_deployment_issues(result: Any, category: str, deployment_stage: str) -> List[Dict[str, Any]]:
+    """Extract deployment-blocking issues from engine results"""
+    issues = []
+    result_lower = str(result).lower()
+
+    # Critical deployment blockers
+    if any(keyword in result_lower for keyword in DEPLOYMENT_CRITICAL_KEYWORDS):
+        severity = 'critical' if deployment_stage == 'production' else 'high'
+        issues.append({
+            'category': category,
+            'severity': severity,
+            'description': f"{category.title()} validation identified potential deployment blocker",
+            'deployment_impact': 'Blocks deployment until resolved'
+        })
+
+    # Warning-level issues
+    if any(keyword in result_lower for keyword in DEPLOYMENT_WARNING_KEYWORDS):
+        issues.append({
+            'category': category,
+            'severity': 'medium',
+            'description': f"{category.title()} validation found deployment concerns",
+            'deployment_impact': 'Should be addressed before deployment'
+        })
+
+    return issues
+
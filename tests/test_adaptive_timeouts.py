@@ -0,0 +1,210 @@
+"""
+Tests for adaptive per-model timeouts learned from observed latency
+"""
+import asyncio
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.clients.latency_tracker import LatencyTracker, size_bucket
+
+
+class TestLatencyBuckets(unittest.TestCase):
+    """Test size buckets and persistence of the latency model"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'latency_model.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_size_buckets(self):
+        """Test prompts are grouped by estimated token count"""
+        self.assertEqual(size_bucket(500), '<=2k')
+        self.assertEqual(size_bucket(2_000), '<=2k')
+        self.assertEqual(size_bucket(50_000), '<=128k')
+        self.assertEqual(size_bucket(900_000), '>512k')
+        self.assertEqual(size_bucket(None), 'all')
+
+    def test_buckets_are_separate(self):
+        """Test large prompts don't inflate the small-prompt percentile"""
+        tracker = LatencyTracker(min_samples=3)
+        for _ in range(3):
+            tracker.record('pro', 2.0, tokens=1_000)
+            tracker.record('pro', 90.0, tokens=200_000)
+
+        self.assertEqual(tracker.percentile('pro', 0.99, tokens=1_500), 2.0)
+        self.assertEqual(tracker.percentile('pro', 0.99, tokens=300_000), 90.0)
+        self.assertEqual(tracker.percentile('pro', 0.99), 90.0)
+
+    def test_sparse_bucket_fallback(self):
+        """Test a sparse bucket falls back to the model window only when allowed"""
+        tracker = LatencyTracker(min_samples=3)
+        for _ in range(3):
+            tracker.record('flash', 1.0, tokens=1_000)
+
+        self.assertEqual(tracker.percentile('flash', 0.9, tokens=50_000), 1.0)
+        self.assertIsNone(tracker.percentile('flash', 0.9, tokens=50_000, fallback_to_model=False))
+
+    def test_persisted_across_instances(self):
+        """Test a restarted tracker keeps what it learned"""
+        tracker = LatencyTracker(min_samples=2, path=self.path)
+        tracker.record('flash-lite', 0.5, tokens=100)
+        tracker.record('flash-lite', 0.7, tokens=100)
+        tracker.save()
+
+        restored = LatencyTracker(min_samples=2, path=self.path)
+        self.assertEqual(restored.percentile('flash-lite', 0.99, tokens=100), 0.7)
+        self.assertEqual(os.listdir(self.tmp_dir), ['latency_model.json'])
+
+    def test_failed_save_stays_dirty(self):
+        """Test a failed write is retried by the next save"""
+        tracker = LatencyTracker(min_samples=1, path=self.path)
+        tracker.record('flash', 0.5)
+        with patch('src.clients.latency_tracker.os.replace', side_effect=OSError("disk full")):
+            tracker.save()
+        self.assertFalse(os.path.exists(self.path))
+
+        tracker.save()
+        self.assertEqual(LatencyTracker(min_samples=1, path=self.path).percentile('flash', 0.5), 0.5)
+
+    def test_corrupted_file_starts_empty(self):
+        """Test a corrupted latency model doesn't break startup"""
+        with open(self.path, 'w') as f:
+            f.write('{"samples": ')
+        self.assertEqual(LatencyTracker(path=self.path).get_stats(), {})
+
+
+class TestLatencySaves(unittest.IsolatedAsyncioTestCase):
+    """Test write-behind saves of the latency model"""
+
+    async def test_samples_recorded_during_write_are_kept_dirty(self):
+        """Test the worker writes a loop-side snapshot and later samples still need a save"""
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        tracker = LatencyTracker(min_samples=1, path=os.path.join(tmp_dir, 'latency_model.json'),
+                                 save_delay_seconds=60)
+        tracker.record('flash', 0.5)
+
+        writing = threading.Event()
+        release = threading.Event()
+        write = tracker._write
+
+        def slow_write(snapshot):
+            writing.set()
+            release.wait(5)
+            return write(snapshot)
+
+        with patch.object(tracker, '_write', side_effect=slow_write):
+            save = asyncio.create_task(tracker.asave())
+            await asyncio.to_thread(writing.wait, 5)
+            tracker.record('flash', 0.7)
+            release.set()
+            await save
+
+        self.assertTrue(tracker._dirty)
+        self.assertEqual(LatencyTracker(min_samples=1, path=tracker.path).get_stats()['flash|all']['samples'], 1)
+        await tracker.aclose()
+        self.assertFalse(tracker._dirty)
+        self.assertEqual(LatencyTracker(min_samples=1, path=tracker.path).get_stats()['flash|all']['samples'], 2)
+
+
+class TestAdaptiveDeadlines(unittest.IsolatedAsyncioTestCase):
+    """Test GeminiClient derives deadlines from the latency model"""
+
+    def _make_client(self, **overrides):
+        from src.clients import gemini_client
+        from src.config import SmartToolsConfig
+
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        smart_config = SmartToolsConfig(
+            enable_response_cache=False,
+            latency_model_path=os.path.join(tmp_dir, 'latency_model.json'),
+            adaptive_timeout_min_samples=5,
+            adaptive_timeout_min_seconds=0.1,
+            **overrides
+        )
+        with patch.object(gemini_client, 'RATE_LIMIT_FILE', os.path.join(tmp_dir, 'rate_limits.json')):
+            return gemini_client.GeminiClient(smart_config)
+
+    def test_flat_timeout_until_learned(self):
+        """Test the base timeout applies without enough observations"""
+        client = self._make_client()
+        self.assertEqual(client._request_timeout('flash', 'prompt'), client.base_request_timeout)
+
+    def test_deadline_tracks_model_and_size(self):
+        """Test small flash-lite calls get short deadlines and large pro calls long ones"""
+        client = self._make_client()
+        small, large = 'p' * 400, 'p' * 800_000
+        for _ in range(5):
+            client.latency_tracker.record('flash-lite', 0.2, tokens=client.token_estimator.estimate(small, 'flash-lite'))
+            client.latency_tracker.record('pro', 80.0, tokens=client.token_estimator.estimate(large, 'pro'))
+
+        self.assertAlmostEqual(client._request_timeout('flash-lite', small), 0.4)
+        self.assertEqual(client._request_timeout('pro', large), 160.0)
+        # Large prompts on flash-lite have no history yet - no guessing from small ones
+        self.assertEqual(client._request_timeout('flash-lite', large), client.base_request_timeout)
+
+    def test_deadline_is_clamped(self):
+        """Test learned deadlines stay within the configured bounds"""
+        client = self._make_client(adaptive_timeout_max_seconds=120)
+        for _ in range(5):
+            client.latency_tracker.record('pro', 100.0, tokens=client.token_estimator.estimate('x', 'pro'))
+        self.assertEqual(client._request_timeout('pro', 'x'), 120)
+
+    async def test_hung_call_is_abandoned_and_rerouted(self):
+        """Test a hung flash-lite call is cut at the learned deadline and falls back"""
+        client = self._make_client()
+        prompt = 'explain'
+        tokens = client.token_estimator.estimate(prompt, 'flash-lite')
+        for _ in range(5):
+            client.latency_tracker.record('flash-lite', 0.1, tokens=tokens)
+
+        class Response:
+            text = 'from flash'
+            usage_metadata = None
+
+        async def dispatch(shard, prompt, model_name):
+            if model_name == 'flash-lite':
+                await asyncio.sleep(30)
+            return Response()
+
+        with patch.object(client, '_dispatch_generate', dispatch):
+            start = time.perf_counter()
+            text, model_used, attempts = await client._generate_content_with_fallback(prompt, 'flash-lite')
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual((text, model_used, attempts), ('from flash', 'flash', 2))
+        self.assertLess(elapsed, 1.0)
+        # The timeout was recorded as a censored sample at the deadline, apart from real latencies
+        stats = client.latency_tracker.get_stats()
+        self.assertEqual(stats['flash-lite|all']['samples'], 5)
+        self.assertEqual(stats['flash-lite|all|timeouts']['samples'], 1)
+
+    def test_timeouts_raise_deadline_but_not_hedge_delay(self):
+        """Test timed-out calls lengthen the deadline without inflating the hedge percentile"""
+        client = self._make_client()
+        tracker = client.latency_tracker
+        tokens = client.token_estimator.estimate('x', 'flash')
+        for _ in range(8):
+            tracker.record('flash', 1.0, tokens=tokens)
+        for _ in range(2):
+            tracker.record('flash', 30.0, tokens=tokens, timed_out=True)
+
+        self.assertEqual(tracker.percentile('flash', 0.9, tokens=tokens, min_samples=5), 1.0)
+        self.assertEqual(client._request_timeout('flash', 'x'), 60.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
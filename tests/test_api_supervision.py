@@ -0,0 +1,158 @@
+"""
+Tests for event-driven API call supervision and CPU pressure callbacks
+"""
+import asyncio
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.services.cpu_throttler import CPUThrottler
+
+
+class TestCPUPressureListeners(unittest.IsolatedAsyncioTestCase):
+    """Test CPUThrottler notifies listeners only on pressure transitions"""
+
+    def setUp(self):
+        self.throttler = CPUThrottler.get_instance()
+        self.saved_state = (self.throttler._throttle_active, list(self.throttler._pressure_listeners))
+        self.throttler._throttle_active = False
+        self.events = []
+
+    def tearDown(self):
+        self.throttler._throttle_active, self.throttler._pressure_listeners = self.saved_state
+
+    def _listener(self, active, cpu_percent):
+        self.events.append((active, cpu_percent))
+
+    async def test_listener_called_on_transitions_only(self):
+        """Test repeated high readings produce one notification"""
+        self.throttler.add_pressure_listener(self._listener)
+        with patch.object(self.throttler, '_get_cpu_usage', side_effect=[95.0, 96.0, 20.0]):
+            for _ in range(3):
+                self.throttler._operation_count = self.throttler.cpu_check_interval
+                self.throttler._last_yield_time = time.time()
+                await self.throttler.should_yield()
+
+        self.assertEqual(self.events, [(True, 95.0), (False, 20.0)])
+
+    def test_bound_method_listener_is_weak(self):
+        """Test a listener's owner can be garbage collected"""
+        class Owner:
+            def __init__(self, events):
+                self.events = events
+
+            def on_change(self, active, cpu_percent):
+                self.events.append(active)
+
+        owner = Owner(self.events)
+        self.throttler.add_pressure_listener(owner.on_change)
+        del owner
+
+        self.throttler._set_throttle_active(True, 90.0)
+        self.assertEqual(self.events, [])
+
+    def test_remove_listener(self):
+        """Test removed listeners are not called"""
+        self.throttler.add_pressure_listener(self._listener)
+        self.throttler.remove_pressure_listener(self._listener)
+        self.throttler._set_throttle_active(True, 90.0)
+        self.assertEqual(self.events, [])
+
+
+class TestEventSupervision(unittest.IsolatedAsyncioTestCase):
+    """Test GeminiClient awaits API calls with a single deadline"""
+
+    def _make_client(self, **overrides):
+        from src.clients import gemini_client
+        from src.config import SmartToolsConfig
+
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        smart_config = SmartToolsConfig(enable_response_cache=False, enable_adaptive_timeouts=False, **overrides)
+        with patch.object(gemini_client, 'RATE_LIMIT_FILE', os.path.join(tmp_dir, 'rate_limits.json')):
+            return gemini_client.GeminiClient(smart_config)
+
+    async def test_timeout_is_accurate_and_cancels_request(self):
+        """Test the deadline fires on time and the in-flight request is cancelled"""
+        client = self._make_client()
+        cancelled = asyncio.Event()
+
+        async def hanging_dispatch(shard, prompt, model_name):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        shard = client.key_pool.select('flash')
+        with patch.object(client, '_dispatch_generate', hanging_dispatch):
+            start = time.perf_counter()
+            with self.assertRaises(asyncio.TimeoutError):
+                await client._cpu_safe_api_call(shard, 'prompt', 0.25, 'flash')
+            elapsed = time.perf_counter() - start
+
+        self.assertTrue(cancelled.is_set())
+        self.assertLess(abs(elapsed - 0.25), 0.1)
+        self.assertEqual(shard.in_flight, 0)
+
+    async def test_no_periodic_wakeups_while_waiting(self):
+        """Test the throttler isn't consulted while a call is in flight"""
+        client = self._make_client()
+        throttler = MagicMock()
+        throttler.yield_if_needed = AsyncMock()
+        throttler.yield_control = AsyncMock()
+        client.cpu_throttler = throttler
+
+        async def slow_dispatch(shard, prompt, model_name):
+            await asyncio.sleep(0.3)
+            return 'response'
+
+        with patch.object(client, '_dispatch_generate', slow_dispatch):
+            result = await client._cpu_safe_api_call(client.key_pool.select('flash'), 'p', 5, 'flash')
+
+        self.assertEqual(result, 'response')
+        throttler.yield_if_needed.assert_not_called()
+        throttler.get_throttling_stats.assert_not_called()
+        throttler.yield_control.assert_not_called()
+
+    async def test_pressure_callback_defers_dispatch(self):
+        """Test high CPU pressure reported by callback yields once before dispatch"""
+        client = self._make_client()
+        throttler = MagicMock()
+        throttler.yield_control = AsyncMock()
+        client.cpu_throttler = throttler
+
+        async def dispatch(shard, prompt, model_name):
+            return 'response'
+
+        client._on_cpu_pressure_change(True, 97.0)
+        with patch.object(client, '_dispatch_generate', dispatch):
+            await client._cpu_safe_api_call(client.key_pool.select('flash'), 'p', 5, 'flash')
+
+        throttler.yield_control.assert_awaited_once()
+
+    async def test_poll_mode_still_available(self):
+        """Test the legacy polling supervisor can be selected"""
+        client = self._make_client(api_call_supervision='poll', api_call_check_interval_seconds=0.05)
+
+        async def dispatch(shard, prompt, model_name):
+            await asyncio.sleep(0.12)
+            return 'response'
+
+        with patch.object(client, '_dispatch_generate', dispatch), \
+             patch.object(client, '_await_api_call', side_effect=AssertionError("event path used")):
+            result = await client._cpu_safe_api_call(client.key_pool.select('flash'), 'p', 5, 'flash')
+
+        self.assertEqual(result, 'response')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Tests for the end-to-end benchmark harness in scripts/benchmarks
+"""
+import asyncio
+import shutil
+import tempfile
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, 'scripts', 'benchmarks'))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+import run_benchmarks
+from run_benchmarks import compare_to_baseline, percentile
+from synthetic_repo import generate_repo
+
+
+class TestBenchmarkHarness(unittest.TestCase):
+    """Test metric helpers, repo generation and baseline comparison"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles"""
+        self.assertEqual(percentile([3, 1, 2, 4], 0.5), 2)
+        self.assertEqual(percentile(list(range(1, 101)), 0.95), 95)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_synthetic_repo_is_deterministic(self):
+        """Test the same seed produces the same tree and contents"""
+        first = generate_repo(os.path.join(self.tmp_dir, 'a'), 40, seed=3)
+        second = generate_repo(os.path.join(self.tmp_dir, 'b'), 40, seed=3)
+        files_a = run_benchmarks.list_files(first)
+        files_b = run_benchmarks.list_files(second)
+
+        self.assertEqual(len(files_a), 40)
+        self.assertEqual([os.path.relpath(f, first) for f in files_a],
+                         [os.path.relpath(f, second) for f in files_b])
+        with open(files_a[7]) as fa, open(files_b[7]) as fb:
+            self.assertEqual(fa.read(), fb.read())
+
+    def test_compare_to_baseline(self):
+        """Test only metrics past tolerance plus slack are regressions"""
+        baseline = {'understand@10': {'p50_seconds': 1.0, 'p95_seconds': 2.0, 'peak_rss_mb': 100.0}}
+        within = {'understand@10': {'p50_seconds': 1.25, 'p95_seconds': 2.0, 'peak_rss_mb': 120.0}}
+        regressed = {'understand@10': {'p50_seconds': 1.5, 'p95_seconds': 2.0, 'peak_rss_mb': 100.0},
+                     'deploy@10': {'p50_seconds': 99.0}}
+
+        self.assertEqual(compare_to_baseline(within, baseline, tolerance=0.25), [])
+        regressions = compare_to_baseline(regressed, baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('understand@10 p50_seconds', regressions[0])
+
+    def test_end_to_end_smoke(self):
+        """Test every tool completes through the server router with fake engines"""
+        results = asyncio.run(run_benchmarks.run_benchmarks(
+            sizes=[10], tools=run_benchmarks.TOOLS, iterations=1,
+            time_scale=0.001, seed=0, repo_dir=self.tmp_dir
+        ))
+        self.assertEqual(set(results), {f"{tool}@10" for tool in run_benchmarks.TOOLS})
+        for metrics in results.values():
+            self.assertEqual(metrics['failures'], 0)
+            self.assertGreater(metrics['peak_rss_mb'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,255 @@
+"""
+Tests for the process-wide AIMD concurrency governor
+"""
+import asyncio
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.services import concurrency_governor
+from src.services.concurrency_governor import (
+    RATE_LIMITED, SUCCESS, ConcurrencyGovernor, governor_scope
+)
+
+
+def make_governor(**kwargs):
+    settings = dict(initial_limit=2, min_limit=1, max_limit=8, decrease_factor=0.5,
+                    decrease_cooldown_seconds=0, memory_high_percent=101)
+    settings.update(kwargs)
+    return ConcurrencyGovernor(**settings)
+
+
+class TestAIMD(unittest.TestCase):
+    """Test limit adjustments"""
+
+    def test_additive_increase_only_while_binding(self):
+        """Test fast completions grow the limit only when it is the constraint"""
+        governor = make_governor(initial_limit=2)
+        for _ in range(4):
+            governor.observe('analyze_code', 1.0, SUCCESS, was_binding=False)
+        self.assertEqual(governor.limit, 2)
+
+        for _ in range(4):
+            governor.observe('analyze_code', 1.0, SUCCESS, was_binding=True)
+        self.assertEqual(governor.limit, 3)
+
+    def test_multiplicative_decrease_on_rate_limit(self):
+        """Test a 429 halves the limit, bounded by the floor"""
+        governor = make_governor(initial_limit=8)
+        governor.observe('analyze_code', None, RATE_LIMITED)
+        self.assertEqual(governor.limit, 4)
+        for _ in range(5):
+            governor.decrease('timeout')
+        self.assertEqual(governor.limit, 1)
+        self.assertEqual(governor.get_stats()['decrease_reasons'], {'rate_limited': 1, 'timeout': 5})
+
+    def test_decrease_cooldown(self):
+        """Test a burst of 429s counts as one congestion event"""
+        governor = make_governor(initial_limit=8, decrease_cooldown_seconds=60)
+        for _ in range(5):
+            governor.decrease('rate_limited')
+        self.assertEqual(governor.limit, 4)
+
+    def test_slow_engine_counts_as_congestion(self):
+        """Test a completion far above the engine's average shrinks the limit"""
+        governor = make_governor(initial_limit=4, latency_min_samples=3)
+        for _ in range(3):
+            governor.observe('check_quality', 2.0, SUCCESS, was_binding=False)
+        governor.observe('analyze_code', 10.0, SUCCESS, was_binding=False)  # Other engines have their own baseline
+        self.assertEqual(governor.limit, 4)
+
+        governor.observe('check_quality', 5.0, SUCCESS)
+        self.assertEqual(governor.limit, 2)
+
+    def test_cpu_pressure_listener(self):
+        """Test CPU throttling transitions reported by CPUThrottler shrink the limit"""
+        throttler = Mock()
+        governor = make_governor(initial_limit=6, cpu_throttler=throttler)
+        callback = throttler.add_pressure_listener.call_args[0][0]
+        callback(False, 20.0)
+        self.assertEqual(governor.limit, 6)
+        callback(True, 95.0)
+        self.assertEqual(governor.limit, 3)
+
+    @patch('psutil.virtual_memory')
+    def test_memory_pressure(self, mock_memory):
+        """Test high system memory shrinks the limit on acquire"""
+        mock_memory.return_value = Mock(percent=95)
+        governor = make_governor(initial_limit=4, memory_high_percent=85)
+
+        async def acquire():
+            owner = await governor.acquire('a')
+            governor.release(owner, outcome=None)
+
+        asyncio.run(acquire())
+        self.assertEqual(governor.limit, 2)
+        self.assertEqual(governor.get_stats()['memory_percent'], 95)
+
+
+class TestSlots(unittest.IsolatedAsyncioTestCase):
+    """Test slot accounting and fairness"""
+
+    async def test_limit_bounds_in_flight(self):
+        """Test no more than `limit` slots are held at once"""
+        governor = make_governor(initial_limit=2, max_limit=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with governor.slot('analyze_code'):
+                peak = max(peak, governor.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call() for _ in range(6)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(governor.in_flight, 0)
+
+    async def test_fair_share_between_tool_calls(self):
+        """Test a second tool call gets the next slot ahead of a large call's backlog"""
+        governor = make_governor(initial_limit=2, max_limit=2)
+        order = []
+
+        async def call(owner, tag, delay):
+            with governor_scope(owner):
+                async with governor.slot():
+                    order.append(tag)
+                    await asyncio.sleep(delay)
+
+        big = [asyncio.create_task(call('full_analysis#1', f"big{i}", 0.02)) for i in range(5)]
+        await asyncio.sleep(0)
+        small = asyncio.create_task(call('understand#2', 'small', 0.01))
+        await asyncio.gather(*big, small)
+
+        self.assertEqual(order[:3], ['big0', 'big1', 'small'])
+
+    async def test_cancelled_waiter_does_not_leak(self):
+        """Test cancelling a queued acquire leaves the accounting intact"""
+        governor = make_governor(initial_limit=1, max_limit=1)
+        owner = await governor.acquire('a')
+        waiter = asyncio.create_task(governor.acquire('b'))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiter
+
+        governor.release(owner)
+        self.assertEqual(governor.get_stats()['waiting'], 0)
+        self.assertEqual(governor.in_flight, 0)
+
+    async def test_errors_release_slot(self):
+        """Test a failing engine call still frees its slot"""
+        governor = make_governor(initial_limit=1)
+        with self.assertRaises(asyncio.TimeoutError):
+            async with governor.slot('analyze_code'):
+                raise asyncio.TimeoutError()
+        self.assertEqual(governor.in_flight, 0)
+        self.assertEqual(governor.get_stats()['decrease_reasons'], {'timeout': 1})
+
+
+class TestToolIntegration(unittest.IsolatedAsyncioTestCase):
+    """Test smart tools take their engine slots from the shared governor"""
+
+    def setUp(self):
+        concurrency_governor.reset_concurrency_governor()
+        self.addCleanup(concurrency_governor.reset_concurrency_governor)
+
+    async def test_concurrent_tools_share_limit(self):
+        """Test two tools running at once never exceed the global limit together"""
+        from src.config import SmartToolsConfig
+        from src.smart_tools.understand_tool import UnderstandTool
+        from src.smart_tools.validate_tool import ValidateTool
+
+        smart_config = SmartToolsConfig(concurrency_initial_limit=2, concurrency_max_limit=2)
+        governor = concurrency_governor.get_concurrency_governor(smart_config)
+        peak = 0
+
+        async def engine(**kwargs):
+            nonlocal peak
+            peak = max(peak, governor.in_flight)
+            await asyncio.sleep(0.01)
+            return "analysis"
+
+        engines = {name: engine for name in ('analyze_code', 'search_code', 'check_quality', 'map_dependencies')}
+        with patch('psutil.virtual_memory', return_value=Mock(percent=10)):
+            tools = [UnderstandTool(engines), ValidateTool(engines)]
+        for tool in tools:
+            self.assertIs(tool.concurrency_governor, governor)
+            tool.cpu_throttler = None
+
+        await asyncio.gather(*(
+            tool.execute_multiple_engines(list(engines)) for tool in tools
+        ))
+        self.assertEqual(peak, 2)
+        self.assertEqual(governor.get_stats()['acquired'], 8)
+
+    def _tool(self, engine, **settings):
+        from src.config import SmartToolsConfig
+        from src.smart_tools.understand_tool import UnderstandTool
+
+        governor = concurrency_governor.get_concurrency_governor(SmartToolsConfig(
+            concurrency_initial_limit=4, concurrency_max_limit=8, concurrency_decrease_factor=0.5,
+            concurrency_memory_high_percent=100,
+            **settings))
+        with patch('psutil.virtual_memory', return_value=Mock(percent=10)):
+            tool = UnderstandTool({'analyze_code': engine})
+        tool.cpu_throttler = None
+        return tool, governor
+
+    async def test_error_text_results_reach_governor(self):
+        """Test engines that report a 429 or failure as text shrink or hold the limit"""
+        replies = ["Engine analyze_code failed: 429 Resource has been exhausted", "Engine analyze_code failed: boom"]
+
+        async def engine(**kwargs):
+            return replies.pop(0)
+
+        tool, governor = self._tool(engine)
+        await tool.execute_engine('analyze_code')
+        self.assertEqual(governor.limit, 2)
+        self.assertEqual(governor.get_stats()['decrease_reasons'], {'rate_limited': 1})
+
+        await tool.execute_engine('analyze_code')
+        self.assertEqual(governor.limit, 2)
+        self.assertEqual(governor.get_stats()['increases'], 0)
+        self.assertEqual(governor.in_flight, 0)
+
+    async def test_slot_released_during_retry_backoff(self):
+        """Test a retrying engine call gives its slot back while it sleeps"""
+        calls = []
+
+        async def engine(**kwargs):
+            calls.append(governor.in_flight)
+            if len(calls) == 1:
+                raise Exception("Request timeout")
+            return "analysis"
+
+        tool, governor = self._tool(engine)
+        tool._max_retries = 1
+        tool._base_retry_delay = 0.01
+        in_flight_while_sleeping = []
+        real_sleep = asyncio.sleep
+
+        async def sleep(delay):
+            in_flight_while_sleeping.append(governor.in_flight)
+            await real_sleep(0)
+
+        with patch('asyncio.sleep', side_effect=sleep):
+            self.assertEqual(await tool.execute_engine('analyze_code'), "analysis")
+        self.assertEqual(calls, [1, 1])
+        self.assertEqual(in_flight_while_sleeping, [0])
+        self.assertEqual(governor.get_stats()['acquired'], 2)
+        self.assertEqual(governor.get_stats()['decrease_reasons'], {'timeout': 1})
+
+    def test_disabled(self):
+        """Test the governor can be switched off"""
+        from src.config import SmartToolsConfig
+        self.assertIsNone(concurrency_governor.get_concurrency_governor(
+            SmartToolsConfig(enable_concurrency_governor=False)))
+
+
+if __name__ == '__main__':
+    unittest.main()
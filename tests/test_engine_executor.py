@@ -0,0 +1,134 @@
+"""
+Tests for the concurrent multi-engine executor in BaseSmartTool
+"""
+import asyncio
+import contextlib
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.smart_tools.base_smart_tool import BaseSmartTool, EngineRun
+
+
+class SleepEngine:
+    """Engine that sleeps, tracking how many runs overlap"""
+
+    def __init__(self, delay, tracker, result=None):
+        self.delay = delay
+        self.tracker = tracker
+        self.result = result
+        self.cancelled = False
+
+    async def execute(self, **kwargs):
+        self.tracker['active'] += 1
+        self.tracker['peak'] = max(self.tracker['peak'], self.tracker['active'])
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        finally:
+            self.tracker['active'] -= 1
+        return self.result if self.result is not None else f"result {kwargs.get('tag', '')}".strip()
+
+
+class DummyTool(BaseSmartTool):
+    async def execute(self, **kwargs):
+        pass
+
+    def get_routing_strategy(self, **kwargs):
+        return {}
+
+
+class TestConcurrentEngineExecutor(unittest.IsolatedAsyncioTestCase):
+    """Test bounded parallelism, completion order, deadlines and quorum"""
+
+    def setUp(self):
+        self.tracker = {'active': 0, 'peak': 0}
+
+    def _tool(self, delays, **engine_overrides):
+        engines = {name: SleepEngine(delay, self.tracker) for name, delay in delays.items()}
+        for name, engine in engine_overrides.items():
+            engines[name] = engine
+        tool = DummyTool(engines)
+        tool.cpu_throttler = None
+        tool.concurrency_governor = None
+        return tool
+
+    async def test_runs_in_parallel_with_bound(self):
+        """Test engines overlap but never exceed max_parallel"""
+        tool = self._tool({f"e{i}": 0.05 for i in range(6)})
+        start = asyncio.get_running_loop().time()
+        results = await tool.execute_multiple_engines(list(tool.engines), max_parallel=3)
+        elapsed = asyncio.get_running_loop().time() - start
+
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.tracker['peak'], 3)
+        self.assertLess(elapsed, 0.25)
+
+    async def test_completion_order(self):
+        """Test results are yielded as engines finish, not in request order"""
+        tool = self._tool({'slow': 0.15, 'medium': 0.08, 'fast': 0.01})
+        order = [run.engine_name async for run in tool.iter_engine_results(['slow', 'medium', 'fast'], max_parallel=3)]
+        self.assertEqual(order, ['fast', 'medium', 'slow'])
+
+    async def test_per_engine_timeout(self):
+        """Test an engine past its deadline is reported as timed out without blocking others"""
+        tool = self._tool({'stuck': 5, 'ok': 0.01})
+        runs = {run.engine_name: run async for run in tool.iter_engine_results(['stuck', 'ok'], engine_timeout=0.05)}
+
+        self.assertTrue(runs['ok'].success)
+        self.assertIsInstance(runs['stuck'].error, asyncio.TimeoutError)
+        self.assertTrue(tool.engines['stuck'].cancelled)
+        self.assertEqual(tool.get_executor_stats()['timed_out'], 1)
+
+    async def test_overall_deadline_cancels_stragglers(self):
+        """Test the overall deadline yields finished engines and times out the rest"""
+        tool = self._tool({'a': 0.01, 'b': 5, 'c': 5})
+        runs = [run async for run in tool.iter_engine_results(['a', 'b', 'c'], deadline=0.1)]
+
+        self.assertEqual([r.engine_name for r in runs], ['a', 'b', 'c'])
+        self.assertTrue(runs[0].success)
+        self.assertFalse(runs[1].success)
+        self.assertTrue(tool.engines['b'].cancelled and tool.engines['c'].cancelled)
+        self.assertEqual(self.tracker['active'], 0)
+
+    async def test_quorum_cancels_stragglers(self):
+        """Test iteration stops once enough engines succeed"""
+        tool = self._tool({'a': 0.01, 'b': 0.02, 'c': 5})
+        results = await tool.execute_multiple_engines(['a', 'b', 'c'], quorum=2)
+
+        self.assertEqual(list(results), ['a', 'b'])
+        self.assertTrue(tool.engines['c'].cancelled)
+        self.assertEqual(tool.get_executor_stats()['cancelled'], 1)
+
+    async def test_failures_are_partial(self):
+        """Test failed engines are dropped and engine_kwargs reach the right engine"""
+        tool = self._tool({'ok': 0.01}, broken=SleepEngine(0.01, self.tracker, result="❌ Engine failed"),
+                          structured=SleepEngine(0.01, self.tracker, result={'success': False, 'error': 'x'}))
+        results = await tool.execute_multiple_engines(['ok', 'broken', 'structured'],
+                                                      engine_kwargs={'ok': {'tag': 'ok-only'}})
+        self.assertEqual(results, {'ok': 'result ok-only'})
+
+    async def test_early_exit_cancels_in_flight(self):
+        """Test closing the iterator early cancels engines still running"""
+        tool = self._tool({'fast': 0.01, 'slow': 5})
+        async with contextlib.aclosing(tool.iter_engine_results(['fast', 'slow'])) as runs:
+            async for run in runs:
+                break
+        self.assertTrue(tool.engines['slow'].cancelled)
+
+    def test_engine_run_success(self):
+        """Test success classification matches the legacy result handling"""
+        self.assertTrue(EngineRun('e', result='analysis').success)
+        self.assertFalse(EngineRun('e', result='❌ failed').success)
+        self.assertFalse(EngineRun('e', result={'error': 'x'}).success)
+        self.assertTrue(EngineRun('e', result={'success': True}).success)
+        self.assertFalse(EngineRun('e', error=RuntimeError()).success)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,232 @@
+"""
+Tests for incremental analysis through the per-engine result store
+"""
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.services import engine_result_store
+from src.services.engine_result_store import (EngineResultStore, ShardRun, is_cacheable_result,
+                                              merge_shard_results, plan_shards)
+from src.smart_tools.base_smart_tool import BaseSmartTool
+from src.smart_tools.validate_tool import ValidateTool
+
+
+class DummyTool(BaseSmartTool):
+    async def execute(self, **kwargs):
+        pass
+
+    def get_routing_strategy(self, **kwargs):
+        return {}
+
+
+class RecordingEngine:
+    """Engine stand-in that reports which files each call received"""
+
+    def __init__(self, template="Reviewed {files}", qualified=False):
+        self.calls = []
+        self.template = template
+        self.qualified = qualified
+
+    def name(self, path):
+        return os.path.join(os.path.basename(os.path.dirname(path)), os.path.basename(path)) if self.qualified \
+            else os.path.basename(path)
+
+    async def __call__(self, paths=None, **kwargs):
+        files = sorted(self.name(p) for p in paths)
+        self.calls.append(files)
+        return self.template.format(files=', '.join(files))
+
+
+class TestResultStore(unittest.TestCase):
+    """Test shard planning and the store itself"""
+
+    def test_plan_shards_groups_directories(self):
+        """Test shards keep directories together and are stable under reordering"""
+        paths = ['/p/b/2.py', '/p/a/1.py', '/p/b/1.py', '/p/c/1.py', '/p/a/2.py']
+        self.assertEqual(plan_shards(paths, 3), [['/p/a/1.py', '/p/a/2.py'], ['/p/b/1.py', '/p/b/2.py', '/p/c/1.py']])
+        self.assertEqual(plan_shards(reversed(paths), 3), plan_shards(paths, 3))
+        self.assertEqual(plan_shards([f'/p/big/{i}.py' for i in range(5)], 2),
+                         [['/p/big/0.py', '/p/big/1.py'], ['/p/big/2.py', '/p/big/3.py'], ['/p/big/4.py']])
+
+    def test_only_successful_results_are_cacheable(self):
+        """Test error strings and failed dicts are never stored"""
+        self.assertTrue(is_cacheable_result("## Findings\nNone"))
+        self.assertTrue(is_cacheable_result({'success': True}))
+        self.assertFalse(is_cacheable_result("❌ Engine Error: boom"))
+        self.assertFalse(is_cacheable_result("Engine check_quality not available"))
+        self.assertFalse(is_cacheable_result({'success': False}))
+        self.assertFalse(is_cacheable_result(""))
+
+    def test_ttl_and_byte_budget(self):
+        """Test expired entries miss and old entries are evicted past the budget"""
+        store = EngineResultStore(max_bytes=10, ttl_seconds=60)
+        store.put('a', 'aaaaa')
+        store.put('b', 'bbbbb')
+        store.put('c', 'ccccc')
+        self.assertIsNone(store.get('a'))
+        self.assertEqual(store.get('c'), 'ccccc')
+        self.assertEqual(store.get_stats()['evictions'], 1)
+
+        with patch.object(engine_result_store.time, 'time', return_value=engine_result_store.time.time() + 120):
+            self.assertIsNone(store.get('b'))
+        self.assertEqual(store.get_stats()['expired'], 1)
+
+    def test_merge_marks_reused_shards(self):
+        """Test merged reports label reused shards and pass single fresh results through"""
+        self.assertEqual(merge_shard_results([ShardRun(['/p/a.py'], {'raw': 1})]), {'raw': 1})
+        merged = merge_shard_results([ShardRun(['/p/a/x.py'], 'fresh'), ShardRun(['/p/b/y.py'], 'old', reused=True)])
+        self.assertIn('### Shard 1/2: 1 files in a\n\nfresh', merged)
+        self.assertIn('### Shard 2/2: 1 files in b - ♻️ reused from previous run', merged)
+
+    def test_merge_recomputes_aggregates(self):
+        """Test findings repeated across shards and per-shard sharder summaries are merged"""
+        sharded = ("## check_quality: 2 files analyzed in 2 parallel shards\n\n"
+                   "1 duplicate findings reported by more than one shard were merged.\n\n"
+                   "### Shard 1/2: 1 files in a\n\n- shared finding\n\n### Shard 2/2: 1 files in a\n\n- only a")
+        merged = merge_shard_results([ShardRun(['/p/a/x.py', '/p/a/y.py'], sharded),
+                                      ShardRun(['/p/b/z.py'], '- shared finding\n- only b', reused=True)],
+                                     'check_quality')
+
+        self.assertTrue(merged.startswith('## check_quality: 3 files analyzed in 2 shards (1 reused)'))
+        self.assertEqual(merged.count('files analyzed'), 1)
+        self.assertEqual(merged.count('shared finding'), 1)
+        self.assertIn('2 duplicate findings reported by more than one shard were merged.', merged)
+        self.assertIn('- only b', merged)
+
+
+class IncrementalTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.paths = []
+        for directory in ('core', 'util'):
+            os.makedirs(os.path.join(self.tmp_dir, directory))
+            for i in range(2):
+                self.paths.append(self.write(f'{directory}/m{i}.py', f'value = {i}\n'))
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def edit(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    def make_tool(self, tool_class, engine):
+        tool = tool_class({'check_quality': engine})
+        tool.result_store = EngineResultStore()
+        tool._incremental_shard_files = 2
+        return tool
+
+
+class TestIncrementalExecution(IncrementalTestCase):
+    """Test only shards with changed files reach the engine"""
+
+    async def test_rerun_sends_only_changed_shard(self):
+        engine = RecordingEngine()
+        tool = self.make_tool(DummyTool, engine)
+
+        first = await tool.execute_engine_incremental('check_quality', 'paths', self.paths, check_type='all')
+        self.assertEqual(engine.calls, [['m0.py', 'm1.py'], ['m0.py', 'm1.py']])
+        self.assertFalse(any(run.reused for run in first))
+
+        self.edit(self.paths[2], 'value = 99\n')
+        second = await tool.execute_engine_incremental('check_quality', 'paths', self.paths, check_type='all')
+        self.assertEqual(len(engine.calls), 3)
+        self.assertEqual([run.reused for run in second], [True, False])
+        self.assertEqual(tool.get_executor_stats()['reused_shards'], 1)
+
+        # Different parameters are a different analysis
+        await tool.execute_engine_incremental('check_quality', 'paths', self.paths, check_type='security')
+        self.assertEqual(len(engine.calls), 5)
+
+    async def test_failed_shards_are_retried(self):
+        engine = RecordingEngine(template="❌ Engine Error: quota")
+        tool = self.make_tool(DummyTool, engine)
+
+        await tool.execute_engine_incremental('check_quality', 'paths', self.paths, shard=False)
+        await tool.execute_engine_incremental('check_quality', 'paths', self.paths, shard=False)
+        self.assertEqual(len(engine.calls), 2)
+
+    async def test_without_store_is_single_call(self):
+        engine = RecordingEngine()
+        tool = self.make_tool(DummyTool, engine)
+        tool.result_store = None
+
+        runs = await tool.execute_engine_incremental('check_quality', 'paths', self.paths)
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(len(engine.calls), 1)
+
+    async def test_validate_marks_reused_issues(self):
+        """Test issues extracted from reused shards are tagged and counted in the report"""
+        engine = RecordingEngine(template="- error: unchecked input in {files}", qualified=True)
+        tool = self.make_tool(ValidateTool, engine)
+
+        await tool._run_quality_analysis(self.paths, 'all')
+        self.edit(self.paths[0], 'value = -1\n')
+        result = (await tool._run_quality_analysis(self.paths, 'all'))['quality']
+
+        self.assertEqual((result['shards'], result['reused_shards']), (2, 1))
+        reused = [issue for issue in result['issues'] if issue.get('reused')]
+        self.assertTrue(reused)
+        self.assertLess(len(reused), len(result['issues']))
+        self.assertIn('♻️ reused from previous run', result['result'])
+
+        report = tool._synthesize_validation_report(
+            'all', {'quality': result['result']}, result['issues'], len(result['issues']),
+            {'validation_scope': 'all', 'severity_filter': 'low'})
+        self.assertIn(f"{len(reused)} of {len(result['issues'])} issues reused", report)
+
+    async def test_reused_issues_follow_their_shard(self):
+        """Test an edit in the first shard leaves its fresh issues untagged and tags the later reused shard"""
+        async def engine(paths=None, **kwargs):
+            if 'core' in paths[0]:
+                return "- error: unchecked input in core"
+            return "\n".join(f"- warning: slow loop in {os.path.basename(p)}" for p in sorted(paths))
+
+        tool = self.make_tool(ValidateTool, engine)
+        await tool._run_quality_analysis(self.paths, 'all')
+        self.edit(self.paths[0], 'value = -1\n')
+        result = (await tool._run_quality_analysis(self.paths, 'all'))['quality']
+
+        self.assertEqual(result['reused_shards'], 1)
+        self.assertEqual([(issue['shard'], bool(issue.get('reused'))) for issue in result['issues']],
+                         [(1, False), (2, True), (2, True)])
+
+    async def test_incremental_totals_match_full_run(self):
+        """Test issue counts from a sharded, partly reused run equal those of one run over all files"""
+        async def engine(paths=None, **kwargs):
+            files = sorted(RecordingEngine(qualified=True).name(p) for p in paths)
+            return "\n".join(["- error: unchecked input handling"] + [f"- warning: slow loop in {f}" for f in files])
+
+        full_tool = self.make_tool(ValidateTool, engine)
+        full_tool.result_store = None
+        full = (await full_tool._run_quality_analysis(self.paths, 'all'))['quality']
+
+        tool = self.make_tool(ValidateTool, engine)
+        first = (await tool._run_quality_analysis(self.paths, 'all'))['quality']
+        self.edit(self.paths[0], 'value = -1\n')
+        rerun = (await tool._run_quality_analysis(self.paths, 'all'))['quality']
+
+        self.assertEqual(first['shards'], 2)
+        self.assertEqual(rerun['reused_shards'], 1)
+        for result in (first, rerun):
+            self.assertEqual(len(result['issues']), len(full['issues']))
+            self.assertEqual([i['severity'] for i in result['issues']], [i['severity'] for i in full['issues']])
+            self.assertEqual(result['result'].count('unchecked input handling'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
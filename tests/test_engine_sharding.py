@@ -0,0 +1,163 @@
+"""
+Tests for map-reduce sharding of large file sets across engine calls
+"""
+import asyncio
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.engines.engine_sharding import EngineSharder, plan_token_shards, reduce_shard_results
+from src.engines.engine_wrapper import EngineWrapper
+from src.services.concurrency_governor import ConcurrencyGovernor
+
+
+class TestShardPlanning(unittest.TestCase):
+    """Test token-bounded shard planning and the reduce step"""
+
+    def test_shards_respect_budget_and_directories(self):
+        """Test small directories are packed together and large ones split"""
+        tokens = {'/p/a/1.py': 40, '/p/a/2.py': 40, '/p/b/1.py': 10, '/p/c/1.py': 60, '/p/c/2.py': 60}
+        self.assertEqual(plan_token_shards(tokens, 100),
+                         [['/p/a/1.py', '/p/a/2.py', '/p/b/1.py'], ['/p/c/1.py'], ['/p/c/2.py']])
+        self.assertEqual(plan_token_shards({'/p/huge.py': 500, '/p/x.py': 5}, 100), [['/p/huge.py'], ['/p/x.py']])
+
+    def test_reduce_merges_duplicate_findings(self):
+        """Test findings reported by several shards appear once"""
+        shards = [['/p/a/1.py'], ['/p/b/1.py']]
+        results = ["## Issues\n- Missing   timeout on requests\n- SQL built by concatenation",
+                   "## Issues\n- missing timeout on requests\n1. Unused import"]
+        merged, removed = reduce_shard_results('check_quality', shards, results)
+
+        self.assertEqual(removed, 1)
+        self.assertEqual(merged.count('timeout on requests'), 1)
+        self.assertEqual(merged.count('## Issues'), 2)
+        self.assertIn('Unused import', merged)
+        self.assertIn('### Shard 2/2: 1 files in b', merged)
+
+    def test_reduce_reports_failed_shards(self):
+        """Test partial failures are flagged and total failure surfaces the engine error"""
+        merged, _ = reduce_shard_results('check_quality', [['/p/a.py'], ['/p/b.py']],
+                                         ["- fine", RuntimeError("quota")])
+        self.assertIn('1 of 2 shards failed', merged)
+        self.assertIn('Analysis failed: quota', merged)
+
+        merged, _ = reduce_shard_results('check_quality', [['/p/a.py'], ['/p/b.py']],
+                                         ["❌ Engine Error: quota", RuntimeError("quota")])
+        self.assertEqual(merged, "❌ Engine Error: quota")
+
+
+class TestShardedExecution(unittest.IsolatedAsyncioTestCase):
+    """Test the engine wrapper maps oversized file lists over parallel shards"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.paths = []
+        for directory in ('api', 'core', 'util'):
+            os.makedirs(os.path.join(self.tmp_dir, directory))
+            for i in range(2):
+                path = os.path.join(self.tmp_dir, directory, f'm{i}.py')
+                with open(path, 'w') as f:
+                    f.write('x = 1\n' * 60)  # ~100 estimated tokens
+                self.paths.append(path)
+
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+
+        async def engine(paths=None, **kwargs):
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            await asyncio.sleep(0.01)
+            self.in_flight -= 1
+            self.calls.append(sorted(os.path.relpath(p, self.tmp_dir) for p in paths))
+            return f"- shared finding\n- reviewed {', '.join(self.calls[-1])}"
+
+        self.engine = engine
+
+    def make_wrapper(self, engine_name='check_quality', **sharder_kwargs):
+        wrapper = EngineWrapper(engine_name, self.engine)
+        wrapper.sharder = EngineSharder(**sharder_kwargs)
+        return wrapper
+
+    async def run_wrapper(self, wrapper, paths):
+        """Run the wrapper's path expansion and sharded execution, with the test dir as engine cwd"""
+        kwargs = wrapper._adapt_parameters(wrapper._preprocess_path_inputs({'paths': paths}))
+        original_cwd = os.getcwd()
+        try:
+            return await wrapper._execute_sharded(kwargs, self.tmp_dir)
+        finally:
+            os.chdir(original_cwd)
+
+    async def test_large_file_list_is_sharded(self):
+        wrapper = self.make_wrapper(max_shard_tokens=300, max_parallel=2)
+        result = await self.run_wrapper(wrapper, self.tmp_dir)
+
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(sorted(f for call in self.calls for f in call), sorted(
+            os.path.relpath(p, self.tmp_dir) for p in self.paths))
+        self.assertTrue(all(len({os.path.dirname(f) for f in call}) == 1 for call in self.calls))
+        self.assertEqual(self.peak, 2)
+        self.assertEqual(result.count('shared finding'), 1)
+        self.assertEqual(wrapper.sharder.get_stats()['duplicates_removed'], 2)
+
+    async def test_governor_limit_caps_parallelism(self):
+        wrapper = self.make_wrapper(max_shard_tokens=300, max_parallel=4, governor=Mock(limit=1))
+        await self.run_wrapper(wrapper, self.paths)
+        self.assertEqual((len(self.calls), self.peak), (3, 1))
+
+    async def test_shards_hold_governor_slots(self):
+        """Test extra shards take their own slots, so the fan-out never exceeds the governor limit"""
+        governor = ConcurrencyGovernor(initial_limit=3, max_limit=3, memory_high_percent=100.0)
+        peak_in_flight = 0
+        engine = self.engine
+
+        async def engine_with_slots(paths=None, **kwargs):
+            nonlocal peak_in_flight
+            peak_in_flight = max(peak_in_flight, governor.in_flight)
+            return await engine(paths=paths, **kwargs)
+
+        self.engine = engine_with_slots
+        wrapper = self.make_wrapper(max_shard_tokens=300, max_parallel=4, governor=governor)
+        async with governor.slot('other_tool_engine', owner='other'):
+            async with governor.slot('check_quality', owner='this'):
+                await self.run_wrapper(wrapper, self.paths)
+                self.assertEqual(governor.in_flight, 2)
+
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(self.peak, 2)
+        self.assertEqual(peak_in_flight, 3)
+        self.assertGreaterEqual(governor.stats['acquired'], 2 + 1)
+
+    async def test_concurrent_sharded_calls_at_limit_finish(self):
+        """Test N sharded calls each holding one of N slots run their shards on their own slot"""
+        calls = 3
+        governor = ConcurrencyGovernor(initial_limit=calls, max_limit=calls, memory_high_percent=100.0)
+        wrapper = self.make_wrapper(max_shard_tokens=300, max_parallel=4, governor=governor)
+
+        async def sharded_call(owner):
+            async with governor.slot('check_quality', owner=owner):
+                return await self.run_wrapper(wrapper, self.paths)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(sharded_call(f'tool-{i}') for i in range(calls))), timeout=5)
+
+        self.assertEqual(len(self.calls), 3 * calls)
+        self.assertTrue(all('3 parallel shards' in result for result in results))
+        self.assertEqual(governor.in_flight, 0)
+
+    async def test_small_and_cross_file_calls_run_once(self):
+        await self.run_wrapper(self.make_wrapper(max_shard_tokens=100_000), self.paths)
+        await self.run_wrapper(self.make_wrapper('analyze_code', max_shard_tokens=300), self.paths)
+        self.assertEqual([len(call) for call in self.calls], [6, 6])
+
+
+if __name__ == '__main__':
+    unittest.main()
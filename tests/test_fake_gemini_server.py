@@ -0,0 +1,163 @@
+"""
+Tests for the local fake Gemini backend
+"""
+import asyncio
+import random
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.clients.fake_gemini_server import (
+    FakeGeminiServer, FakeGeminiSettings, model_family, parse_latency, sample_latency
+)
+from src.clients.gemini_transport import GeminiHttpError, GeminiHttpTransport
+
+
+class TestLatencySpecs(unittest.TestCase):
+    """Test latency distribution parsing and sampling"""
+
+    def test_parse(self):
+        """Test each supported distribution parses"""
+        self.assertEqual(parse_latency('fixed:0.5'), ('fixed', (0.5,)))
+        self.assertEqual(parse_latency('uniform:1,2'), ('uniform', (1.0, 2.0)))
+        self.assertEqual(parse_latency('lognormal:1.0,0.5'), ('lognormal', (1.0, 0.5)))
+        with self.assertRaises(ValueError):
+            parse_latency('gamma:1')
+        with self.assertRaises(ValueError):
+            parse_latency('uniform:1')
+
+    def test_lognormal_median(self):
+        """Test the lognormal spec is parameterised by its median"""
+        rng = random.Random(1)
+        samples = sorted(sample_latency(rng, 'lognormal', (2.0, 0.5)) for _ in range(2001))
+        self.assertAlmostEqual(samples[1000], 2.0, delta=0.15)
+
+    def test_model_family(self):
+        """Test model ids map to the client's model names"""
+        self.assertEqual(model_family('gemini-2.5-flash-lite'), 'flash-lite')
+        self.assertEqual(model_family('gemini-2.5-flash'), 'flash')
+        self.assertEqual(model_family('gemini-2.5-pro'), 'pro')
+
+
+class TestFakeGeminiServer(unittest.IsolatedAsyncioTestCase):
+    """Test fault injection over HTTP"""
+
+    async def _start(self, **settings):
+        server = FakeGeminiServer(FakeGeminiSettings(**settings))
+        base_url = await server.start()
+        self.addAsyncCleanup(server.close)
+        transport = GeminiHttpTransport(base_url)
+        self.addAsyncCleanup(transport.close)
+        return server, transport
+
+    async def test_response_size_and_usage(self):
+        """Test responses have the configured size and usage metadata"""
+        server, transport = await self._start(latency='fixed:0', response_chars=600)
+        response = await transport.generate_content('gemini-2.5-flash', 'x' * 400, 'key')
+
+        self.assertAlmostEqual(len(response.text), 600, delta=10)
+        self.assertIn('## Findings', response.text)
+        self.assertEqual(response.usage_metadata.prompt_token_count, 100)
+
+    async def test_latency_distribution_applied(self):
+        """Test fixed latency is scaled per model family"""
+        server, transport = await self._start(latency='fixed:0.1')
+        start = time.perf_counter()
+        await transport.generate_content('gemini-2.5-flash-lite', 'p', 'key')
+        lite = time.perf_counter() - start
+        start = time.perf_counter()
+        await transport.generate_content('gemini-2.5-pro', 'p', 'key')
+        pro = time.perf_counter() - start
+
+        self.assertLess(lite, 0.15)
+        self.assertGreaterEqual(pro, 0.3)
+
+    async def test_rpm_limit_returns_429_with_retry_after(self):
+        """Test requests past the per-key RPM limit are rejected"""
+        server, transport = await self._start(latency='fixed:0', rpm_limits={'flash': 2})
+        for _ in range(2):
+            await transport.generate_content('gemini-2.5-flash', 'p', 'key-a')
+
+        with self.assertRaises(GeminiHttpError) as ctx:
+            await transport.generate_content('gemini-2.5-flash', 'p', 'key-a')
+        self.assertEqual(ctx.exception.status, 429)
+        self.assertIn('retry-after', ctx.exception.headers)
+        # Limits are per key and per model
+        await transport.generate_content('gemini-2.5-flash', 'p', 'key-b')
+        await transport.generate_content('gemini-2.5-pro', 'p', 'key-a')
+        self.assertEqual(server.get_stats()['rate_limited'], 1)
+
+    async def test_injected_faults_are_deterministic(self):
+        """Test the same seed injects the same faults into the same request sequence"""
+        async def run():
+            server, transport = await self._start(latency='fixed:0', error_rate=0.5, seed=7)
+            outcomes = []
+            for _ in range(12):
+                try:
+                    await transport.generate_content('gemini-2.5-flash', 'p', 'key')
+                    outcomes.append('ok')
+                except GeminiHttpError as e:
+                    outcomes.append(e.status)
+            return outcomes
+
+        first, second = await run(), await run()
+        self.assertEqual(first, second)
+        self.assertIn(500, first)
+        self.assertIn('ok', first)
+
+    async def test_hung_requests(self):
+        """Test timeout injection hangs the request"""
+        server, transport = await self._start(latency='fixed:0', timeout_rate=1.0, hang_seconds=1)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(transport.generate_content('gemini-2.5-flash', 'p', 'key'), timeout=0.2)
+
+    async def test_streaming(self):
+        """Test the SSE endpoint yields the response in chunks"""
+        server, transport = await self._start(latency='fixed:0', stream_chunks=3)
+        chunks = [c.text async for c in transport.stream_generate_content('gemini-2.5-flash', 'p', 'key')]
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(''.join(chunks).startswith('## Summary'))
+
+
+class TestGeminiClientFakeTransport(unittest.IsolatedAsyncioTestCase):
+    """Test GeminiClient targets the fake backend through config"""
+
+    async def test_generate_content_and_fallback_on_429(self):
+        """Test requests succeed and a saturated model falls back"""
+        from src.clients import gemini_client
+        from src.config import SmartToolsConfig
+
+        smart_config = SmartToolsConfig(
+            gemini_transport='fake',
+            fake_gemini_latency='fixed:0.01',
+            fake_gemini_rpm_limits={'pro': 1},
+            enable_response_cache=False,
+            enable_adaptive_timeouts=False,
+            enable_admission_control=False
+        )
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        with patch.object(gemini_client, 'RATE_LIMIT_FILE', os.path.join(tmp_dir, 'rate_limits.json')):
+            client = gemini_client.GeminiClient(smart_config)
+        self.addAsyncCleanup(client.close)
+
+        text, model_used, _ = await client.generate_content('first', model_name='pro')
+        self.assertEqual(model_used, 'pro')
+        self.assertIn('## Summary', text)
+
+        with patch.object(client, '_progressive_backoff_retry', side_effect=Exception("backoff skipped")):
+            _, model_used, _ = await client.generate_content('second', model_name='pro')
+        self.assertEqual(model_used, 'flash')
+        self.assertEqual(client.fake_server.get_stats()['rate_limited'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
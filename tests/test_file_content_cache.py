@@ -0,0 +1,173 @@
+"""
+Tests for the process-wide file content cache
+"""
+import asyncio
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.services import file_content_cache
+from src.services.file_content_cache import FileContentCache
+from src.engines.engine_wrapper import EngineFactory
+from src.smart_tools.base_smart_tool import BaseSmartTool
+
+
+class DummyTool(BaseSmartTool):
+    async def execute(self, **kwargs):
+        pass
+
+    def get_routing_strategy(self, **kwargs):
+        return {}
+
+
+class CountingLoad:
+    """Wraps the cache's loader to count disk reads"""
+
+    def __init__(self):
+        self.reads = []
+        self._load = file_content_cache._load
+
+    def __call__(self, path, cached_version, *args):
+        version, content = self._load(path, cached_version, *args)
+        if content is not None:
+            self.reads.append(path)
+        return version, content
+
+
+class FileCacheTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.loader = CountingLoad()
+        patcher = patch.object(file_content_cache, '_load', self.loader)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+
+class TestFileContentCache(FileCacheTestCase):
+    """Test validation, LRU budget and read sharing"""
+
+    async def test_hit_miss_and_stale(self):
+        """Test unchanged files are served from memory and changed ones re-read"""
+        cache = FileContentCache()
+        path = self.write('a.py', 'x = 1\n')
+
+        self.assertEqual(await cache.fetch(path), ('x = 1\n', 'miss'))
+        self.assertEqual(await cache.fetch(path), ('x = 1\n', 'hit'))
+
+        with open(path, 'w') as f:
+            f.write('x = 22\n')
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        self.assertEqual(await cache.fetch(path), ('x = 22\n', 'stale'))
+
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['stale']), (1, 1, 1))
+        self.assertEqual(len(self.loader.reads), 2)
+
+    async def test_lru_byte_budget(self):
+        """Test least recently used files are evicted past the byte budget"""
+        cache = FileContentCache(max_bytes=250)
+        a, b, c = (self.write(n, n[0] * 100) for n in ('a.txt', 'b.txt', 'c.txt'))
+
+        await cache.read_text(a)
+        await cache.read_text(b)
+        await cache.read_text(a)  # b is now least recently used
+        await cache.read_text(c)
+
+        self.assertIn(a, cache)
+        self.assertNotIn(b, cache)
+        self.assertIn(c, cache)
+        self.assertEqual(cache.get_stats()['bytes'], 200)
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+
+    async def test_oversized_file_not_kept(self):
+        """Test a file larger than the budget is returned but not cached"""
+        cache = FileContentCache(max_bytes=10)
+        path = self.write('big.txt', 'z' * 50)
+        self.assertEqual(await cache.read_text(path), 'z' * 50)
+        self.assertEqual(len(cache), 0)
+
+    async def test_concurrent_reads_share_one_disk_read(self):
+        """Test engines asking for the same file at once cause one read"""
+        cache = FileContentCache()
+        path = self.write('shared.py', 'print(1)\n')
+
+        results = await asyncio.gather(*(cache.fetch(path) for _ in range(5)))
+
+        self.assertEqual({content for content, _ in results}, {'print(1)\n'})
+        self.assertEqual(len(self.loader.reads), 1)
+
+    async def test_missing_file(self):
+        """Test unreadable files return None and drop any stale entry"""
+        cache = FileContentCache()
+        path = self.write('gone.py', 'pass\n')
+        await cache.read_text(path)
+        os.unlink(path)
+
+        self.assertEqual(await cache.fetch(path), (None, 'error'))
+        self.assertNotIn(path, cache)
+
+
+class TestSharedCacheConsumers(FileCacheTestCase):
+    """Test tools and engines read each file once through the shared cache"""
+
+    def setUp(self):
+        super().setUp()
+        file_content_cache.reset_file_content_cache()
+        self.addCleanup(file_content_cache.reset_file_content_cache)
+
+    async def test_tools_share_prepopulated_contents(self):
+        """Test a second tool's pre-population is served from the first tool's reads"""
+        paths = [self.write(f'm{i}.py', f'value = {i}\n') for i in range(3)]
+        first, second = DummyTool({}), DummyTool({})
+
+        await first._populate_file_cache({'files': paths}, ['files'])
+        await second._populate_file_cache({'files': paths}, ['files'])
+
+        self.assertEqual(first.get_cache_stats()['cache_misses'], 3)
+        self.assertEqual(second.get_cache_stats()['cache_hits'], 3)
+        self.assertEqual(second.get_cache_stats()['cache_size'], 3)
+        self.assertEqual(len(self.loader.reads), 3)
+
+        second.clear_cache()
+        self.assertEqual(second.get_cache_stats()['cache_size'], 0)
+        self.assertEqual(len(file_content_cache.get_file_content_cache()), 0)
+
+    async def test_engine_reads_go_through_cache(self):
+        """Test the engines' per-file reads are served from the shared cache"""
+        class Implementations:
+            def __init__(self):
+                self.original_reads = 0
+
+            async def _read_file_safe(self, file_path):
+                self.original_reads += 1
+                return None
+
+        path = self.write('engine.py', 'def f():\n    return 1\n')
+        await DummyTool({})._populate_file_cache({'files': [path]}, ['files'])
+
+        implementations = Implementations()
+        EngineFactory._apply_file_cache_patch(implementations)
+        self.assertEqual(await implementations._read_file_safe(path), 'def f():\n    return 1\n')
+        self.assertEqual(await implementations._read_file_safe(path + '.missing'), None)
+
+        self.assertEqual(implementations.original_reads, 1)
+        self.assertEqual(len(self.loader.reads), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Tests for mmap-backed file views and large-file reads through the file cache
+"""
+import shutil
+import tempfile
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.services.file_content_cache import FileContentCache
+from src.utils.file_view import FileView
+
+
+class FileViewTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+
+    def write_log(self, name, lines):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            f.writelines(f"line {i:05d}\n" for i in range(lines))
+        return path
+
+
+class TestFileView(FileViewTestCase):
+    """Test mapping, slicing and excerpts"""
+
+    def test_threshold_picks_mmap(self):
+        """Test small files are read and large ones mapped"""
+        path = self.write_log('app.log', 100)  # 1100 bytes
+
+        with FileView(path, mmap_threshold=4096) as small:
+            self.assertFalse(small.mapped)
+            self.assertEqual(small.text(0, 11), 'line 00000\n')
+        with FileView(path, mmap_threshold=1024) as large:
+            self.assertTrue(large.mapped)
+            self.assertEqual(large.size, 1100)
+            chunk = large.slice(11, 22)
+            self.assertIsInstance(chunk, memoryview)
+            self.assertEqual(bytes(chunk), b'line 00001\n')
+            chunk.release()
+        self.assertTrue(large.closed)
+
+    def test_excerpt_keeps_head_and_tail_on_line_boundaries(self):
+        """Test oversized files decode only their head and tail"""
+        path = self.write_log('big.log', 1000)  # 11000 bytes
+        with FileView(path, mmap_threshold=0) as view:
+            excerpt = view.excerpt(1100)
+            self.assertEqual(view.excerpt(20000), view.text())
+
+        self.assertTrue(excerpt.startswith('line 00000\n'))
+        self.assertTrue(excerpt.endswith('line 00999\n'))
+        self.assertIn('bytes omitted from 11,000-byte file', excerpt)
+        for line in filter(None, excerpt.splitlines()):
+            self.assertTrue(line.startswith('line ') or line.startswith('[...'), line)
+        self.assertLess(len(excerpt), 1200)
+
+    def test_close_with_live_slice(self):
+        """Test closing while a slice is held does not raise"""
+        path = self.write_log('held.log', 200)
+        view = FileView(path, mmap_threshold=0)
+        chunk = view.slice(0, 10)
+        view.close()
+        self.assertEqual(bytes(chunk), b'line 00000')
+        chunk.release()
+
+
+class TestCacheMapsLargeFiles(FileViewTestCase, unittest.IsolatedAsyncioTestCase):
+    """Test the shared cache maps large files instead of holding decoded text"""
+
+    async def test_large_file_decoded_as_excerpt(self):
+        """Test a mapped file is served as an excerpt and kept out of the byte budget"""
+        path = self.write_log('huge.log', 1000)
+        cache = FileContentCache(max_bytes=1_000_000, mmap_threshold=4096, max_text_bytes=1100)
+
+        content, outcome = await cache.fetch(path)
+        self.assertEqual(outcome, 'miss')
+        self.assertTrue(content.endswith('line 00999\n'))
+        self.assertLess(len(content), 1200)
+
+        stats = cache.get_stats()
+        self.assertEqual((stats['bytes'], stats['mapped_views'], stats['mapped_bytes']), (0, 1, 11000))
+        self.assertEqual(await cache.fetch(path), (content, 'hit'))
+
+        cache.invalidate(path)
+        self.assertEqual(cache.get_stats()['mapped_views'], 0)
+
+    async def test_open_views_are_capped(self):
+        """Test the least recently used views are unmapped past max_views"""
+        paths = [self.write_log(f'{i}.log', 500) for i in range(3)]
+        cache = FileContentCache(mmap_threshold=1024, max_views=2)
+
+        views = [content for content, _ in await cache.fetch_many(paths)]
+
+        self.assertTrue(all(isinstance(view, FileView) for view in views))
+        self.assertTrue(views[0].closed)
+        self.assertNotIn(paths[0], cache)
+        self.assertEqual(len(cache), 2)
+        cache.clear()
+        self.assertTrue(views[2].closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
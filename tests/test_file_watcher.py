@@ -0,0 +1,166 @@
+"""
+Tests for filesystem change notification and the caches validated by it
+"""
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.services import file_content_cache
+from src.services.file_content_cache import FileContentCache
+from src.services.file_watcher import FileWatcher, inotify_available
+from src.smart_tools.base_smart_tool import BaseSmartTool
+
+
+class DummyTool(BaseSmartTool):
+    async def execute(self, **kwargs):
+        pass
+
+    def get_routing_strategy(self, **kwargs):
+        return {}
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class WatcherBackendMixin:
+    """Behaviour every backend must provide"""
+
+    backend = None
+
+    def setUp(self):
+        self.root = os.path.realpath(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root, True)
+        os.makedirs(os.path.join(self.root, 'src'))
+        self.path = self.write('src/app.py', 'x = 1\n')
+        self.watcher = FileWatcher(backend=self.backend, poll_interval=0.05)
+        self.addCleanup(self.watcher.stop)
+        self.assertTrue(self.watcher.watch(self.root))
+        self.assertTrue(wait_for(lambda: self.watcher.dirty_paths(self.root, self.watcher.sequence) is not None))
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_change_invalidates_path(self):
+        """Test a modified file stops being reported unchanged"""
+        seq = self.watcher.sequence
+        self.assertTrue(self.watcher.is_unchanged_since(self.path, seq))
+
+        with open(self.path, 'a') as f:
+            f.write('y = 2\n')
+        self.assertTrue(wait_for(lambda: not self.watcher.is_unchanged_since(self.path, seq)))
+        self.assertIn(self.path, self.watcher.dirty_paths(self.root, seq))
+        self.assertTrue(wait_for(lambda: self.watcher.is_unchanged_since(self.path, self.watcher.sequence)))
+
+    def test_new_directory_is_covered(self):
+        """Test files in directories created after watching started are tracked"""
+        os.makedirs(os.path.join(self.root, 'pkg'))
+        new_file = self.write('pkg/mod.py', 'pass\n')
+        self.assertTrue(wait_for(lambda: self.watcher.is_unchanged_since(new_file, self.watcher.sequence)))
+
+        seq = self.watcher.sequence
+        os.unlink(new_file)
+        self.assertTrue(wait_for(lambda: new_file in (self.watcher.dirty_paths(self.root, seq) or ())))
+
+    def test_uncovered_paths_are_never_trusted(self):
+        """Test paths outside watched roots and ignored directories fall back to stat"""
+        os.makedirs(os.path.join(self.root, 'node_modules'))
+        ignored = self.write('node_modules/lib.js', '')
+        seq = self.watcher.sequence
+        self.assertFalse(self.watcher.is_unchanged_since(ignored, seq))
+        self.assertFalse(self.watcher.is_unchanged_since(__file__, seq))
+        self.assertFalse(self.watcher.is_unchanged_since(self.path, None))
+        self.assertIsNone(self.watcher.dirty_paths(os.path.dirname(self.root), seq))
+
+
+@unittest.skipUnless(inotify_available(), "inotify not available")
+class TestInotifyWatcher(WatcherBackendMixin, unittest.TestCase):
+    backend = 'inotify'
+
+    def test_queue_overflow_distrusts_everything(self):
+        """Test dropped events invalidate entries validated before the overflow"""
+        seq = self.watcher.sequence
+        self.watcher._handle_event(-1, 0x4000, '')
+        self.assertFalse(self.watcher.is_unchanged_since(self.path, seq))
+        self.assertIsNone(self.watcher.dirty_paths(self.root, seq))
+        self.assertEqual(self.watcher.get_stats()['overflows'], 1)
+
+
+class TestPollingWatcher(WatcherBackendMixin, unittest.TestCase):
+    backend = 'poll'
+
+
+class TestWatchedCaches(unittest.IsolatedAsyncioTestCase):
+    """Test the file and project-context caches skip validation the watcher vouches for"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.changed = set()
+        self.watcher = Mock(sequence=1, dirty_paths=Mock(side_effect=lambda root, seq: set(self.changed)))
+        self.watcher.is_unchanged_since.side_effect = lambda path, seq: seq is not None and path not in self.changed
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    async def test_file_cache_skips_stat_for_unchanged_files(self):
+        """Test watched entries are served without a filesystem round trip"""
+        paths = [self.write(f'{i}.py', f'v = {i}\n') for i in range(3)]
+        cache = FileContentCache(watcher=self.watcher)
+        await cache.fetch_many(paths)
+
+        with patch.object(file_content_cache, '_load_many') as load_many, \
+                patch.object(file_content_cache, '_load') as load:
+            self.assertEqual(await cache.fetch_many(paths), [(f'v = {i}\n', 'hit') for i in range(3)])
+            self.assertEqual(await cache.fetch(paths[0]), ('v = 0\n', 'hit'))
+        load_many.assert_not_called()
+        load.assert_not_called()
+        self.assertEqual(cache.get_stats()['watcher_hits'], 4)
+
+        with open(paths[1], 'w') as f:
+            f.write('v = 10\n')
+        self.changed.add(paths[1])
+        self.assertEqual(await cache.fetch(paths[1]), ('v = 10\n', 'stale'))
+
+    async def test_project_context_reread_only_when_relevant_files_change(self):
+        """Test project context is reused until an analyzed or root context file changes"""
+        tool = DummyTool({})
+        tool._file_watcher = self.watcher
+        source = self.write('main.py', 'pass\n')
+        context = {'project_root': self.tmp_dir, 'claude_md_content': None}
+        tool.context_reader = Mock(read_project_context=Mock(return_value=context),
+                                   CONTEXT_FILES=['CLAUDE.md', 'docs/README.md'])
+
+        self.assertIs(await tool._get_project_context([source]), context)
+        self.watcher.watch.assert_called_once_with(self.tmp_dir)
+
+        self.changed.add(os.path.join(self.tmp_dir, 'build', 'out.o'))
+        await tool._get_project_context([source])
+        self.assertEqual(tool.context_reader.read_project_context.call_count, 1)
+
+        self.changed.add(os.path.join(self.tmp_dir, 'docs', 'README.md'))
+        await tool._get_project_context([source])
+        self.assertEqual(tool.context_reader.read_project_context.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Tests for the async-native Gemini HTTP transport
+Uses a local fake server to check that concurrent requests overlap instead of queueing
+"""
+import asyncio
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.clients.gemini_transport import GeminiHttpTransport, GeminiHttpError
+
+FAKE_LATENCY = 0.2
+
+
+def make_fake_gemini_app(status: int = 200):
+    """Fake generateContent endpoint with fixed latency"""
+    async def generate(request):
+        body = await request.json()
+        await asyncio.sleep(FAKE_LATENCY)
+        if status != 200:
+            return web.Response(status=status, text="Resource exhausted",
+                                headers={'Retry-After': '7'})
+        prompt = body['contents'][0]['parts'][0]['text']
+        return web.json_response({
+            'candidates': [{'content': {'parts': [{'text': f"echo: {prompt}"}]}}],
+            'usageMetadata': {'promptTokenCount': 3, 'candidatesTokenCount': 4, 'totalTokenCount': 7},
+            'model': request.match_info['model'],
+            'key': request.headers.get('x-goog-api-key')
+        })
+
+    app = web.Application()
+    app.router.add_post('/v1beta/models/{model}:generateContent', generate)
+    return app
+
+
+class TestGeminiHttpTransport(unittest.IsolatedAsyncioTestCase):
+    """Test GeminiHttpTransport against a fake server"""
+
+    async def asyncSetUp(self):
+        self.server = TestServer(make_fake_gemini_app())
+        await self.server.start_server()
+        self.transport = GeminiHttpTransport(
+            base_url=str(self.server.make_url('/v1beta')),
+            max_connections=64
+        )
+
+    async def asyncTearDown(self):
+        await self.transport.close()
+        await self.server.close()
+
+    async def test_generate_content_parses_response(self):
+        """Test response text, usage metadata and key header"""
+        response = await self.transport.generate_content('gemini-2.5-flash', 'hello', 'key-1')
+
+        self.assertEqual(response.text, 'echo: hello')
+        self.assertEqual(response.usage_metadata.total_token_count, 7)
+        self.assertEqual(response.payload['model'], 'gemini-2.5-flash')
+        self.assertEqual(response.payload['key'], 'key-1')
+
+    async def test_concurrent_requests_complete_in_single_latency(self):
+        """N concurrent requests should take about 1x latency, not N/threads x latency"""
+        request_count = 40
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[
+            self.transport.generate_content('gemini-2.5-flash', f"prompt {i}", 'key-1')
+            for i in range(request_count)
+        ])
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(responses), request_count)
+        self.assertEqual(responses[7].text, 'echo: prompt 7')
+        self.assertLess(elapsed, FAKE_LATENCY * 3)
+
+    async def test_session_is_reused(self):
+        """Test the pooled session is shared across calls"""
+        await self.transport.generate_content('gemini-2.5-flash', 'one', 'key-1')
+        first_session = self.transport._session
+        await self.transport.generate_content('gemini-2.5-flash', 'two', 'key-1')
+
+        self.assertIs(self.transport._session, first_session)
+
+
+class TestGeminiHttpTransportErrors(unittest.IsolatedAsyncioTestCase):
+    """Test error mapping for non-2xx responses"""
+
+    async def test_rate_limit_error_carries_status_and_headers(self):
+        """Test 429 responses raise GeminiHttpError with Retry-After available"""
+        server = TestServer(make_fake_gemini_app(status=429))
+        await server.start_server()
+        transport = GeminiHttpTransport(base_url=str(server.make_url('/v1beta')))
+        try:
+            with self.assertRaises(GeminiHttpError) as ctx:
+                await transport.generate_content('gemini-2.5-flash', 'hello', 'key-1')
+
+            self.assertEqual(ctx.exception.status, 429)
+            self.assertIn('429', str(ctx.exception))
+            self.assertEqual(ctx.exception.headers['retry-after'], '7')
+        finally:
+            await transport.close()
+            await server.close()
+
+
+class TestGeminiClientHttpMode(unittest.IsolatedAsyncioTestCase):
+    """Test GeminiClient routes calls through the HTTP transport when configured"""
+
+    async def test_client_uses_http_transport(self):
+        """Test generate_content goes over HTTP with the current key"""
+        from src.clients import gemini_client
+        from src.config import SmartToolsConfig
+
+        server = TestServer(make_fake_gemini_app())
+        await server.start_server()
+        smart_config = SmartToolsConfig(
+            gemini_transport='http',
+            enable_response_cache=False,
+            enable_adaptive_timeouts=False,
+            gemini_api_base_url=str(server.make_url('/v1beta'))
+        )
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        rate_limit_file = os.path.join(tmp_dir, 'rate_limits.json')
+
+        try:
+            with patch.object(gemini_client, 'RATE_LIMIT_FILE', rate_limit_file):
+                client = gemini_client.GeminiClient(smart_config)
+            text, model_used, attempts = await client.generate_content('hi', model_name='flash')
+
+            self.assertEqual(text, 'echo: hi')
+            self.assertEqual(model_used, 'flash')
+            self.assertEqual(attempts, 1)
+            await client.close()
+        finally:
+            await server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
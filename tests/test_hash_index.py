@@ -0,0 +1,126 @@
+"""
+Tests for the persisted content hash index and the project context keys built from it
+"""
+import shutil
+import tempfile
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.services.hash_index import HashIndex
+from src.smart_tools.base_smart_tool import BaseSmartTool
+
+
+class DummyTool(BaseSmartTool):
+    async def execute(self, **kwargs):
+        pass
+
+    def get_routing_strategy(self, **kwargs):
+        return {}
+
+
+class HashIndexTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = os.path.realpath(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.root = os.path.join(self.tmp_dir, 'project')
+        self.index_dir = os.path.join(self.tmp_dir, 'index')
+        os.makedirs(os.path.join(self.root, '.git'))
+        os.makedirs(os.path.join(self.root, 'src'))
+        self.paths = [self.write(f'src/m{i}.py', f'value = {i}\n') for i in range(3)]
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def edit(self, path, content):
+        with open(path, 'w') as f:
+            f.write(content)
+        st = os.stat(path)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    def make_index(self):
+        index = HashIndex(index_dir=self.index_dir, max_workers=2)
+        self.addCleanup(index.close)
+        return index
+
+
+class TestHashIndex(HashIndexTestCase):
+    """Test digests are reused across processes until a file changes"""
+
+    async def test_persisted_digests_are_reused(self):
+        first = await self.make_index().digest_many(self.paths)
+        self.assertTrue(all(first.values()))
+        self.assertEqual(len(os.listdir(self.index_dir)), 1)
+
+        index = self.make_index()
+        self.assertEqual(await index.digest_many(self.paths), first)
+        self.assertEqual((index.stats['files_hashed'], index.stats['reused'], index.stats['roots_loaded']), (0, 3, 1))
+
+        self.edit(self.paths[1], 'value = 10\n')
+        second = await index.digest_many(self.paths)
+        self.assertEqual(index.stats['files_hashed'], 1)
+        self.assertNotEqual(second[self.paths[1]], first[self.paths[1]])
+        self.assertEqual(second[self.paths[0]], first[self.paths[0]])
+
+    async def test_digest_covers_full_content(self):
+        """Test files sharing a long prefix still get different digests"""
+        prefix = 'x' * 20_000
+        a = self.write('a.txt', prefix + 'a')
+        b = self.write('b.txt', prefix + 'b')
+        digests = self.make_index().digest_files([a, b])
+        self.assertNotEqual(digests[a], digests[b])
+
+    async def test_unhashable_and_unrooted_paths(self):
+        """Test directories and missing files have no digest and rootless files are not persisted"""
+        outside = os.path.join(self.tmp_dir, 'loose.py')
+        with open(outside, 'w') as f:
+            f.write('pass\n')
+
+        index = HashIndex(index_dir=self.index_dir)
+        digests = await index.digest_many([self.root, os.path.join(self.root, 'missing.py'), outside])
+        self.assertEqual(list(digests.values())[:2], [None, None])
+        self.assertTrue(digests[outside])
+        self.assertFalse(os.path.exists(self.index_dir))
+
+    async def test_corrupt_index_is_ignored(self):
+        index = self.make_index()
+        await index.digest_many(self.paths)
+        name = os.listdir(self.index_dir)[0]
+        with open(os.path.join(self.index_dir, name), 'w') as f:
+            f.write('{not json')
+
+        index = self.make_index()
+        self.assertTrue(all((await index.digest_many(self.paths)).values()))
+        self.assertEqual(index.stats['files_hashed'], 3)
+
+
+class TestProjectContextKeys(HashIndexTestCase):
+    """Test project context is re-read only when an analyzed file's content changes"""
+
+    async def test_context_keyed_by_full_content(self):
+        tool = DummyTool({})
+        tool._file_watcher = None
+        tool._hash_index = self.make_index()
+        tool.context_reader = Mock(read_project_context=Mock(return_value={'project_root': self.root}))
+
+        big = self.write('src/big.py', 'a' * 20_000 + '\n')
+        await tool._get_project_context(self.paths + [big])
+        await tool._get_project_context(self.paths + [big])
+        self.assertEqual(tool.context_reader.read_project_context.call_count, 1)
+
+        # An edit past the first 10KB is a different key
+        self.edit(big, 'a' * 20_000 + 'b\n')
+        await tool._get_project_context(self.paths + [big])
+        self.assertEqual(tool.context_reader.read_project_context.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Tests for hedged requests across API keys
+"""
+import asyncio
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.clients.hedging import HedgeBudget
+from src.clients.latency_tracker import LatencyTracker
+
+
+class TestLatencyTracker(unittest.TestCase):
+    """Test latency percentiles"""
+
+    def test_percentile_needs_min_samples(self):
+        """Test no percentile is reported before enough calls were seen"""
+        tracker = LatencyTracker(min_samples=3)
+        tracker.record('flash', 1.0)
+        tracker.record('flash', 2.0)
+        self.assertIsNone(tracker.percentile('flash', 0.9))
+        tracker.record('flash', 3.0)
+        self.assertEqual(tracker.percentile('flash', 0.9), 3.0)
+
+    def test_percentiles(self):
+        """Test nearest-rank percentiles over the window"""
+        tracker = LatencyTracker(min_samples=1)
+        for i in range(1, 101):
+            tracker.record('pro', float(i))
+        self.assertEqual(tracker.percentile('pro', 0.5), 50.0)
+        self.assertEqual(tracker.percentile('pro', 0.9), 90.0)
+        self.assertEqual(tracker.get_stats()['pro|all']['p99'], 99.0)
+
+
+class TestHedgeBudget(unittest.TestCase):
+    """Test the hedge budget caps duplicates"""
+
+    def test_budget_earns_fraction_per_request(self):
+        """Test one hedge is earned per 1/ratio requests"""
+        budget = HedgeBudget(ratio=0.25, burst=1)
+        hedges = 0
+        for _ in range(20):
+            budget.record_request()
+            if budget.can_hedge():
+                budget.spend()
+                hedges += 1
+        self.assertEqual(hedges, 5)
+        self.assertEqual(budget.get_stats()['hedges_sent'], 5)
+
+
+class TestGeminiClientHedging(unittest.IsolatedAsyncioTestCase):
+    """Test slow calls are hedged on the other key"""
+
+    async def asyncSetUp(self):
+        from src.clients import gemini_client
+        from src.config import SmartToolsConfig
+
+        self.seen = []
+        self.slow_keys = {'key-a'}
+
+        async def generate(request):
+            key = request.headers.get('x-goog-api-key')
+            self.seen.append(key)
+            await asyncio.sleep(2.0 if key in self.slow_keys else 0.05)
+            return web.json_response({'candidates': [{'content': {'parts': [{'text': f"ok from {key}"}]}}]})
+
+        app = web.Application()
+        app.router.add_post('/v1beta/models/{model}:generateContent', generate)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+
+        smart_config = SmartToolsConfig(
+            google_api_key='key-a',
+            google_api_key2='key-b',
+            gemini_transport='http',
+            enable_response_cache=False,
+            enable_adaptive_timeouts=False,
+            gemini_api_base_url=str(server.make_url('/v1beta')),
+            enable_request_hedging=True,
+            hedge_budget_ratio=1.0,
+            hedge_min_samples=5
+        )
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        with patch.object(gemini_client, 'RATE_LIMIT_FILE', os.path.join(tmp_dir, 'rate_limits.json')), \
+             patch.object(gemini_client, 'API_KEYS', ['key-a', 'key-b']):
+            self.client = gemini_client.GeminiClient(smart_config)
+        self.addAsyncCleanup(self.client.close)
+        for _ in range(5):
+            self.client.latency_tracker.record('flash', 0.1)
+
+    async def test_slow_call_is_hedged_on_other_key(self):
+        """Test the duplicate on the fast key answers well before the slow one"""
+        shard = self.client.key_pool.shards[0]
+        start = time.perf_counter()
+        response = await self.client._cpu_safe_api_call(shard, 'prompt', 10, 'flash')
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.text, 'ok from key-b')
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(self.seen, ['key-a', 'key-b'])
+        stats = self.client.get_hedging_stats()
+        self.assertEqual((stats['hedges_sent'], stats['hedge_wins']), (1, 1))
+        self.assertEqual(shard.in_flight, 0)
+
+    async def test_hedge_win_is_credited_to_hedge_key(self):
+        """Test success and route outcome go to the key that answered, not the slow one"""
+        primary, other = self.client.key_pool.shards
+        self.client.key_pool.record_rate_limit(primary, 'flash', cooldown_seconds=60)
+
+        response = await self.client._cpu_safe_api_call(primary, 'prompt', 10, 'flash')
+
+        self.assertEqual(response.text, 'ok from key-b')
+        self.assertTrue(primary.is_cooling('flash'))
+        self.assertEqual(self.client.get_model_router_stats()['keys'], {f'flash|{other.index}': 1})
+
+    async def test_fast_call_is_not_hedged(self):
+        """Test calls finishing within the percentile send no duplicate"""
+        self.slow_keys = set()
+        response = await self.client._cpu_safe_api_call(self.client.key_pool.shards[0], 'prompt', 10, 'flash')
+
+        self.assertEqual(response.text, 'ok from key-a')
+        self.assertEqual(self.seen, ['key-a'])
+        self.assertEqual(self.client.get_hedging_stats()['hedges_sent'], 0)
+
+    async def test_budget_exhausted_waits_for_original(self):
+        """Test no hedge is sent once the budget is spent"""
+        self.client.hedge_budget.ratio = 0.0
+        response = await self.client._cpu_safe_api_call(self.client.key_pool.shards[0], 'prompt', 10, 'flash')
+
+        self.assertEqual(response.text, 'ok from key-a')
+        self.assertEqual(self.seen, ['key-a'])
+        self.assertEqual(self.client.get_hedging_stats()['denied'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+"""
+Tests for the per-key Gemini client pool
+Checks load-balancing, rate limit cooldown steering and concurrent use of both keys
+"""
+import asyncio
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.clients.key_pool import KeyPool
+from src.services import concurrency_governor
+
+
+class TestKeyPool(unittest.TestCase):
+    """Test shard selection in KeyPool"""
+
+    def setUp(self):
+        self.pool = KeyPool(['key-a', 'key-b'])
+
+    def test_select_prefers_least_loaded_key(self):
+        """Test a busy key is skipped in favour of an idle one"""
+        first = self.pool.select('flash')
+        with self.pool.lease(first):
+            second = self.pool.select('flash')
+            self.assertNotEqual(first.index, second.index)
+
+        self.assertEqual(first.in_flight, 0)
+        self.assertEqual(first.total_requests, 1)
+
+    def test_select_alternates_when_idle(self):
+        """Test sequential requests spread across keys by total usage"""
+        used = []
+        for _ in range(4):
+            shard = self.pool.select('flash')
+            with self.pool.lease(shard):
+                used.append(shard.index)
+
+        self.assertEqual(used, [0, 1, 0, 1])
+
+    def test_rate_limited_key_is_avoided_for_that_model(self):
+        """Test cooldown steers new requests to the other key, per model"""
+        shard = self.pool.shards[0]
+        self.pool.record_rate_limit(shard, 'flash', cooldown_seconds=60)
+
+        self.assertEqual(self.pool.select('flash').index, 1)
+        self.assertEqual(self.pool.select('pro').index, 0)
+
+        self.pool.record_success(shard, 'flash')
+        self.assertFalse(shard.is_cooling('flash'))
+
+    def test_select_with_exclude(self):
+        """Test excluded shards are never returned"""
+        self.assertEqual(self.pool.select('flash', exclude={0}).index, 1)
+        self.assertIsNone(self.pool.select('flash', exclude={0, 1}))
+
+    def test_stats(self):
+        """Test per-key statistics"""
+        self.pool.record_rate_limit(self.pool.shards[1], 'flash', cooldown_seconds=60)
+        stats = self.pool.get_stats()
+
+        self.assertEqual([s['key_index'] for s in stats], [0, 1])
+        self.assertEqual(stats[1]['rate_limit_hits'], 1)
+        self.assertEqual(stats[1]['cooling_models'], ['flash'])
+
+
+def make_keyed_app(limited_keys=(), latency: float = 0.2):
+    """Fake generateContent endpoint that rate limits some keys and records key usage"""
+    seen = {'keys': [], 'models': [], 'max_concurrent': {}, 'active': {}}
+
+    async def generate(request):
+        key = request.headers.get('x-goog-api-key')
+        seen['keys'].append(key)
+        seen['models'].append(request.match_info['model'])
+        seen['active'][key] = seen['active'].get(key, 0) + 1
+        seen['max_concurrent'][key] = max(seen['max_concurrent'].get(key, 0), seen['active'][key])
+        try:
+            await asyncio.sleep(latency)
+            if key in limited_keys:
+                return web.Response(status=429, text="Resource exhausted")
+            return web.json_response({
+                'candidates': [{'content': {'parts': [{'text': f"ok from {key}"}]}}]
+            })
+        finally:
+            seen['active'][key] -= 1
+
+    app = web.Application()
+    app.router.add_post('/v1beta/models/{model}:generateContent', generate)
+    return app, seen
+
+
+class TestGeminiClientKeyPool(unittest.IsolatedAsyncioTestCase):
+    """Test GeminiClient routes requests across both API keys"""
+
+    async def _make_client(self, server, **settings):
+        from src.clients import gemini_client
+        from src.config import SmartToolsConfig
+
+        smart_config = SmartToolsConfig(
+            google_api_key='key-a',
+            google_api_key2='key-b',
+            gemini_transport='http',
+            enable_response_cache=False,
+            enable_adaptive_timeouts=False,
+            gemini_api_base_url=str(server.make_url('/v1beta')),
+            **settings
+        )
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+
+        with patch.object(gemini_client, 'RATE_LIMIT_FILE', os.path.join(tmp_dir, 'rate_limits.json')), \
+             patch.object(gemini_client, 'API_KEYS', ['key-a', 'key-b']):
+            client = gemini_client.GeminiClient(smart_config)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_concurrent_requests_use_both_keys(self):
+        """Test concurrent requests are spread over both keys at once"""
+        app, seen = make_keyed_app()
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        client = await self._make_client(server)
+
+        results = await asyncio.gather(*[
+            client.generate_content(f"prompt {i}", model_name='flash') for i in range(6)
+        ])
+
+        self.assertTrue(all(text.startswith('ok from') for text, _, _ in results))
+        self.assertEqual(seen['keys'].count('key-a'), 3)
+        self.assertEqual(seen['keys'].count('key-b'), 3)
+        self.assertGreater(seen['max_concurrent']['key-b'], 1)
+
+    async def test_rate_limit_on_one_key_retries_other_key(self):
+        """Test a 429 on one key is served by the other key without backoff"""
+        app, seen = make_keyed_app(limited_keys={'key-a'}, latency=0.01)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        client = await self._make_client(server)
+        concurrency_governor.reset_concurrency_governor()
+        self.addCleanup(concurrency_governor.reset_concurrency_governor)
+        governor = concurrency_governor.get_concurrency_governor()
+
+        text, model_used, attempts = await client.generate_content("hello", model_name='flash')
+        self.assertEqual(text, 'ok from key-b')
+        self.assertEqual(model_used, 'flash')
+        self.assertEqual(attempts, 2)
+        # The 429 reaches the shared engine limit even though the request recovered
+        self.assertEqual(governor.get_stats()['decrease_reasons'], {'rate_limited': 1})
+
+        # key-a is cooling for flash, so the next request goes straight to key-b
+        seen['keys'].clear()
+        text, _, attempts = await client.generate_content("again", model_name='flash')
+        self.assertEqual(seen['keys'], ['key-b'])
+        self.assertEqual(attempts, 1)
+
+    async def test_summary_respects_admission_denial(self):
+        """Test a summary denied flash-lite budget falls back instead of sending the request anyway"""
+        app, seen = make_keyed_app(latency=0.01)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        client = await self._make_client(server, enable_admission_control=True)
+
+        admit = client.admission.admit
+
+        async def deny_flash_lite(model_name, tokens, exclude=()):
+            return None if model_name == 'flash-lite' else await admit(model_name, tokens, exclude)
+
+        with patch.object(client.admission, 'admit', side_effect=deny_flash_lite):
+            summary = await client.generate_summary("summarize")
+
+        self.assertTrue(summary.startswith('ok from'))
+        self.assertEqual(len(seen['models']), 1)
+        self.assertNotIn('lite', seen['models'][0])
+        self.assertEqual(sum(shard.in_flight for shard in client.key_pool.shards), 0)
+
+    async def test_backoff_retry_goes_through_admission(self):
+        """Test backoff retries take bucket budget sized by the calibrated estimator"""
+        from src.clients import gemini_client
+
+        app, seen = make_keyed_app(latency=0.01)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        client = await self._make_client(server, enable_admission_control=True)
+        admitted = client.admission.stats['admitted']
+
+        with patch.object(gemini_client.config, 'progressive_backoff_seconds', [0]), \
+             patch.object(client.admission, 'admit', wraps=client.admission.admit) as admit:
+            text, _, _ = await client._progressive_backoff_retry("hello " * 50, 'flash', timeout=5)
+
+        self.assertTrue(text.startswith('ok from'))
+        self.assertEqual(admit.call_count, 1)
+        self.assertEqual(admit.call_args.args, ('flash', client.token_estimator.estimate("hello " * 50, 'flash')))
+        self.assertEqual(client.admission.stats['admitted'], admitted + 1)
+        self.assertEqual(sum(shard.in_flight for shard in client.key_pool.shards), 0)
+
+    async def test_admission_is_opt_in(self):
+        """Test admission control stays off unless enabled for a known quota tier"""
+        app, _ = make_keyed_app()
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('ENABLE_ADMISSION_CONTROL', None)
+            client = await self._make_client(server)
+        self.assertIsNone(client.admission)
+
+
+if __name__ == '__main__':
+    unittest.main()
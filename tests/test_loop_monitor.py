@@ -0,0 +1,124 @@
+"""
+Tests for the event-loop lag monitor and its CPUThrottler integration
+"""
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.services.cpu_throttler import CPUThrottler
+from src.services.loop_monitor import LoopLagMonitor
+
+
+def busy_section(seconds):
+    """Synchronous work that holds the event loop"""
+    time.sleep(seconds)
+
+
+class TestLoopLagMonitor(unittest.IsolatedAsyncioTestCase):
+    """Test lag sampling and blocking detection"""
+
+    def setUp(self):
+        self.monitor = LoopLagMonitor(sample_interval_ms=10, lag_threshold_ms=50,
+                                      block_threshold_ms=80, max_stack_samples=2)
+        self.addCleanup(self.monitor.stop)
+
+    async def test_idle_loop_has_low_lag(self):
+        """Test an idle loop reports small lag and no blocking"""
+        self.monitor.start()
+        await asyncio.sleep(0.2)
+
+        stats = self.monitor.get_stats()
+        self.assertGreater(stats['samples'], 5)
+        self.assertLess(stats['lag_p50_ms'], 20)
+        self.assertFalse(stats['lagging'])
+        self.assertEqual(stats['blocks_detected'], 0)
+
+    async def test_blocking_section_is_attributed_with_stack(self):
+        """Test a blocking task is named and its stack sampled"""
+        self.monitor.start()
+        await asyncio.sleep(0.05)
+
+        async def offender():
+            busy_section(0.3)
+
+        await asyncio.create_task(offender(), name='offender-task')
+        await asyncio.sleep(0.05)
+
+        stats = self.monitor.get_stats()
+        self.assertGreaterEqual(stats['lag_max_ms'], 200)
+        self.assertEqual(stats['blocks_detected'], 1)
+        block = stats['recent_blocks'][0]
+        self.assertEqual(block['task'], 'offender-task')
+        self.assertGreaterEqual(block['duration_ms'], 200)
+        self.assertTrue(1 <= len(block['stacks']) <= 2)
+        self.assertIn('busy_section', ''.join(block['stacks'][0]))
+
+    async def test_in_progress_stall_counts_as_lag(self):
+        """Test current lag includes a stall the sampler hasn't seen yet"""
+        self.monitor.start()
+        await asyncio.sleep(0.05)
+        busy_section(0.1)
+        self.assertTrue(self.monitor.is_lagging())
+
+    async def test_stop_ends_watchdog(self):
+        """Test stop() cancels the sampler and joins the watchdog thread"""
+        self.monitor.start()
+        watchdog = self.monitor._watchdog
+        await asyncio.sleep(0.02)
+        self.monitor.stop()
+        self.assertFalse(self.monitor.running)
+        self.assertFalse(watchdog.is_alive())
+
+
+class TestThrottlerLoopLag(unittest.IsolatedAsyncioTestCase):
+    """Test loop lag feeds CPUThrottler decisions and stats"""
+
+    def setUp(self):
+        self.throttler = CPUThrottler.get_instance()
+        self.saved_state = (self.throttler._throttle_active, self.throttler._pressure_reason,
+                            self.throttler.loop_monitor)
+        self.throttler._throttle_active = False
+        self.throttler.loop_monitor = LoopLagMonitor(lag_threshold_ms=50)
+
+    def tearDown(self):
+        self.throttler.loop_monitor.stop()
+        (self.throttler._throttle_active, self.throttler._pressure_reason,
+         self.throttler.loop_monitor) = self.saved_state
+
+    async def _check(self):
+        self.throttler._operation_count = self.throttler.cpu_check_interval
+        self.throttler._last_yield_time = time.time()
+        return await self.throttler.should_yield()
+
+    async def test_loop_lag_activates_throttling_with_idle_cpu(self):
+        """Test high loop lag throttles even when system CPU is low"""
+        with patch.object(self.throttler, '_get_cpu_usage', return_value=10.0), \
+                patch.object(self.throttler.loop_monitor, 'current_lag_ms', return_value=200.0) as lag:
+            self.assertTrue(await self._check())
+            self.assertTrue(self.throttler._throttle_active)
+            self.assertEqual(self.throttler.get_throttling_stats()['pressure_reason'], 'loop_lag')
+
+            lag.return_value = 5.0
+            self.assertFalse(await self._check())
+            self.assertFalse(self.throttler._throttle_active)
+
+    async def test_stats_include_loop_lag(self):
+        """Test get_throttling_stats exposes the monitor's stats"""
+        self.assertTrue(self.throttler.start_loop_monitor())
+        await asyncio.sleep(0.12)
+
+        stats = self.throttler.get_throttling_stats()
+        self.assertTrue(stats['loop_lag']['running'])
+        self.assertGreater(stats['loop_lag']['samples'], 0)
+        self.assertIn('recent_blocks', stats['loop_lag'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+"""
+Tests for the model router that reorders fallback chains from live outcomes
+"""
+import shutil
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.clients.model_router import ERROR, RATE_LIMITED, SUCCESS, ModelRouter
+
+
+class TestModelRouter(unittest.TestCase):
+    """Test rolling windows and chain ordering"""
+
+    def setUp(self):
+        self.router = ModelRouter(window_seconds=300, rate_limit_threshold=0.5, min_observations=3)
+
+    def test_healthy_chain_is_unchanged(self):
+        """Test the preferred order stands without bad outcomes"""
+        for i in range(5):
+            self.router.record('pro', 0, SUCCESS, latency=8.0, now=i)
+        self.assertEqual(self.router.order(['pro', 'flash', 'flash-lite'], now=10), ['pro', 'flash', 'flash-lite'])
+
+    def test_rate_limited_model_moves_last(self):
+        """Test a model 429ing across keys is tried after the others"""
+        for i in range(4):
+            self.router.record('pro', i % 2, RATE_LIMITED, now=i)
+        self.router.record('flash', 0, SUCCESS, latency=2.0, now=5)
+
+        self.assertTrue(self.router.is_demoted('pro', now=10))
+        self.assertEqual(self.router.order(['pro', 'flash', 'flash-lite'], now=10), ['flash', 'flash-lite', 'pro'])
+        self.assertEqual(self.router.get_stats()['reordered'], 1)
+
+    def test_too_few_observations_do_not_demote(self):
+        """Test one unlucky 429 doesn't reorder the chain"""
+        self.router.record('pro', 0, RATE_LIMITED, now=0)
+        self.assertFalse(self.router.is_demoted('pro', now=1))
+
+    def test_outcomes_age_out(self):
+        """Test a demoted model is probed again after the window"""
+        for i in range(3):
+            self.router.record('pro', 0, RATE_LIMITED, now=i)
+        self.assertTrue(self.router.is_demoted('pro', now=100))
+        self.assertFalse(self.router.is_demoted('pro', now=400))
+
+    def test_failing_model_demoted_on_success_rate(self):
+        """Test persistent non-429 errors also demote a model"""
+        for i in range(3):
+            self.router.record('flash', 0, ERROR, now=i)
+        self.assertEqual(self.router.order(['flash', 'flash-lite'], now=5), ['flash-lite', 'flash'])
+
+    def test_demoted_models_ranked_by_success_then_latency(self):
+        """Test the least bad demoted model is tried first among them"""
+        for i in range(4):
+            self.router.record('pro', 0, RATE_LIMITED, now=i)
+            self.router.record('flash', 0, RATE_LIMITED if i else SUCCESS, latency=1.0, now=i)
+        self.assertEqual(self.router.order(['pro', 'flash', 'flash-lite'], now=5), ['flash-lite', 'flash', 'pro'])
+
+
+class TestGeminiClientRouting(unittest.IsolatedAsyncioTestCase):
+    """Test the fallback chain follows the router"""
+
+    def _make_client(self):
+        from src.clients import gemini_client
+        from src.config import SmartToolsConfig
+
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        smart_config = SmartToolsConfig(enable_response_cache=False, enable_adaptive_timeouts=False,
+                                        enable_admission_control=False)
+        with patch.object(gemini_client, 'RATE_LIMIT_FILE', os.path.join(tmp_dir, 'rate_limits.json')):
+            return gemini_client.GeminiClient(smart_config)
+
+    async def test_rate_limited_pro_is_skipped(self):
+        """Test requests go straight to flash once pro has been 429ing"""
+        client = self._make_client()
+        dispatched = []
+
+        class Response:
+            text = 'ok'
+            usage_metadata = None
+
+        async def dispatch(shard, prompt, model_name):
+            dispatched.append(model_name)
+            if model_name == 'pro':
+                raise Exception("429 Resource has been exhausted")
+            return Response()
+
+        backoff = AsyncMock(side_effect=Exception("still rate limited"))
+        with patch.object(client, '_dispatch_generate', dispatch), \
+             patch.object(client, '_progressive_backoff_retry', backoff):
+            for i in range(3):
+                await client._generate_content_with_fallback(f'prompt {i}', 'pro')
+            self.assertEqual(backoff.await_count, 3)
+
+            dispatched.clear()
+            text, model_used, attempts = await client._generate_content_with_fallback('prompt', 'pro')
+
+        self.assertEqual((text, model_used, attempts), ('ok', 'flash', 1))
+        self.assertEqual(dispatched, ['flash'])
+        self.assertEqual(backoff.await_count, 3)
+        self.assertTrue(client.get_model_router_stats()['models']['pro']['demoted'])
+
+
+if __name__ == '__main__':
+    unittest.main()
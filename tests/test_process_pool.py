@@ -0,0 +1,112 @@
+"""
+Tests for the shared process pool used for CPU-bound post-processing
+"""
+import asyncio
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.services.correlation_framework import analyze_engine_results
+from src.services.process_pool import ProcessPool, _run_compact, decode_result
+from src.utils.issue_extraction import extract_deployment_issues, extract_validation_issues
+
+
+class TestCompactEncoding(unittest.TestCase):
+    """Test the worker result encoding"""
+
+    def test_small_results_are_not_compressed(self):
+        compressed, payload = _run_compact(extract_validation_issues, ("an error here", "quality"), {})
+        self.assertFalse(compressed)
+        self.assertEqual(decode_result(compressed, payload), extract_validation_issues("an error here", "quality"))
+
+    def test_large_results_are_compressed(self):
+        compressed, payload = _run_compact(str.split, ("word " * 5000,), {})
+        self.assertTrue(compressed)
+        self.assertLess(len(payload), 5000)
+        self.assertEqual(len(decode_result(compressed, payload)), 5000)
+
+
+class TestProcessPool(unittest.IsolatedAsyncioTestCase):
+    """Test offloading, inline execution and fallback"""
+
+    def setUp(self):
+        self.pool = ProcessPool(max_workers=1, min_offload_chars=1000)
+        self.addCleanup(self.pool.shutdown)
+
+    async def test_offloads_large_inputs(self):
+        """Test large inputs run in a worker and match the inline result"""
+        text = "critical error: deprecated API warning\n" * 200
+        issues = await self.pool.run(extract_deployment_issues, text, "security", "production", size_hint=len(text))
+
+        self.assertEqual(issues, extract_deployment_issues(text, "security", "production"))
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['offloaded'], 1)
+        self.assertTrue(stats['started'])
+
+    async def test_small_inputs_run_inline(self):
+        """Test inputs under the threshold skip the worker round-trip"""
+        issues = await self.pool.run(extract_validation_issues, "an error", "quality", size_hint=8)
+        self.assertEqual(len(issues), 1)
+        self.assertEqual(self.pool.get_stats()['inline'], 1)
+        self.assertFalse(self.pool.get_stats()['started'])
+
+    async def test_correlation_analysis_round_trip(self):
+        """Test correlation results (dataclasses and enums) survive the trip back"""
+        engine_results = {
+            'check_quality': "Security vulnerability: SQL injection in login. Recommendation: use parameters. " * 20,
+            'config_validator': "Security issue: password stored in config. Recommendation: use a secret store. " * 20
+        }
+        result = await self.pool.run(analyze_engine_results, engine_results, size_hint=5000)
+        expected = analyze_engine_results(engine_results)
+
+        self.assertEqual(result['summary'], expected['summary'])
+        self.assertEqual([c.correlation_type for c in result['correlations']],
+                         [c.correlation_type for c in expected['correlations']])
+
+    async def test_broken_pool_falls_back_to_thread(self):
+        """Test a dead worker pool still returns a result and is restarted next time"""
+        await self.pool.run(extract_validation_issues, "x" * 2000, "quality", size_hint=2000)
+        for process in list(self.pool._executor._processes.values()):
+            process.kill()
+            process.join()
+        issues = await self.pool.run(extract_validation_issues, "error " * 400, "quality", size_hint=2400)
+
+        self.assertEqual(len(issues), 5)
+        stats = self.pool.get_stats()
+        self.assertEqual((stats['thread_fallbacks'], stats['restarts']), (1, 1))
+        self.assertFalse(stats['started'])
+
+
+class TestToolOffload(unittest.IsolatedAsyncioTestCase):
+    """Test smart tools route post-processing through the pool"""
+
+    async def test_validate_issue_extraction_uses_pool(self):
+        from src.smart_tools.validate_tool import ValidateTool
+
+        tool = ValidateTool({})
+        tool.process_pool = ProcessPool(max_workers=1, min_offload_chars=100)
+        self.addCleanup(tool.process_pool.shutdown)
+
+        issues = await tool._extract_issues_from_result("security error found " * 50, "security")
+        self.assertEqual(len(issues), 5)
+        self.assertEqual(issues[0]['severity'], 'high')
+        self.assertEqual(tool.process_pool.get_stats()['offloaded'], 1)
+
+    async def test_correlations_without_pool_use_thread(self):
+        from src.smart_tools.validate_tool import ValidateTool
+
+        tool = ValidateTool({})
+        tool.process_pool = None
+        with patch('asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+            result = await tool.analyze_correlations({'a': 'performance issue', 'b': 'slow query issue'})
+        self.assertIn('summary', result)
+        to_thread.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
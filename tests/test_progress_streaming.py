@@ -0,0 +1,154 @@
+"""
+Tests for streamed Gemini output surfaced as progress notifications
+"""
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.services.progress_reporter import (
+    ProgressReporter, get_progress_reporter, progress_scope, report_progress
+)
+
+
+class RecordingSink:
+    """Collects (progress, total, message, time) notifications"""
+
+    def __init__(self):
+        self.notifications = []
+
+    async def __call__(self, progress, total, message):
+        self.notifications.append((progress, total, message, time.perf_counter()))
+
+    @property
+    def messages(self):
+        return [n[2] for n in self.notifications]
+
+
+class TestProgressReporter(unittest.IsolatedAsyncioTestCase):
+    """Test buffering and flushing of streamed chunks"""
+
+    async def test_flushes_at_section_boundaries(self):
+        """Test each notification carries whole markdown sections"""
+        sink = RecordingSink()
+        reporter = ProgressReporter(sink, flush_chars=10_000, flush_interval_seconds=60)
+
+        await reporter.stream_chunk('model', "## Summary\nAll good")
+        await reporter.stream_chunk('model', " so far\n## Issues\n- one")
+        await reporter.stream_chunk('model', "\n- two")
+        await reporter.flush()
+
+        self.assertEqual(sink.messages, [
+            "[model] ## Summary\nAll good",
+            "[model]  so far",
+            "[model] \n## Issues\n- one\n- two"
+        ])
+        self.assertEqual([n[0] for n in sink.notifications], [1, 2, 3])
+
+    async def test_flushes_on_size(self):
+        """Test large buffers are flushed without waiting for a boundary"""
+        sink = RecordingSink()
+        reporter = ProgressReporter(sink, flush_chars=10, flush_interval_seconds=60)
+
+        await reporter.stream_chunk('model', 'first')
+        await reporter.stream_chunk('model', 'abcdef')
+        self.assertEqual(sink.messages, ['[model] first'])
+        await reporter.stream_chunk('model', 'ghijkl')
+        self.assertEqual(sink.messages, ['[model] first', '[model] abcdefghijkl'])
+
+    async def test_send_failures_are_ignored(self):
+        """Test a broken client connection never fails the tool call"""
+        async def broken(progress, total, message):
+            raise ConnectionError("client went away")
+
+        reporter = ProgressReporter(broken)
+        await reporter.section('Engine done', 'text')
+        self.assertEqual(reporter.notifications_sent, 0)
+
+    async def test_scope_is_inherited_by_tasks(self):
+        """Test engine tasks started inside the scope see the reporter"""
+        sink = RecordingSink()
+        reporter = ProgressReporter(sink)
+
+        async def engine(name):
+            await report_progress(f"{name} running")
+
+        with progress_scope(reporter):
+            await asyncio.gather(engine('a'), engine('b'))
+        await report_progress("outside scope")
+
+        self.assertIsNone(get_progress_reporter())
+        self.assertEqual(sorted(sink.messages), ['a running', 'b running'])
+
+
+class TestGeminiClientStreaming(unittest.IsolatedAsyncioTestCase):
+    """Test GeminiClient streams partial output when a reporter is active"""
+
+    async def test_first_section_arrives_before_full_response(self):
+        """Test time-to-first-output is well under the full response time"""
+        from src.clients import gemini_client
+        from src.config import SmartToolsConfig
+
+        sections = ["## Overview\nThe module parses config.", "\n## Issues\n- Missing validation.",
+                    "\n## Recommendations\n- Add tests."]
+
+        async def stream(request):
+            response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+            await response.prepare(request)
+            for i, text in enumerate(sections):
+                if i:
+                    await asyncio.sleep(0.3)
+                payload = {'candidates': [{'content': {'parts': [{'text': text}]}}]}
+                if i == len(sections) - 1:
+                    payload['usageMetadata'] = {'totalTokenCount': 42}
+                await response.write(f"data: {json.dumps(payload)}\r\n\r\n".encode())
+            await response.write_eof()
+            return response
+
+        app = web.Application()
+        app.router.add_post('/v1beta/models/{model}:streamGenerateContent', stream)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+
+        smart_config = SmartToolsConfig(
+            gemini_transport='http',
+            enable_response_cache=False,
+            enable_adaptive_timeouts=False,
+            gemini_api_base_url=str(server.make_url('/v1beta'))
+        )
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        with patch.object(gemini_client, 'RATE_LIMIT_FILE', os.path.join(tmp_dir, 'rate_limits.json')):
+            client = gemini_client.GeminiClient(smart_config)
+        self.addAsyncCleanup(client.close)
+
+        sink = RecordingSink()
+        start = time.perf_counter()
+        with progress_scope(ProgressReporter(sink, flush_interval_seconds=60)):
+            text, model_used, _ = await client.generate_content('explain', model_name='flash')
+        finished = time.perf_counter()
+
+        self.assertEqual(text, ''.join(sections))
+        self.assertEqual(model_used, 'flash')
+        self.assertEqual(len(sink.notifications), 3)
+        self.assertIn('## Overview', sink.messages[0])
+        self.assertIn('## Recommendations', sink.messages[2])
+        first_output = sink.notifications[0][3] - start
+        self.assertLess(first_output, (finished - start) / 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+Tests for the write-behind rate limit state store
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.services.rate_limit_store import RateLimitStore, merge_entry
+
+TODAY = '2026-01-02'
+
+
+def _record_hits(path: str, hits: int):
+    """Worker process: record hits one flush at a time"""
+    store = RateLimitStore(path)
+    store.load()
+    for _ in range(hits):
+        entry = store.data.setdefault('flash', {'date': TODAY, 'rpd_hits': 0})
+        entry['rpd_hits'] += 1
+        store.mark_dirty()
+        store.flush()
+
+
+class TestMergeEntry(unittest.TestCase):
+    """Test three-way merge of one model's entry"""
+
+    def test_counters_add_both_sides(self):
+        """Test increments from both processes survive"""
+        base = {'date': TODAY, 'rpd_hits': 2, 'key_hits': {'0': 2}}
+        local = {'date': TODAY, 'rpd_hits': 5, 'key_hits': {'0': 4, '1': 1}}
+        other = {'date': TODAY, 'rpd_hits': 3, 'key_hits': {'0': 3}}
+
+        merged = merge_entry(base, local, other)
+
+        self.assertEqual(merged['rpd_hits'], 6)
+        self.assertEqual(merged['key_hits'], {'0': 5, '1': 1})
+
+    def test_unchanged_local_adopts_disk(self):
+        """Test a process that changed nothing takes the file's state"""
+        base = {'date': TODAY, 'blocked_until': None}
+        other = {'date': TODAY, 'blocked_until': '2026-01-02T10:00:00'}
+        self.assertEqual(merge_entry(base, dict(base), other), other)
+
+    def test_local_field_change_wins(self):
+        """Test fields this process changed override the file"""
+        base = {'date': TODAY, 'blocked_until': '2026-01-02T10:00:00'}
+        local = {'date': TODAY, 'blocked_until': None}
+        other = {'date': TODAY, 'blocked_until': '2026-01-02T10:00:00', 'rpd_hits': 1}
+
+        merged = merge_entry(base, local, other)
+
+        self.assertIsNone(merged['blocked_until'])
+        self.assertEqual(merged['rpd_hits'], 1)
+
+    def test_newer_day_wins(self):
+        """Test a day rollover replaces the stale day's counters"""
+        local = {'date': '2026-01-03', 'rpd_hits': 1}
+        other = {'date': TODAY, 'rpd_hits': 50}
+        self.assertEqual(merge_entry({'date': TODAY, 'rpd_hits': 40}, local, other), local)
+
+
+class TestRateLimitStore(unittest.IsolatedAsyncioTestCase):
+    """Test write-behind flushing and atomic snapshots"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'rate_limits.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    async def test_mark_dirty_writes_behind(self):
+        """Test updates reach disk after the flush interval, not synchronously"""
+        store = RateLimitStore(self.path, flush_interval_seconds=0.05)
+        store.load()
+        store.data['flash'] = {'date': TODAY, 'rpd_hits': 1}
+        store.mark_dirty()
+
+        self.assertFalse(os.path.exists(self.path))
+        await asyncio.sleep(0.2)
+
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)['flash']['rpd_hits'], 1)
+        self.assertEqual(store.stats['flushes'], 1)
+
+    async def test_burst_of_updates_is_one_write(self):
+        """Test many updates inside the interval coalesce into one snapshot"""
+        store = RateLimitStore(self.path, flush_interval_seconds=0.05)
+        store.load()
+        store.data['flash'] = {'date': TODAY, 'rpd_hits': 0}
+        for _ in range(100):
+            store.data['flash']['rpd_hits'] += 1
+            store.mark_dirty()
+        await store.aclose()
+
+        self.assertEqual(store.stats['flushes'], 1)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)['flash']['rpd_hits'], 100)
+
+    async def test_snapshot_leaves_no_temp_files(self):
+        """Test the atomic rename cleans up after itself"""
+        store = RateLimitStore(self.path)
+        store.load()
+        store.data['pro'] = {'date': TODAY, 'count': 0}
+        store.mark_dirty()
+        await store.aclose()
+
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ['rate_limits.json', 'rate_limits.json.lock'])
+
+    async def test_two_stores_merge_instead_of_clobbering(self):
+        """Test concurrent writers both keep their increments"""
+        first = RateLimitStore(self.path)
+        second = RateLimitStore(self.path)
+        first.load()
+        second.load()
+
+        first.data['flash'] = {'date': TODAY, 'rpd_hits': 3}
+        second.data['flash'] = {'date': TODAY, 'rpd_hits': 2}
+        second.data['pro'] = {'date': TODAY, 'rpd_hits': 1}
+        first.mark_dirty()
+        second.mark_dirty()
+        await first.aclose()
+        await second.aclose()
+
+        with open(self.path) as f:
+            data = json.load(f)
+        self.assertEqual(data['flash']['rpd_hits'], 5)
+        self.assertEqual(data['pro']['rpd_hits'], 1)
+        # The second store has adopted the merged view
+        self.assertEqual(second.data['flash']['rpd_hits'], 5)
+
+    def test_corrupted_file_loads_empty(self):
+        """Test a corrupted file doesn't break startup"""
+        with open(self.path, 'w') as f:
+            f.write('{"flash": ')
+        self.assertEqual(RateLimitStore(self.path).load(), {})
+
+    def test_concurrent_processes(self):
+        """Test separate processes flushing the same file lose no increments"""
+        ctx = multiprocessing.get_context('spawn')
+        workers = [ctx.Process(target=_record_hits, args=(self.path, 20)) for _ in range(3)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join(timeout=60)
+            self.assertEqual(p.exitcode, 0)
+
+        with open(self.path) as f:
+            self.assertEqual(json.load(f)['flash']['rpd_hits'], 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
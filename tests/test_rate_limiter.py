@@ -0,0 +1,142 @@
+"""
+Tests for proactive per-(key, model) admission control
+"""
+import asyncio
+import time
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.clients.key_pool import KeyPool
+from src.clients.rate_limiter import (
+    AdmissionController, ModelQuota, TokenBucket, build_model_quotas
+)
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test token bucket refill arithmetic"""
+
+    def test_wait_time_and_refill(self):
+        """Test an empty bucket reports the refill delay"""
+        bucket = TokenBucket(capacity=10, refill_per_second=2, now=0.0)
+        bucket.consume(10, now=0.0)
+
+        self.assertAlmostEqual(bucket.wait_time(1, now=0.0), 0.5)
+        self.assertEqual(bucket.wait_time(1, now=0.5), 0.0)
+        self.assertAlmostEqual(bucket.tokens, 1.0)
+
+    def test_refill_is_capped(self):
+        """Test tokens never exceed capacity"""
+        bucket = TokenBucket(capacity=5, refill_per_second=100, now=0.0)
+        bucket.wait_time(1, now=10.0)
+        self.assertEqual(bucket.tokens, 5)
+
+    def test_oversized_request_clamped_to_capacity(self):
+        """Test a request larger than the bucket waits for a full bucket, not forever"""
+        bucket = TokenBucket(capacity=100, refill_per_second=10, now=0.0)
+        self.assertEqual(bucket.wait_time(1_000, now=0.0), 0.0)
+        bucket.consume(1_000, now=0.0)
+        self.assertAlmostEqual(bucket.wait_time(1_000, now=0.0), 10.0)
+
+    def test_drain(self):
+        """Test drain empties the bucket"""
+        bucket = TokenBucket(capacity=5, refill_per_second=1, now=0.0)
+        bucket.drain(now=0.0)
+        self.assertAlmostEqual(bucket.wait_time(1, now=0.0), 1.0)
+
+
+class TestBuildModelQuotas(unittest.TestCase):
+    """Test quota tier resolution"""
+
+    def test_overrides_apply_per_field(self):
+        """Test overrides replace only the given limits"""
+        quotas = build_model_quotas('free', {'pro': {'rpm': 50}})
+        self.assertEqual(quotas['pro'].rpm, 50)
+        self.assertEqual(quotas['pro'].rpd, 100)
+        self.assertEqual(quotas['flash'].rpm, 10)
+
+    def test_unknown_tier(self):
+        """Test an unknown tier raises"""
+        with self.assertRaises(ValueError):
+            build_model_quotas('platinum')
+
+
+class TestAdmissionController(unittest.IsolatedAsyncioTestCase):
+    """Test admission queueing and rerouting"""
+
+    def _make_controller(self, keys=1, rpm=600, max_queue_seconds=1.0):
+        pool = KeyPool([f"key-{i}" for i in range(keys)])
+        quotas = {'flash': ModelQuota(rpm=rpm, tpm=10_000_000, rpd=100_000)}
+        return AdmissionController(pool, quotas, max_queue_seconds=max_queue_seconds)
+
+    async def test_burst_spreads_across_keys(self):
+        """Test a burst is admitted on both keys before any queueing"""
+        controller = self._make_controller(keys=2, rpm=600)
+
+        used = [(await controller.admit('flash', 100)).index for _ in range(1_200)]
+
+        self.assertEqual(used.count(0), 600)
+        self.assertEqual(used.count(1), 600)
+        self.assertEqual(controller.stats['queued'], 0)
+
+    async def test_exhausted_budget_queues_briefly(self):
+        """Test requests past the budget wait for refill instead of failing"""
+        controller = self._make_controller(rpm=600)
+        for _ in range(600):
+            await controller.admit('flash', 1)
+
+        start = time.perf_counter()
+        shard = await controller.admit('flash', 1)
+        waited = time.perf_counter() - start
+
+        self.assertIsNotNone(shard)
+        self.assertGreater(waited, 0.05)
+        self.assertLess(waited, 0.5)
+        self.assertEqual(controller.stats['queued'], 1)
+
+    async def test_reroute_when_wait_exceeds_queue_limit(self):
+        """Test None is returned when no key has budget soon enough"""
+        controller = self._make_controller(rpm=6, max_queue_seconds=0.5)
+        for _ in range(6):
+            self.assertIsNotNone(await controller.admit('flash', 1))
+
+        self.assertIsNone(await controller.admit('flash', 1))
+        self.assertIsNone(controller.try_admit('flash', 1))
+        self.assertEqual(controller.stats['rerouted'], 1)
+
+    async def test_rate_limit_drains_key(self):
+        """Test a 429 steers the next request to the other key"""
+        controller = self._make_controller(keys=2, rpm=600)
+        shard = await controller.admit('flash', 1)
+        controller.record_rate_limit(shard, 'flash')
+
+        other = await controller.admit('flash', 1)
+        self.assertNotEqual(other.index, shard.index)
+
+    async def test_unknown_model_is_not_limited(self):
+        """Test models without a quota pass straight through"""
+        controller = self._make_controller(rpm=1)
+        for _ in range(10):
+            self.assertIsNotNone(controller.try_admit('pro', 1))
+
+    async def test_concurrent_waiters_do_not_oversubscribe(self):
+        """Test concurrent admits never exceed the refilled budget"""
+        controller = self._make_controller(rpm=600, max_queue_seconds=2.0)
+        for _ in range(600):
+            await controller.admit('flash', 1)
+
+        start = time.perf_counter()
+        shards = await asyncio.gather(*[controller.admit('flash', 1) for _ in range(5)])
+        elapsed = time.perf_counter() - start
+
+        self.assertTrue(all(s is not None for s in shards))
+        # 10 requests/second refill -> the 5th waiter needs ~0.5s
+        self.assertGreater(elapsed, 0.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
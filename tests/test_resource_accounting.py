@@ -0,0 +1,151 @@
+"""
+Tests for cgroup- and process-aware CPU and memory accounting
+"""
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from src.services import resource_accounting
+from src.services.concurrency_governor import ConcurrencyGovernor
+from src.services.cpu_throttler import CPUThrottler
+from src.services.resource_accounting import ResourceAccounting, find_cgroup_dir
+
+
+class FakeCgroup:
+    """A cgroup v2 directory with writable controller files"""
+
+    def __init__(self, root):
+        self.dir = os.path.join(root, 'sys', 'fs', 'cgroup', 'app.slice')
+        os.makedirs(self.dir)
+        self.write('cgroup.controllers', 'cpu memory')
+
+    def write(self, name, contents):
+        with open(os.path.join(self.dir, name), 'w') as f:
+            f.write(contents)
+
+
+class TestResourceAccounting(unittest.TestCase):
+    """Test quota-relative CPU and cgroup memory readings"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, True)
+        self.cgroup = FakeCgroup(self.tmp_dir)
+
+    def test_find_cgroup_dir(self):
+        """Test the unified hierarchy entry resolves to our group's directory"""
+        proc_cgroup = os.path.join(self.tmp_dir, 'cgroup')
+        with open(proc_cgroup, 'w') as f:
+            f.write('0::/app.slice\n')
+        root = os.path.join(self.tmp_dir, 'sys', 'fs', 'cgroup')
+
+        self.assertEqual(find_cgroup_dir(root, proc_cgroup), self.cgroup.dir)
+
+        with open(proc_cgroup, 'w') as f:
+            f.write('4:memory:/docker/abc\n1:cpu:/\n')
+        self.assertIsNone(find_cgroup_dir(root, proc_cgroup))
+
+    def test_cpu_percent_is_relative_to_quota(self):
+        """Test usage is measured against cpu.max rather than host CPUs"""
+        self.cgroup.write('cpu.max', '50000 100000')
+        self.cgroup.write('cpu.stat', 'usage_usec 1000000\nthrottled_usec 0\n')
+        accounting = ResourceAccounting('auto', cgroup_dir=self.cgroup.dir)
+        self.assertEqual(accounting.mode, 'cgroup')
+        self.assertEqual(accounting.cpu_quota_cores(), 0.5)
+
+        with patch.object(resource_accounting.time, 'monotonic', return_value=100.0):
+            self.assertEqual(accounting.cpu_percent(), 0.0)
+        # 0.4s of CPU in 1s against a half-core quota
+        self.cgroup.write('cpu.stat', 'usage_usec 1400000\nthrottled_usec 0\n')
+        with patch.object(resource_accounting.time, 'monotonic', return_value=101.0):
+            self.assertAlmostEqual(accounting.cpu_percent(), 80.0)
+
+    def test_cgroup_throttling_counts_as_full_quota(self):
+        """Test time throttled by the cgroup reports 100% of quota"""
+        self.cgroup.write('cpu.max', '100000 100000')
+        self.cgroup.write('cpu.stat', 'usage_usec 0\nthrottled_usec 0\n')
+        accounting = ResourceAccounting('cgroup', cgroup_dir=self.cgroup.dir)
+
+        with patch.object(resource_accounting.time, 'monotonic', return_value=10.0):
+            accounting.cpu_percent()
+        self.cgroup.write('cpu.stat', 'usage_usec 100000\nthrottled_usec 5000\n')
+        with patch.object(resource_accounting.time, 'monotonic', return_value=11.0):
+            self.assertEqual(accounting.cpu_percent(), 100.0)
+        self.assertEqual(accounting.get_stats()['cgroup_throttled_samples'], 1)
+
+    def test_unlimited_quota_uses_usable_cpus(self):
+        """Test cpu.max 'max' falls back to the CPUs we may run on"""
+        self.cgroup.write('cpu.max', 'max 100000')
+        accounting = ResourceAccounting('cgroup', cgroup_dir=self.cgroup.dir)
+        self.assertEqual(accounting.cpu_quota_cores(), float(len(os.sched_getaffinity(0))))
+
+    def test_process_mode_measures_own_cpu_time(self):
+        """Test process accounting sees CPU burned by this process"""
+        accounting = ResourceAccounting('process', cgroup_dir='')
+        accounting.cpu_percent()
+        deadline = time.process_time() + 0.2
+        while time.process_time() < deadline:
+            pass
+        self.assertGreater(accounting.cpu_percent(), 0.0)
+
+    @patch('psutil.virtual_memory')
+    def test_memory_uses_cgroup_limit(self, mock_memory):
+        """Test memory is relative to memory.max, host-wide without a limit"""
+        mock_memory.return_value = Mock(percent=30.0)
+        self.cgroup.write('memory.current', '805306368')
+        self.cgroup.write('memory.max', '1073741824')
+        accounting = ResourceAccounting('cgroup', cgroup_dir=self.cgroup.dir)
+        self.assertEqual(accounting.memory_percent(), 75.0)
+
+        self.cgroup.write('memory.max', 'max')
+        self.assertEqual(accounting.memory_percent(), 30.0)
+
+    def test_invalid_mode(self):
+        """Test unknown modes are rejected"""
+        with self.assertRaises(ValueError):
+            ResourceAccounting('quantum')
+
+
+class TestAccountingConsumers(unittest.IsolatedAsyncioTestCase):
+    """Test the throttler and governor read the accounting, not host-wide psutil"""
+
+    async def test_throttler_uses_quota_relative_cpu(self):
+        """Test CPUThrottler throttles on quota-relative usage"""
+        throttler = CPUThrottler.get_instance()
+        saved = (throttler._throttle_active, throttler._last_cpu_check, throttler.resource_accounting)
+        self.addCleanup(lambda: setattr(throttler, '_throttle_active', saved[0]))
+        self.addCleanup(lambda: setattr(throttler, '_last_cpu_check', saved[1]))
+        self.addCleanup(lambda: setattr(throttler, 'resource_accounting', saved[2]))
+
+        throttler._throttle_active = False
+        throttler._last_cpu_check = 0
+        throttler.resource_accounting = Mock(cpu_percent=Mock(return_value=95.0))
+        throttler._operation_count = throttler.cpu_check_interval
+        throttler._last_yield_time = time.time()
+
+        self.assertTrue(await throttler.should_yield())
+        self.assertTrue(throttler._throttle_active)
+        self.assertEqual(throttler.get_throttling_stats()['pressure_reason'], 'cpu')
+
+    async def test_governor_reads_cgroup_memory(self):
+        """Test the governor backs off on cgroup memory pressure"""
+        accounting = Mock(memory_percent=Mock(return_value=92.0))
+        governor = ConcurrencyGovernor(initial_limit=4, decrease_factor=0.5, decrease_cooldown_seconds=0,
+                                       memory_high_percent=85, resource_accounting=accounting)
+        owner = await governor.acquire()
+        governor.release(owner, outcome=None)
+
+        self.assertEqual(governor.limit, 2)
+        self.assertEqual(governor.get_stats()['memory_percent'], 92.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
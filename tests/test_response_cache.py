@@ -0,0 +1,192 @@
+"""
+Tests for the persistent Gemini response cache
+"""
+import asyncio
+import multiprocessing
+import shutil
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.services.response_cache import ResponseCache, reset_response_cache
+
+
+def _write_entries(db_path: str, worker: int, count: int):
+    """Writer process for the multi-process sharing test"""
+    cache = ResponseCache(db_path)
+    for i in range(count):
+        cache.put(f"w{worker}-{i}", 'gemini-2.5-flash', {'text': f"{worker}:{i}"})
+    cache.close()
+
+
+class TestResponseCache(unittest.TestCase):
+    """Test ResponseCache storage, expiry and eviction"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'responses.sqlite3')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_round_trip(self):
+        """Test values survive a put/get and a reopen"""
+        cache = ResponseCache(self.db_path)
+        key = cache.make_key('gemini-2.5-flash', 'prompt')
+        cache.put(key, 'gemini-2.5-flash', {'text': 'answer', 'model_used': 'flash'})
+        cache.close()
+
+        reopened = ResponseCache(self.db_path)
+        self.assertEqual(reopened.get(key), {'text': 'answer', 'model_used': 'flash'})
+        self.assertIsNone(reopened.get('missing'))
+        self.assertEqual(reopened.stats['hits'], 1)
+        self.assertEqual(reopened.stats['misses'], 1)
+        reopened.close()
+
+    def test_key_depends_on_model_prompt_and_params(self):
+        """Test each key component changes the digest"""
+        base = ResponseCache.make_key('m', 'p', {'temperature': 0})
+        self.assertNotEqual(base, ResponseCache.make_key('m2', 'p', {'temperature': 0}))
+        self.assertNotEqual(base, ResponseCache.make_key('m', 'p2', {'temperature': 0}))
+        self.assertNotEqual(base, ResponseCache.make_key('m', 'p', {'temperature': 1}))
+        self.assertEqual(base, ResponseCache.make_key('m', 'p', {'temperature': 0}))
+
+    def test_values_are_compressed(self):
+        """Test repetitive payloads are stored compressed"""
+        cache = ResponseCache(self.db_path)
+        cache.put('k', 'm', {'text': 'x' * 100_000})
+        self.assertLess(cache.get_stats()['total_bytes'], 5_000)
+        cache.close()
+
+    def test_ttl_expiry(self):
+        """Test expired entries are misses and get deleted"""
+        cache = ResponseCache(self.db_path, ttl_seconds=60)
+        cache.put('k', 'm', {'text': 'old'})
+        with patch('src.services.response_cache.time.time', return_value=time.time() + 120):
+            self.assertIsNone(cache.get('k'))
+        self.assertEqual(cache.get_stats()['entries'], 0)
+        cache.close()
+
+    def test_lru_eviction_respects_byte_budget(self):
+        """Test least recently used entries are evicted first"""
+        cache = ResponseCache(self.db_path, max_bytes=4_000)
+        payload = {'text': os.urandom(600).hex()}
+        now = time.time()
+        for i in range(3):
+            with patch('src.services.response_cache.time.time', return_value=now + i):
+                cache.put(f"k{i}", 'm', payload)
+        # Touch k0 so k1 becomes least recently used
+        with patch('src.services.response_cache.time.time', return_value=now + 10):
+            cache.get('k0')
+        for i in range(3, 6):
+            with patch('src.services.response_cache.time.time', return_value=now + 10 + i):
+                cache.put(f"k{i}", 'm', payload)
+
+        stats = cache.get_stats()
+        self.assertLessEqual(stats['total_bytes'], 4_000)
+        self.assertGreater(stats['evictions'], 0)
+        self.assertIsNone(cache.get('k1'))
+        self.assertIsNotNone(cache.get('k5'))
+        cache.close()
+
+    def test_shared_between_processes(self):
+        """Test several processes can write the same store concurrently"""
+        ResponseCache(self.db_path).close()
+        ctx = multiprocessing.get_context('spawn')
+        workers = [ctx.Process(target=_write_entries, args=(self.db_path, w, 50)) for w in range(3)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join(timeout=60)
+            self.assertEqual(p.exitcode, 0)
+
+        cache = ResponseCache(self.db_path)
+        self.assertEqual(cache.get_stats()['entries'], 150)
+        self.assertEqual(cache.get('w2-49'), {'text': '2:49'})
+        cache.close()
+
+
+class TestGeminiClientResponseCache(unittest.IsolatedAsyncioTestCase):
+    """Test GeminiClient serves reruns from the response cache"""
+
+    async def _make_client(self, generate):
+        """GeminiClient with a fresh response cache, talking to a fake generateContent handler"""
+        from src.clients import gemini_client
+        from src.config import SmartToolsConfig
+
+        app = web.Application()
+        app.router.add_post('/v1beta/models/{model}:generateContent', generate)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        reset_response_cache()
+        self.addCleanup(reset_response_cache)
+        smart_config = SmartToolsConfig(
+            gemini_transport='http',
+            gemini_api_base_url=str(server.make_url('/v1beta')),
+            response_cache_path=os.path.join(tmp_dir, 'responses.sqlite3'),
+            enable_adaptive_timeouts=False
+        )
+        with patch.object(gemini_client, 'RATE_LIMIT_FILE', os.path.join(tmp_dir, 'rate_limits.json')):
+            client = gemini_client.GeminiClient(smart_config)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_rerun_skips_api(self):
+        """Test an unchanged prompt is answered from disk without an upstream call"""
+        upstream_calls = []
+
+        async def generate(request):
+            upstream_calls.append(request.match_info['model'])
+            await asyncio.sleep(0.2)
+            return web.json_response({'candidates': [{'content': {'parts': [{'text': 'analysis'}]}}]})
+
+        client = await self._make_client(generate)
+
+        first = await client.generate_content('review this code', model_name='flash')
+        start = time.perf_counter()
+        second = await client.generate_content('review this code', model_name='flash')
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(first, ('analysis', 'flash', 1))
+        self.assertEqual(second, ('analysis', 'flash', 0))
+        self.assertEqual(upstream_calls, ['gemini-2.5-flash'])
+        self.assertLess(elapsed, 0.1)
+        self.assertEqual(client.get_response_cache_stats()['hits'], 1)
+
+    async def test_fallback_answer_is_not_cached(self):
+        """Test an answer from a fallback model is not stored under the requested model"""
+        upstream_calls = []
+
+        async def generate(request):
+            model = request.match_info['model']
+            upstream_calls.append(model)
+            if model == 'gemini-2.5-flash':
+                return web.Response(status=400, text="Invalid argument")
+            return web.json_response({'candidates': [{'content': {'parts': [{'text': 'lite analysis'}]}}]})
+
+        client = await self._make_client(generate)
+
+        first = await client.generate_content('review this code', model_name='flash')
+        second = await client.generate_content('review this code', model_name='flash')
+
+        self.assertEqual(first[:2], ('lite analysis', 'flash-lite'))
+        self.assertGreater(second[2], 0)
+        self.assertEqual(upstream_calls.count('gemini-2.5-flash-lite'), 2)
+        self.assertEqual(client.get_response_cache_stats()['hits'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
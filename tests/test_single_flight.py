@@ -0,0 +1,172 @@
+"""
+Tests for single-flight coalescing of identical in-flight Gemini prompts
+"""
+import asyncio
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.clients.single_flight import SingleFlight, prompt_key
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    """Test SingleFlight sharing, errors and cancellation"""
+
+    async def test_concurrent_calls_share_one_execution(self):
+        """Test identical concurrent keys run the work once"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return 'result'
+
+        results = await asyncio.gather(*[flight.do('k', work) for _ in range(5)])
+
+        self.assertEqual(results, ['result'] * 5)
+        self.assertEqual(calls, 1)
+        self.assertEqual(flight.get_stats(), {'executions': 1, 'coalesced': 4, 'in_flight': 0})
+
+    async def test_different_keys_run_separately(self):
+        """Test distinct keys are not coalesced"""
+        flight = SingleFlight()
+
+        async def work(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(flight.do('a', lambda: work(1)), flight.do('b', lambda: work(2)))
+
+        self.assertEqual(results, [1, 2])
+        self.assertEqual(flight.stats['coalesced'], 0)
+
+    async def test_sequential_calls_are_not_cached(self):
+        """Test a finished call is not reused by later callers"""
+        flight = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        self.assertEqual(await flight.do('k', work), 1)
+        self.assertEqual(await flight.do('k', work), 2)
+
+    async def test_errors_propagate_to_all_waiters(self):
+        """Test every waiter sees the leader's exception"""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(*[flight.do('k', work) for _ in range(3)], return_exceptions=True)
+
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+        self.assertEqual(flight.in_flight(), 0)
+
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        """Test the shared call survives while other callers still wait"""
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        leader = asyncio.create_task(flight.do('k', work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do('k', work))
+        await asyncio.sleep(0)
+        leader.cancel()
+
+        self.assertEqual(await follower, 'done')
+        with self.assertRaises(asyncio.CancelledError):
+            await leader
+
+    async def test_last_waiter_cancellation_cancels_call(self):
+        """Test the upstream call is cancelled once nobody waits for it"""
+        flight = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        caller = asyncio.create_task(flight.do('k', work))
+        await started.wait()
+        caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    def test_prompt_key_includes_model(self):
+        """Test the key separates models and prompts"""
+        self.assertNotEqual(prompt_key('flash', 'p'), prompt_key('pro', 'p'))
+        self.assertNotEqual(prompt_key('flash', 'p'), prompt_key('flash', 'q'))
+        self.assertEqual(prompt_key('flash', 'p'), prompt_key('flash', 'p'))
+
+
+class TestGeminiClientCoalescing(unittest.IsolatedAsyncioTestCase):
+    """Test GeminiClient.generate_content coalesces identical prompts"""
+
+    async def test_identical_prompts_make_one_upstream_call(self):
+        """Test concurrent identical prompts reach the server once"""
+        from src.clients import gemini_client
+        from src.config import SmartToolsConfig
+
+        upstream_calls = []
+
+        async def generate(request):
+            body = await request.json()
+            upstream_calls.append(body['contents'][0]['parts'][0]['text'])
+            await asyncio.sleep(0.1)
+            return web.json_response({'candidates': [{'content': {'parts': [{'text': 'shared'}]}}]})
+
+        app = web.Application()
+        app.router.add_post('/v1beta/models/{model}:generateContent', generate)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+
+        smart_config = SmartToolsConfig(
+            gemini_transport='http',
+            enable_response_cache=False,
+            enable_adaptive_timeouts=False,
+            gemini_api_base_url=str(server.make_url('/v1beta'))
+        )
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        with patch.object(gemini_client, 'RATE_LIMIT_FILE', os.path.join(tmp_dir, 'rate_limits.json')):
+            client = gemini_client.GeminiClient(smart_config)
+        self.addAsyncCleanup(client.close)
+
+        results = await asyncio.gather(
+            *[client.generate_content('same prompt', model_name='flash') for _ in range(4)],
+            client.generate_content('other prompt', model_name='flash')
+        )
+
+        self.assertTrue(all(text == 'shared' for text, _, _ in results))
+        self.assertEqual(sorted(upstream_calls), ['other prompt', 'same prompt'])
+        stats = client.get_coalescing_stats()
+        self.assertEqual(stats['executions'], 2)
+        self.assertEqual(stats['coalesced'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+"""
+Tests for local token estimation and prompt budgeting before dispatch
+"""
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('GOOGLE_API_KEY', 'test-key-for-initialization')
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.clients.token_budget import PromptBudgeter, TokenEstimator, split_file_blocks
+
+
+def file_block(path: str, content: str) -> str:
+    """Same format engine_wrapper uses for collected files"""
+    return f"### File: {path}\n```\n{content}\n```\n"
+
+
+def corpus_prompt(files, instructions="Review the authentication flow for security issues."):
+    return "Analyze the following code:\n\n" + "\n\n".join(file_block(p, c) for p, c in files) + "\n" + instructions
+
+
+class TestTokenEstimator(unittest.TestCase):
+    """Test estimation and per-model calibration"""
+
+    def test_calibrates_towards_actual_ratio(self):
+        """Test recorded usage moves the chars-per-token ratio towards reality"""
+        estimator = TokenEstimator(smoothing=0.5)
+        text = 'x' * 2000
+        before = estimator.estimate(text, 'flash')
+        for _ in range(10):
+            estimator.record('flash', len(text), estimator.estimate(text, 'flash'), actual_tokens=1000)
+
+        self.assertLess(before, 1000)
+        self.assertAlmostEqual(estimator.estimate(text, 'flash'), 1000, delta=5)
+        # Other models keep their own calibration
+        self.assertEqual(estimator.estimate(text, 'pro'), before)
+
+    def test_stats_track_estimated_vs_actual(self):
+        """Test the per-request estimate error is reported"""
+        estimator = TokenEstimator()
+        estimator.record('flash', 400, 100, actual_tokens=125)
+
+        stats = estimator.get_stats()['flash']
+        self.assertEqual(stats['recent'], [(100, 125)])
+        self.assertEqual(stats['mean_abs_error_pct'], 20.0)
+
+    def test_missing_usage_does_not_calibrate(self):
+        """Test responses without usage metadata leave the estimate unchanged"""
+        estimator = TokenEstimator()
+        before = estimator.estimate('x' * 1000, 'flash')
+        estimator.record('flash', 1000, before, actual_tokens=None)
+        self.assertEqual(estimator.estimate('x' * 1000, 'flash'), before)
+
+    def test_latency_fit_separates_overhead_from_per_token_cost(self):
+        """Test latency samples over varied prompt sizes fit overhead plus throughput"""
+        estimator = TokenEstimator()
+        for tokens in range(1_000, 201_000, 10_000):
+            estimator.record('pro', tokens * 4, tokens, actual_tokens=tokens, elapsed_seconds=2.0 + tokens / 8_000)
+
+        stats = estimator.get_stats()['pro']
+        self.assertAlmostEqual(stats['prompt_tokens_per_second'], 8_000, delta=1)
+        self.assertAlmostEqual(stats['base_seconds'], 2.0, delta=0.01)
+        self.assertAlmostEqual(estimator.tokens_for_seconds(45, 'pro'), 344_000, delta=100)
+
+
+class TestPromptBudgeter(unittest.TestCase):
+    """Test tier changes, trimming and sharding"""
+
+    def test_small_prompt_is_unchanged(self):
+        """Test prompts within budget go out as-is"""
+        budgeter = PromptBudgeter(TokenEstimator(), max_prompt_tokens=1000)
+        plan = budgeter.plan('short prompt', 'pro')
+        self.assertEqual((plan.model_name, plan.prompts, plan.action), ('pro', ['short prompt'], 'none'))
+
+    def test_switches_to_faster_tier(self):
+        """Test a prompt too slow for pro moves to flash when flash fits"""
+        budgeter = PromptBudgeter(TokenEstimator(), max_prompt_tokens=1_000_000, latency_budget_seconds=10)
+        prompt = 'x' * int(100_000 * 3.6)  # ~100k tokens: pro budget 50k, flash 150k
+
+        plan = budgeter.plan(prompt, 'pro')
+
+        self.assertEqual(plan.model_name, 'flash')
+        self.assertEqual(plan.action, 'tier')
+        self.assertEqual(plan.prompts, [prompt])
+
+    def test_latency_budget_is_opt_in(self):
+        """Test the budget ignores latency unless a latency budget is configured"""
+        estimator = TokenEstimator()
+        budgeter = PromptBudgeter(estimator, max_prompt_tokens=400_000)
+        self.assertEqual(budgeter.budget_for('pro'), 400_000)
+
+    def test_budget_stable_across_small_fast_calls(self):
+        """Test many small calls dominated by fixed overhead don't collapse the pro budget"""
+        estimator = TokenEstimator()
+        budgeter = PromptBudgeter(estimator, max_prompt_tokens=1_000_000, latency_budget_seconds=45)
+        before = budgeter.budget_for('pro')
+
+        for i in range(500):
+            tokens = 500 + (i * 37) % 2_500
+            estimator.record('pro', tokens * 4, tokens, actual_tokens=tokens, elapsed_seconds=1.0 + (i * 53) % 20 / 10)
+
+        self.assertEqual(before, 225_000)
+        self.assertEqual(budgeter.budget_for('pro'), before)
+        self.assertEqual(budgeter.plan('x' * int(100_000 * 3.6), 'pro').action, 'none')
+
+    def test_split_file_blocks_keeps_instructions(self):
+        """Test head, file blocks and trailing instructions are separated"""
+        prompt = corpus_prompt([('a.py', 'print(1)'), ('b.py', 'print(2)')])
+        head, blocks, tail = split_file_blocks(prompt)
+
+        self.assertEqual(head, "Analyze the following code:\n\n")
+        self.assertEqual([p for p, _ in blocks], ['a.py', 'b.py'])
+        self.assertEqual(head + ''.join(b for _, b in blocks) + tail, prompt)
+        self.assertIn('authentication', tail)
+
+    def test_trim_drops_least_relevant_files(self):
+        """Test lock files and unrelated code go before files matching the request"""
+        filler = 'y = 1\n' * 3000
+        prompt = corpus_prompt([
+            ('src/auth.py', 'def authentication(): pass\n' + filler),
+            ('package-lock.json', filler),
+            ('src/colors.py', filler),
+        ])
+        budgeter = PromptBudgeter(TokenEstimator(), max_prompt_tokens=6000, allow_tier_change=False)
+
+        plan = budgeter.plan(prompt, 'flash')
+
+        self.assertEqual(plan.action, 'trim')
+        self.assertEqual(plan.omitted_files, ['package-lock.json', 'src/colors.py'])
+        self.assertIn('### File: src/auth.py', plan.prompts[0])
+        self.assertTrue(plan.prompts[0].endswith('security issues.'))
+        self.assertLessEqual(plan.estimated_tokens, 6000)
+
+    def test_shard_strategy_splits_files(self):
+        """Test each shard keeps the instructions and fits the budget"""
+        files = [(f'src/m{i}.py', 'z = 2\n' * 2000) for i in range(4)]
+        budgeter = PromptBudgeter(TokenEstimator(), max_prompt_tokens=7000,
+                                  strategy='shard', allow_tier_change=False)
+
+        plan = budgeter.plan(corpus_prompt(files), 'flash')
+
+        self.assertEqual(plan.action, 'shard')
+        self.assertEqual(len(plan.prompts), 2)
+        for shard in plan.prompts:
+            self.assertTrue(shard.startswith('Analyze the following code:'))
+            self.assertIn('security issues.', shard)
+            self.assertLessEqual(budgeter.estimator.estimate(shard, 'flash'), 7000)
+
+
+class TestGeminiClientBudget(unittest.IsolatedAsyncioTestCase):
+    """Test GeminiClient applies the budget and records actual usage"""
+
+    async def asyncSetUp(self):
+        from src.clients import gemini_client
+        from src.config import SmartToolsConfig
+
+        self.requests = []
+
+        async def generate(request):
+            body = await request.json()
+            text = body['contents'][0]['parts'][0]['text']
+            self.requests.append((request.match_info['model'], text))
+            return web.json_response({
+                'candidates': [{'content': {'parts': [{'text': f'analysis {len(self.requests)}'}]}}],
+                'usageMetadata': {'promptTokenCount': len(text) // 3}
+            })
+
+        app = web.Application()
+        app.router.add_post('/v1beta/models/{model}:generateContent', generate)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+
+        smart_config = SmartToolsConfig(
+            gemini_transport='http',
+            enable_response_cache=False,
+            enable_adaptive_timeouts=False,
+            gemini_api_base_url=str(server.make_url('/v1beta')),
+            max_prompt_tokens=7000,
+            prompt_budget_strategy='shard'
+        )
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir, True)
+        with patch.object(gemini_client, 'RATE_LIMIT_FILE', os.path.join(tmp_dir, 'rate_limits.json')):
+            self.client = gemini_client.GeminiClient(smart_config)
+        self.addAsyncCleanup(self.client.close)
+
+    async def test_records_estimated_and_actual_tokens(self):
+        """Test usage metadata from each response calibrates the estimator"""
+        prompt = 'q' * 3000
+        await self.client.generate_content(prompt, model_name='flash')
+
+        stats = self.client.get_token_budget_stats()['models']['flash']
+        self.assertEqual(stats['samples'], 1)
+        self.assertEqual(stats['recent'], [(int(3000 / 3.6), 1000)])
+
+    async def test_oversized_corpus_is_sharded(self):
+        """Test an oversized file corpus becomes several budget-sized requests"""
+        files = [(f'src/m{i}.py', 'z = 2\n' * 2000) for i in range(4)]
+        text, model_used, _ = await self.client.generate_content(corpus_prompt(files), model_name='flash')
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertIn('## Part 1 of 2', text)
+        self.assertIn('## Part 2 of 2', text)
+        self.assertEqual(model_used, 'flash')
+        self.assertEqual(self.client.get_token_budget_stats()['sharded'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()